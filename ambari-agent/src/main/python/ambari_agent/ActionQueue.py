@@ -30,6 +30,7 @@ import time
 from AgentException import AgentException
 from LiveStatus import LiveStatus
 from ActualConfigHandler import ActualConfigHandler
+from CommandQueue import CommandQueue
 from CommandStatusDict import CommandStatusDict
 from CustomServiceOrchestrator import CustomServiceOrchestrator
 from ambari_agent.BackgroundCommandExecutionHandle import BackgroundCommandExecutionHandle
@@ -44,13 +45,14 @@ class ActionQueue(threading.Thread):
   Note: Action and command terms in this and related classes are used interchangeably
   """
 
-  # How many actions can be performed in parallel. Feel free to change
+  # How many actions can be performed in parallel by default, see parallel_execution_max_actions
   MAX_CONCURRENT_ACTIONS = 5
 
-
-  #How much time(in seconds) we need wait for new incoming execution command before checking
-  #status command queue
-  EXECUTION_COMMAND_WAIT_TIME = 2
+  # Queue lanes, a lower value is served first. Status and background commands are
+  # taken before the execution commands, which keep the order they were sent in
+  STATUS_COMMAND_PRIORITY = 0
+  BACKGROUND_COMMAND_PRIORITY = 1
+  EXECUTION_COMMAND_PRIORITY = 2
 
   STATUS_COMMAND = 'STATUS_COMMAND'
   EXECUTION_COMMAND = 'EXECUTION_COMMAND'
@@ -68,9 +70,10 @@ class ActionQueue(threading.Thread):
 
   def __init__(self, config, controller):
     super(ActionQueue, self).__init__()
-    self.commandQueue = Queue.Queue()
-    self.statusCommandQueue = Queue.Queue()
-    self.backgroundCommandQueue = Queue.Queue()
+    self.commandQueue = CommandQueue([self.STATUS_COMMAND_PRIORITY,
+                                      self.BACKGROUND_COMMAND_PRIORITY,
+                                      self.EXECUTION_COMMAND_PRIORITY],
+                                     key=lambda command: command.get('taskId'))
     self.commandStatuses = CommandStatusDict(callback_action =
       self.status_update_callback)
     self.config = config
@@ -80,24 +83,33 @@ class ActionQueue(threading.Thread):
     self.tmpdir = config.get('agent', 'prefix')
     self.customServiceOrchestrator = CustomServiceOrchestrator(config, controller)
     self.parallel_execution = config.get_parallel_exec_option()
+    self.max_parallel_actions = 1
     if self.parallel_execution == 1:
-      logger.info("Parallel execution is enabled, will start Agent commands in parallel")
+      self.max_parallel_actions = config.get_parallel_exec_max_actions()
+      logger.info("Parallel execution is enabled, will run up to {0} Agent commands in parallel".format(
+        self.max_parallel_actions))
+    self.workers = []
+    self.metricsLock = threading.Lock()
+    self.runningCommands = 0
+    self.reset_metrics()
 
   def stop(self):
     self._stop.set()
+    # wake up the threads waiting for commands
+    self.commandQueue.close()
 
   def stopped(self):
     return self._stop.isSet()
 
   def put_status(self, commands):
     #Was supposed that we got all set of statuses, we don't need to keep old ones
-    self.statusCommandQueue.queue.clear()
+    self.commandQueue.clear([self.STATUS_COMMAND_PRIORITY])
 
     for command in commands:
       logger.info("Adding " + command['commandType'] + " for service " + \
                   command['serviceName'] + " of cluster " + \
                   command['clusterName'] + " to the queue.")
-      self.statusCommandQueue.put(command)
+      self.commandQueue.put(command, self.STATUS_COMMAND_PRIORITY)
 
   def put(self, commands):
     for command in commands:
@@ -111,9 +123,9 @@ class ActionQueue(threading.Thread):
                   command['serviceName'] + " of cluster " + \
                   command['clusterName'] + " to the queue.")
       if command['commandType'] == self.BACKGROUND_EXECUTION_COMMAND :
-        self.backgroundCommandQueue.put(self.createCommandHandle(command))
+        self.commandQueue.put(self.createCommandHandle(command), self.BACKGROUND_COMMAND_PRIORITY)
       else:
-        self.commandQueue.put(command)
+        self.commandQueue.put(command, self.EXECUTION_COMMAND_PRIORITY)
 
   def cancel(self, commands):
     for command in commands:
@@ -125,60 +137,96 @@ class ActionQueue(threading.Thread):
       reason = command['reason']
 
       # Remove from the command queue by task_id
-      queue = self.commandQueue
-      self.commandQueue = Queue.Queue()
-
-      while not queue.empty():
-        queued_command = queue.get(False)
-        if queued_command['task_id'] != task_id:
-          self.commandQueue.put(queued_command)
-        else:
-          logger.info("Canceling " + queued_command['commandType'] + \
-                      " for service " + queued_command['serviceName'] + \
-                      " of cluster " +  queued_command['clusterName'] + \
-                      " to the queue.")
+      for queued_command in self.commandQueue.remove(task_id, [self.EXECUTION_COMMAND_PRIORITY]):
+        logger.info("Canceling " + queued_command['commandType'] + \
+                    " for service " + queued_command['serviceName'] + \
+                    " of cluster " +  queued_command['clusterName'] + \
+                    " to the queue.")
 
       # Kill if in progress
       self.customServiceOrchestrator.cancel_command(task_id, reason)
 
   def run(self):
+    if self.parallel_execution == 1:
+      # execution commands are run by the workers, this thread serves the other lanes
+      self.start_workers()
+      priorities = [self.STATUS_COMMAND_PRIORITY, self.BACKGROUND_COMMAND_PRIORITY]
+    else:
+      priorities = None
+    self.take_commands(priorities)
+
+  def start_workers(self):
+    for i in range(self.max_parallel_actions):
+      worker = threading.Thread(target=self.take_commands, args=([self.EXECUTION_COMMAND_PRIORITY],),
+                                name="ActionQueueWorker-{0}".format(i))
+      worker.daemon = True
+      worker.start()
+      self.workers.append(worker)
+
+  def take_commands(self, priorities):
+    """
+    Waits for the commands of the given lanes and processes them until the queue is stopped
+    """
     while not self.stopped():
-      self.processBackgroundQueueSafeEmpty();
-      self.processStatusCommandQueueSafeEmpty();
-      try:
-        if self.parallel_execution == 0:
-          command = self.commandQueue.get(True, self.EXECUTION_COMMAND_WAIT_TIME)
-          self.process_command(command)
-        else:
-          # If parallel execution is enabled, just kick off all available
-          # commands using separate threads
-          while (True):
-            command = self.commandQueue.get(True, self.EXECUTION_COMMAND_WAIT_TIME)
-            logger.info("Kicking off a thread for the command, id=" +
-                        str(command['commandId']) + " taskId=" + str(command['taskId']))
-            t = threading.Thread(target=self.process_command, args=(command,))
-            t.daemon = True
-            t.start()
-      except (Queue.Empty):
-        pass
-
-  def processBackgroundQueueSafeEmpty(self):
-    while not self.backgroundCommandQueue.empty():
       try:
-        command = self.backgroundCommandQueue.get(False)
-        if(command.has_key('__handle') and command['__handle'].status == None):
-          self.process_command(command)
-      except (Queue.Empty):
-        pass
-
-  def processStatusCommandQueueSafeEmpty(self):
-    while not self.statusCommandQueue.empty():
+        command, wait_time = self.commandQueue.get(priorities=priorities)
+      except Queue.Empty:
+        continue
+      self.process_queued_command(command, wait_time)
+
+  def process_queued_command(self, command, wait_time):
+    commandType = command['commandType']
+    if commandType == self.BACKGROUND_EXECUTION_COMMAND:
+      if command.has_key('__handle') and command['__handle'].status == None:
+        self.process_command(command)
+    elif commandType == self.STATUS_COMMAND:
+      self.process_command(command)
+    else:
+      with self.metricsLock:
+        self.runningCommands += 1
+      start_time = time.time()
       try:
-        command = self.statusCommandQueue.get(False)
         self.process_command(command)
-      except (Queue.Empty):
-        pass
-
+      finally:
+        run_time = time.time() - start_time
+        with self.metricsLock:
+          self.runningCommands -= 1
+          self.metrics['completedCommands'] += 1
+          self.metrics['totalWaitTime'] += wait_time
+          self.metrics['maxWaitTime'] = max(self.metrics['maxWaitTime'], wait_time)
+          self.metrics['totalRunTime'] += run_time
+          self.metrics['maxRunTime'] = max(self.metrics['maxRunTime'], run_time)
+
+  def reset_metrics(self):
+    self.metrics = {
+      'completedCommands': 0,
+      'totalWaitTime': 0,
+      'maxWaitTime': 0,
+      'totalRunTime': 0,
+      'maxRunTime': 0,
+    }
+
+  def get_metrics(self):
+    """
+    Returns the state of the queue and the wait and run times (in ms) of the
+    execution commands completed since the previous call
+    """
+    with self.metricsLock:
+      metrics = self.metrics
+      self.reset_metrics()
+      running = self.runningCommands
+    completed = metrics['completedCommands']
+    return {
+      'queuedCommands': self.commandQueue.qsize([self.EXECUTION_COMMAND_PRIORITY]),
+      'queuedStatusCommands': self.commandQueue.qsize([self.STATUS_COMMAND_PRIORITY]),
+      'runningCommands': running,
+      'maxParallelCommands': self.max_parallel_actions,
+      'completedCommands': completed,
+      'averageWaitTime': int(metrics['totalWaitTime'] * 1000 / completed) if completed else 0,
+      'maxWaitTime': int(metrics['maxWaitTime'] * 1000),
+      'averageRunTime': int(metrics['totalRunTime'] * 1000 / completed) if completed else 0,
+      'maxRunTime': int(metrics['maxRunTime'] * 1000),
+    }
 
   def createCommandHandle(self, command):
     if(command.has_key('__handle')):
@@ -210,13 +258,16 @@ class ActionQueue(threading.Thread):
 
   def tasks_in_progress_or_pending(self):
     return_val = False
-    if not self.commandQueue.empty():
+    if self.execution_commands_pending():
       return_val = True
     if self.controller.recovery_manager.has_active_command():
       return_val = True
     return return_val
     pass
 
+  def execution_commands_pending(self):
+    return not self.commandQueue.empty([self.EXECUTION_COMMAND_PRIORITY])
+
   def execute_command(self, command):
     '''
     Executes commands of type EXECUTION_COMMAND
@@ -495,6 +546,4 @@ class ActionQueue(threading.Thread):
 
   # Removes all commands from the queue
   def reset(self):
-    queue = self.commandQueue
-    with queue.mutex:
-      queue.queue.clear()
+    self.commandQueue.clear([self.EXECUTION_COMMAND_PRIORITY])
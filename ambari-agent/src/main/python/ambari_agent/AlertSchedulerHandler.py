@@ -22,12 +22,16 @@ limitations under the License.
 http://apscheduler.readthedocs.org/en/v2.1.2
 """
 import ambari_simplejson as json
+import hashlib
 import logging
 import os
 import sys
+import threading
 import time
 
+from datetime import datetime, timedelta
 from apscheduler.scheduler import Scheduler
+from apscheduler.threadpool import ThreadPool
 from alerts.collector import AlertCollector
 from alerts.metric_alert import MetricAlert
 from alerts.port_alert import PortAlert
@@ -45,6 +49,11 @@ class AlertSchedulerHandler():
   TYPE_WEB = 'WEB'
   TYPE_RECOVERY = 'RECOVERY'
 
+  # alerts of every type run in their own thread pool, so that slow script
+  # alerts do not delay the others; other types share the default pool
+  THREAD_POOL_SIZES = {TYPE_PORT: 2, TYPE_WEB: 2, TYPE_METRIC: 2, TYPE_SCRIPT: 3}
+  DEFAULT_THREAD_POOL_SIZE = 1
+
   def __init__(self, cachedir, stacks_dir, common_services_dir, host_scripts_dir,
       alert_grace_period, cluster_configuration, config, recovery_manager,
       in_minutes=True):
@@ -71,6 +80,7 @@ class AlertSchedulerHandler():
 
     self._collector = AlertCollector()
     self.__scheduler = Scheduler(self.APS_CONFIG)
+    self.__thread_pools = self.__create_thread_pools()
     self.__in_minutes = in_minutes
     self.config = config
     self.recovery_manger = recovery_manager
@@ -109,14 +119,57 @@ class AlertSchedulerHandler():
 
     # write out the new definitions
     with open(os.path.join(self.cachedir, self.FILENAME), 'w') as f:
-      json.dump(alert_definitions, f, indent=2)
+      json.dump(alert_definitions, f, separators=(',', ':'))
 
     # reschedule only the jobs that have changed
-    self.reschedule()
+    self.reschedule(alert_definitions)
 
 
   def __make_function(self, alert_def):
-    return lambda: alert_def.collect()
+    """
+    Makes the job of the definition, which only hands the alert over to the
+    thread pool of its type. A run which is due while the previous one is
+    still in progress is skipped and reported as an overrun.
+    """
+    thread_pool = self.__get_thread_pool(alert_def)
+    running = threading.Lock()
+
+    def collect():
+      try:
+        alert_def.collect()
+      finally:
+        running.release()
+
+    def submit():
+      if not running.acquire(False):
+        logger.warning("[AlertScheduler] The alert {0} is still running, skipping its next run".format(
+          alert_def.get_name()))
+        self._collector.record_overrun(alert_def.get_uuid())
+        return
+
+      try:
+        thread_pool.submit(collect)
+      except:
+        running.release()
+        raise
+
+    return submit
+
+
+  def __create_thread_pools(self):
+    thread_pools = {}
+    for alert_type, size in self.THREAD_POOL_SIZES.iteritems():
+      thread_pools[alert_type] = ThreadPool(core_threads=size, max_threads=size)
+    thread_pools[None] = ThreadPool(core_threads=self.DEFAULT_THREAD_POOL_SIZE,
+      max_threads=self.DEFAULT_THREAD_POOL_SIZE)
+    return thread_pools
+
+
+  def __get_thread_pool(self, alert_def):
+    alert_type = alert_def.alert_source_meta.get('type')
+    if alert_type in self.__thread_pools:
+      return self.__thread_pools[alert_type]
+    return self.__thread_pools[None]
 
 
   def start(self):
@@ -146,49 +199,52 @@ class AlertSchedulerHandler():
       self.__scheduler.shutdown(wait=False)
       self.__scheduler = Scheduler(self.APS_CONFIG)
 
+      for thread_pool in self.__thread_pools.values():
+        thread_pool.shutdown(wait=False)
+      self.__thread_pools = self.__create_thread_pools()
+
     logger.info("[AlertScheduler] Stopped the alert scheduler.")
 
-  def reschedule(self):
+  def reschedule(self, commands=None):
     """
     Removes jobs that are scheduled where their UUID no longer is valid.
     Schedules jobs where the definition UUID is not currently scheduled.
+    The UUID of a definition changes with its content, so only the changed
+    definitions are converted and scheduled again.
+    :param commands: the alert definition commands, loaded from the
+    definitions file if not specified
     """
     jobs_scheduled = 0
     jobs_removed = 0
 
-    definitions = self.__load_definitions()
+    if commands is None:
+      commands = self.__load_commands()
+
+    json_definitions = self.__get_json_definitions(commands)
+    definition_uuids = set(json_definition.get('uuid') for _, _, json_definition in json_definitions)
     scheduled_jobs = self.__scheduler.get_jobs()
+    scheduled_uuids = set(scheduled_job.name for scheduled_job in scheduled_jobs)
 
-    # for every scheduled job, see if its UUID is still valid
+    # jobs without valid UUIDs should be unscheduled
     for scheduled_job in scheduled_jobs:
-      uuid_valid = False
-
-      for definition in definitions:
-        definition_uuid = definition.get_uuid()
-        if scheduled_job.name == definition_uuid:
-          uuid_valid = True
-          break
-
-      # jobs without valid UUIDs should be unscheduled
-      if uuid_valid == False:
+      if scheduled_job.name not in definition_uuids:
         jobs_removed += 1
         logger.info("[AlertScheduler] Unscheduling {0}".format(scheduled_job.name))
         self._collector.remove_by_uuid(scheduled_job.name)
         self.__scheduler.unschedule_job(scheduled_job)
 
-    # for every definition, determine if there is a scheduled job
-    for definition in definitions:
-      definition_scheduled = False
-      for scheduled_job in scheduled_jobs:
-        definition_uuid = definition.get_uuid()
-        if definition_uuid == scheduled_job.name:
-          definition_scheduled = True
-          break
-
-      # if no jobs are found with the definitions UUID, schedule it
-      if definition_scheduled == False:
-        jobs_scheduled += 1
-        self.schedule_definition(definition)
+    # if no jobs are found with the definitions UUID, schedule it
+    for clusterName, hostName, json_definition in json_definitions:
+      if json_definition.get('uuid') in scheduled_uuids:
+        continue
+
+      definition = self.__json_to_callable(clusterName, hostName, json_definition)
+      if definition is None:
+        continue
+
+      definition.set_helpers(self._collector, self._cluster_configuration)
+      jobs_scheduled += 1
+      self.schedule_definition(definition)
 
     logger.info("[AlertScheduler] Reschedule Summary: {0} rescheduled, {1} unscheduled".format(
         str(jobs_scheduled), str(jobs_removed)))
@@ -234,30 +290,47 @@ class AlertSchedulerHandler():
     """
     definitions = []
 
-    all_commands = None
+    for clusterName, hostName, json_definition in self.__get_json_definitions(self.__load_commands()):
+      alert = self.__json_to_callable(clusterName, hostName, json_definition)
+
+      if alert is None:
+        continue
+
+      alert.set_helpers(self._collector, self._cluster_configuration)
+
+      definitions.append(alert)
+
+    return definitions
+
+
+  def __load_commands(self):
+    """
+    Loads the alert definition commands of all clusters from the file.
+    :return:
+    """
     alerts_definitions_path = os.path.join(self.cachedir, self.FILENAME)
     try:
       with open(alerts_definitions_path) as fp:
-        all_commands = json.load(fp)
+        return json.load(fp)
     except:
       logger.warning('[AlertScheduler] {0} not found or invalid. No alerts will be scheduled until registration occurs.'.format(alerts_definitions_path))
-      return definitions
+      return []
 
-    for command_json in all_commands:
+
+  def __get_json_definitions(self, commands):
+    """
+    Gets the (cluster name, host name, definition json) of every definition
+    in the alert definition commands.
+    """
+    json_definitions = []
+    for command_json in commands:
       clusterName = '' if not 'clusterName' in command_json else command_json['clusterName']
       hostName = '' if not 'hostName' in command_json else command_json['hostName']
 
       for definition in command_json['alertDefinitions']:
-        alert = self.__json_to_callable(clusterName, hostName, definition)
+        json_definitions.append((clusterName, hostName, definition))
 
-        if alert is None:
-          continue
-
-        alert.set_helpers(self._collector, self._cluster_configuration)
-
-        definitions.append(alert)
-
-    return definitions
+    return json_definitions
 
 
   def __json_to_callable(self, clusterName, hostName, json_definition):
@@ -314,12 +387,12 @@ class AlertSchedulerHandler():
 
     job = None
 
+    interval = definition.interval()
     if self.__in_minutes:
-      job = self.__scheduler.add_interval_job(self.__make_function(definition),
-        minutes=definition.interval())
-    else:
-      job = self.__scheduler.add_interval_job(self.__make_function(definition),
-        seconds=definition.interval())
+      interval = interval * 60
+
+    job = self.__scheduler.add_interval_job(self.__make_function(definition),
+      seconds=interval, start_date=datetime.now() + timedelta(seconds=self.get_offset(definition, interval)))
 
     # although the documentation states that Job(kwargs) takes a name
     # key/value pair, it does not actually set the name; do it manually
@@ -330,6 +403,16 @@ class AlertSchedulerHandler():
       definition.get_name(), definition.get_uuid()))
 
 
+  def get_offset(self, definition, interval):
+    """
+    Gets the delay of the first run of the definition, so that the runs of the
+    alerts are spread over their interval instead of all starting at once.
+    The delay is the same for a definition on the same host across restarts.
+    """
+    key = u"{0}/{1}".format(definition.host_name, definition.get_name())
+    return int(hashlib.md5(key.encode('utf-8')).hexdigest(), 16) % max(int(interval), 1)
+
+
   def get_job_count(self):
     """
     Gets the number of jobs currently scheduled. This is mainly used for
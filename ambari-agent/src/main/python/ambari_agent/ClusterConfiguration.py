@@ -21,18 +21,41 @@ limitations under the License.
 import logging
 import ambari_simplejson as json
 import os
+import tempfile
 import threading
 
 logger = logging.getLogger(__name__)
 
+class ConfigurationSnapshot():
+  """
+  Immutable version of the configurations of all clusters. Lookups resolved
+  against a snapshot are cached in it, the cache goes away with the snapshot.
+  """
+
+  def __init__(self, version, configurations):
+    self.version = version
+    # keys are cluster names, values are configurations
+    self.configurations = configurations
+    # (cluster name, key) -> value
+    self.values = {}
+
+
 class ClusterConfiguration():
   """
   Maintains an in-memory cache and disk cache of the configurations for
   every cluster. This is useful for having quick access to any of the
   configuration properties.
+
+  Updates replace the current snapshot of the configurations with a new one
+  (copy-on-write), so readers never take a lock. On disk the configurations
+  are kept as a snapshot file, and a journal where every update is appended
+  as a single line. The journal is compacted into the snapshot file once it
+  holds COMPACTION_THRESHOLD updates.
   """
 
   FILENAME = 'configurations.json'
+  JOURNAL_FILENAME = 'configurations.journal'
+  COMPACTION_THRESHOLD = 20
 
   # constants that define which commands hold configurations that can be
   # used to populate this cache
@@ -40,6 +63,9 @@ class ClusterConfiguration():
   ALERT_DEFINITION_COMMANDS = 'alertDefinitionCommands'
   COMMANDS_WITH_CONFIGURATIONS = [EXECUTION_COMMANDS, ALERT_DEFINITION_COMMANDS]
 
+  # 'foo-bar/baz' -> ('foo-bar', 'baz'), shared by all the snapshots
+  _key_paths = {}
+
   def __init__(self, cluster_config_cache_dir):
     """
     Initializes the configuration cache.
@@ -48,12 +74,13 @@ class ClusterConfiguration():
     """
     self.cluster_config_cache_dir = cluster_config_cache_dir
 
-    # keys are cluster names, values are configurations
-    self.__configurations = {}
+    self.__snapshot = ConfigurationSnapshot(0, {})
+    self.__journal_entries = 0
 
-    self.__file_lock = threading.RLock()
-    self.__cache_lock = threading.RLock()
+    # serializes the updates, reads are lock-free
+    self.__update_lock = threading.RLock()
     self.__config_json_file = os.path.join(self.cluster_config_cache_dir, self.FILENAME)
+    self.__journal_file = os.path.join(self.cluster_config_cache_dir, self.JOURNAL_FILENAME)
 
     # ensure that our cache directory exists
     if not os.path.exists(cluster_config_cache_dir):
@@ -62,14 +89,48 @@ class ClusterConfiguration():
       except:
         logger.critical("Could not create the cluster configuration cache directory {0}".format(cluster_config_cache_dir))
 
-    # if the file exists, then load it
+    # if the files exist, then load them
+    configurations = {}
     try:
       if os.path.isfile(self.__config_json_file):
         with open(self.__config_json_file, 'r') as fp:
-          self.__configurations = json.load(fp)
+          configurations = json.load(fp)
     except Exception, exception:
       logger.warning("Unable to load configurations from {0}. This file will be regenerated on registration".format(self.__config_json_file))
 
+    try:
+      if os.path.isfile(self.__journal_file):
+        self._load_journal(configurations)
+    except Exception, exception:
+      logger.warning("Unable to load the updates from {0}".format(self.__journal_file))
+
+    self.__snapshot = ConfigurationSnapshot(self.__journal_entries, configurations)
+
+
+  def _load_journal(self, configurations):
+    """
+    Applies the journal to the configurations. The last update may be partially
+    written, the journal is truncated after the last complete update so that
+    the next updates are not appended to a torn line.
+    """
+    with open(self.__journal_file, 'r+') as fp:
+      good_offset = 0
+      while True:
+        line = fp.readline()
+        if not line:
+          return
+        try:
+          if not line.endswith('\n'):
+            raise ValueError("incomplete line")
+          entry = json.loads(line)
+          configurations[entry['clusterName']] = entry['configurations']
+        except Exception, exception:
+          logger.warning("Unable to load all updates from {0}, loaded {1}".format(self.__journal_file, self.__journal_entries))
+          fp.truncate(good_offset)
+          return
+        self.__journal_entries += 1
+        good_offset = fp.tell()
+
 
   def update_configurations_from_heartbeat(self, heartbeat):
     """
@@ -120,25 +181,51 @@ class ClusterConfiguration():
     :param configuration:
     :return:
     """
-    logger.info("Updating cached configurations for cluster {0}".format(cluster_name))
+    with self.__update_lock:
+      snapshot = self.__snapshot
+      # execution commands of the same heartbeat usually carry the same configurations
+      if snapshot.configurations.get(cluster_name) == configuration:
+        return
 
-    self.__cache_lock.acquire()
-    try:
-      self.__configurations[cluster_name] = configuration
-    except Exception, exception :
-      logger.exception("Unable to update configurations for cluster {0}".format(cluster_name))
-    finally:
-      self.__cache_lock.release()
+      logger.info("Updating cached configurations for cluster {0}".format(cluster_name))
+
+      configurations = dict(snapshot.configurations)
+      configurations[cluster_name] = configuration
+      self.__snapshot = ConfigurationSnapshot(snapshot.version + 1, configurations)
+
+      try:
+        if self.__journal_entries + 1 >= self.COMPACTION_THRESHOLD:
+          self._compact(configurations)
+        else:
+          self._append_to_journal(cluster_name, configuration)
+      except Exception, exception :
+        logger.exception("Unable to update configurations for cluster {0}".format(cluster_name))
+
+
+  def _append_to_journal(self, cluster_name, configuration):
+    line = json.dumps({'clusterName': cluster_name, 'configurations': configuration}, separators=(',', ':'))
+    with open(self.__journal_file, 'a') as f:
+      f.write(line + '\n')
+    self.__journal_entries += 1
 
 
-    self.__file_lock.acquire()
+  def _compact(self, configurations):
+    """
+    Atomically replaces the snapshot file with the given configurations and
+    truncates the journal
+    """
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + self.FILENAME, dir=self.cluster_config_cache_dir)
     try:
-      with open(self.__config_json_file, 'w') as f:
-        json.dump(self.__configurations, f, indent=2)
-    except Exception, exception :
-      logger.exception("Unable to update configurations for cluster {0}".format(cluster_name))
-    finally:
-      self.__file_lock.release()
+      with os.fdopen(fd, 'w') as f:
+        json.dump(configurations, f, separators=(',', ':'))
+      os.rename(tmp_path, self.__config_json_file)
+    except:
+      os.remove(tmp_path)
+      raise
+
+    # a crash right here replays the journal over the new snapshot, which is harmless
+    open(self.__journal_file, 'w').close()
+    self.__journal_entries = 0
 
 
   def get_configuration_value(self, cluster_name, key):
@@ -149,16 +236,23 @@ class ClusterConfiguration():
     :param key:  a lookup key, like 'foo-bar/baz'
     :return: the value, or None if not found
     """
-    self.__cache_lock.acquire()
+    snapshot = self.__snapshot
     try:
-      dictionary = self.__configurations[cluster_name]
-      for layer_key in key.split('/'):
-        dictionary = dictionary[layer_key]
+      return snapshot.values[(cluster_name, key)]
+    except KeyError:
+      pass
 
-      return dictionary
+    path = self._key_paths.get(key)
+    if path is None:
+      path = self._key_paths[key] = tuple(key.split('/'))
 
+    try:
+      dictionary = snapshot.configurations[cluster_name]
+      for layer_key in path:
+        dictionary = dictionary[layer_key]
     except Exception:
       logger.debug("Cache miss for configuration property {0} in cluster {1}".format(key, cluster_name))
-      return None
-    finally:
-      self.__cache_lock.release()
+      dictionary = None
+
+    snapshot.values[(cluster_name, key)] = dictionary
+    return dictionary
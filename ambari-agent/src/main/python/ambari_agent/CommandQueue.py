@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+
+'''
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+import collections
+import threading
+import time
+from Queue import Empty
+
+class QueueEntry():
+  __slots__ = ['command', 'priority', 'key', 'queued_at', 'removed']
+
+  def __init__(self, command, priority, key, queued_at):
+    self.command = command
+    self.priority = priority
+    self.key = key
+    self.queued_at = queued_at
+    self.removed = False
+
+
+class CommandQueue():
+  """
+  Blocking queue of commands with a FIFO lane per priority (lower value is
+  served first). Consumers may wait for commands of some of the lanes only.
+
+  Commands for which key(command) is not None are indexed, so removing them
+  by key does not touch the other entries: the removed entries are only
+  marked and skipped when they reach the head of their lane.
+  Implementation is thread-safe.
+  """
+
+  # lanes are compacted once they hold more removed entries than this and the queued ones
+  MIN_ENTRIES_TO_COMPACT = 1000
+
+  def __init__(self, priorities, key=None):
+    self.priorities = sorted(priorities)
+    self.key = key
+    self.lanes = {}
+    self.sizes = {}
+    self.removed = {}
+    for priority in self.priorities:
+      self.lanes[priority] = collections.deque()
+      self.sizes[priority] = 0
+      self.removed[priority] = 0
+    # key -> queued entries with this key
+    self.index = {}
+    self.mutex = threading.Lock()
+    self.not_empty = threading.Condition(self.mutex)
+    self.closed = False
+
+  def put(self, command, priority):
+    key = None
+    if self.key is not None:
+      key = self.key(command)
+    entry = QueueEntry(command, priority, key, time.time())
+    with self.mutex:
+      self.lanes[priority].append(entry)
+      self.sizes[priority] += 1
+      if key is not None:
+        self.index.setdefault(key, []).append(entry)
+      self.not_empty.notify_all()
+
+  def get(self, block=True, timeout=None, priorities=None):
+    """
+    Returns the oldest command of the highest priority lane among the given
+    priorities (all lanes by default) and the time it spent in the queue.
+    Raises Queue.Empty if no command arrives in time or the queue is closed.
+    """
+    priorities = self._select_priorities(priorities)
+    deadline = None
+    if timeout is not None:
+      deadline = time.time() + timeout
+    with self.mutex:
+      while True:
+        for priority in priorities:
+          entry = self._pop(priority)
+          if entry is not None:
+            return entry.command, time.time() - entry.queued_at
+        if not block or self.closed:
+          raise Empty()
+        if deadline is None:
+          self.not_empty.wait()
+        else:
+          remaining = deadline - time.time()
+          if remaining <= 0:
+            raise Empty()
+          self.not_empty.wait(remaining)
+
+  def qsize(self, priorities=None):
+    with self.mutex:
+      return sum(self.sizes[priority] for priority in self._select_priorities(priorities))
+
+  def empty(self, priorities=None):
+    return self.qsize(priorities) == 0
+
+  def clear(self, priorities=None):
+    with self.mutex:
+      for priority in self._select_priorities(priorities):
+        for entry in self.lanes[priority]:
+          if not entry.removed:
+            self._unindex(entry)
+        self.lanes[priority].clear()
+        self.sizes[priority] = 0
+        self.removed[priority] = 0
+
+  def remove(self, key, priorities=None):
+    """
+    Removes the queued commands with the given key, returns the removed commands
+    """
+    priorities = self._select_priorities(priorities)
+    removed = []
+    with self.mutex:
+      for entry in list(self.index.get(key, [])):
+        if entry.priority in priorities:
+          self._unindex(entry)
+          entry.removed = True
+          self.sizes[entry.priority] -= 1
+          self.removed[entry.priority] += 1
+          removed.append(entry.command)
+          self._compact(entry.priority)
+    return removed
+
+  def close(self):
+    """
+    Wakes up all consumers, get() does not block any more
+    """
+    with self.mutex:
+      self.closed = True
+      self.not_empty.notify_all()
+
+  def _pop(self, priority):
+    lane = self.lanes[priority]
+    while lane:
+      entry = lane.popleft()
+      if entry.removed:
+        self.removed[priority] -= 1
+        continue
+      self.sizes[priority] -= 1
+      self._unindex(entry)
+      return entry
+    return None
+
+  def _unindex(self, entry):
+    if entry.key is None:
+      return
+    entries = self.index[entry.key]
+    entries.remove(entry)
+    if not entries:
+      del self.index[entry.key]
+
+  def _compact(self, priority):
+    removed = self.removed[priority]
+    if removed > self.MIN_ENTRIES_TO_COMPACT and removed > self.sizes[priority]:
+      lane = self.lanes[priority]
+      self.lanes[priority] = collections.deque(entry for entry in lane if not entry.removed)
+      self.removed[priority] = 0
+
+  def _select_priorities(self, priorities):
+    if priorities is None:
+      return self.priorities
+    return [priority for priority in self.priorities if priority in priorities]
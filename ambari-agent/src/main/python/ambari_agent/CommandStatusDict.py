@@ -20,12 +20,93 @@ limitations under the License.
 
 import ambari_simplejson as json
 import logging
+import os
 import threading
 import copy
 from Grep import Grep
 
 logger = logging.getLogger()
 
+class OutputTail():
+  """
+  Keeps the last max_size bytes of a growing output file. Every update
+  reads only the data appended since the previous one.
+  """
+
+  def __init__(self, path, max_size):
+    self.path = path
+    self.max_size = max_size
+    self.inode = None
+    self.offset = 0
+    self.data = ''
+
+  def update(self):
+    """
+    Returns True if the file changed since the previous update
+    """
+    with open(self.path, 'rb') as f:
+      stat = os.fstat(f.fileno())
+      changed = False
+      if stat.st_ino != self.inode or stat.st_size < self.offset:
+        # first read, or the file was rewritten
+        self.inode = stat.st_ino
+        self.offset = 0
+        self.data = ''
+        changed = True
+      if stat.st_size == self.offset:
+        return changed
+      # older data would be dropped from the tail anyway
+      start = max(self.offset, stat.st_size - self.max_size)
+      f.seek(start)
+      new_data = f.read(stat.st_size - start)
+      skipped = start > self.offset
+      self.offset = start + len(new_data)
+      if skipped:
+        self.data = new_data
+      else:
+        self.data += new_data
+      if skipped or len(self.data) > self.max_size:
+        self.data = self.data[-self.max_size:]
+        # do not report a partial line
+        line_end = self.data.find('\n')
+        if line_end != -1:
+          self.data = self.data[line_end + 1:]
+      return True
+
+
+class InProgressOutput():
+  """
+  Output files of an IN_PROGRESS command and what of them was reported
+  """
+
+  def __init__(self, report, max_size):
+    self.paths = (report.get('tmpout'), report.get('tmperr'), report.get('structuredOut'))
+    self.stdout = OutputTail(report.get('tmpout'), max_size)
+    self.stderr = OutputTail(report.get('tmperr'), max_size)
+    self.structured_out_stat = None
+    self.structured_out = '{}'
+
+  def update_structured_out(self):
+    """
+    Returns True if the structured output changed since the previous update
+    """
+    path = self.paths[2]
+    try:
+      stat = os.stat(path)
+      structured_out_stat = (stat.st_ino, stat.st_mtime, stat.st_size)
+      if structured_out_stat == self.structured_out_stat:
+        return False
+      with open(path, 'r') as f:
+        self.structured_out = f.read()
+      self.structured_out_stat = structured_out_stat
+    except Exception:
+      if self.structured_out_stat is None:
+        return False
+      self.structured_out_stat = None
+      self.structured_out = '{}'
+    return True
+
+
 class CommandStatusDict():
   """
   Holds results for all commands that are being executed or have finished
@@ -40,6 +121,7 @@ class CommandStatusDict():
     updated
     """
     self.current_state = {} # Contains all statuses
+    self.in_progress_outputs = {} # Output of IN_PROGRESS commands, by task id
     self.callback_action = callback_action
     self.lock = threading.RLock()
 
@@ -79,11 +161,24 @@ class CommandStatusDict():
       c = copy.copy(self.current_state[taskId][1])
     return c
 
+  # How many bytes from the end of the output files of IN_PROGRESS commands are kept
+  OUTPUT_TAIL_SIZE = 64 * 1024
+
+  def has_in_progress_commands(self):
+    from ActionQueue import ActionQueue
+    with self.lock:
+      for command, report in self.current_state.values():
+        if command['commandType'] in [ActionQueue.EXECUTION_COMMAND, ActionQueue.BACKGROUND_EXECUTION_COMMAND] \
+            and report['status'] == ActionQueue.IN_PROGRESS_STATUS:
+          return True
+    return False
+
   def generate_report(self):
     """
     Generates status reports about commands that are IN_PROGRESS, COMPLETE or
     FAILED. Statuses for COMPLETE or FAILED commands are forgotten after
-    generation
+    generation. IN_PROGRESS commands are reported when they start and then
+    only when their output changes.
     """
     from ActionQueue import ActionQueue
     with self.lock: # Synchronized
@@ -97,9 +192,11 @@ class CommandStatusDict():
             resultReports.append(report)
             # Removing complete/failed command status from dict
             del self.current_state[key]
+            self.in_progress_outputs.pop(key, None)
           else:
-            in_progress_report = self.generate_in_progress_report(command, report)
-            resultReports.append(in_progress_report)
+            in_progress_report = self.generate_in_progress_report(command, report, key)
+            if in_progress_report is not None:
+              resultReports.append(in_progress_report)
         elif command ['commandType'] == ActionQueue.STATUS_COMMAND:
           resultComponentStatus.append(report)
           # Component status is useful once, removing it
@@ -115,30 +212,40 @@ class CommandStatusDict():
       return result
 
 
-  def generate_in_progress_report(self, command, report):
+  def generate_in_progress_report(self, command, report, key):
     """
-    Reads stdout/stderr for IN_PROGRESS command from disk file
-    and populates other fields of report.
+    Reads the new stdout/stderr of IN_PROGRESS command from disk files
+    and populates other fields of report. Returns None if the output did
+    not change since the previous report.
     """
     from ActionQueue import ActionQueue
+    output = self.in_progress_outputs.get(key)
+    changed = False
+    if output is None or output.paths != (report.get('tmpout'), report.get('tmperr'), report.get('structuredOut')):
+      output = InProgressOutput(report, self.OUTPUT_TAIL_SIZE)
+      self.in_progress_outputs[key] = output
+      changed = True
     try:
-      tmpout = open(report['tmpout'], 'r').read()
-      tmperr = open(report['tmperr'], 'r').read()
+      stdout_changed = output.stdout.update()
+      stderr_changed = output.stderr.update()
+      changed = changed or stdout_changed or stderr_changed
+      tmpout = output.stdout.data
+      tmperr = output.stderr.data
     except Exception, err:
       logger.warn(err)
       tmpout = '...'
       tmperr = '...'
-    try:
-      tmpstructuredout = open(report['structuredOut'], 'r').read()
-    except Exception:
-      tmpstructuredout = '{}'
+    if output.update_structured_out():
+      changed = True
+    if not changed:
+      return None
     grep = Grep()
-    output = grep.tail(tmpout, Grep.OUTPUT_LAST_LINES)
+    tmpout = grep.tail(tmpout, Grep.OUTPUT_LAST_LINES)
     inprogress = self.generate_report_template(command)
     inprogress.update({
-      'stdout': output,
+      'stdout': tmpout,
       'stderr': tmperr,
-      'structuredOut': tmpstructuredout,
+      'structuredOut': output.structured_out,
       'exitCode': 777,
       'status': ActionQueue.IN_PROGRESS_STATUS,
     })
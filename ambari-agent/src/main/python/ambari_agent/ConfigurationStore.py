@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+
+'''
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+import hashlib
+import logging
+import os
+import tempfile
+import ambari_simplejson as json
+
+logger = logging.getLogger()
+
+class ConfigurationStore():
+  """
+  Content-addressed store of the configuration payloads of commands.
+  Every payload is written once to <store_dir>/config-<sha1 of its json>.json,
+  command json files reference it by the digest.
+  Payloads in use are touched instead, so that DataCleaner removes only the
+  ones no recent command has referenced.
+  """
+  FILE_NAME_FORMAT = "config-{0}.json"
+
+  def __init__(self, store_dir):
+    self.store_dir = store_dir
+
+  def put(self, payload):
+    """
+    Stores the payload if it is not stored yet, returns its digest
+    """
+    content = json.dumps(payload, sort_keys=True, separators=(',', ':'))
+    digest = hashlib.sha1(content).hexdigest()
+    path = self.get_path(digest)
+    try:
+      os.utime(path, None)
+    except OSError:
+      self.write(path, content)
+    return digest
+
+  def get_path(self, digest):
+    return os.path.join(self.store_dir, self.FILE_NAME_FORMAT.format(digest))
+
+  def write(self, path, content):
+    if not os.path.isdir(self.store_dir):
+      os.makedirs(self.store_dir, 0700)
+    # configurations may contain passwords
+    fd, tmp_path = tempfile.mkstemp(dir=self.store_dir, prefix=".config-")
+    try:
+      with os.fdopen(fd, 'w') as f:
+        f.write(content)
+      os.rename(tmp_path, path)
+    except (IOError, OSError):
+      os.remove(tmp_path)
+      # a concurrent writer has stored the same payload (rename does not replace files on windows)
+      if not os.path.exists(path):
+        raise
+    logger.debug("Stored configuration payload " + path)
@@ -27,8 +27,13 @@ import threading
 
 from FileCache import FileCache
 from AgentException import AgentException
+from ConfigurationStore import ConfigurationStore
 from PythonExecutor import PythonExecutor
 from PythonReflectiveExecutor import PythonReflectiveExecutor
+from PythonPooledExecutor import PythonPooledExecutor
+from PythonWorkerPool import PythonWorkerPool
+import PythonScriptChain
+from ExitHelper import ExitHelper
 import Constants
 import hostname
 
@@ -50,12 +55,13 @@ class CustomServiceOrchestrator():
   PRE_HOOK_PREFIX="before"
   POST_HOOK_PREFIX="after"
 
-  HOSTS_LIST_KEY = "all_hosts"
-  PING_PORTS_KEY = "all_ping_ports"
-  RACKS_KEY = "all_racks"
-  IPV4_ADDRESSES_KEY = "all_ipv4_ips"
+  # set in the command json when clusterHostInfo is dumped in the range encoding of the server
+  COMPRESSED_CLUSTER_HOST_INFO_KEY = "compressedClusterHostInfo"
+  # command parts written to the configuration store, the command json references them by digest
+  STORED_CONFIGURATION_KEYS = ['configurations', 'configuration_attributes']
+  STORED_CONFIGURATIONS_KEY = "storedConfigurations"
+  CONFIGURATION_STORE_DIR = "config_store"
 
-  AMBARI_SERVER_HOST = "ambari_server_host"
   DONT_DEBUG_FAILURES_FOR_COMMANDS = [COMMAND_NAME_SECURITY_STATUS, COMMAND_NAME_STATUS]
   REFLECTIVELY_RUN_COMMANDS = [COMMAND_NAME_SECURITY_STATUS, COMMAND_NAME_STATUS] # -- commands which run a lot and often (this increases their speed)
 
@@ -68,6 +74,9 @@ class CustomServiceOrchestrator():
                                                'status_command_stdout.txt')
     self.status_commands_stderr = os.path.join(self.tmp_dir,
                                                'status_command_stderr.txt')
+    self.configuration_store = ConfigurationStore(os.path.join(self.tmp_dir, self.CONFIGURATION_STORE_DIR))
+    # content of status_command.json, which is not rewritten while it stays the same
+    self.status_command_json = None
     self.public_fqdn = hostname.public_hostname(config)
     # cache reset will be called on every agent registration
     controller.registration_listeners.append(self.file_cache.reset)
@@ -80,6 +89,33 @@ class CustomServiceOrchestrator():
       pass # Ignore fail
     self.commands_in_progress_lock = threading.RLock()
     self.commands_in_progress = {}
+    self.status_workers_pool = self.create_status_workers_pool(config)
+    # run hooks and the script of a command in one python process
+    self.single_process_hooks = config.has_option('agent', 'single_process_hooks') and \
+                                config.get('agent', 'single_process_hooks').lower() == 'true'
+
+  def create_status_workers_pool(self, config):
+    """
+    Creates a pool of long-lived processes for status commands if it is enabled
+    by [agent] status_command_workers, otherwise status commands run reflectively
+    """
+    workers_count = 0
+    if config.has_option('agent', 'status_command_workers'):
+      workers_count = int(config.get('agent', 'status_command_workers'))
+    if workers_count <= 0:
+      return None
+
+    max_tasks = 100
+    if config.has_option('agent', 'status_command_worker_max_tasks'):
+      max_tasks = int(config.get('agent', 'status_command_worker_max_tasks'))
+    max_memory_mb = 256
+    if config.has_option('agent', 'status_command_worker_max_memory_mb'):
+      max_memory_mb = int(config.get('agent', 'status_command_worker_max_memory_mb'))
+
+    logger.info("Status commands will be executed by a pool of {0} workers".format(workers_count))
+    pool = PythonWorkerPool(workers_count, config.get('agent', 'cache_dir'), max_tasks, max_memory_mb)
+    ExitHelper().register(pool.shutdown)
+    return pool
 
   def map_task_to_process(self, task_id, processId):
     with self.commands_in_progress_lock:
@@ -103,7 +139,9 @@ class CustomServiceOrchestrator():
     Wrapper for unit testing
     :return:
     """
-    if forced_command_name in self.REFLECTIVELY_RUN_COMMANDS:
+    if forced_command_name in self.REFLECTIVELY_RUN_COMMANDS and self.status_workers_pool:
+      return PythonPooledExecutor(self.tmp_dir, self.config, self.status_workers_pool)
+    elif forced_command_name in self.REFLECTIVELY_RUN_COMMANDS:
       return PythonReflectiveExecutor(self.tmp_dir, self.config)
     else:
       return PythonExecutor(self.tmp_dir, self.config)
@@ -185,17 +223,26 @@ class CustomServiceOrchestrator():
         raise AgentException("Background commands are supported without hooks only")
 
       python_executor = self.get_py_executor(forced_command_name)
-      for py_file, current_base_dir in filtered_py_file_list:
-        log_info_on_failure = not command_name in self.DONT_DEBUG_FAILURES_FOR_COMMANDS
-        script_params = [command_name, json_path, current_base_dir, tmpstrucoutfile, logger_level, self.exec_tmp_dir]
-        ret = python_executor.run_file(py_file, script_params,
-                               tmpoutfile, tmperrfile, timeout,
-                               tmpstrucoutfile, self.map_task_to_process,
-                               task_id, override_output_files, handle = handle, log_info_on_failure=log_info_on_failure)
-        # Next run_file() invocations should always append to current output
-        override_output_files = False
-        if ret['exitcode'] != 0:
-          break
+      log_info_on_failure = not command_name in self.DONT_DEBUG_FAILURES_FOR_COMMANDS
+      if self.single_process_hooks and len(filtered_py_file_list) > 1 and type(python_executor) is PythonExecutor:
+        # phase timeouts are summed up, as the phases run in a single process
+        script_params = PythonScriptChain.chain_params(command_name, json_path, tmpstrucoutfile, logger_level,
+                                                       self.exec_tmp_dir, filtered_py_file_list)
+        ret = python_executor.run_file(PythonScriptChain.CHAIN_SCRIPT, script_params,
+                                       tmpoutfile, tmperrfile, timeout * len(filtered_py_file_list),
+                                       tmpstrucoutfile, self.map_task_to_process,
+                                       task_id, override_output_files, log_info_on_failure=log_info_on_failure)
+      else:
+        for py_file, current_base_dir in filtered_py_file_list:
+          script_params = [command_name, json_path, current_base_dir, tmpstrucoutfile, logger_level, self.exec_tmp_dir]
+          ret = python_executor.run_file(py_file, script_params,
+                                 tmpoutfile, tmperrfile, timeout,
+                                 tmpstrucoutfile, self.map_task_to_process,
+                                 task_id, override_output_files, handle = handle, log_info_on_failure=log_info_on_failure)
+          # Next run_file() invocations should always append to current output
+          override_output_files = False
+          if ret['exitcode'] != 0:
+            break
 
       if not ret: # Something went wrong
         raise AgentException("No script has been executed")
@@ -324,120 +371,39 @@ class CustomServiceOrchestrator():
       file_path = os.path.join(self.tmp_dir, "status_command.json")
     else:
       task_id = command['taskId']
-      if 'clusterHostInfo' in command and command['clusterHostInfo'] and not retry:
-        command['clusterHostInfo'] = self.decompressClusterHostInfo(command['clusterHostInfo'])
+      if 'clusterHostInfo' in command and command['clusterHostInfo']:
+        # scripts expand the host lists they need (see Script.load_config)
+        command[self.COMPRESSED_CLUSTER_HOST_INFO_KEY] = True
       file_path = os.path.join(self.tmp_dir, "command-{0}.json".format(task_id))
       if command_type == ActionQueue.AUTO_EXECUTION_COMMAND:
         file_path = os.path.join(self.tmp_dir, "auto_command-{0}.json".format(task_id))
 
+    content = json.dumps(self.store_configurations(command), separators=(',', ':'))
+    if command_type == ActionQueue.STATUS_COMMAND:
+      if content == self.status_command_json and os.path.isfile(file_path):
+        return file_path
+      self.status_command_json = content
+
     # Json may contain passwords, that's why we need proper permissions
     if os.path.isfile(file_path):
       os.unlink(file_path)
-    with os.fdopen(os.open(file_path, os.O_WRONLY | os.O_CREAT,
+    with os.fdopen(os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
                            0600), 'w') as f:
-      content = json.dumps(command, sort_keys = False, indent = 4)
       f.write(content)
     return file_path
 
-  def decompressClusterHostInfo(self, clusterHostInfo):
-    info = clusterHostInfo.copy()
-    #Pop info not related to host roles
-    hostsList = info.pop(self.HOSTS_LIST_KEY)
-    pingPorts = info.pop(self.PING_PORTS_KEY)
-    racks = info.pop(self.RACKS_KEY)
-    ipv4_addresses = info.pop(self.IPV4_ADDRESSES_KEY)
-
-    ambariServerHost = info.pop(self.AMBARI_SERVER_HOST)
-
-    decompressedMap = {}
-
-    for k,v in info.items():
-      # Convert from 1-3,5,6-8 to [1,2,3,5,6,7,8]
-      indexes = self.convertRangeToList(v)
-      # Convert from [1,2,3,5,6,7,8] to [host1,host2,host3...]
-      decompressedMap[k] = [hostsList[i] for i in indexes]
-
-    #Convert from ['1:0-2,4', '42:3,5-7'] to [1,1,1,42,1,42,42,42]
-    pingPorts = self.convertMappedRangeToList(pingPorts)
-    racks = self.convertMappedRangeToList(racks)
-    ipv4_addresses = self.convertMappedRangeToList(ipv4_addresses)
-
-    #Convert all elements to str
-    pingPorts = map(str, pingPorts)
-
-    #Add ping ports to result
-    decompressedMap[self.PING_PORTS_KEY] = pingPorts
-    #Add hosts list to result
-    decompressedMap[self.HOSTS_LIST_KEY] = hostsList
-    #Add racks list to result
-    decompressedMap[self.RACKS_KEY] = racks
-    #Add ips list to result
-    decompressedMap[self.IPV4_ADDRESSES_KEY] = ipv4_addresses
-    #Add ambari-server host to result
-    decompressedMap[self.AMBARI_SERVER_HOST] = ambariServerHost
-
-    return decompressedMap
-
-  # Converts from 1-3,5,6-8 to [1,2,3,5,6,7,8]
-  def convertRangeToList(self, list):
-
-    resultList = []
-
-    for i in list:
-
-      ranges = i.split(',')
-
-      for r in ranges:
-        rangeBounds = r.split('-')
-        if len(rangeBounds) == 2:
-
-          if not rangeBounds[0] or not rangeBounds[1]:
-            raise AgentException("Broken data in given range, expected - ""m-n"" or ""m"", got : " + str(r))
-
-
-          resultList.extend(range(int(rangeBounds[0]), int(rangeBounds[1]) + 1))
-        elif len(rangeBounds) == 1:
-          resultList.append((int(rangeBounds[0])))
-        else:
-          raise AgentException("Broken data in given range, expected - ""m-n"" or ""m"", got : " + str(r))
-
-    return resultList
-
-  #Converts from ['1:0-2,4', '42:3,5-7'] to [1,1,1,42,1,42,42,42]
-  def convertMappedRangeToList(self, list):
-
-    resultDict = {}
-
-    for i in list:
-      valueToRanges = i.split(":")
-      if len(valueToRanges) <> 2:
-        raise AgentException("Broken data in given value to range, expected format - ""value:m-n"", got - " + str(i))
-      value = valueToRanges[0]
-      rangesToken = valueToRanges[1]
-
-      for r in rangesToken.split(','):
-
-        rangeIndexes = r.split('-')
-
-        if len(rangeIndexes) == 2:
-
-          if not rangeIndexes[0] or not rangeIndexes[1]:
-            raise AgentException("Broken data in given value to range, expected format - ""value:m-n"", got - " + str(r))
-
-          start = int(rangeIndexes[0])
-          end = int(rangeIndexes[1])
-
-          for k in range(start, end + 1):
-            resultDict[k] = value if not value.isdigit() else int(value)
-
-
-        elif len(rangeIndexes) == 1:
-          index = int(rangeIndexes[0])
-
-          resultDict[index] = value if not value.isdigit() else int(value)
-
-
-    resultList = dict(sorted(resultDict.items())).values()
-
-    return resultList
-
+  def store_configurations(self, command):
+    """
+    Returns a copy of the command, which references the configurations in the
+    configuration store instead of including them (see Script.load_config)
+    """
+    command_json = dict(command)
+    stored_configurations = {'dir': self.configuration_store.store_dir}
+    for key in self.STORED_CONFIGURATION_KEYS:
+      if command.get(key):
+        payloads = command_json.pop(key)
+        stored_configurations[key] = dict((config_type, self.configuration_store.put(payload))
+                                          for config_type, payload in payloads.iteritems())
+    if len(stored_configurations) > 1:
+      command_json[self.STORED_CONFIGURATIONS_KEY] = stored_configurations
+    return command_json
@@ -31,7 +31,10 @@ class DataCleaner(threading.Thread):
   COMMAND_FILE_NAMES_PATTERN = 'errors-\d+.txt|output-\d+.txt|site-\d+.pp|structured-out-\d+.json|command-\d+.json'
   AUTO_COMMAND_FILE_NAMES_PATTERN = \
     'auto_command-\d+.json|auto_errors-\d+.txt|auto_output-\d+.txt|auto_structured-out-\d+.json'
-  FILE_NAME_PATTERN = AUTO_COMMAND_FILE_NAMES_PATTERN + "|" + COMMAND_FILE_NAMES_PATTERN
+  # payloads of the configuration store, see ConfigurationStore
+  CONFIGURATION_FILE_NAMES_PATTERN = 'config-[0-9a-f]+\.json'
+  FILE_NAME_PATTERN = AUTO_COMMAND_FILE_NAMES_PATTERN + "|" + COMMAND_FILE_NAMES_PATTERN + "|" + \
+                      CONFIGURATION_FILE_NAMES_PATTERN
 
   def __init__(self, config):
     threading.Thread.__init__(self)
@@ -19,12 +19,17 @@ limitations under the License.
 '''
 import StringIO
 
+import hashlib
+import httplib
 import logging
 import os
 import shutil
+import socket
+import tempfile
+import threading
 import zipfile
-import urllib2
 import urllib
+import urlparse
 from AmbariConfig import AmbariConfig
 
 logger = logging.getLogger()
@@ -47,11 +52,14 @@ class FileCache():
   CUSTOM_ACTIONS_CACHE_DIRECTORY="custom_actions"
   HOST_SCRIPTS_CACHE_DIRECTORY="host_scripts"
   HASH_SUM_FILE=".hash"
+  MANIFEST_FILE=".manifest"
   ARCHIVE_NAME="archive.zip"
   ENABLE_AUTO_AGENT_CACHE_UPDATE_KEY = "agent.auto.cache.update"
 
   BLOCK_SIZE=1024*16
   SOCKET_TIMEOUT=10
+  # if more than this part of files has changed, the whole archive is downloaded instead
+  MAX_CHANGED_FILES_RATIO=0.5
 
   def __init__(self, config):
     self.service_component_pool = {}
@@ -61,6 +69,9 @@ class FileCache():
     # from the server is not possible or agent should rollback to local copy
     self.tolerate_download_failures = \
           config.get('agent','tolerate_download_failures').lower() == 'true'
+    # idle keep-alive connections to the server, by (scheme, host:port)
+    self.connections = {}
+    self.connections_lock = threading.Lock()
     self.reset()
 
 
@@ -145,18 +156,22 @@ class FileCache():
         local_hash = self.read_hash_sum(full_path)
         if not local_hash or local_hash != remote_hash:
           logger.debug("Updating directory {0}".format(full_path))
-          download_url = self.build_download_url(server_url_prefix,
-                                                 subdirectory, self.ARCHIVE_NAME)
-          membuffer = self.fetch_url(download_url)
-          # extract only when the archive is not zero sized
-          if (membuffer.getvalue().strip()):
-            self.invalidate_directory(full_path)
-            self.unpack_archive(membuffer, full_path)
-            self.write_hash_sum(full_path, remote_hash)
-          else:
-            logger.warn("Skipping empty archive: {0}. "
-                        "Expected archive was not found. Cached copy will be used.".format(download_url))
-            pass
+          if not self.update_changed_files(full_path, subdirectory, server_url_prefix, remote_hash):
+            download_url = self.build_download_url(server_url_prefix,
+                                                   subdirectory, self.ARCHIVE_NAME)
+            membuffer = self.fetch_url(download_url)
+            # extract only when the archive is not zero sized
+            if (membuffer.getvalue().strip()):
+              staging_path = self.get_staging_directory(full_path)
+              self.invalidate_directory(staging_path)
+              self.unpack_archive(membuffer, staging_path)
+              self.write_manifest(staging_path, self.count_file_hash_sums(staging_path))
+              self.write_hash_sum(staging_path, remote_hash)
+              self.swap_directory(staging_path, full_path)
+            else:
+              logger.warn("Skipping empty archive: {0}. "
+                          "Expected archive was not found. Cached copy will be used.".format(download_url))
+              pass
         # Finally consider cache directory up-to-date
         self.uptodate_paths.append(full_path)
     except CachingException, e:
@@ -171,6 +186,108 @@ class FileCache():
     return full_path
 
 
+  def update_changed_files(self, full_path, subdirectory, server_url_prefix, remote_hash):
+    """
+    Downloads only the files which differ from the manifest of the local copy.
+    Returns False if the whole archive should be downloaded instead: there is no local
+    copy or manifest, the server does not provide a manifest, or most of the files have changed.
+    """
+    local_manifest = self.read_manifest(full_path)
+    if local_manifest is None:
+      return False
+
+    manifest_url = self.build_download_url(server_url_prefix, subdirectory, self.MANIFEST_FILE)
+    try:
+      remote_manifest = self.parse_manifest(self.fetch_url(manifest_url).getvalue())
+    except CachingException, e:
+      logger.debug("Manifest is not available, the whole archive will be downloaded. {0}".format(str(e)))
+      return False
+    if not remote_manifest:
+      return False
+
+    changed_files = set(path for path, hash_sum in remote_manifest.iteritems() if local_manifest.get(path) != hash_sum)
+    if len(changed_files) > len(remote_manifest) * self.MAX_CHANGED_FILES_RATIO:
+      return False
+
+    logger.info("Updating {0} changed files in directory {1}".format(len(changed_files), full_path))
+    staging_path = self.get_staging_directory(full_path)
+    self.invalidate_directory(staging_path)
+    try:
+      for path in remote_manifest:
+        target = os.path.join(staging_path, *path.split('/'))
+        if not os.path.isdir(os.path.dirname(target)):
+          os.makedirs(os.path.dirname(target))
+        if path in changed_files:
+          download_url = self.build_download_url(server_url_prefix, subdirectory, urllib.pathname2url(path))
+          with open(target, "wb") as fh:
+            fh.write(self.fetch_url(download_url).getvalue())
+        else:
+          shutil.copy2(os.path.join(full_path, *path.split('/')), target)
+    except (IOError, OSError), err:
+      raise CachingException("Can not prepare directory {0} : {1}".format(staging_path, str(err)))
+
+    if self.count_file_hash_sums(staging_path) != remote_manifest:
+      logger.warn("Directory {0} does not match the manifest after update, "
+                  "the whole archive will be downloaded".format(full_path))
+      return False
+
+    self.write_manifest(staging_path, remote_manifest)
+    self.write_hash_sum(staging_path, remote_hash)
+    self.swap_directory(staging_path, full_path)
+    return True
+
+
+  def get_staging_directory(self, directory):
+    return directory.rstrip(os.sep) + ".staging"
+
+
+  def swap_directory(self, source, target):
+    """
+    Replaces target directory with source one. Source is moved to a new version directory
+    next to target, and target is a symbolic link to it, which is replaced by a single
+    rename, so target is never missing or partially updated. Where symbolic links are not
+    available, target is renamed away and is missing for a moment.
+    """
+    target = target.rstrip(os.sep)
+    parent, name = os.path.split(target)
+    version_prefix = name + ".v"
+    old_path = target + ".old"
+    try:
+      if os.path.exists(old_path):
+        shutil.rmtree(old_path)
+
+      if not hasattr(os, "symlink"):
+        if os.path.isdir(target):
+          os.rename(target, old_path)
+        elif os.path.exists(target):
+          os.unlink(target)
+        os.rename(source, target)
+      else:
+        version_path = tempfile.mkdtemp(prefix=version_prefix, dir=parent)
+        os.rename(source, version_path)
+        link_path = target + ".link"
+        if os.path.lexists(link_path):
+          os.unlink(link_path)
+        os.symlink(os.path.basename(version_path), link_path)
+
+        if os.path.islink(target):
+          old_version = os.readlink(target)
+          # only the versions made here are removed
+          if old_version.startswith(version_prefix) and os.sep not in old_version:
+            old_path = os.path.join(parent, old_version)
+        elif os.path.isdir(target):
+          # a plain directory of an older agent, it is replaced once by two renames
+          os.rename(target, old_path)
+        elif os.path.exists(target):
+          os.unlink(target)
+        os.rename(link_path, target)
+
+      if os.path.isdir(old_path) and not os.path.islink(old_path):
+        shutil.rmtree(old_path)
+    except Exception, err:
+      raise CachingException("Can not replace cache directory {0}: {1}".format(target, str(err)))
+
+
   def build_download_url(self, server_url_prefix,
                          directory, filename):
     """
@@ -186,28 +303,135 @@ class FileCache():
   def fetch_url(self, url):
     """
     Fetches content on url to in-memory buffer and returns the resulting buffer.
+    Connections to the server are kept alive and reused by subsequent calls.
     May throw exceptions because of various reasons
     """
     logger.debug("Trying to download {0}".format(url))
     try:
-      memory_buffer = StringIO.StringIO()
-      proxy_handler = urllib2.ProxyHandler({})
-      opener = urllib2.build_opener(proxy_handler)
-      u = opener.open(url, timeout=self.SOCKET_TIMEOUT)
-      logger.debug("Connected with {0} with code {1}".format(u.geturl(),
-                                                             u.getcode()))
-      buff = u.read(self.BLOCK_SIZE)
-      while buff:
-        memory_buffer.write(buff)
-        buff = u.read(self.BLOCK_SIZE)
-        if not buff:
-          break
+      scheme, netloc, path, query, fragment = urlparse.urlsplit(url)
+      if query:
+        path += "?" + query
+      connection = self.acquire_connection(scheme, netloc)
+      try:
+        try:
+          response = self.send_request(connection, path)
+        except (httplib.HTTPException, socket.error):
+          # server may have closed the idle connection, retry with a new one
+          connection.close()
+          connection = self.create_connection(scheme, netloc)
+          response = self.send_request(connection, path)
+        logger.debug("Connected with {0} with code {1}".format(url, response.status))
+
+        memory_buffer = StringIO.StringIO()
+        buff = response.read(self.BLOCK_SIZE)
+        while buff:
+          memory_buffer.write(buff)
+          buff = response.read(self.BLOCK_SIZE)
+      except:
+        connection.close()
+        raise
+
+      if response.will_close:
+        connection.close()
+      else:
+        self.release_connection(scheme, netloc, connection)
+
+      if response.status != httplib.OK:
+        raise CachingException("HTTP Error {0}: {1}".format(response.status, response.reason))
       return memory_buffer
     except Exception, err:
       raise CachingException("Can not download file from"
                              " url {0} : {1}".format(url, str(err)))
 
 
+  def create_connection(self, scheme, netloc):
+    if scheme == "https":
+      return httplib.HTTPSConnection(netloc, timeout=self.SOCKET_TIMEOUT)
+    return httplib.HTTPConnection(netloc, timeout=self.SOCKET_TIMEOUT)
+
+
+  def acquire_connection(self, scheme, netloc):
+    with self.connections_lock:
+      idle_connections = self.connections.get((scheme, netloc))
+      if idle_connections:
+        return idle_connections.pop()
+    return self.create_connection(scheme, netloc)
+
+
+  def release_connection(self, scheme, netloc, connection):
+    with self.connections_lock:
+      self.connections.setdefault((scheme, netloc), []).append(connection)
+
+
+  def send_request(self, connection, path):
+    connection.request("GET", path)
+    return connection.getresponse()
+
+
+  def count_file_hash_sums(self, directory):
+    """
+    Returns a dictionary of file path (relative to directory, with '/' separators) to sha1 hash sum,
+    in the same format as the manifest generated at the server
+    """
+    hash_sums = {}
+    abs_src = os.path.abspath(directory)
+    try:
+      for root, dirs, files in os.walk(directory):
+        for f in files:
+          if f in [self.HASH_SUM_FILE, self.MANIFEST_FILE, self.ARCHIVE_NAME] or f.endswith(".pyc"):
+            continue
+          full_path = os.path.abspath(os.path.join(root, f))
+          sha1 = hashlib.sha1()
+          with open(full_path, 'rb') as fh:
+            for data in iter(lambda: fh.read(self.BLOCK_SIZE), ''):
+              sha1.update(data)
+          hash_sums[full_path[len(abs_src) + 1:].replace(os.sep, '/')] = sha1.hexdigest()
+    except (IOError, OSError), err:
+      raise CachingException("Can not calculate hash sums of files in {0} : {1}".format(directory, str(err)))
+    return hash_sums
+
+
+  def parse_manifest(self, content):
+    """
+    Parses "<sha1> <relative path>" lines into a dictionary. Paths which
+    could point outside of the directory are rejected.
+    """
+    manifest = {}
+    for line in content.splitlines():
+      if line.strip():
+        try:
+          hash_sum, path = line.split(' ', 1)
+        except ValueError:
+          raise CachingException("Malformed manifest line: {0}".format(line))
+        if os.path.isabs(path) or '..' in path.replace('\\', '/').split('/'):
+          raise CachingException("Unsafe path in the manifest: {0}".format(path))
+        manifest[path] = hash_sum
+    return manifest
+
+
+  def read_manifest(self, directory):
+    """
+    Returns the manifest of the local copy of directory, or None
+    """
+    manifest_file = os.path.join(directory, self.MANIFEST_FILE)
+    try:
+      with open(manifest_file) as fh:
+        return self.parse_manifest(fh.read())
+    except (IOError, CachingException):
+      return None
+
+
+  def write_manifest(self, directory, manifest):
+    manifest_file = os.path.join(directory, self.MANIFEST_FILE)
+    try:
+      with open(manifest_file, "w") as fh:
+        for path in sorted(manifest.keys()):
+          fh.write("{0} {1}\n".format(manifest[path], path))
+    except Exception, err:
+      raise CachingException("Can not write to file {0} : {1}".format(manifest_file,
+                                                                 str(err)))
+
+
   def read_hash_sum(self, directory):
     """
     Tries to read a hash sum from previously generated file. Returns string
@@ -59,14 +59,14 @@ class Heartbeat:
     heartbeat['recoveryReport'] = rec_status
 
     commandsInProgress = False
-    if not self.actionQueue.commandQueue.empty():
+    if self.actionQueue.execution_commands_pending():
       commandsInProgress = True
 
     if len(queueResult) != 0:
       heartbeat['reports'] = queueResult['reports']
       heartbeat['componentStatus'] = queueResult['componentStatus']
-      if len(heartbeat['reports']) > 0:
-        # There may be IN_PROGRESS tasks
+      if len(heartbeat['reports']) > 0 or self.actionQueue.commandStatuses.has_in_progress_commands():
+        # There may be IN_PROGRESS tasks, unchanged ones are not reported
         commandsInProgress = True
       pass
 
@@ -94,6 +94,8 @@ class Heartbeat:
         logger.debug("agentEnv: %s", str(nodeInfo))
         logger.debug("mounts: %s", str(mounts))
 
+    heartbeat['actionQueueMetrics'] = self.actionQueue.get_metrics()
+
     if self.collector is not None:
       heartbeat['alerts'] = self.collector.alerts()
     
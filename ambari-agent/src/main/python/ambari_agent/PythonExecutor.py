@@ -62,6 +62,16 @@ class PythonExecutor(object):
       tmperr =  open(tmperrfile, 'a')
     return tmpout, tmperr
 
+  def capture_output(self, process, tmpout, tmperr):
+    """
+    Starts teeing stdout and stderr pipes of the process to the output files
+    """
+    out_capture = OutputCapture(process.stdout, tmpout)
+    err_capture = OutputCapture(process.stderr, tmperr)
+    out_capture.start()
+    err_capture.start()
+    return out_capture, err_capture
+
   def run_file(self, script, script_params, tmpoutfile, tmperrfile,
                timeout, tmpstructedoutfile, callback, task_id,
                override_output_files = True, handle = None, log_info_on_failure=True):
@@ -83,6 +93,7 @@ class PythonExecutor(object):
       tmpout, tmperr = self.open_subprocess_files(tmpoutfile, tmperrfile, override_output_files)
 
       process = self.launch_python_subprocess(pythonCommand, tmpout, tmperr)
+      captures = self.capture_output(process, tmpout, tmperr)
       # map task_id to pid
       callback(task_id, process.pid)
       logger.debug("Launching watchdog thread")
@@ -91,10 +102,12 @@ class PythonExecutor(object):
       thread = Thread(target =  self.python_watchdog_func, args = (process, timeout))
       thread.start()
       # Waiting for the process to be either finished or killed
-      process.communicate()
+      process.wait()
       self.event.set()
       thread.join()
-      result = self.prepare_process_result(process.returncode, tmpoutfile, tmperrfile, tmpstructedoutfile, timeout=timeout)
+      out, error = self.collect_output(captures)
+      result = self.prepare_process_result(process.returncode, tmpoutfile, tmperrfile, tmpstructedoutfile,
+                                           timeout=timeout, out=out, error=error)
       
       if log_info_on_failure and result['exitcode']:
         self.on_failure(pythonCommand, result)
@@ -123,8 +136,25 @@ class PythonExecutor(object):
       ret = shell_runner.run(cmd)
       logger.info("Command '{0}' returned {1}. {2}{3}".format(cmd, ret["exitCode"], ret["error"], ret["output"]))
     
-  def prepare_process_result(self, returncode, tmpoutfile, tmperrfile, tmpstructedoutfile, timeout=None):
-    out, error, structured_out = self.read_result_from_files(tmpoutfile, tmperrfile, tmpstructedoutfile)
+  def collect_output(self, captures):
+    """
+    Waits for the output of the finished process and returns the captured stdout and stderr.
+    Daemons forked by the script may keep the pipes open, such pipes are still teed to the files
+    in background but are not waited for longer than OUTPUT_CAPTURE_GRACE_PERIOD.
+    """
+    deadline = time.time() + OUTPUT_CAPTURE_GRACE_PERIOD
+    for capture in captures:
+      capture.join(max(deadline - time.time(), 0))
+      if capture.isAlive():
+        logger.debug("Output pipe is still held open by a child of the finished process")
+    return [capture.getvalue() for capture in captures]
+
+  def prepare_process_result(self, returncode, tmpoutfile, tmperrfile, tmpstructedoutfile, timeout=None,
+                             out=None, error=None):
+    if out is None or error is None:
+      out, error, structured_out = self.read_result_from_files(tmpoutfile, tmperrfile, tmpstructedoutfile)
+    else:
+      structured_out = self.read_structured_out(tmpstructedoutfile)
 
     if self.python_process_has_been_killed:
       error = str(error) + "\n Python script has been killed due to timeout" + \
@@ -137,6 +167,9 @@ class PythonExecutor(object):
   def read_result_from_files(self, out_path, err_path, structured_out_path):
     out = open(out_path, 'r').read()
     error = open(err_path, 'r').read()
+    return out, error, self.read_structured_out(structured_out_path)
+
+  def read_structured_out(self, structured_out_path):
     try:
       with open(structured_out_path, 'r') as fp:
         structured_out = json.load(fp)
@@ -149,7 +182,7 @@ class PythonExecutor(object):
         logger.warn(structured_out)
       else:
         structured_out = {}
-    return out, error, structured_out
+    return structured_out
 
   def launch_python_subprocess(self, command, tmpout, tmperr):
     """
@@ -164,8 +197,8 @@ class PythonExecutor(object):
         command_env[k] = str(v)
 
     return subprocess.Popen(command,
-      stdout=tmpout,
-      stderr=tmperr, close_fds=close_fds, env=command_env)
+      stdout=subprocess.PIPE,
+      stderr=subprocess.PIPE, close_fds=close_fds, env=command_env)
 
   def isSuccessfull(self, returncode):
     return not self.python_process_has_been_killed and returncode == 0
@@ -177,12 +210,11 @@ class PythonExecutor(object):
     return python_command
 
   def condenseOutput(self, stdout, stderr, retcode, structured_out):
-    log_lines_count = self.config.get('heartbeat', 'log_lines_count')
-    
+    # the whole output is reported, only the in-progress reports are tailed
     result = {
       "exitcode": retcode,
-      "stdout": self.grep.tail(stdout, log_lines_count) if log_lines_count else stdout,
-      "stderr": self.grep.tail(stderr, log_lines_count) if log_lines_count else stderr,
+      "stdout": stdout.strip(),
+      "stderr": stderr.strip(),
       "structuredOut" : structured_out
     }
     
@@ -196,6 +228,53 @@ class PythonExecutor(object):
       self.python_process_has_been_killed = True
     pass
 
+# seconds to wait for the output pipes to be closed after the process has finished
+OUTPUT_CAPTURE_GRACE_PERIOD = 5
+
+class OutputCapture(threading.Thread):
+  """
+  Reads the output pipe of a process as soon as data arrives, writes it through
+  to the output file (so in-progress reports see it) and keeps it for the
+  final report, so that the file is not read back.
+  """
+  READ_SIZE = 64 * 1024
+
+  def __init__(self, pipe, output_file):
+    threading.Thread.__init__(self)
+    self.daemon = True
+    self.pipe = pipe
+    self.output_file = output_file
+    self.chunks = []
+    self.lock = threading.Lock()
+
+  def run(self):
+    fd = self.pipe.fileno()
+    try:
+      while True:
+        data = os.read(fd, self.READ_SIZE)
+        if not data:
+          break
+        self.write(data)
+    except (IOError, OSError), err:
+      logger.warn("Failed to read the command output: " + str(err))
+    finally:
+      self.pipe.close()
+      self.output_file.close()
+
+  def write(self, data):
+    try:
+      self.output_file.write(data)
+      self.output_file.flush()
+    except (IOError, ValueError), err:
+      logger.debug("Failed to write the command output: " + str(err))
+
+    with self.lock:
+      self.chunks.append(data)
+
+  def getvalue(self):
+    with self.lock:
+      return ''.join(self.chunks)
+
 class Holder:
   def __init__(self, command, out_file, err_file, structured_out_file, handle):
     self.command = command
@@ -215,6 +294,7 @@ class BackgroundThread(threading.Thread):
 
     logger.debug("Starting process command %s" % self.holder.command)
     process = self.pythonExecutor.launch_python_subprocess(self.holder.command, process_out, process_err)
+    captures = self.pythonExecutor.capture_output(process, process_out, process_err)
 
     logger.debug("Process has been started. Pid = %s" % process.pid)
 
@@ -222,10 +302,12 @@ class BackgroundThread(threading.Thread):
     self.holder.handle.status = BackgroundCommandExecutionHandle.RUNNING_STATUS
     self.holder.handle.on_background_command_started(self.holder.handle.command['taskId'], process.pid)
 
-    process.communicate()
+    process.wait()
 
     self.holder.handle.exitCode = process.returncode
-    process_condensed_result = self.pythonExecutor.prepare_process_result(process.returncode, self.holder.out_file, self.holder.err_file, self.holder.structured_out_file)
+    out, error = self.pythonExecutor.collect_output(captures)
+    process_condensed_result = self.pythonExecutor.prepare_process_result(process.returncode, self.holder.out_file, self.holder.err_file,
+                                                                          self.holder.structured_out_file, out=out, error=error)
     logger.debug("Calling callback with args %s" % process_condensed_result)
     self.holder.handle.on_background_command_complete_callback(process_condensed_result, self.holder.handle)
     logger.debug("Exiting from thread for holder pid %s" % self.holder.handle.pid)
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+
+'''
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+from PythonExecutor import PythonExecutor
+
+import pprint
+import logging
+
+logger = logging.getLogger()
+
+class PythonPooledExecutor(PythonExecutor):
+  """
+  Runs STATUS, SECURITY_STATUS commands in a pool of pre-warmed worker processes.
+  Unlike PythonReflectiveExecutor, imports of the libraries survive between runs,
+  and a misbehaving script can not affect the agent process itself.
+  """
+
+  def __init__(self, tmpDir, config, worker_pool):
+    super(PythonPooledExecutor, self).__init__(tmpDir, config)
+    self.worker_pool = worker_pool
+
+  def run_file(self, script, script_params, tmpoutfile, tmperrfile,
+               timeout, tmpstructedoutfile, callback, task_id,
+               override_output_files = True, handle = None, log_info_on_failure=True):
+    pythonCommand = self.python_command(script, script_params)
+    logger.debug("Running command in worker pool " + pprint.pformat(pythonCommand))
+
+    returncode, self.python_process_has_been_killed = self.worker_pool.execute(script, script_params,
+                                                                               tmpoutfile, tmperrfile,
+                                                                               override_output_files, timeout)
+    if returncode:
+      logger.debug("Pooled command failed with return_code=" + str(returncode))
+
+    return self.prepare_process_result(returncode, tmpoutfile, tmperrfile, tmpstructedoutfile, timeout=timeout)
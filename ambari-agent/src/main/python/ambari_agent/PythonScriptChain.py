@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+
+'''
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+import os
+import sys
+
+CHAIN_SCRIPT = os.path.splitext(os.path.abspath(__file__))[0] + ".py"
+
+USAGE = "Usage: {0} <COMMAND> <JSON_CONFIG> <STROUTPUT> <LOGGING_LEVEL> <TMP_DIR> <SCRIPT> <BASEDIR> [<SCRIPT> <BASEDIR> ...]"
+
+
+def chain_params(command_name, json_path, structured_out_path, logging_level, tmp_dir, py_file_list):
+  """
+  Returns arguments of CHAIN_SCRIPT running the (script, base dir) tuples one after another
+  """
+  params = [command_name, json_path, structured_out_path, logging_level, tmp_dir]
+  for py_file, base_dir in py_file_list:
+    params += [py_file, base_dir]
+  return params
+
+
+def main():
+  """
+  Runs the before hook, the script and the after hook of a command in this interpreter.
+  The command json is parsed once and shared by all of them, while each one still gets
+  its own Environment, structured output reload and modules (params.py etc.) of its base dir.
+  """
+  if len(sys.argv) < 8 or len(sys.argv) % 2:
+    print USAGE.format(os.path.basename(sys.argv[0]))
+    sys.exit(1)
+
+  command_name, json_path, structured_out_path, logging_level, tmp_dir = sys.argv[1:6]
+  scripts = sys.argv[6:]
+
+  from PythonWorkerPool import drop_modules_under, execute_script
+  from resource_management.libraries.script.script import Script
+  # scripts see the same sys.path as when they are run by themselves
+  del sys.path[0]
+  try:
+    Script.preloaded_config = (json_path, Script.load_config(json_path))
+  except (IOError, ValueError):
+    # every script reports the failure by itself
+    pass
+
+  for i in range(0, len(scripts), 2):
+    script, base_dir = scripts[i], scripts[i + 1]
+    Script.stack_version_from_distro_select = None
+    returncode = execute_script(script, [command_name, json_path, base_dir, structured_out_path, logging_level, tmp_dir])
+    drop_modules_under(base_dir)
+    if returncode:
+      sys.exit(returncode)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,314 @@
+#!/usr/bin/env python
+
+'''
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+import imp
+import logging
+import os
+import Queue
+import select
+import subprocess
+import sys
+import threading
+import time
+import traceback
+import ambari_simplejson as json
+
+logger = logging.getLogger()
+
+WORKER_SCRIPT = os.path.splitext(os.path.abspath(__file__))[0] + ".py"
+
+# modules imported once per worker, so that status scripts do not pay for them every run
+PREWARMED_MODULES = ["resource_management", "resource_management.libraries.script.script",
+                     "resource_management.libraries.functions", "ambari_commons"]
+
+
+class PythonWorker(object):
+  """
+  Handle to a single long-lived python process, which executes status scripts
+  sent over its stdin and reports exit codes over its stdout.
+  Messages are single-line json documents in both directions.
+  """
+
+  PING_TIMEOUT = 5
+  # how long a worker is given to exit by itself after its input is closed
+  EXIT_TIMEOUT = 1
+
+  def __init__(self, python_binary, cache_dir):
+    self.tasks_done = 0
+    self.process = subprocess.Popen([python_binary, WORKER_SCRIPT, cache_dir],
+                                    stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                    close_fds=True, env=dict(os.environ))
+    self.pid = self.process.pid
+    logger.info("Started status command worker with pid={0}".format(self.pid))
+
+  def is_alive(self):
+    return self.process.poll() is None
+
+  def send(self, message):
+    self.process.stdin.write(json.dumps(message) + "\n")
+    self.process.stdin.flush()
+
+  def receive(self, timeout):
+    """
+    Returns the next message from the worker, or None if it was not received in timeout seconds
+    """
+    ready = select.select([self.process.stdout], [], [], timeout)[0]
+    if not ready:
+      return None
+    line = self.process.stdout.readline()
+    if not line:
+      raise IOError("Status command worker pid={0} closed its output".format(self.pid))
+    return json.loads(line)
+
+  def ping(self):
+    try:
+      self.send({'ping': True})
+      response = self.receive(self.PING_TIMEOUT)
+      return response is not None and response.get('pong') == self.pid
+    except (IOError, OSError, ValueError):
+      return False
+
+  def memory_usage_mb(self):
+    """
+    Resident memory of the worker in megabytes, or 0 if it cannot be determined
+    """
+    try:
+      with open("/proc/{0}/statm".format(self.pid)) as f:
+        resident_pages = int(f.read().split()[1])
+      return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (IOError, OSError, ValueError, IndexError):
+      return 0
+
+  def terminate(self):
+    from ambari_commons import shell
+    logger.info("Stopping status command worker with pid={0}".format(self.pid))
+    try:
+      self.process.stdin.close()
+    except (IOError, OSError):
+      pass
+    deadline = time.time() + self.EXIT_TIMEOUT
+    while self.is_alive() and time.time() < deadline:
+      time.sleep(0.05)
+    if self.is_alive():
+      shell.kill_process_with_children(self.pid)
+    try:
+      self.process.wait()
+    except OSError:
+      pass
+
+
+class PythonWorkerPool(object):
+  """
+  Pool of pre-warmed python processes used for STATUS and SECURITY_STATUS commands.
+  A worker is health-checked before every command, and is recycled when it has
+  executed max_tasks commands, has grown above max_memory_mb, or has timed out.
+  """
+
+  def __init__(self, size, cache_dir, max_tasks=100, max_memory_mb=256, python_binary=None):
+    self.size = size
+    self.cache_dir = cache_dir
+    self.max_tasks = max_tasks
+    self.max_memory_mb = max_memory_mb
+    self.python_binary = python_binary or os.environ.get('PYTHON_EXE', sys.executable)
+    self.workers_lock = threading.RLock()
+    self.workers = []
+    # None values are free slots for which a worker has not been started yet
+    self.idle_workers = Queue.Queue()
+    for i in range(size):
+      self.idle_workers.put(None)
+
+  def create_worker(self):
+    """
+    Wrapper for unit testing
+    """
+    return PythonWorker(self.python_binary, self.cache_dir)
+
+  def acquire(self):
+    worker = self.idle_workers.get()
+    if worker is not None and not worker.ping():
+      logger.warn("Status command worker pid={0} failed health check, recycling it".format(worker.pid))
+      self.discard(worker)
+      worker = None
+
+    if worker is None:
+      try:
+        worker = self.create_worker()
+      except Exception:
+        self.idle_workers.put(None)
+        raise
+      with self.workers_lock:
+        self.workers.append(worker)
+    return worker
+
+  def release(self, worker):
+    if worker.tasks_done >= self.max_tasks:
+      logger.debug("Status command worker pid={0} executed {1} commands, recycling it".format(worker.pid, worker.tasks_done))
+      self.discard(worker)
+      self.idle_workers.put(None)
+    elif self.max_memory_mb and worker.memory_usage_mb() > self.max_memory_mb:
+      logger.info("Status command worker pid={0} uses more than {1}MB, recycling it".format(worker.pid, self.max_memory_mb))
+      self.discard(worker)
+      self.idle_workers.put(None)
+    else:
+      self.idle_workers.put(worker)
+
+  def discard(self, worker):
+    with self.workers_lock:
+      if worker in self.workers:
+        self.workers.remove(worker)
+    worker.terminate()
+
+  def execute(self, script, script_params, tmpoutfile, tmperrfile, override_output_files, timeout):
+    """
+    Runs the script in one of the workers.
+    Returns a tuple (exit code, True if the worker was killed due to timeout)
+    """
+    worker = self.acquire()
+    request = {
+      'script': script,
+      'params': script_params,
+      'tmpoutfile': tmpoutfile,
+      'tmperrfile': tmperrfile,
+      'override_output_files': override_output_files,
+    }
+    try:
+      worker.send(request)
+      response = worker.receive(timeout)
+    except (IOError, OSError, ValueError):
+      logger.exception("Status command worker pid={0} failed".format(worker.pid))
+      self.discard(worker)
+      self.idle_workers.put(None)
+      return 1, False
+
+    if response is None:
+      logger.error("Status command worker pid={0} timed out and will be killed".format(worker.pid))
+      self.discard(worker)
+      self.idle_workers.put(None)
+      return 1, True
+
+    worker.tasks_done += 1
+    self.release(worker)
+    return response['exitcode'], False
+
+  def shutdown(self):
+    with self.workers_lock:
+      workers = list(self.workers)
+      self.workers = []
+    for worker in workers:
+      worker.terminate()
+
+
+def drop_modules_under(path):
+  """
+  Removes modules loaded from the path (service scripts, params.py ...) so that
+  they are re-evaluated against the next command json
+  """
+  path = os.path.realpath(path) + os.sep
+  for name, module in sys.modules.items():
+    module_file = getattr(module, '__file__', None)
+    if module_file and os.path.realpath(module_file).startswith(path):
+      del sys.modules[name]
+
+
+def execute_script(script, script_params):
+  """
+  Runs the script in this interpreter the same way as 'python script params...' would, returns its exit code
+  """
+  old_argv = sys.argv
+  old_path = list(sys.path)
+  old_main = sys.modules.get('__main__')
+  returncode = 1
+
+  sys.argv = [script] + script_params
+  sys.path.insert(0, os.path.dirname(script))
+  try:
+    imp.load_source('__main__', script)
+  except SystemExit as e:
+    if e.code is None:
+      returncode = 0
+    elif isinstance(e.code, int):
+      returncode = e.code
+    else:
+      sys.stderr.write(str(e.code) + "\n")
+  except Exception:
+    traceback.print_exc()
+  else:
+    returncode = 0
+  finally:
+    sys.stdout.flush()
+    sys.stderr.flush()
+    sys.argv = old_argv
+    sys.path = old_path
+    if old_main is not None:
+      sys.modules['__main__'] = old_main
+  return returncode
+
+
+def run_script(request, cache_dir):
+  mode = 'w' if request['override_output_files'] else 'a'
+  out = open(request['tmpoutfile'], mode)
+  err = open(request['tmperrfile'], mode)
+  # descriptors are redirected too, so that output of child processes lands in the same files
+  os.dup2(out.fileno(), 1)
+  os.dup2(err.fileno(), 2)
+  try:
+    return execute_script(request['script'], request['params'])
+  finally:
+    drop_modules_under(cache_dir)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.dup2(devnull, 2)
+    os.close(devnull)
+    out.close()
+    err.close()
+
+
+def main():
+  cache_dir = sys.argv[1]
+  # keep the channel to the agent on a private descriptor, scripts and their children write to 1 and 2
+  channel = os.fdopen(os.dup(1), 'w')
+  devnull = os.open(os.devnull, os.O_WRONLY)
+  os.dup2(devnull, 1)
+  os.dup2(devnull, 2)
+  os.close(devnull)
+  sys.stdout = os.fdopen(1, 'w', 0)
+  sys.stderr = os.fdopen(2, 'w', 0)
+
+  for module in PREWARMED_MODULES:
+    try:
+      __import__(module)
+    except Exception:
+      pass
+
+  while True:
+    line = sys.stdin.readline()
+    if not line:
+      break
+    request = json.loads(line)
+    if 'ping' in request:
+      response = {'pong': os.getpid()}
+    else:
+      response = {'exitcode': run_script(request, cache_dir)}
+    channel.write(json.dumps(response) + "\n")
+    channel.flush()
+
+
+if __name__ == "__main__":
+  main()
@@ -29,6 +29,8 @@ class AlertCollector():
   """  
   def __init__(self):
     self.__buckets = {}
+    # uuid -> number of runs skipped since the alert was last collected
+    self.__overruns = {}
     self.__lock = threading.RLock()
 
 
@@ -37,12 +39,28 @@ class AlertCollector():
     try:
       if not cluster in self.__buckets:
         self.__buckets[cluster] = {}
-        
+
+      overruns = self.__overruns.pop(alert.get('uuid'), 0)
+      if overruns:
+        alert['overruns'] = overruns
+
       self.__buckets[cluster][alert['name']] = alert
     finally:
       self.__lock.release()
 
 
+  def record_overrun(self, alert_uuid):
+    """
+    Records that a run of the alert was skipped because the previous one was
+    still in progress. The count is reported with the next collected alert.
+    """
+    self.__lock.acquire()
+    try:
+      self.__overruns[alert_uuid] = self.__overruns.get(alert_uuid, 0) + 1
+    finally:
+      self.__lock.release()
+
+
   def remove(self, cluster, alert_name):
     """
     Removes the alert with the specified name if it exists in the dictionary
@@ -63,6 +81,7 @@ class AlertCollector():
     """
     self.__lock.acquire()
     try:
+      self.__overruns.pop(alert_uuid, None)
       for cluster,alert_map in self.__buckets.iteritems():
         for alert_name in alert_map.keys():
           alert = alert_map[alert_name]
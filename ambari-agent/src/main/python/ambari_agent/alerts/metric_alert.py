@@ -22,14 +22,13 @@ import imp
 import ambari_simplejson as json
 import logging
 import re
-import urllib2
 import uuid
 
 from  tempfile import gettempdir
 from alerts.base_alert import BaseAlert
-from ambari_commons.urllib_handlers import RefreshHeaderProcessor
 from resource_management.libraries.functions.get_port_from_url import get_port_from_url
 from resource_management.libraries.functions.curl_krb_request import curl_krb_request
+from resource_management.libraries.functions.jmx import jmx_cache, DEFAULT_JMX_CACHE_TTL
 from ambari_agent import Constants
 
 logger = logging.getLogger()
@@ -65,6 +64,11 @@ class MetricAlert(BaseAlert):
 
     self.config = config
 
+    # JMX responses are shared with the other metric alerts for that many seconds
+    self.jmx_cache_ttl = DEFAULT_JMX_CACHE_TTL
+    if config is not None and config.has_option('agent', 'alert_jmx_cache_ttl'):
+      self.jmx_cache_ttl = int(config.get('agent', 'alert_jmx_cache_ttl'))
+
   def _collect(self):
     if self.metric_info is None:
       raise Exception("Could not determine result. Specific metric collector is not defined.")
@@ -194,9 +198,8 @@ class MetricAlert(BaseAlert):
       url = "{0}://{1}:{2}/jmx?qry={3}".format(
         "https" if ssl else "http", host, str(port), jmx_property_key)
 
-      # use a customer header processor that will look for the non-standard
-      # "Refresh" header and attempt to follow the redirect
-      response = None
+      # responses are shared between the alerts querying the same url, the pooled
+      # connection follows the non-standard "Refresh" header like RefreshHeaderProcessor
       content = ''
       try:
         if kerberos_principal is not None and kerberos_keytab is not None and security_enabled:
@@ -207,26 +210,16 @@ class MetricAlert(BaseAlert):
           kerberos_executable_search_paths = self._get_configuration_value('{{kerberos-env/executable_search_paths}}')
           smokeuser = self._get_configuration_value('{{cluster-env/smokeuser}}')
 
-          response, error_msg, time_millis = curl_krb_request(tmp_dir, kerberos_keytab, kerberos_principal, url,
-            "metric_alert", kerberos_executable_search_paths, False, self.get_name(), smokeuser,
-            connection_timeout=self.curl_connection_timeout)
-
-          content = response
+          content = jmx_cache.get((url, kerberos_principal),
+            lambda: curl_krb_request(tmp_dir, kerberos_keytab, kerberos_principal, url,
+              "metric_alert", kerberos_executable_search_paths, False, self.get_name(), smokeuser,
+              connection_timeout=self.curl_connection_timeout)[0],
+            self.jmx_cache_ttl)
         else:
-          url_opener = urllib2.build_opener(RefreshHeaderProcessor())
-          response = url_opener.open(url, timeout=self.connection_timeout)
-          content = response.read()
+          content = jmx_cache.get_url(url, self.connection_timeout, self.jmx_cache_ttl)
       except Exception, exception:
         if logger.isEnabledFor(logging.DEBUG):
           logger.exception("[Alert][{0}] Unable to make a web request: {1}".format(self.get_name(), str(exception)))
-      finally:
-        # explicitely close the connection as we've seen python hold onto these
-        if response is not None:
-          try:
-            response.close()
-          except:
-            logger.debug("[Alert][{0}] Unable to close JMX URL connection to {1}".format
-              (self.get_name(), url))
 
       json_is_valid = True
       try:
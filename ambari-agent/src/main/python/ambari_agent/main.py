@@ -46,6 +46,8 @@ import HeartbeatHandlers
 from HeartbeatHandlers import bind_signal_handlers
 from ambari_commons.constants import AMBARI_SUDO_BINARY
 from resource_management.core.logger import Logger
+from resource_management.core import sudo_helper
+from resource_management.core.shell import SHELL_SESSIONS_ENV_VAR
 logger = logging.getLogger()
 alerts_logger = logging.getLogger('ambari_alerts')
 
@@ -220,6 +222,29 @@ def reset_agent(options):
 
 MAX_RETRIES = 10
 
+def start_sudo_helper(config):
+  """
+  Starts the privileged helper, which serves file operations of resource_management.core.sudo
+  when the agent is run as non-root. The helper exits together with the agent.
+  """
+  if os.geteuid() == 0 or not config.has_option('agent', 'sudo_helper_enabled') or \
+      config.get('agent', 'sudo_helper_enabled').lower() != 'true':
+    return
+
+  audit_log = os.path.join(os.path.dirname(AmbariConfig.AmbariConfig.getLogFile()), "ambari-sudo-helper.log")
+  socket_path = sudo_helper.start_helper(audit_log, AMBARI_SUDO_BINARY)
+  if socket_path:
+    logger.info("Started privileged helper on {0}".format(socket_path))
+  else:
+    logger.warn("Could not start privileged helper, privileged operations will be executed via {0}".format(AMBARI_SUDO_BINARY))
+
+def enable_shell_sessions(config):
+  """
+  Makes the scripts started by the agent run their shell commands in reusable bash sessions
+  """
+  if config.has_option('agent', 'shell_sessions') and config.get('agent', 'shell_sessions').lower() == 'true':
+    os.environ[SHELL_SESSIONS_ENV_VAR] = "true"
+
 # event - event, that will be passed to Controller and NetUtil to make able to interrupt loops form outside process
 # we need this for windows os, where no sigterm available
 def main(heartbeat_stop_callback=None):
@@ -279,6 +304,8 @@ def main(heartbeat_stop_callback=None):
 
   if not OSCheck.get_os_family() == OSConst.WINSRV_FAMILY:
     daemonize()
+    start_sudo_helper(config)
+    enable_shell_sessions(config)
 
   #
   # Iterate through the list of server hostnames and connect to the first active server
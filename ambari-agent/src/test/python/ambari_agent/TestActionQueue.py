@@ -17,13 +17,14 @@ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 See the License for the specific language governing permissions and
 limitations under the License.
 '''
-from Queue import Queue
+from Queue import Empty
 
 from unittest import TestCase
 from ambari_agent.LiveStatus import LiveStatus
 from ambari_agent.ActionQueue import ActionQueue
+from ambari_agent.CommandQueue import CommandQueue
 from ambari_agent.AmbariConfig import AmbariConfig
-import os, errno, time, pprint, tempfile, threading
+import os, errno, time, pprint, tempfile, threading, shutil
 import sys
 from threading import Thread
 import copy
@@ -36,6 +37,7 @@ from ambari_agent.ActualConfigHandler import ActualConfigHandler
 from ambari_agent.RecoveryManager import RecoveryManager
 from ambari_commons import OSCheck
 from only_for_platform import not_for_platform, os_distro_value, PLATFORM_WINDOWS, PLATFORM_LINUX
+from output_pipes import output_pipe
 
 import logging
 
@@ -239,11 +241,12 @@ class TestActionQueue(TestCase):
 
   @patch.object(AmbariConfig, "get_parallel_exec_option")
   @patch.object(ActionQueue, "process_command")
-  @patch.object(Queue, "get")
+  @patch.object(CommandQueue, "get")
   @patch.object(CustomServiceOrchestrator, "__init__")
   def test_ActionQueueStartStop(self, CustomServiceOrchestrator_mock,
                                 get_mock, process_command_mock, get_parallel_exec_option_mock):
     CustomServiceOrchestrator_mock.return_value = None
+    get_mock.return_value = (MagicMock(), 0)
     dummy_controller = MagicMock()
     config = MagicMock()
     get_parallel_exec_option_mock.return_value = 0
@@ -401,21 +404,14 @@ class TestActionQueue(TestCase):
     self.assertEqual(len(report['reports']), 0)
 
   @patch.object(OSCheck, "os_distribution", new = MagicMock(return_value = os_distro_value))
-  @patch("__builtin__.open")
   @patch.object(ActionQueue, "status_update_callback")
-  def test_execute_command(self, status_update_callback_mock, open_mock):
-    # Make file read calls visible
-    def open_side_effect(file, mode):
-      if mode == 'r':
-        file_mock = MagicMock()
-        file_mock.read.return_value = "Read from " + str(file)
-        return file_mock
-      else:
-        return self.original_open(file, mode)
-    open_mock.side_effect = open_side_effect
-
+  def test_execute_command(self, status_update_callback_mock):
     config = AmbariConfig()
-    tempdir = tempfile.gettempdir()
+    tempdir = tempfile.mkdtemp()
+    # Output of the command in progress
+    for file_name in ["errors-3.txt", "output-3.txt", "structured-out-3.json"]:
+      with open(os.path.join(tempdir, file_name), "w") as f:
+        f.write("Read from " + os.path.join(tempdir, file_name))
     config.set('agent', 'prefix', tempdir)
     config.set('agent', 'cache_dir', "/var/lib/ambari-agent/cache")
     config.set('agent', 'tolerate_download_failures', "true")
@@ -464,11 +460,19 @@ class TestActionQueue(TestCase):
                 'exitCode': 777}
     self.assertEqual(report['reports'][0], expected)
     self.assertTrue(actionQueue.tasks_in_progress_or_pending())
+    # unchanged output is not reported again
+    self.assertEqual(actionQueue.result()['reports'], [])
+    with open(os.path.join(tempdir, "output-3.txt"), "a") as f:
+      f.write("\nmore output")
+    report = actionQueue.result()
+    self.assertEqual(report['reports'][0]['stdout'],
+                     'Read from {0}\nmore output'.format(os.path.join(tempdir, "output-3.txt")))
 
   # Continue command execution
     unfreeze_flag.set()
     # wait until ready
-    while report['reports'][0]['status'] == 'IN_PROGRESS':
+    while len(report['reports']) == 0 or \
+                    report['reports'][0]['status'] == 'IN_PROGRESS':
       time.sleep(0.1)
       report = actionQueue.result()
     # check report
@@ -561,6 +565,7 @@ class TestActionQueue(TestCase):
     # now should not have reports (read complete/failed reports are deleted)
     report = actionQueue.result()
     self.assertEqual(len(report['reports']), 0)
+    shutil.rmtree(tempdir)
 
 
   @patch.object(OSCheck, "os_distribution", new = MagicMock(return_value = os_distro_value))
@@ -719,11 +724,12 @@ class TestActionQueue(TestCase):
 
   @patch.object(AmbariConfig, "get_parallel_exec_option")
   @patch.object(ActionQueue, "process_command")
-  @patch.object(Queue, "get")
+  @patch.object(CommandQueue, "get")
   @patch.object(CustomServiceOrchestrator, "__init__")
   def test_reset_queue(self, CustomServiceOrchestrator_mock,
                                 get_mock, process_command_mock, gpeo_mock):
     CustomServiceOrchestrator_mock.return_value = None
+    get_mock.side_effect = wait_for_command
     dummy_controller = MagicMock()
     dummy_controller.recovery_manager = RecoveryManager(tempfile.mktemp())
     config = MagicMock()
@@ -744,19 +750,26 @@ class TestActionQueue(TestCase):
 
   @patch.object(AmbariConfig, "get_parallel_exec_option")
   @patch.object(ActionQueue, "process_command")
-  @patch.object(Queue, "get")
+  @patch.object(CommandQueue, "get")
   @patch.object(CustomServiceOrchestrator, "__init__")
   def test_cancel(self, CustomServiceOrchestrator_mock,
                        get_mock, process_command_mock, gpeo_mock):
     CustomServiceOrchestrator_mock.return_value = None
+    get_mock.side_effect = wait_for_command
     dummy_controller = MagicMock()
     config = MagicMock()
     gpeo_mock.return_value = 0
     config.get_parallel_exec_option = gpeo_mock
     actionQueue = ActionQueue(config, dummy_controller)
+    actionQueue.customServiceOrchestrator = MagicMock()
     actionQueue.start()
     actionQueue.put([self.datanode_install_command, self.hbase_install_command])
     self.assertEqual(2, actionQueue.commandQueue.qsize())
+    actionQueue.cancel([{'target_task_id': self.datanode_install_command['taskId'], 'reason': 'reason'}])
+    self.assertEqual(1, actionQueue.commandQueue.qsize())
+    actionQueue.customServiceOrchestrator.cancel_command.assert_called_once_with(
+      self.datanode_install_command['taskId'], 'reason')
+    actionQueue.put([self.datanode_install_command])
     actionQueue.reset()
     self.assertTrue(actionQueue.commandQueue.empty())
     time.sleep(0.1)
@@ -774,6 +787,7 @@ class TestActionQueue(TestCase):
     config = MagicMock()
     gpeo_mock.return_value = 1
     config.get_parallel_exec_option = gpeo_mock
+    config.get_parallel_exec_max_actions.return_value = 3
     actionQueue = ActionQueue(config, dummy_controller)
     actionQueue.put([self.datanode_install_command, self.hbase_install_command])
     self.assertEqual(2, actionQueue.commandQueue.qsize())
@@ -782,10 +796,45 @@ class TestActionQueue(TestCase):
     actionQueue.stop()
     actionQueue.join()
     self.assertEqual(actionQueue.stopped(), True, 'Action queue is not stopped.')
+    self.assertEqual(3, len(actionQueue.workers))
     self.assertEqual(2, process_command_mock.call_count)
     process_command_mock.assert_any_calls([call(self.datanode_install_command), call(self.hbase_install_command)])
 
 
+  @patch("time.time")
+  @patch.object(ActionQueue, "process_command")
+  @patch.object(CustomServiceOrchestrator, "__init__")
+  def test_status_commands_first_and_metrics(self, CustomServiceOrchestrator_mock,
+                                             process_command_mock, time_mock):
+    CustomServiceOrchestrator_mock.return_value = None
+    time_mock.return_value = 100
+    actionQueue = ActionQueue(AmbariConfig(), MagicMock())
+    actionQueue.put([self.datanode_install_command])
+    actionQueue.put_status([self.status_command])
+    self.assertTrue(actionQueue.execution_commands_pending())
+
+    time_mock.return_value = 101
+    command, wait_time = actionQueue.commandQueue.get(False)
+    self.assertEqual(self.status_command, command)
+    actionQueue.process_queued_command(command, wait_time)
+    command, wait_time = actionQueue.commandQueue.get(False)
+    self.assertEqual(self.datanode_install_command, command)
+    self.assertFalse(actionQueue.execution_commands_pending())
+
+    def process_command(command):
+      time_mock.return_value = 104
+    process_command_mock.side_effect = process_command
+    actionQueue.process_queued_command(command, wait_time)
+    self.assertEqual(2, process_command_mock.call_count)
+
+    metrics = actionQueue.get_metrics()
+    self.assertEqual({'queuedCommands': 0, 'queuedStatusCommands': 0, 'runningCommands': 0,
+                      'maxParallelCommands': 1, 'completedCommands': 1,
+                      'averageWaitTime': 1000, 'maxWaitTime': 1000,
+                      'averageRunTime': 3000, 'maxRunTime': 3000}, metrics)
+    # metrics are reported once
+    self.assertEqual(0, actionQueue.get_metrics()['completedCommands'])
+
   @patch("time.sleep")
   @patch.object(OSCheck, "os_distribution", new=MagicMock(return_value=os_distro_value))
   @patch.object(StackVersionsFileHandler, "read_stack_version")
@@ -953,8 +1002,8 @@ class TestActionQueue(TestCase):
 
     execute_command = copy.deepcopy(self.background_command)
     actionQueue.put([execute_command])
-    actionQueue.processBackgroundQueueSafeEmpty();
-    actionQueue.processStatusCommandQueueSafeEmpty();
+    command, wait_time = actionQueue.commandQueue.get(False)
+    actionQueue.process_queued_command(command, wait_time)
     
     #assert that python execturor start
     self.assertTrue(runCommand_mock.called)
@@ -998,8 +1047,8 @@ class TestActionQueue(TestCase):
     actionQueue.on_background_command_complete_callback = wraped(actionQueue.on_background_command_complete_callback,
                                                                  None, command_complete_w)
     actionQueue.put([self.background_command])
-    actionQueue.processBackgroundQueueSafeEmpty();
-    actionQueue.processStatusCommandQueueSafeEmpty();
+    command, wait_time = actionQueue.commandQueue.get(False)
+    actionQueue.process_queued_command(command, wait_time)
     
     with lock:
       complete_done.wait(0.1)
@@ -1035,23 +1084,26 @@ class TestActionQueue(TestCase):
     },
   }
 
+def wait_for_command(*args, **kwargs):
+  # keeps the commands in the queue
+  time.sleep(0.01)
+  raise Empty()
+
 def patch_output_file(pythonExecutor):
   def windows_py(command, tmpout, tmperr):
     proc = MagicMock()
     proc.pid = 33
     proc.returncode = 0
-    with tmpout:
-      tmpout.write('process_out')
-    with tmperr:
-      tmperr.write('process_err')
+    proc.stdout = output_pipe('process_out')
+    proc.stderr = output_pipe('process_err')
     return proc
   def open_subprocess_files_win(fout, ferr, f):
     return MagicMock(), MagicMock()
-  def read_result_from_files(out_path, err_path, structured_out_path):
-    return 'process_out', 'process_err', '{"a": "b."}'
+  def read_structured_out(structured_out_path):
+    return '{"a": "b."}'
   pythonExecutor.launch_python_subprocess = windows_py
   pythonExecutor.open_subprocess_files = open_subprocess_files_win
-  pythonExecutor.read_result_from_files = read_result_from_files
+  pythonExecutor.read_structured_out = read_structured_out
 
 def wraped(func, before = None, after = None):
     def wrapper(*args, **kwargs):
@@ -20,6 +20,10 @@ limitations under the License.
 
 import copy
 import os
+import shutil
+import tempfile
+import threading
+import time
 
 from ambari_agent.AlertSchedulerHandler import AlertSchedulerHandler
 from ambari_agent.alerts.metric_alert import MetricAlert
@@ -208,3 +212,80 @@ class TestAlertSchedulerHandler(TestCase):
 
     self.assertTrue(scheduler._AlertSchedulerHandler__scheduler.start.called)
     scheduler.schedule_definition.assert_called_with(alert_mock)
+
+  def test_update_definitions_reschedules_changed_definitions(self):
+    def heartbeat(*uuids):
+      definitions = [{'name': uuid, 'uuid': uuid, 'interval': 1, 'enabled': True,
+                      'source': {'type': 'PORT', 'uri': 'http://c6401.ambari.apache.org:8080'}} for uuid in uuids]
+      return {'alertDefinitionCommands': [{'clusterName': 'c1', 'hostName': 'host', 'alertDefinitions': definitions,
+                                           'configurations': {}}]}
+
+    cache_dir = tempfile.mkdtemp()
+    try:
+      scheduler = AlertSchedulerHandler(cache_dir, TEST_PATH, TEST_PATH, TEST_PATH, 5, None, None, None)
+      scheduler.start()
+      scheduler.update_definitions(heartbeat('uuid1', 'uuid2'))
+      self.assertEquals(2, scheduler.get_job_count())
+
+      json_to_callable = scheduler._AlertSchedulerHandler__json_to_callable
+      scheduler._AlertSchedulerHandler__json_to_callable = Mock(side_effect=json_to_callable)
+      # the definition file is not read again
+      with patch("__builtin__.open", MagicMock()) as open_mock:
+        scheduler.update_definitions(heartbeat('uuid2', 'uuid3'))
+        self.assertEquals(1, open_mock.call_count)
+
+      self.assertEquals(['uuid2', 'uuid3'], sorted(job.name for job in
+                                                   scheduler._AlertSchedulerHandler__scheduler.get_jobs()))
+      self.assertEquals(1, scheduler._AlertSchedulerHandler__json_to_callable.call_count)
+      self.assertEquals('uuid3', scheduler._AlertSchedulerHandler__json_to_callable.call_args[0][2]['uuid'])
+    finally:
+      scheduler.stop()
+      shutil.rmtree(cache_dir)
+
+  def test_offsets_are_spread_over_interval(self):
+    scheduler = AlertSchedulerHandler(TEST_PATH, TEST_PATH, TEST_PATH, TEST_PATH, 5, None, None, None)
+    definitions = []
+    for i in range(20):
+      definition = PortAlert({'name': 'alert' + str(i), 'uuid': str(i), 'interval': 1}, {'type': 'PORT'})
+      definition.set_cluster('c1', 'c6401.ambari.apache.org')
+      definitions.append(definition)
+
+    offsets = [scheduler.get_offset(definition, 60) for definition in definitions]
+    self.assertTrue(all(0 <= offset < 60 for offset in offsets))
+    self.assertTrue(len(set(offsets)) > 1)
+    # the same host gets the same offsets every time
+    self.assertEqual(offsets, [scheduler.get_offset(definition, 60) for definition in definitions])
+
+  def test_overruns_are_skipped_and_reported(self):
+    scheduler = AlertSchedulerHandler(TEST_PATH, TEST_PATH, TEST_PATH, TEST_PATH, 5, None, None, None)
+    collector = scheduler.collector()
+    release = threading.Event()
+    started = threading.Event()
+
+    definition = ScriptAlert({'name': 'slow', 'uuid': 'uuid1', 'interval': 1}, {'type': 'SCRIPT'}, None)
+    definition.set_helpers(collector, None)
+    definition.set_cluster('c1', 'c6401.ambari.apache.org')
+
+    def collect():
+      started.set()
+      release.wait(5)
+      collector.put('c1', {'name': 'slow', 'uuid': 'uuid1'})
+    definition.collect = collect
+
+    job = scheduler._AlertSchedulerHandler__make_function(definition)
+    try:
+      job()
+      started.wait(5)
+      # the previous run is still in progress
+      job()
+      job()
+    finally:
+      release.set()
+      scheduler.stop()
+
+    for i in range(50):
+      alerts = collector.alerts()
+      if alerts:
+        break
+      time.sleep(.1)
+    self.assertEqual([{'name': 'slow', 'uuid': 'uuid1', 'overruns': 2}], alerts)
@@ -36,6 +36,7 @@ from ambari_agent.alerts.recovery_alert import RecoveryAlert
 from ambari_agent.apscheduler.scheduler import Scheduler
 from ambari_agent.ClusterConfiguration import ClusterConfiguration
 from ambari_commons.urllib_handlers import RefreshHeaderProcessor
+from resource_management.libraries.functions.jmx import jmx_cache
 
 from collections import namedtuple
 from mock.mock import MagicMock, patch
@@ -958,12 +959,33 @@ class TestAlerts(TestCase):
     self.assertTrue(http_conn.getresponse.called)
     self.assertTrue(http_response_mock.called)
 
-    # now we know that the refresh header is intercepting, reset the mocks
-    # and try with a METRIC alert
-    MagicMock.reset_mock(http_response_mock)
-    MagicMock.reset_mock(http_connection_mock)
+
+  @patch('httplib.HTTPConnection')
+  def test_metric_alert_follows_refresh_header(self, http_connection_mock):
+    """
+    Tests that METRIC alerts follow the refresh header over pooled connections
+    :param http_connection_mock:
+    :return:
+    """
+    jmx_cache.clear()
+    redirect_response = MagicMock(status=200, will_close=False)
+    redirect_response.getheader.return_value = "3; url=http://c6402.ambari.apache.org:80/jmx?qry=someJmxObject"
+    jmx_response = MagicMock(status=200, will_close=False)
+    jmx_response.getheader.return_value = None
+    jmx_response.read.return_value = '{"beans": [{"value": 1, "otherValue": 2}]}'
+
+    def create_connection(netloc, timeout):
+      connection = MagicMock(sock=None)
+      if netloc.startswith('c6401'):
+        connection.getresponse.return_value = redirect_response
+      else:
+        connection.getresponse.return_value = jmx_response
+      return connection
+
+    http_connection_mock.side_effect = create_connection
 
     definition_json = self._get_metric_alert_definition()
+    definition_json['source']['jmx']['property_list'] = ["someJmxObject/value", "someJmxObject/otherValue"]
 
     configuration = {'hdfs-site' :
       { 'dfs.datanode.http.address': 'c6401.ambari.apache.org:80'}
@@ -979,10 +1001,17 @@ class TestAlerts(TestCase):
 
     alert.collect()
 
-    self.assertFalse(response is None)
-    self.assertTrue(http_conn.request.called)
-    self.assertTrue(http_conn.getresponse.called)
-    self.assertTrue(http_response_mock.called)
+    self.assertEquals(['c6401.ambari.apache.org:80', 'c6402.ambari.apache.org:80'],
+                      [args[0] for args, kwargs in http_connection_mock.call_args_list])
+    alerts = collector.alerts()
+    self.assertEquals('OK', alerts[0]['state'])
+    self.assertEquals('(Unit Tests) OK: 1 2 102', alerts[0]['text'])
+
+    # the response is reused by the next run instead of being fetched again
+    alert.collect()
+    self.assertEquals(2, http_connection_mock.call_count)
+    self.assertEquals(1, jmx_response.read.call_count)
+    jmx_cache.clear()
 
 
   def test_urllib2_refresh_header_processor(self):
@@ -1243,7 +1272,7 @@ class TestAlerts(TestCase):
 
 
   def open_side_effect(self, file, mode):
-    if mode == 'w':
+    if mode in ('w', 'a'):
       file_mock = MagicMock()
       return file_mock
     else:
@@ -19,25 +19,25 @@ limitations under the License.
 '''
 
 import os
+import shutil
 import sys
+import tempfile
+
+import ambari_simplejson as json
 
 from ambari_agent.ClusterConfiguration import ClusterConfiguration
 
-from mock.mock import MagicMock, patch, mock_open, ANY
+from mock.mock import MagicMock, patch, mock_open
 from unittest import TestCase
 
 class TestClusterConfigurationCache(TestCase):
 
-  def setUp(self):
-    # save original open() method for later use
-    self.original_open = open
-
   def tearDown(self):
     sys.stdout == sys.__stdout__
 
 
   @patch("os.path.exists", new = MagicMock(return_value=True))
-  @patch("os.path.isfile", new = MagicMock(return_value=True))
+  @patch("os.path.isfile", new = MagicMock(side_effect=lambda path: path.endswith("configurations.json")))
   def test_cluster_configuration_cache_initialization(self):
     configuration_json = '{ "c1" : { "foo-site" : { "foo" : "bar", "foobar" : "baz" } } }'
     open_mock = mock_open(read_data=configuration_json)
@@ -56,48 +56,56 @@ class TestClusterConfigurationCache(TestCase):
     pass
 
 
-  @patch("ambari_simplejson.dump")
-  def test_cluster_configuration_update(self, json_dump_mock):
-    cluster_configuration = self.__get_cluster_configuration()
-
-    configuration = {'foo-site' :
-      { 'bar': 'rendered-bar', 'baz' : 'rendered-baz' }
-    }
-
-    file_mock = self.__update_cluster_configuration(cluster_configuration, configuration)
-    file_mock.assert_called_with(os.sep + "foo" + os.sep + "bar" + os.sep + "baz" + os.sep + "configurations.json", 'w')
-
-    json_dump_mock.assert_called_with({'c1': {'foo-site': {'baz': 'rendered-baz', 'bar': 'rendered-bar'}}}, ANY, indent=2)
-    pass
-
-  def __get_cluster_configuration(self):
-    """
-    Gets an instance of the cluster cache where the file read and write
-    operations have been mocked out
-    :return:
-    """
-    with patch("__builtin__.open") as open_mock:
-      open_mock.side_effect = self.open_side_effect
-      cluster_configuration = ClusterConfiguration(os.path.join(os.sep, "foo", "bar", "baz"))
-      return cluster_configuration
-
-
-  def __update_cluster_configuration(self, cluster_configuration, configuration):
-    """
-    Updates the configuration cache, using as mock file as the disk based
-    cache so that a file is not created during tests
-    :return:
-    """
-    with patch("__builtin__.open") as open_mock:
-      open_mock.side_effect = self.open_side_effect
+  def test_cluster_configuration_update(self):
+    cache_dir = tempfile.mkdtemp()
+    try:
+      cluster_configuration = ClusterConfiguration(cache_dir)
+      configuration = {'foo-site' :
+        { 'bar': 'rendered-bar', 'baz' : 'rendered-baz' }
+      }
       cluster_configuration._update_configurations("c1", configuration)
+      self.assertEqual('rendered-bar', cluster_configuration.get_configuration_value('c1', 'foo-site/bar'))
 
-    return open_mock
-
-
-  def open_side_effect(self, file, mode):
-    if mode == 'w':
-      file_mock = MagicMock()
-      return file_mock
-    else:
-      return self.original_open(file, mode)
+      # updates are appended to the journal, the same configurations only once
+      cluster_configuration._update_configurations("c1", configuration)
+      cluster_configuration._update_configurations("c1", {'foo-site' : { 'bar': 'updated-bar' }})
+      self.assertEqual('updated-bar', cluster_configuration.get_configuration_value('c1', 'foo-site/bar'))
+      self.assertEqual(None, cluster_configuration.get_configuration_value('c1', 'foo-site/baz'))
+      self.assertFalse(os.path.exists(os.path.join(cache_dir, "configurations.json")))
+      with open(os.path.join(cache_dir, "configurations.journal")) as f:
+        self.assertEqual(2, len(f.readlines()))
+
+      # a partially written update is ignored on load
+      with open(os.path.join(cache_dir, "configurations.journal"), "a") as f:
+        f.write('{"clusterName":"c1","configura')
+      cluster_configuration = ClusterConfiguration(cache_dir)
+      self.assertEqual('updated-bar', cluster_configuration.get_configuration_value('c1', 'foo-site/bar'))
+
+      # the torn line is cut off, so the next updates are loaded again
+      cluster_configuration._update_configurations("c1", {'foo-site' : { 'bar': 'after-restart' }})
+      with open(os.path.join(cache_dir, "configurations.journal")) as f:
+        self.assertEqual(3, len(f.readlines()))
+      cluster_configuration = ClusterConfiguration(cache_dir)
+      self.assertEqual('after-restart', cluster_configuration.get_configuration_value('c1', 'foo-site/bar'))
+    finally:
+      shutil.rmtree(cache_dir)
+
+
+  def test_journal_compaction(self):
+    cache_dir = tempfile.mkdtemp()
+    try:
+      cluster_configuration = ClusterConfiguration(cache_dir)
+      cluster_configuration.COMPACTION_THRESHOLD = 3
+      for i in range(4):
+        cluster_configuration._update_configurations("c" + str(i % 2), {'foo-site' : { 'foo': i }})
+
+      with open(os.path.join(cache_dir, "configurations.json")) as f:
+        self.assertEqual({'c0': {'foo-site': {'foo': 2}}, 'c1': {'foo-site': {'foo': 1}}}, json.load(f))
+      with open(os.path.join(cache_dir, "configurations.journal")) as f:
+        self.assertEqual(1, len(f.readlines()))
+
+      cluster_configuration = ClusterConfiguration(cache_dir)
+      self.assertEqual(2, cluster_configuration.get_configuration_value('c0', 'foo-site/foo'))
+      self.assertEqual(3, cluster_configuration.get_configuration_value('c1', 'foo-site/foo'))
+    finally:
+      shutil.rmtree(cache_dir)
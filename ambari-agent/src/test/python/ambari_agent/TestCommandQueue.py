@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+
+'''
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+import threading
+from Queue import Empty
+from unittest import TestCase
+from ambari_agent.CommandQueue import CommandQueue
+
+class TestCommandQueue(TestCase):
+
+  def test_priorities(self):
+    queue = CommandQueue([0, 1])
+    queue.put('install', 1)
+    queue.put('start', 1)
+    queue.put('status', 0)
+    self.assertEqual(3, queue.qsize())
+    self.assertEqual(2, queue.qsize([1]))
+
+    self.assertEqual('status', queue.get(False)[0])
+    self.assertEqual('install', queue.get(False)[0])
+    self.assertRaises(Empty, queue.get, False, None, [0])
+    self.assertEqual('start', queue.get(False, priorities=[1])[0])
+    self.assertTrue(queue.empty())
+    self.assertRaises(Empty, queue.get, True, 0.01)
+
+  def test_remove_and_clear(self):
+    queue = CommandQueue([0, 1], key=lambda command: command.get('taskId'))
+    queue.put({'taskId': 1}, 1)
+    queue.put({'taskId': 2}, 1)
+    queue.put({'taskId': 3}, 1)
+    queue.put({'taskId': 2}, 0)
+    queue.put({'status': 'command'}, 0)
+
+    self.assertEqual([{'taskId': 2}], queue.remove(2, [1]))
+    self.assertEqual([], queue.remove(2, [1]))
+    self.assertEqual(2, queue.qsize([1]))
+    self.assertEqual(2, queue.qsize([0]))
+    queue.clear([0])
+    self.assertEqual({1: 1, 3: 1}, dict((key, len(entries)) for key, entries in queue.index.items()))
+    self.assertEqual([1, 3], [queue.get(False)[0]['taskId'] for i in range(2)])
+    self.assertTrue(queue.empty())
+    self.assertEqual({}, queue.index)
+
+  def test_removed_entries_are_compacted(self):
+    queue = CommandQueue([0], key=lambda command: command)
+    queue.MIN_ENTRIES_TO_COMPACT = 2
+    for task_id in range(5):
+      queue.put(task_id, 0)
+    queue.remove(0)
+    queue.remove(2)
+    self.assertEqual(5, len(queue.lanes[0]))
+    # more removed entries than queued ones
+    queue.remove(3)
+    self.assertEqual(2, len(queue.lanes[0]))
+    queue.remove(4)
+    self.assertEqual(1, queue.qsize())
+    self.assertEqual(1, queue.get(False)[0])
+    self.assertRaises(Empty, queue.get, False)
+
+  def test_blocking_get(self):
+    queue = CommandQueue([0])
+    results = []
+    consumer = threading.Thread(target=lambda: results.append(queue.get()[0]))
+    consumer.start()
+    queue.put('command', 0)
+    consumer.join(5)
+    self.assertEqual(['command'], results)
+
+    # consumers are woken up when the queue is closed
+    consumer = threading.Thread(target=lambda: self.assertRaises(Empty, queue.get))
+    consumer.start()
+    queue.close()
+    consumer.join(5)
+    self.assertFalse(consumer.isAlive())
@@ -147,14 +147,12 @@ class TestCommandStatusDict(TestCase):
       }
     self.assertEquals(report, expected)
 
-  @patch("__builtin__.open")
-  def test_structured_output(self, open_mock):
+  def test_structured_output(self):
     callback_mock = MagicMock()
     commandStatuses = CommandStatusDict(callback_action = callback_mock)
-    file_mock = MagicMock(name = 'file_mock')
-    file_mock.__enter__.return_value = file_mock
-    file_mock.read.return_value = '{"var1":"test1", "var2":"test2"}'
-    open_mock.return_value = file_mock
+    structured_out_file = tempfile.NamedTemporaryFile(suffix='.json')
+    structured_out_file.write('{"var1":"test1", "var2":"test2"}')
+    structured_out_file.flush()
     command_in_progress1 = {
       'commandType': 'EXECUTION_COMMAND',
       'commandId': '1-1',
@@ -170,7 +168,7 @@ class TestCommandStatusDict(TestCase):
     command_in_progress1_report = {
       'status': 'IN_PROGRESS',
       'taskId': 5,
-      'structuredOut' : 'structured_out.tmp',
+      'structuredOut' : structured_out_file.name,
       }
     commandStatuses.put_command_status(command_in_progress1, command_in_progress1_report)
     report = commandStatuses.generate_report()
@@ -185,3 +183,48 @@ class TestCommandStatusDict(TestCase):
                     'actionId': '1-1', 'taskId': 5, 'exitCode': 777}]
       }
     self.assertEquals(report, expected)
+    structured_out_file.close()
+
+  def test_in_progress_output_is_reported_when_changed(self):
+    commandStatuses = CommandStatusDict(callback_action = MagicMock())
+    commandStatuses.OUTPUT_TAIL_SIZE = 30
+    tmpout = tempfile.NamedTemporaryFile()
+    tmperr = tempfile.NamedTemporaryFile()
+    command = {
+      'commandType': 'EXECUTION_COMMAND',
+      'commandId': '1-1',
+      'clusterName': u'cc',
+      'role': u'DATANODE',
+      'roleCommand': u'INSTALL',
+      'serviceName': u'HDFS',
+      'taskId': 5
+    }
+    commandStatuses.put_command_status(command, {'status': 'IN_PROGRESS', 'taskId': 5,
+                                                 'tmpout': tmpout.name, 'tmperr': tmperr.name,
+                                                 'structuredOut': tmpout.name + '.missing'})
+    tmpout.write("".join(["line %d\n" % i for i in range(20)]))
+    tmpout.flush()
+
+    reports = commandStatuses.generate_report()['reports']
+    self.assertEqual(1, len(reports))
+    # the last 30 bytes without the partial line
+    self.assertEqual("line 17\nline 18\nline 19", reports[0]['stdout'])
+    self.assertEqual("", reports[0]['stderr'])
+    self.assertEqual("{}", reports[0]['structuredOut'])
+    self.assertTrue(commandStatuses.has_in_progress_commands())
+
+    # unchanged output is not reported again
+    self.assertEqual([], commandStatuses.generate_report()['reports'])
+
+    tmperr.write("error\n")
+    tmperr.flush()
+    reports = commandStatuses.generate_report()['reports']
+    self.assertEqual("error\n", reports[0]['stderr'])
+    self.assertEqual("line 17\nline 18\nline 19", reports[0]['stdout'])
+
+    commandStatuses.put_command_status(command, {'status': 'COMPLETED', 'taskId': 5})
+    self.assertEqual([{'status': 'COMPLETED', 'taskId': 5}], commandStatuses.generate_report()['reports'])
+    self.assertFalse(commandStatuses.has_in_progress_commands())
+    self.assertEqual({}, commandStatuses.in_progress_outputs)
+    tmpout.close()
+    tmperr.close()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+
+'''
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+import copy
+import os
+import shutil
+import tempfile
+import time
+from unittest import TestCase
+
+import ambari_simplejson as json
+from ambari_agent.ConfigurationStore import ConfigurationStore
+from resource_management.core.exceptions import Fail
+from resource_management.libraries.script import Script
+from resource_management.libraries.script.config_dictionary import StoredConfigDictionary
+
+class TestConfigurationStore(TestCase):
+
+  def setUp(self):
+    self.tmp_dir = tempfile.mkdtemp()
+    self.store = ConfigurationStore(os.path.join(self.tmp_dir, "config_store"))
+
+  def tearDown(self):
+    shutil.rmtree(self.tmp_dir)
+
+  def test_payload_is_written_once(self):
+    digest = self.store.put({'b': '2', 'a': '1'})
+    path = self.store.get_path(digest)
+    self.assertEqual('{"a":"1","b":"2"}', open(path).read())
+    self.assertEqual(0600, os.stat(path).st_mode & 0777)
+
+    os.utime(path, (0, 0))
+    # the same content in another order has the same digest, the file is only touched
+    self.assertEqual(digest, self.store.put({'a': '1', 'b': '2'}))
+    self.assertTrue(time.time() - os.path.getmtime(path) < 60)
+    self.assertNotEqual(digest, self.store.put({'a': '1'}))
+    self.assertEqual(2, len(os.listdir(self.store.store_dir)))
+
+  def test_scripts_load_stored_configurations(self):
+    command = {
+      'roleCommand': 'START',
+      'configurations': {'hdfs-site': {'dfs.replication': '3'}, 'core-site': {}},
+      'storedConfigurations': {
+        'dir': self.store.store_dir,
+        'configurations': {
+          'hdfs-site': self.store.put({'dfs.replication': '3'}),
+          'core-site': self.store.put({}),
+          'missing-site': '0' * 40,
+        }
+      }
+    }
+    del command['configurations']
+    command_file = os.path.join(self.tmp_dir, "command-1.json")
+    with open(command_file, "w") as f:
+      json.dump(command, f)
+
+    config = Script.load_config(command_file)
+    configurations = config['configurations']
+    self.assertTrue(isinstance(configurations, StoredConfigDictionary))
+    self.assertTrue('hdfs-site' in configurations)
+    self.assertTrue(configurations.get('core-site') is configurations['core-site'])
+    self.assertEqual(None, configurations.get('yarn-site'))
+    # values are converted the same way as for the inline configurations
+    self.assertEqual(3, configurations['hdfs-site']['dfs.replication'])
+    self.assertRaises(Fail, configurations.__getitem__, 'missing-site')
+    self.assertFalse('storedConfigurations' in config)
+
+  def test_stored_configurations_are_loaded_by_dict_and_copy(self):
+    digests = {'hdfs-site': self.store.put({'dfs.replication': '3'}), 'core-site': self.store.put({})}
+    expected = {'hdfs-site': {'dfs.replication': '3'}, 'core-site': {}}
+
+    configurations = StoredConfigDictionary(self.store.store_dir, digests)
+    self.assertEqual(expected, dict(configurations))
+    self.assertEqual(expected, copy.copy(StoredConfigDictionary(self.store.store_dir, digests)))
+    self.assertEqual(expected, copy.deepcopy(StoredConfigDictionary(self.store.store_dir, digests)))
+    self.assertEqual(expected, StoredConfigDictionary(self.store.store_dir, digests).copy())
+    self.assertEqual(sorted(expected.items()), sorted(StoredConfigDictionary(self.store.store_dir, digests).items()))
+    self.assertRaises(Fail, configurations.__setitem__, 'core-site', {})
@@ -18,6 +18,7 @@ See the License for the specific language governing permissions and
 limitations under the License.
 '''
 import ConfigParser
+import json
 from multiprocessing.pool import ThreadPool
 import os
 
@@ -41,6 +42,9 @@ from ambari_agent.BackgroundCommandExecutionHandle import BackgroundCommandExecu
 from ambari_agent.CustomServiceOrchestrator import CustomServiceOrchestrator
 from ambari_agent.FileCache import FileCache
 from ambari_agent.PythonExecutor import PythonExecutor
+from ambari_agent import PythonScriptChain
+from ambari_agent.PythonPooledExecutor import PythonPooledExecutor
+from ambari_agent.PythonReflectiveExecutor import PythonReflectiveExecutor
 from ambari_commons import OSCheck
 from only_for_platform import get_platform, os_distro_value, PLATFORM_WINDOWS
 
@@ -74,14 +78,12 @@ class TestCustomServiceOrchestrator(TestCase):
 
 
   @patch.object(OSCheck, "os_distribution", new = MagicMock(return_value = os_distro_value))
-  @patch.object(CustomServiceOrchestrator, 'decompressClusterHostInfo')
   @patch("ambari_agent.hostname.public_hostname")
   @patch("os.path.isfile")
   @patch("os.unlink")
   @patch.object(FileCache, "__init__")
   def test_dump_command_to_json(self, FileCache_mock, unlink_mock,
-                                isfile_mock, hostname_mock,
-                                decompress_cluster_host_info_mock):
+                                isfile_mock, hostname_mock):
     FileCache_mock.return_value = None
     hostname_mock.return_value = "test.hst"
     command = {
@@ -100,12 +102,7 @@ class TestCustomServiceOrchestrator(TestCase):
                          'all_ping_ports': ['8670:0,1']},
       'hostLevelParams':{}
     }
-    
-    decompress_cluster_host_info_mock.return_value = {'namenode_host' : ['h2.hortonworks.com'],
-                         'slave_hosts'   : ['h1.hortonworks.com', 'h2.hortonworks.com'],
-                         'all_hosts'     : ['h1.hortonworks.com', 'h2.hortonworks.com'],
-                         'all_ping_ports': ['8670', '8670']}
-    
+
     config = AmbariConfig().getConfig()
     tempdir = tempfile.gettempdir()
     config.set('agent', 'prefix', tempdir)
@@ -119,18 +116,31 @@ class TestCustomServiceOrchestrator(TestCase):
     if get_platform() != PLATFORM_WINDOWS:
       self.assertEqual(oct(os.stat(json_file).st_mode & 0777), '0600')
     self.assertTrue(json_file.endswith("command-3.json"))
-    self.assertTrue(decompress_cluster_host_info_mock.called)
+    # host lists are kept in the range encoding
+    with open(json_file) as f:
+      dumped_command = json.load(f)
+    self.assertTrue(dumped_command['compressedClusterHostInfo'])
+    self.assertEqual(['0', '1'], dumped_command['clusterHostInfo']['slave_hosts'])
+    # configurations are referenced from the configuration store
+    self.assertFalse('configurations' in dumped_command)
+    stored_configurations = dumped_command['storedConfigurations']
+    self.assertEqual(orchestrator.configuration_store.store_dir, stored_configurations['dir'])
+    digest = stored_configurations['configurations']['global']
+    self.assertEqual({}, json.load(open(orchestrator.configuration_store.get_path(digest))))
+    self.assertEqual({'global' : {}}, command['configurations'])
     os.unlink(json_file)
     # Test dumping STATUS_COMMAND
     command['commandType']='STATUS_COMMAND'
-    decompress_cluster_host_info_mock.reset_mock()
     json_file = orchestrator.dump_command_to_json(command)
     self.assertTrue(os.path.exists(json_file))
     self.assertTrue(os.path.getsize(json_file) > 0)
     if get_platform() != PLATFORM_WINDOWS:
       self.assertEqual(oct(os.stat(json_file).st_mode & 0777), '0600')
     self.assertTrue(json_file.endswith("status_command.json"))
-    self.assertFalse(decompress_cluster_host_info_mock.called)
+    # the same status command is not dumped again
+    unlink_mock.reset_mock()
+    self.assertEqual(json_file, orchestrator.dump_command_to_json(command))
+    self.assertFalse(unlink_mock.called)
     os.unlink(json_file)
     # Testing side effect of dump_command_to_json
     self.assertEquals(command['public_hostname'], "test.hst")
@@ -303,6 +313,61 @@ class TestCustomServiceOrchestrator(TestCase):
 
     pass
 
+
+  @patch.object(CustomServiceOrchestrator, "resolve_script_path")
+  @patch.object(CustomServiceOrchestrator, "resolve_hook_script_path")
+  @patch.object(FileCache, "get_host_scripts_base_dir")
+  @patch.object(FileCache, "get_service_base_dir")
+  @patch.object(FileCache, "get_hook_base_dir")
+  @patch.object(CustomServiceOrchestrator, "dump_command_to_json")
+  @patch.object(PythonExecutor, "run_file")
+  @patch.object(FileCache, "__init__")
+  def test_runCommand_single_process_hooks(self, FileCache_mock,
+                                           run_file_mock, dump_command_to_json_mock,
+                                           get_hook_base_dir_mock, get_service_base_dir_mock,
+                                           get_host_scripts_base_dir_mock,
+                                           resolve_hook_script_path_mock,
+                                           resolve_script_path_mock):
+    FileCache_mock.return_value = None
+    command = {
+      'role' : 'REGION_SERVER',
+      'hostLevelParams' : {
+        'jdk_location' : 'some_location'
+      },
+      'commandParams': {
+        'script_type': 'PYTHON',
+        'script': 'scripts/hbase_regionserver.py',
+        'command_timeout': '600',
+      },
+      'taskId' : '3',
+      'roleCommand': 'START'
+    }
+    dump_command_to_json_mock.return_value = "/command-3.json"
+    resolve_script_path_mock.return_value = "/basedir/scriptpath"
+    resolve_hook_script_path_mock.side_effect = lambda hook_dir, prefix, command_name, script_type: \
+      ('/hooks_dir/{0}-START/scripts/hook.py'.format(prefix), '/hooks_dir/{0}-START'.format(prefix))
+    get_service_base_dir_mock.return_value = "/basedir/"
+    run_file_mock.return_value = {
+        'stdout' : 'sss',
+        'stderr' : 'eee',
+        'exitcode': 0,
+      }
+    self.config.set('agent', 'single_process_hooks', 'true')
+    orchestrator = CustomServiceOrchestrator(self.config, MagicMock())
+
+    ret = orchestrator.runCommand(command, "out.txt", "err.txt")
+    self.assertEqual(ret['exitcode'], 0)
+    self.assertEqual(run_file_mock.call_count, 1)
+    args = run_file_mock.call_args[0]
+    self.assertEqual(PythonScriptChain.CHAIN_SCRIPT, args[0])
+    self.assertEqual(['START', '/command-3.json', args[5], args[1][3], orchestrator.exec_tmp_dir,
+                      '/hooks_dir/before-START/scripts/hook.py', '/hooks_dir/before-START',
+                      '/basedir/scriptpath', '/basedir/',
+                      '/hooks_dir/after-START/scripts/hook.py', '/hooks_dir/after-START'], args[1])
+    # the timeout covers all the phases
+    self.assertEqual(1800, args[4])
+    self.assertTrue(args[8])
+
   @patch("ambari_commons.shell.kill_process_with_children")
   @patch.object(CustomServiceOrchestrator, "resolve_script_path")
   @patch.object(CustomServiceOrchestrator, "resolve_hook_script_path")
@@ -433,7 +498,8 @@ class TestCustomServiceOrchestrator(TestCase):
     actionQueue.on_background_command_complete_callback = TestActionQueue.wraped(actionQueue.on_background_command_complete_callback, command_complete_w, None)
     execute_command = copy.deepcopy(TestActionQueue.TestActionQueue.background_command)
     actionQueue.put([execute_command])
-    actionQueue.processBackgroundQueueSafeEmpty()
+    command, wait_time = actionQueue.commandQueue.get(False)
+    actionQueue.process_queued_command(command, wait_time)
 
     time.sleep(.1)
 
@@ -447,7 +513,10 @@ class TestCustomServiceOrchestrator(TestCase):
     with lock:
       self.assertTrue(complete_was_called.has_key('visited'))
 
-    time.sleep(.1)
+    # wait for the background thread to report the result
+    deadline = time.time() + 5
+    while actionQueue.commandStatuses.get_command_status(19)['status'] == ActionQueue.IN_PROGRESS_STATUS and time.time() < deadline:
+      time.sleep(.01)
 
     runningCommand = actionQueue.commandStatuses.get_command_status(19)
     self.assertTrue(runningCommand is not None)
@@ -544,6 +613,21 @@ class TestCustomServiceOrchestrator(TestCase):
     status = orchestrator.requestComponentStatus(status_command)
     self.assertEqual(runCommand_mock.return_value, status)
 
+  @patch.object(FileCache, "__init__")
+  def test_get_py_executor(self, FileCache_mock):
+    FileCache_mock.return_value = None
+    dummy_controller = MagicMock()
+    orchestrator = CustomServiceOrchestrator(self.config, dummy_controller)
+    self.assertEqual(None, orchestrator.status_workers_pool)
+    self.assertTrue(isinstance(orchestrator.get_py_executor("STATUS"), PythonReflectiveExecutor))
+    self.assertFalse(isinstance(orchestrator.get_py_executor("START"), PythonReflectiveExecutor))
+
+    self.config.set('agent', 'status_command_workers', '2')
+    orchestrator = CustomServiceOrchestrator(self.config, dummy_controller)
+    self.assertEqual(2, orchestrator.status_workers_pool.size)
+    self.assertTrue(isinstance(orchestrator.get_py_executor("SECURITY_STATUS"), PythonPooledExecutor))
+    self.assertFalse(isinstance(orchestrator.get_py_executor("START"), PythonPooledExecutor))
+
   @patch.object(CustomServiceOrchestrator, "runCommand")
   @patch.object(FileCache, "__init__")
   def test_requestComponentSecurityState(self, FileCache_mock, runCommand_mock):
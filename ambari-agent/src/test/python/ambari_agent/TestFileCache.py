@@ -31,6 +31,7 @@ from threading import Thread
 from ambari_agent.FileCache import FileCache, CachingException
 from ambari_agent.AmbariConfig import AmbariConfig
 from mock.mock import MagicMock, patch
+from only_for_platform import not_for_platform, PLATFORM_WINDOWS
 import StringIO
 import sys
 import shutil
@@ -139,6 +140,8 @@ class TestFileCache(TestCase):
   @patch.object(FileCache, "invalidate_directory")
   @patch.object(FileCache, "unpack_archive")
   @patch.object(FileCache, "write_hash_sum")
+  @patch.object(FileCache, "write_manifest", new=MagicMock())
+  @patch.object(FileCache, "swap_directory", new=MagicMock())
   def test_provide_directory(self, write_hash_sum_mock, unpack_archive_mock,
                              invalidate_directory_mock,
                              read_hash_sum_mock, fetch_url_mock,
@@ -268,22 +271,38 @@ class TestFileCache(TestCase):
         'http://localhost:8080/resources//stacks/HDP/2.1.1/hooks/archive.zip')
 
 
-  @patch("urllib2.OpenerDirector.open")
-  def test_fetch_url(self, urlopen_mock):
+  @patch("httplib.HTTPConnection")
+  def test_fetch_url(self, connection_mock):
     fileCache = FileCache(self.config)
     remote_url = "http://dummy-url/"
     # Test normal download
     test_str = 'abc' * 100000 # Very long string
     test_string_io = StringIO.StringIO(test_str)
     test_buffer = MagicMock()
+    test_buffer.status = 200
+    test_buffer.will_close = False
     test_buffer.read.side_effect = test_string_io.read
-    urlopen_mock.return_value = test_buffer
+    connection_mock.return_value.getresponse.return_value = test_buffer
 
     memory_buffer = fileCache.fetch_url(remote_url)
 
     self.assertEquals(memory_buffer.getvalue(), test_str)
     self.assertEqual(test_buffer.read.call_count, 20) # depends on buffer size
+    connection_mock.return_value.request.assert_called_with("GET", "/")
+
+    # Test that the connection is kept alive and reused
+    test_buffer.read.side_effect = StringIO.StringIO("abc").read
+    self.assertEquals(fileCache.fetch_url("http://dummy-url/.hash").getvalue(), "abc")
+    self.assertEquals(connection_mock.call_count, 1)
+    connection_mock.return_value.request.assert_called_with("GET", "/.hash")
+
+    # Test error response
+    test_buffer.read.side_effect = StringIO.StringIO("Not found").read
+    test_buffer.status = 404
+    self.assertRaises(CachingException, fileCache.fetch_url, remote_url)
+
     # Test exception handling
+    test_buffer.status = 200
     test_buffer.read.side_effect = self.exc_side_effect
     try:
       fileCache.fetch_url(remote_url)
@@ -294,6 +313,89 @@ class TestFileCache(TestCase):
       self.fail('Unexpected exception thrown:' + str(e))
 
 
+  @patch.object(FileCache, "fetch_url")
+  def test_provide_directory_changed_files(self, fetch_url_mock):
+    cache_dir = tempfile.mkdtemp()
+    try:
+      full_path = os.path.join(cache_dir, "custom_actions")
+      os.makedirs(os.path.join(full_path, "scripts"))
+      with open(os.path.join(full_path, "scripts", "changed.py"), "w") as f:
+        f.write("old")
+      with open(os.path.join(full_path, "scripts", "same.py"), "w") as f:
+        f.write("same")
+      with open(os.path.join(full_path, "other.py"), "w") as f:
+        f.write("other")
+      with open(os.path.join(full_path, "removed.py"), "w") as f:
+        f.write("removed")
+      fileCache = FileCache(self.config)
+      fileCache.write_hash_sum(full_path, "hash1")
+      fileCache.write_manifest(full_path, fileCache.count_file_hash_sums(full_path))
+
+      remote_manifest = {
+        "scripts/changed.py": "ca527369d9e8c1e081558bd92f90f65c4eb77e21", # sha1 of "new content"
+        "scripts/same.py": fileCache.count_file_hash_sums(full_path)["scripts/same.py"],
+        "scripts/added.py": "ca527369d9e8c1e081558bd92f90f65c4eb77e21",
+        "other.py": fileCache.count_file_hash_sums(full_path)["other.py"],
+      }
+      manifest_content = "".join("{0} {1}\n".format(h, p) for p, h in remote_manifest.items())
+      responses = {
+        "server/custom_actions/.hash": "hash2",
+        "server/custom_actions/.manifest": manifest_content,
+        "server/custom_actions/scripts/changed.py": "new content",
+        "server/custom_actions/scripts/added.py": "new content",
+      }
+      fetch_url_mock.side_effect = lambda url: StringIO.StringIO(responses[url])
+
+      res = fileCache.provide_directory(cache_dir, "custom_actions", "server")
+
+      self.assertEquals(full_path, res)
+      self.assertEquals(remote_manifest, fileCache.count_file_hash_sums(full_path))
+      self.assertEquals(remote_manifest, fileCache.read_manifest(full_path))
+      self.assertEquals("hash2", fileCache.read_hash_sum(full_path))
+      self.assertFalse(os.path.exists(os.path.join(full_path, "removed.py")))
+      self.assertFalse(os.path.exists(fileCache.get_staging_directory(full_path)))
+      fetched = sorted(c[0][0] for c in fetch_url_mock.call_args_list)
+      # unchanged files are not downloaded
+      self.assertEquals(["server/custom_actions/.hash", "server/custom_actions/.manifest",
+                         "server/custom_actions/scripts/added.py",
+                         "server/custom_actions/scripts/changed.py"], fetched)
+    finally:
+      shutil.rmtree(cache_dir)
+
+
+  @not_for_platform(PLATFORM_WINDOWS)
+  def test_swap_directory(self):
+    fileCache = FileCache(self.config)
+    cache_dir = tempfile.mkdtemp()
+    try:
+      target = os.path.join(cache_dir, "package")
+      # a plain directory left by an older agent
+      os.makedirs(os.path.join(target, "scripts"))
+      for version in ["1", "2"]:
+        staging = fileCache.get_staging_directory(target)
+        os.makedirs(staging)
+        with open(os.path.join(staging, "version"), "w") as fh:
+          fh.write(version)
+        fileCache.swap_directory(staging, target)
+
+        self.assertTrue(os.path.islink(target))
+        with open(os.path.join(target, "version")) as fh:
+          self.assertEquals(version, fh.read())
+        # only the current version is kept
+        self.assertEquals(["package", os.readlink(target)], sorted(os.listdir(cache_dir)))
+    finally:
+      shutil.rmtree(cache_dir)
+
+
+  def test_parse_manifest_rejects_unsafe_paths(self):
+    fileCache = FileCache(self.config)
+    self.assertEquals({"scripts/a..b.py": "h1", "c.py": "h2"},
+                      fileCache.parse_manifest("h1 scripts/a..b.py\n\nh2 c.py\n"))
+    for path in ["../etc/passwd", "scripts/../../x.py", "/etc/passwd", "scripts\\..\\..\\x.py"]:
+      self.assertRaises(CachingException, fileCache.parse_manifest, "h1 ok.py\nh2 {0}\n".format(path))
+    self.assertRaises(CachingException, fileCache.parse_manifest, "malformed\n")
+
+
   def test_read_write_hash_sum(self):
     tmpdir = tempfile.mkdtemp()
     dummyhash = "DUMMY_HASH"
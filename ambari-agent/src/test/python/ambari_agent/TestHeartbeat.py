@@ -71,7 +71,8 @@ class TestHeartbeat(TestCase):
     self.assertEquals(result['nodeStatus']['cause'], "NONE")
     self.assertEquals(result['nodeStatus']['status'], "HEALTHY")
     # result may or may NOT have an agentEnv structure in it
-    self.assertEquals((len(result) is 6) or (len(result) is 7), True)
+    self.assertEquals((len(result) is 7) or (len(result) is 8), True)
+    self.assertEquals(result['actionQueueMetrics']['queuedCommands'], 0)
     self.assertEquals(not heartbeat.reports, True, "Heartbeat should not contain task in progress")
 
   @patch("subprocess.Popen")
@@ -175,6 +176,10 @@ class TestHeartbeat(TestCase):
                   {'status': 'HEALTHY',
                    'cause': 'NONE'},
                 'recoveryReport': {'summary': 'DISABLED'},
+                'actionQueueMetrics': {'queuedCommands': 0, 'queuedStatusCommands': 0,
+                                       'runningCommands': 0, 'maxParallelCommands': 1,
+                                       'completedCommands': 0, 'averageWaitTime': 0, 'maxWaitTime': 0,
+                                       'averageRunTime': 0, 'maxRunTime': 0},
                 'timestamp': 'timestamp', 'hostname': 'hostname',
                 'responseId': 10, 'reports': [
       {'status': 'IN_PROGRESS', 'roleCommand': u'INSTALL',
@@ -19,20 +19,23 @@ limitations under the License.
 '''
 
 import pprint
+import shutil
 
 from unittest import TestCase
+import os
 import threading
 import tempfile
 import time
 from threading import Thread
 
-from ambari_agent.PythonExecutor import PythonExecutor
+from ambari_agent.PythonExecutor import PythonExecutor, OutputCapture
 from ambari_agent.AmbariConfig import AmbariConfig
 from mock.mock import MagicMock, patch
 from ambari_commons import OSCheck
 from only_for_platform import os_distro_value
+from output_pipes import output_pipe
 
-@patch.object(PythonExecutor, "open_subprocess_files", new=MagicMock(return_value =("", "")))
+@patch.object(PythonExecutor, "open_subprocess_files", new=MagicMock(return_value =(MagicMock(), MagicMock())))
 class TestPythonExecutor(TestCase):
 
   @patch.object(OSCheck, "os_distribution", new = MagicMock(return_value = os_distro_value))
@@ -134,6 +137,48 @@ class TestPythonExecutor(TestCase):
                                'structuredOut': {}})
     self.assertTrue(callback_method.called)
 
+  @patch.object(OSCheck, "os_distribution", new = MagicMock(return_value = os_distro_value))
+  def test_output_is_captured_from_pipes(self):
+    executor = PythonExecutor("/tmp", AmbariConfig())
+    tmpdir = tempfile.mkdtemp()
+    tmpoutfile = os.path.join(tmpdir, "output.txt")
+    tmperrfile = os.path.join(tmpdir, "errors.txt")
+    tmpstructuredoutfile = os.path.join(tmpdir, "structured-out.json")
+    script = os.path.join(tmpdir, "script.py")
+    with open(script, "w") as f:
+      f.write("import sys\n"
+              "for i in range(1000):\n"
+              "  print 'line %d' % i\n"
+              "sys.stderr.write('error')\n"
+              "open(sys.argv[1], 'w').write('{\"a\": \"b\"}')\n"
+              "sys.exit(3)\n")
+
+    executor.open_subprocess_files = lambda out, err, override: (open(out, 'w'), open(err, 'w'))
+    result = executor.run_file(script, [tmpstructuredoutfile], tmpoutfile, tmperrfile, 5,
+                               tmpstructuredoutfile, MagicMock(), "1-1", log_info_on_failure=False)
+
+    # the whole output is reported
+    self.assertEquals({'exitcode': 3, 'stdout': '\n'.join('line %d' % i for i in range(1000)), 'stderr': 'error',
+                       'structuredOut': {'a': 'b'}}, result)
+    # the whole output is teed to the files
+    self.assertEquals(1000, len(open(tmpoutfile).readlines()))
+    self.assertEquals('error', open(tmperrfile).read())
+    shutil.rmtree(tmpdir)
+
+  def test_output_capture(self):
+    output_file = MagicMock()
+    capture = OutputCapture(output_pipe(''), output_file)
+    capture.write("first\nsec")
+    capture.write("ond\n")
+    self.assertEquals("first\nsecond\n", capture.getvalue())
+    self.assertEquals(2, output_file.write.call_count)
+
+    capture = OutputCapture(output_pipe('a\nb\nc'), output_file)
+    capture.start()
+    capture.join(5)
+    self.assertEquals("a\nb\nc", capture.getvalue())
+    self.assertTrue(output_file.close.called)
+
   @patch.object(OSCheck, "os_distribution", new = MagicMock(return_value = os_distro_value))
   def test_is_successfull(self):
     executor = PythonExecutor("/tmp", AmbariConfig().getConfig())
@@ -173,7 +218,11 @@ class TestPythonExecutor(TestCase):
     tmperr = None
     pid=-1
 
-    def communicate(self):
+    def __init__(self):
+      self.stdout = output_pipe('')
+      self.stderr = output_pipe('')
+
+    def wait(self):
       self.started_event.set()
 
       self.should_finish_event.wait()
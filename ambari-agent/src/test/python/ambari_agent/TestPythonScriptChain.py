@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+
+'''
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from unittest import TestCase
+
+from ambari_agent import PythonScriptChain
+from only_for_platform import not_for_platform, PLATFORM_WINDOWS
+
+
+@not_for_platform(PLATFORM_WINDOWS)
+class TestPythonScriptChain(TestCase):
+
+  def setUp(self):
+    self.tmp_dir = tempfile.mkdtemp()
+    self.json_path = os.path.join(self.tmp_dir, "command-1.json")
+    with open(self.json_path, "w") as f:
+      f.write('{"hostLevelParams": {"custom_command": "START"}}')
+    self.structured_out_path = os.path.join(self.tmp_dir, "structured-out-1.json")
+
+  def tearDown(self):
+    shutil.rmtree(self.tmp_dir)
+
+  def create_phase(self, name, exitcode=0):
+    base_dir = os.path.join(self.tmp_dir, name)
+    scripts_dir = os.path.join(base_dir, "scripts")
+    os.makedirs(scripts_dir)
+    # every phase has its own params module
+    with open(os.path.join(scripts_dir, "params.py"), "w") as f:
+      f.write("name = '{0}'\n".format(name))
+    script = os.path.join(scripts_dir, "script.py")
+    with open(script, "w") as f:
+      f.write("import sys\n"
+              "import params\n"
+              "from resource_management.libraries.script.script import Script\n"
+              "config = Script.load_config(sys.argv[2])\n"
+              "print params.name, sys.argv[1], sys.argv[3] == '{0}', Script.preloaded_config[1] == config\n"
+              "sys.exit({1})\n".format(base_dir, exitcode))
+    return script, base_dir
+
+  def run_chain(self, py_file_list):
+    params = PythonScriptChain.chain_params("START", self.json_path, self.structured_out_path, "INFO",
+                                            self.tmp_dir, py_file_list)
+    process = subprocess.Popen([sys.executable, PythonScriptChain.CHAIN_SCRIPT] + params,
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               env=dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path)))
+    out, err = process.communicate()
+    return process.returncode, out
+
+  def test_phases_run_in_one_process(self):
+    py_file_list = [self.create_phase("before-START"), self.create_phase("service"),
+                    self.create_phase("after-START")]
+    returncode, out = self.run_chain(py_file_list)
+    self.assertEqual(0, returncode)
+    self.assertEqual("before-START START True True\n"
+                     "service START True True\n"
+                     "after-START START True True\n", out)
+
+  def test_failed_phase_stops_the_chain(self):
+    py_file_list = [self.create_phase("before-START"), self.create_phase("service", exitcode=3),
+                    self.create_phase("after-START")]
+    returncode, out = self.run_chain(py_file_list)
+    self.assertEqual(3, returncode)
+    self.assertEqual("before-START START True True\n"
+                     "service START True True\n", out)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+
+'''
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from ambari_agent.PythonWorkerPool import PythonWorkerPool
+from mock.mock import MagicMock, patch
+from only_for_platform import not_for_platform, PLATFORM_WINDOWS
+
+
+@not_for_platform(PLATFORM_WINDOWS)
+class TestPythonWorkerPool(TestCase):
+
+  def setUp(self):
+    self.cache_dir = tempfile.mkdtemp()
+    self.script = os.path.join(self.cache_dir, "status.py")
+    with open(self.script, "w") as f:
+      f.write("import sys\n"
+              "import os\n"
+              "print 'pid=%s args=%s' % (os.getpid(), ' '.join(sys.argv[1:]))\n"
+              "sys.stderr.write('error output\\n')\n"
+              "sys.exit(int(sys.argv[1]))\n")
+    self.tmpoutfile = os.path.join(self.cache_dir, "out.txt")
+    self.tmperrfile = os.path.join(self.cache_dir, "err.txt")
+
+  def tearDown(self):
+    shutil.rmtree(self.cache_dir)
+
+  def test_execute_reuses_worker(self):
+    pool = PythonWorkerPool(1, self.cache_dir)
+    try:
+      exitcode, killed = pool.execute(self.script, ["0"], self.tmpoutfile, self.tmperrfile, True, 30)
+      self.assertEqual(0, exitcode)
+      self.assertFalse(killed)
+      first_output = open(self.tmpoutfile).read()
+      self.assertTrue("args=0" in first_output)
+      self.assertEqual("error output\n", open(self.tmperrfile).read())
+
+      exitcode, killed = pool.execute(self.script, ["3"], self.tmpoutfile, self.tmperrfile, False, 30)
+      self.assertEqual(3, exitcode)
+      output = open(self.tmpoutfile).read()
+      self.assertTrue(output.startswith(first_output))
+      self.assertTrue("args=3" in output)
+      # the same process has executed both scripts
+      self.assertEqual(1, len(pool.workers))
+      self.assertTrue("pid={0} ".format(pool.workers[0].pid) in output)
+    finally:
+      pool.shutdown()
+
+  def test_worker_recycled_after_max_tasks(self):
+    pool = PythonWorkerPool(1, self.cache_dir, max_tasks=1)
+    try:
+      pool.execute(self.script, ["0"], self.tmpoutfile, self.tmperrfile, True, 30)
+      self.assertEqual([], pool.workers)
+      self.assertEqual(None, pool.idle_workers.get_nowait())
+    finally:
+      pool.shutdown()
+
+  def test_unhealthy_worker_replaced(self):
+    pool = PythonWorkerPool(1, self.cache_dir)
+    dead_worker = MagicMock()
+    dead_worker.ping.return_value = False
+    new_worker = MagicMock()
+    pool.idle_workers.get_nowait()
+    pool.idle_workers.put(dead_worker)
+    pool.workers.append(dead_worker)
+
+    with patch.object(PythonWorkerPool, "create_worker", new=MagicMock(return_value=new_worker)):
+      self.assertEqual(new_worker, pool.acquire())
+    self.assertTrue(dead_worker.terminate.called)
+    self.assertEqual([new_worker], pool.workers)
+
+  def test_timed_out_worker_killed(self):
+    pool = PythonWorkerPool(1, self.cache_dir)
+    worker = MagicMock()
+    worker.receive.return_value = None
+
+    with patch.object(PythonWorkerPool, "create_worker", new=MagicMock(return_value=worker)):
+      exitcode, killed = pool.execute(self.script, ["0"], self.tmpoutfile, self.tmperrfile, True, 1)
+    self.assertTrue(killed)
+    self.assertTrue(worker.terminate.called)
+    self.assertEqual(None, pool.idle_workers.get_nowait())
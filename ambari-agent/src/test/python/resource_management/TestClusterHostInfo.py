@@ -0,0 +1,113 @@
+'''
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+import os
+import tempfile
+from unittest import TestCase
+
+import ambari_simplejson as json
+from resource_management.core.exceptions import Fail
+from resource_management.libraries.script import Script
+from resource_management.libraries.script.cluster_host_info import RangeList, decompress_cluster_host_info
+
+HOSTS = ['h0', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'h7', 'h8']
+
+class TestClusterHostInfo(TestCase):
+
+  def test_host_ranges(self):
+    hosts = RangeList(['1-3,5', '6-8'], HOSTS)
+    self.assertEqual(7, len(hosts))
+    self.assertEqual('h1', hosts[0])
+    self.assertEqual('h5', hosts[3])
+    self.assertEqual('h8', hosts[-1])
+    self.assertEqual(['h3', 'h5'], hosts[2:4])
+    self.assertEqual(['h1', 'h2', 'h3', 'h5', 'h6', 'h7', 'h8'], list(hosts))
+    self.assertEqual('h1,h2,h3,h5,h6,h7,h8', ','.join(hosts))
+    self.assertTrue('h5' in hosts)
+    self.assertFalse('h4' in hosts)
+    self.assertEqual(3, hosts.index('h5'))
+    self.assertRaises(IndexError, hosts.__getitem__, 7)
+    # nothing was expanded
+    self.assertEqual(None, hosts._items)
+
+    self.assertEqual(['h1', 'h2', 'h3', 'h5', 'h6', 'h7', 'h8'], hosts)
+    self.assertNotEqual('h1', hosts)
+    self.assertEqual(['h0', 'h1'], ['h0'] + RangeList(['1'], HOSTS))
+    self.assertRaises(TypeError, lambda: 'h0' + RangeList(['1'], HOSTS))
+
+  def test_modification_expands_the_list(self):
+    hosts = RangeList(['2,0-1'], HOSTS)
+    self.assertEqual(['h2', 'h0', 'h1'], list(hosts))
+    hosts.sort()
+    self.assertEqual(['h0', 'h1', 'h2'], list(hosts))
+    hosts.append('h9')
+    self.assertEqual('h9', hosts[3])
+    self.assertEqual(4, len(hosts))
+
+  def test_mapped_ranges(self):
+    ports = RangeList(['8670:0-2,4', '8671:3'], value_type=str)
+    self.assertEqual(['8670', '8670', '8670', '8671', '8670'], list(ports))
+    self.assertEqual('8671', ports[3])
+    self.assertEqual(5, len(ports))
+
+    racks = RangeList(['/rack1:2', '/rack2:0-1'])
+    self.assertEqual(['/rack2', '/rack2', '/rack1'], list(racks))
+    # an index mapped twice gets the latest value
+    self.assertEqual([1, 2, 2], list(RangeList(['1:0-2', '2:1-2'])))
+
+  def test_broken_ranges(self):
+    self.assertRaises(Fail, len, RangeList(['1-'], HOSTS))
+    self.assertRaises(Fail, len, RangeList(['0-1'], None))
+    self.assertRaises(Fail, len, RangeList(['1:0-1-2'], None))
+
+  def test_load_config(self):
+    command = {
+      'compressedClusterHostInfo': True,
+      'clusterHostInfo': {
+        'all_hosts': HOSTS[:3],
+        'namenode_host': ['1'],
+        'slave_hosts': ['0-2'],
+        'all_ping_ports': ['8670:0-2'],
+        'all_racks': ['/default-rack:0-2'],
+        'ambari_server_host': ['h0'],
+      }
+    }
+    fd, command_file = tempfile.mkstemp()
+    with os.fdopen(fd, 'w') as f:
+      json.dump(command, f)
+    try:
+      config = Script.load_config(command_file)
+    finally:
+      os.unlink(command_file)
+
+    cluster_host_info = config['clusterHostInfo']
+    self.assertEqual('h1', cluster_host_info['namenode_host'][0])
+    self.assertEqual(['h0', 'h1', 'h2'], cluster_host_info['slave_hosts'])
+    self.assertEqual(['8670', '8670', '8670'], cluster_host_info['all_ping_ports'])
+    self.assertEqual(['/default-rack'] * 3, cluster_host_info.get('all_racks'))
+    self.assertEqual(HOSTS[:3], cluster_host_info['all_hosts'])
+    self.assertEqual(['h0'], cluster_host_info['ambari_server_host'])
+    # the lists stay range-encoded, they are not expanded by reading them
+    self.assertTrue(isinstance(cluster_host_info['slave_hosts'], RangeList))
+    self.assertEqual(None, cluster_host_info['slave_hosts']._items)
+    self.assertEqual('["h0", "h1", "h2"]', json.dumps(list(cluster_host_info['slave_hosts'])))
+
+  def test_decompress_cluster_host_info(self):
+    info = decompress_cluster_host_info({'all_hosts': HOSTS, 'zookeeper_hosts': ['3-4']})
+    self.assertEqual(['h3', 'h4'], info['zookeeper_hosts'])
+    self.assertEqual(HOSTS, info['all_hosts'])
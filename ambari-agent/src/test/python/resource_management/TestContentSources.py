@@ -28,6 +28,7 @@ from resource_management.core.source import StaticFile
 from resource_management.core.source import DownloadSource
 from resource_management.core.source import Template
 from resource_management.core.source import InlineTemplate
+from resource_management.core.source import TemplateCache, template_cache
 
 if get_platform() != PLATFORM_WINDOWS:
   from resource_management.core import sudo
@@ -35,6 +36,8 @@ if get_platform() != PLATFORM_WINDOWS:
 from ambari_jinja2 import UndefinedError, TemplateNotFound
 import urllib2
 import os
+import shutil
+import tempfile
 
 
 @patch.object(OSCheck, "os_distribution", new = MagicMock(return_value = os_distro_value))
@@ -256,3 +259,47 @@ class TestContentSources(TestCase):
       template = InlineTemplate("{{test_arg1}} template content {{os.path.join(path[0],path[1])}}", [os], test_arg1 = "test", path = ["/one","two"])
       content = template.get_content()
     self.assertEqual(u'test template content /one/two', content)
+
+  def test_inline_template_plain_text(self):
+    """
+    Testing InlineTemplate without jinja syntax is not compiled
+    """
+    with Environment("/base") as env:
+      template = InlineTemplate("plain\r\nvalue\n")
+      content = template.get_content()
+
+    self.assertEqual(None, template.template)
+    self.assertEqual(u'plain\nvalue', content)
+
+  def test_template_cache(self):
+    """
+    Testing compiled templates are shared between Template instances
+    """
+    with Environment("/base") as env:
+      template1 = InlineTemplate("{{test_arg1}} cached content", [], test_arg1 = "first")
+      template2 = InlineTemplate("{{test_arg1}} cached content", [], test_arg1 = "second")
+      self.assertTrue(template1.template is template2.template)
+      self.assertEqual(u'first cached content', template1.get_content())
+      self.assertEqual(u'second cached content', template2.get_content())
+
+    options = {'trim_blocks': True}
+    self.assertFalse(template_cache.get_template(u"{{ x }}", None, options) is template_cache.get_template(u"{{ x }}", None, {}))
+
+  def test_template_cache_bytecode(self):
+    """
+    Testing compiled templates are persisted in the bytecode cache directory
+    """
+    cache_dir = tempfile.mkdtemp()
+    try:
+      cache = TemplateCache()
+      cache.set_bytecode_cache_dir(cache_dir)
+      self.assertEqual(u'value', cache.get_template(u"{{ x }}", None, {}).render(x='value'))
+      self.assertEqual(1, len(os.listdir(cache_dir)))
+
+      new_cache = TemplateCache()
+      new_cache.set_bytecode_cache_dir(cache_dir)
+      with patch.object(new_cache.get_environment({}), "compile") as compile_mock:
+        self.assertEqual(u'value', new_cache.get_template(u"{{ x }}", None, {}).render(x='value'))
+        self.assertFalse(compile_mock.called)
+    finally:
+      shutil.rmtree(cache_dir)
@@ -25,7 +25,7 @@ from ambari_commons.os_check import OSCheck
 import os
 from resource_management.core.system import System
 from resource_management.core import Environment, Fail
-from resource_management.core.resources import Directory
+from resource_management.core.resources import Directory, Execute
 
 if get_platform() != PLATFORM_WINDOWS:
   import pwd
@@ -184,4 +184,47 @@ class TestDirectoryResource(TestCase):
       self.fail("Must fail because /a/b/c/d is not a directory")
     except Fail as e:
       self.assertEqual('Applying Directory[\'/a/b/c/d\'] failed, /a/b/c/d is not a directory',
-                       str(e))
\ No newline at end of file
+                       str(e))
+
+  @not_for_platform(PLATFORM_WINDOWS)
+  @patch("resource_management.core.sudo.chmod_recursive")
+  @patch("resource_management.core.sudo.chmod_extended")
+  @patch("resource_management.core.sudo.chown")
+  @patch("resource_management.core.sudo.path_exists")
+  @patch("resource_management.core.sudo.path_isdir")
+  def test_recursive_mode_flags_forget_accessible_directories(self, isdir_mock, exists_mock, chown_mock,
+                                                              chmod_extended_mock, chmod_recursive_mock):
+    exists_mock.return_value = True
+    isdir_mock.return_value = True
+
+    with Environment('/') as env:
+      Directory('/a/b/c', cd_access='a')
+      Directory('/a/b', recursive_mode_flags={'d': 'o-rwx'})
+      chmod_extended_mock.reset_mock()
+      Directory('/a/b/c/d', cd_access='a')
+
+    # /a/b and /a/b/c lost o+rx, /a was not changed
+    self.assertEqual(['/a/b/c/d', '/a/b/c', '/a/b'],
+                     [args[0] for args, kwargs in chmod_extended_mock.call_args_list])
+
+  @not_for_platform(PLATFORM_WINDOWS)
+  @patch("resource_management.core.shell._call")
+  @patch("resource_management.core.sudo.chmod_extended")
+  @patch("resource_management.core.sudo.chown")
+  @patch("resource_management.core.sudo.path_exists")
+  @patch("resource_management.core.sudo.path_isdir")
+  def test_commands_forget_accessible_directories(self, isdir_mock, exists_mock, chown_mock,
+                                                  chmod_extended_mock, call_mock):
+    exists_mock.return_value = True
+    isdir_mock.return_value = True
+    call_mock.return_value = (0, "", "")
+
+    with Environment('/') as env:
+      Directory('/a/b', cd_access='a')
+      Directory('/a/b', cd_access='a')
+      self.assertEqual(2, chmod_extended_mock.call_count)
+
+      Execute('chmod -R o-rwx /a')
+      Directory('/a/b', cd_access='a')
+
+    self.assertEqual(4, chmod_extended_mock.call_count)
@@ -0,0 +1,182 @@
+'''
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from unittest import TestCase
+from mock.mock import patch, MagicMock
+
+from resource_management.core import Environment, Fail, shell
+from resource_management.core.guards import compile_guard
+from resource_management.core.logger import Logger
+from resource_management.core.resources.system import Directory, Execute, File
+
+
+class TestEnvironment(TestCase):
+
+  def setUp(self):
+    self.started = []
+    self.lock = threading.Lock()
+    self.release = threading.Event()
+
+  def run_action(self, resource, action):
+    with self.lock:
+      self.started.append(resource.name)
+    Logger.info("Running " + resource.name)
+    if resource.name.startswith("slow"):
+      self.release.wait(5)
+    if resource.name.startswith("failing"):
+      raise Fail("Failed " + resource.name)
+
+  def wait_for_start(self, name):
+    for i in range(500):
+      with self.lock:
+        if name in self.started:
+          return
+      threading.Event().wait(.01)
+    self.fail("{0} was not started".format(name))
+
+  @patch.object(Environment, "run_action")
+  def test_independent_resources_run_concurrently(self, run_action_mock):
+    run_action_mock.side_effect = self.run_action
+    logger = Logger.logger
+    Logger.logger = MagicMock(level=logging.INFO)
+    try:
+      with Environment('/') as env:
+        def release_slow_resource():
+          self.wait_for_start("slow")
+          self.wait_for_start("/var/lib/app")
+          self.release.set()
+        releaser = threading.Thread(target=release_slow_resource)
+        releaser.start()
+
+        with env.concurrent(max_workers=2):
+          Execute("slow", paths=["/var/log/app"])
+          Directory("/var/lib/app")
+          # under a path of the slow resource
+          File("/var/log/app/app.log")
+        releaser.join()
+      messages = [args[0] for args, kwargs in Logger.logger.info.call_args_list]
+    finally:
+      Logger.logger = logger
+
+    self.assertEqual("/var/log/app/app.log", self.started[-1])
+    # logged in the order of the resources
+    self.assertEqual(["Running slow", "Running /var/lib/app", "Running /var/log/app/app.log"],
+                     [message for message in messages if message.startswith("Running")])
+    self.assertEqual(0, len(env.resource_list))
+
+  @patch.object(Environment, "run_action")
+  def test_required_and_unknown_resources_run_in_order(self, run_action_mock):
+    run_action_mock.side_effect = self.run_action
+    self.release.set()
+    with Environment('/') as env:
+      with env.concurrent():
+        first = Execute("first", paths=[])
+        Execute("second", paths=[], requires=first)
+        # the paths of the command are not known
+        Execute("third")
+        File("/tmp/fourth")
+      self.assertEqual(["first", "second", "third", "/tmp/fourth"], self.started)
+
+      with env.concurrent():
+        resources = [Execute("a", paths=["/a"]), Execute("b", paths=["/ab"]),
+                     Execute("c", paths=["/a/b/"]), Execute("d")]
+        self.assertEqual([[], [], [0], [0, 1, 2]], env._get_required_resources(resources))
+
+  @patch.object(Environment, "run_action")
+  def test_failure_stops_starting_resources(self, run_action_mock):
+    run_action_mock.side_effect = self.run_action
+    self.release.set()
+    with Environment('/') as env:
+      try:
+        with env.concurrent(max_workers=2):
+          Execute("failing1", paths=["/a"])
+          Execute("failing2", paths=["/b"])
+          Execute("after", paths=["/a"])
+        self.fail("Fail was not raised")
+      except Fail, ex:
+        self.assertEqual("Failed failing1", str(ex))
+
+    self.assertFalse("after" in self.started)
+    self.assertEqual(["after"], [resource.name for resource in env.resource_list])
+
+  def test_native_guards(self):
+    tmp_dir = tempfile.mkdtemp()
+    try:
+      pid_file = os.path.join(tmp_dir, "app.pid")
+      with open(pid_file, "w") as f:
+        f.write("%d\n" % os.getpid())
+      missing_file = os.path.join(tmp_dir, "missing.pid")
+
+      self.assertTrue(compile_guard("ls {0} >/dev/null 2>&1 && ps -p `cat {0}` >/dev/null 2>&1".format(pid_file))())
+      self.assertTrue(compile_guard("test -d {0} && [ -f {1} ] && ps $(cat {1})".format(tmp_dir, pid_file))())
+      self.assertFalse(compile_guard("ls {0} > /dev/null && ps -p `cat {0}`".format(missing_file))())
+      self.assertFalse(compile_guard("ps -p `cat {0}`".format(missing_file))())
+      # ps without pids succeeds, left to the shell
+      self.assertEqual(None, compile_guard("ps `cat {0}`".format(missing_file))())
+      self.assertTrue(compile_guard("id root")())
+      self.assertFalse(compile_guard("getent passwd no_such_user_for_guards")())
+
+      self.assertEqual(None, compile_guard("ls {0}/*".format(tmp_dir)))
+      self.assertEqual(None, compile_guard("ls -l {0}".format(tmp_dir)))
+      self.assertEqual(None, compile_guard("test -e {0} || exit 1".format(tmp_dir)))
+    finally:
+      shutil.rmtree(tmp_dir)
+
+  @patch.object(Environment, "run_action")
+  def test_shell_guards_are_batched_and_cached(self, run_action_mock):
+    run_action_mock.side_effect = self.run_action
+    call = shell.call
+    calls = []
+    def call_side_effect(command, **kwargs):
+      calls.append((command, kwargs))
+      return call(command, **kwargs)
+
+    with patch("resource_management.core.guards.shell.call") as call_mock:
+      call_mock.side_effect = call_side_effect
+      with Environment('/', test_mode=True) as env:
+        Execute("skipped", not_if="echo a | grep -q a")
+        Execute("skipped_too", not_if="echo a | grep -q a")
+        Execute("run", not_if="echo b | grep -q a", only_if="echo c | grep -q c")
+        Execute("checked_again", only_if="echo a | grep -q a")
+        env.run()
+
+    self.assertEqual(["run", "checked_again"], self.started)
+    # the same guard is cached, both guards of a resource are run at once,
+    # and guards are evaluated again after an action was run
+    self.assertEqual(3, len(calls))
+    self.assertEqual("echo a | grep -q a", calls[0][0])
+    self.assertTrue("echo b | grep -q a" in calls[1][0] and "echo c | grep -q c" in calls[1][0])
+    self.assertFalse(calls[1][1]['logoutput'])
+    self.assertEqual("echo a | grep -q a", calls[2][0])
+
+  @patch.object(Environment, "run_action")
+  def test_shell_guards_of_following_resources_are_not_run(self, run_action_mock):
+    with patch("resource_management.core.guards.shell.call") as call_mock:
+      call_mock.return_value = (1, "")
+      with Environment('/', test_mode=True) as env:
+        for i in range(10):
+          Execute("run%d" % i, not_if="echo %d | grep -q a" % i)
+        env.run()
+
+    self.assertEqual(["echo %d | grep -q a" % i for i in range(10)],
+                     [args[0] for args, kwargs in call_mock.call_args_list])
@@ -25,6 +25,8 @@ from ambari_commons.os_check import OSCheck
 from resource_management.core.system import System
 from resource_management.core.resources.system import Execute
 from resource_management.core.environment import Environment
+from resource_management.core import shell
+from resource_management.core.exceptions import ExecuteTimeoutException
 from resource_management.core.shell import quote_bash_args
 
 import subprocess
@@ -37,6 +39,7 @@ if get_platform() != PLATFORM_WINDOWS:
   import pwd
 
 import select
+import signal
 
 
 @patch.object(OSCheck, "os_distribution", new = MagicMock(return_value = os_distro_value))
@@ -281,3 +284,31 @@ class TestExecuteResource(TestCase):
       Execute(expected_command)
 
     self.assertEqual(popen_mock.call_args_list[0][0][0][4], expected_command)
+
+  @not_for_platform(PLATFORM_WINDOWS)
+  @patch.dict(os.environ, {shell.SHELL_SESSIONS_ENV_VAR: "true"})
+  def test_shell_sessions(self):
+    with Environment("/") as env:
+      self.assertEqual((3, 'out\nerr'), shell.call("echo out; echo err >&2; exit 3"))
+      self.assertEqual((0, 'bar baz /tmp'), shell.call('cat; echo $FOO `pwd`', env={'FOO': 'bar baz'}, cwd='/tmp'))
+      # variables of the previous command are not kept
+      self.assertEqual((0, ''), shell.call('echo $FOO'))
+      self.assertRaises(Fail, shell.checked_call, "exit 1")
+      self.assertEqual(1, len(shell._session_pool.sessions))
+
+      # commands which don't need shell are executed directly
+      with patch.object(shell._session_pool, "run", wraps=shell._session_pool.run) as run_mock:
+        self.assertEqual((0, 'a b $HOME'), shell.call(('echo', 'a b', '$HOME')))
+        self.assertFalse(run_mock.called)
+        # bash builtins are run in shell
+        self.assertEqual((0, ''), shell.call(('cd', '/')))
+        self.assertTrue(run_mock.called)
+
+      # processes started in background by the earlier commands survive the timeout
+      code, daemon_pid = shell.call("sleep 30 > /dev/null 2>&1 & echo $!")
+      try:
+        self.assertRaises(ExecuteTimeoutException, shell.call, "sleep 10", timeout=.5)
+        self.assertEqual((0, 'after timeout'), shell.call("echo after timeout"))
+        self.assertEqual(0, shell.call("ps -p {0}".format(daemon_pid))[0])
+      finally:
+        os.kill(int(daemon_pid), signal.SIGKILL)
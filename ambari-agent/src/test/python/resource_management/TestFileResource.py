@@ -23,6 +23,7 @@ from only_for_platform import get_platform, not_for_platform, os_distro_value, P
 
 from ambari_commons.os_check import OSCheck
 
+import hashlib
 import os
 import sys
 from resource_management.core import Environment, Fail
@@ -60,7 +61,6 @@ class TestFileResource(TestCase):
     except Fail as e:
       self.assertEqual('Applying File[\'/existent_directory\'] failed, directory with name /existent_directory exists',
                        str(e))
-    self.assertFalse(dirname_mock.called)
 
   @patch.object(os.path, "dirname")
   @patch("resource_management.core.sudo.path_isdir")
@@ -111,16 +111,18 @@ class TestFileResource(TestCase):
 
 
   @patch("resource_management.core.providers.system._ensure_metadata")
-  @patch("resource_management.core.sudo.read_file")
+  @patch("resource_management.core.sudo.file_digest")
   @patch("resource_management.core.sudo.create_file")
   @patch("resource_management.core.sudo.path_exists")
   @patch("resource_management.core.sudo.path_isdir")
-  def test_action_create_replace(self, isdir_mock, exists_mock, create_file_mock, read_file_mock, ensure_mock):
+  def test_action_create_replace(self, isdir_mock, exists_mock, create_file_mock, file_digest_mock, ensure_mock):
     """
     Tests if 'create' action rewrite existent file with new data
     """
     isdir_mock.side_effect = [False, True]
     exists_mock.return_value = True
+    # same size, other content
+    file_digest_mock.return_value = [11, hashlib.md5('old-content').hexdigest()]
 
     with Environment('/') as env:
       File('/directory/file',
@@ -130,9 +132,32 @@ class TestFileResource(TestCase):
            content='new-content'
       )
 
-    read_file_mock.assert_called_with('/directory/file', encoding=None)    
+    file_digest_mock.assert_called_with('/directory/file', 11)
     create_file_mock.assert_called_with('/directory/file', 'new-content', encoding=None)
 
+  @patch("resource_management.core.providers.system._ensure_metadata")
+  @patch("resource_management.core.sudo.file_digest")
+  @patch("resource_management.core.sudo.create_file")
+  @patch("resource_management.core.sudo.path_exists")
+  @patch("resource_management.core.sudo.path_isdir")
+  def test_action_create_same_content(self, isdir_mock, exists_mock, create_file_mock, file_digest_mock, ensure_mock):
+    """
+    Tests if 'create' action leaves the file with the same content, and checks the parent directory once
+    """
+    isdir_mock.return_value = False
+    exists_mock.return_value = True
+    file_digest_mock.return_value = [11, hashlib.md5('new-content').hexdigest()]
+
+    with Environment('/') as env:
+      isdir_mock.side_effect = lambda path: path == '/directory'
+      File('/directory/file1', content='new-content')
+      File('/directory/file2', content='new-content')
+
+    self.assertEqual(0, create_file_mock.call_count)
+    self.assertEqual(2, ensure_mock.call_count)
+    self.assertEqual(['/directory/file1', '/directory', '/directory/file2'],
+                     [args[0] for args, kwargs in isdir_mock.call_args_list])
+
 
   @patch("resource_management.core.sudo.unlink")
   @patch("resource_management.core.sudo.path_exists")
@@ -202,20 +227,21 @@ class TestFileResource(TestCase):
     except Fail as e:
       pass
 
-    isdir_mock.assert_called_with('/existent_directory')
+    isdir_mock.assert_any_call('/existent_directory')
 
   @patch.object(resource_management.core.Environment, "backup_file")
   @patch("resource_management.core.providers.system._ensure_metadata")
-  @patch("resource_management.core.sudo.read_file")
+  @patch("resource_management.core.sudo.file_digest")
   @patch("resource_management.core.sudo.create_file")
   @patch("resource_management.core.sudo.path_exists")
   @patch("resource_management.core.sudo.path_isdir")
-  def test_attribute_backup(self, isdir_mock, exists_mock, create_file_mock,  read_file_mock, ensure_mock, backup_file_mock):
+  def test_attribute_backup(self, isdir_mock, exists_mock, create_file_mock,  file_digest_mock, ensure_mock, backup_file_mock):
     """
     Tests 'backup' attribute
     """
     isdir_mock.side_effect = [False, True, False, True]
     exists_mock.return_value = True
+    file_digest_mock.return_value = [0, None]
 
     with Environment('/') as env:
       File('/directory/file',
@@ -337,28 +363,59 @@ class TestFileResource(TestCase):
     self.assertEqual(chmod_mock.call_count, 1)
     chown_mock.assert_called_with('/directory/file', None, None)
 
+  @patch("pwd.getpwnam")
+  @patch("grp.getgrnam")
+  @patch("resource_management.core.sudo.chown")
+  @patch("resource_management.core.sudo.chmod_extended")
+  @patch("resource_management.core.sudo.stat")
+  @patch("resource_management.core.sudo.create_file")
+  @patch("resource_management.core.sudo.path_exists")
+  @patch("resource_management.core.sudo.path_isdir")
+  def test_ensure_metadata_is_cached(self, isdir_mock, exists_mock, create_file_mock, stat_mock, chmod_extended_mock,
+                                     chown_mock, getgrnam_mock, getpwnam_mock):
+    """
+    Tests if users, groups and directories made accessible by cd_access are looked up once per environment
+    """
+    isdir_mock.side_effect = lambda path: path.count('/') < 4
+    exists_mock.return_value = False
+    stat_mock.return_value = MagicMock(st_uid=0, st_gid=0, st_mode=0644)
+    getpwnam_mock.return_value = MagicMock(pw_uid=0)
+    getgrnam_mock.return_value = MagicMock(gr_gid=0)
+
+    with Environment('/') as env:
+      for name in ['file1', 'file2']:
+        File('/etc/hadoop/conf/' + name,
+             content='file-content',
+             owner='root',
+             group='hadoop',
+             cd_access='a'
+        )
+
+    self.assertEqual(1, getpwnam_mock.call_count)
+    self.assertEqual(1, getgrnam_mock.call_count)
+    self.assertEqual(['/etc/hadoop/conf', '/etc/hadoop', '/etc'],
+                     [args[0] for args, kwargs in chmod_extended_mock.call_args_list])
+
   @patch("resource_management.core.providers.system._ensure_metadata")
-  @patch("resource_management.core.providers.system.FileProvider._get_content")
-  @patch("resource_management.core.sudo.read_file")
+  @patch("resource_management.core.sudo.file_digest")
   @patch("resource_management.core.sudo.create_file")
   @patch("resource_management.core.sudo.path_exists")
   @patch("resource_management.core.sudo.path_isdir")
-  def test_action_create_encoding(self, isdir_mock, exists_mock, create_file_mock, read_file_mock, get_content_mock ,ensure_mock):
+  def test_action_create_encoding(self, isdir_mock, exists_mock, create_file_mock, file_digest_mock, ensure_mock):
 
     isdir_mock.side_effect = [False, True]
-    content_mock = MagicMock()
-    old_content_mock = MagicMock()
-    get_content_mock.return_value = content_mock
-    read_file_mock.return_value = old_content_mock
+    file_digest_mock.return_value = [0, None]
     exists_mock.return_value = True
     with Environment('/') as env:
       File('/directory/file',
            action='create',
            mode=0777,
-           content='file-content',
+           content=u'file-content-\u00e9',
            encoding = "UTF-8"
       )
 
 
-    read_file_mock.assert_called_with('/directory/file', encoding='UTF-8')
+    # the size of the encoded content is compared
+    file_digest_mock.assert_called_with('/directory/file', 15)
+    create_file_mock.assert_called_with('/directory/file', u'file-content-\u00e9', encoding='UTF-8')
 
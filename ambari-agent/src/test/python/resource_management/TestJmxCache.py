@@ -0,0 +1,104 @@
+'''
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+import threading
+from unittest import TestCase
+
+from mock.mock import MagicMock, patch
+from resource_management.libraries.functions.jmx import JmxCache, JmxFetchError
+
+
+class TestJmxCache(TestCase):
+
+  @patch("time.time")
+  def test_ttl(self, time_mock):
+    cache = JmxCache()
+    loader = MagicMock(side_effect=["first", "second", "third"])
+    time_mock.return_value = 100
+
+    self.assertEqual("first", cache.get("url", loader, 10))
+    time_mock.return_value = 109
+    self.assertEqual("first", cache.get("url", loader, 10))
+    time_mock.return_value = 110
+    self.assertEqual("second", cache.get("url", loader, 10))
+    # ttl of 0 always loads the content
+    self.assertEqual("third", cache.get("url", loader, 0))
+    self.assertEqual(3, loader.call_count)
+
+  def test_concurrent_requests_are_coalesced(self):
+    cache = JmxCache()
+    loading = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def loader():
+      calls.append(1)
+      loading.set()
+      release.wait()
+      return "content"
+
+    results = []
+    first = threading.Thread(target=lambda: results.append(cache.get("url", loader, 0)))
+    first.start()
+    loading.wait()
+    # the loader is released once the second caller waits for the request
+    request = cache.in_flight["url"]
+    waiting = threading.Event()
+    wait = request.done.wait
+    def wait_side_effect(*args):
+      waiting.set()
+      return wait(*args)
+    request.done.wait = wait_side_effect
+    second = threading.Thread(target=lambda: results.append(cache.get("url", loader, 0)))
+    second.start()
+    waiting.wait(5)
+    release.set()
+    first.join()
+    second.join()
+
+    self.assertEqual(["content", "content"], results)
+    self.assertEqual(1, len(calls))
+
+  def test_errors_are_not_cached(self):
+    cache = JmxCache()
+    loader = MagicMock(side_effect=[JmxFetchError("HTTP 500", 500), "content"])
+    self.assertRaises(JmxFetchError, cache.get, "url", loader, 10)
+    self.assertEqual("content", cache.get("url", loader, 10))
+
+  @patch("httplib.HTTPConnection")
+  def test_fetch_url_reuses_connections(self, http_connection_mock):
+    response = MagicMock(status=200, will_close=False)
+    response.getheader.return_value = None
+    response.read.return_value = '{"beans": []}'
+    http_connection_mock.return_value.getresponse.return_value = response
+    http_connection_mock.return_value.sock = None
+
+    cache = JmxCache()
+    self.assertEqual('{"beans": []}', cache.fetch_url("http://c6401:50070/jmx?qry=a", 5))
+    self.assertEqual('{"beans": []}', cache.fetch_url("http://c6401:50070/jmx?qry=b", 5))
+
+    http_connection_mock.assert_called_once_with("c6401:50070", timeout=5)
+    self.assertEqual([(("GET", "/jmx?qry=a"),), (("GET", "/jmx?qry=b"),)],
+                     http_connection_mock.return_value.request.call_args_list)
+
+    response.status = 404
+    try:
+      cache.fetch_url("http://c6401:50070/jmx?qry=c", 5)
+      self.fail("JmxFetchError expected")
+    except JmxFetchError, ex:
+      self.assertEqual(404, ex.http_code)
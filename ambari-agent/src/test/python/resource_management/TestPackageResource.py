@@ -118,6 +118,8 @@ class TestPackageResource(TestCase):
   @patch.object(shell, "checked_call")
   @patch.object(System, "os_family", new = 'redhat')
   def test_action_install_pattern_installed_rhel(self, shell_mock):
+    sys.modules['rpm'] = MagicMock()
+    sys.modules['rpm'].TransactionSet.return_value.dbMatch.return_value = [{'name':'some_package_1_2_3'}]
     sys.modules['yum'] = MagicMock()
     sys.modules['yum'].YumBase.return_value = MagicMock()
     sys.modules['yum'].YumBase.return_value.rpmdb = MagicMock()
@@ -240,6 +242,64 @@ class TestPackageResource(TestCase):
       )
     shell_mock.assert_called_with(['/usr/bin/yum', '-d', '0', '-e', '0', '-y', 'install', 'some_package-3.5.0'], logoutput=False, sudo=True)
 
+  @patch.object(shell, "checked_call")
+  @patch.object(System, "os_family", new = 'redhat')
+  def test_action_install_packages_batch_rhel(self, shell_mock):
+    sys.modules['rpm'] = MagicMock()
+    sys.modules['rpm'].TransactionSet.return_value = MagicMock()
+    sys.modules['rpm'].TransactionSet.return_value.dbMatch.return_value = [{'name':'lzo'}, {'name':'hadoop_2_3_1234'}]
+    with Environment('/') as env:
+      Package("hdp packages",
+              packages = ["hadoop_2_3_*", "snappy", "lzo", "hadoop_2_3_*-libhdfs"],
+              logoutput = False
+      )
+    # the rpm database is read once for all of the packages
+    self.assertEqual(1, sys.modules['rpm'].TransactionSet.return_value.dbMatch.call_count)
+    shell_mock.assert_called_once_with(['/usr/bin/yum', '-d', '0', '-e', '0', '-y', 'install', 'snappy', 'hadoop_2_3_*-libhdfs'], logoutput=False, sudo=True)
+    self.assertEqual(None, env.installed_packages)
+
+  @patch.object(shell, "checked_call")
+  @patch.object(System, "os_family", new = 'suse')
+  def test_action_install_packages_batch_installed_suse(self, shell_mock):
+    sys.modules['rpm'] = MagicMock()
+    sys.modules['rpm'].TransactionSet.return_value = MagicMock()
+    sys.modules['rpm'].TransactionSet.return_value.dbMatch.return_value = [{'name':'snappy'}, {'name':'lzo'}]
+    with Environment('/') as env:
+      Package("hdp packages",
+              packages = ["snappy", "lzo"],
+              logoutput = False
+      )
+      Package("lzo")
+    self.assertEqual(1, sys.modules['rpm'].TransactionSet.return_value.dbMatch.call_count)
+    self.assertEqual(shell_mock.call_count, 0, "shell.checked_call shouldn't be called")
+
+  @patch.object(shell, "checked_call")
+  @patch.object(System, "os_family", new = 'redhat')
+  def test_action_packages_empty_list(self, shell_mock):
+    with Environment('/') as env:
+      for action in ["install", "upgrade", "remove"]:
+        Package("hdp packages",
+                packages = [],
+                action = action
+        )
+    self.assertEqual(shell_mock.call_count, 0, "shell.checked_call shouldn't be called")
+
+  @patch.object(shell, "_call")
+  @patch.object(System, "os_family", new = 'suse')
+  def test_installed_packages_are_listed_again_after_commands(self, call_mock):
+    sys.modules['rpm'] = MagicMock()
+    sys.modules['rpm'].TransactionSet.return_value = MagicMock()
+    sys.modules['rpm'].TransactionSet.return_value.dbMatch.return_value = [{'name':'snappy'}]
+    call_mock.return_value = (0, "", "")
+    with Environment('/') as env:
+      Package("snappy")
+      Package("snappy")
+      self.assertEqual(1, sys.modules['rpm'].TransactionSet.return_value.dbMatch.call_count)
+      # the command may install or remove packages
+      shell.checked_call("rpm -e snappy")
+      Package("snappy")
+    self.assertEqual(2, sys.modules['rpm'].TransactionSet.return_value.dbMatch.call_count)
+
   @replace_underscores
   def func_to_test(self, name):
     return name
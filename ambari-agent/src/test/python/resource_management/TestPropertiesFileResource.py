@@ -178,7 +178,7 @@ class TestPropertiesFIleResource(TestCase):
 
 
   @patch("resource_management.core.providers.system._ensure_metadata")
-  @patch("resource_management.core.sudo.read_file")
+  @patch("resource_management.core.sudo.file_digest")
   @patch("resource_management.core.sudo.create_file")
   @patch("resource_management.core.sudo.path_exists")
   @patch("resource_management.core.sudo.path_isdir")
@@ -188,7 +188,7 @@ class TestPropertiesFIleResource(TestCase):
                                                     os_path_isdir_mock,
                                                     os_path_exists_mock,
                                                     create_file_mock,
-                                                    read_file_mock,
+                                                    file_digest_mock,
                                                     ensure_mock):
     """
     Tests if 'action_create' - rewrite file that exist
@@ -200,7 +200,8 @@ class TestPropertiesFIleResource(TestCase):
     time_asctime_mock.return_value = 777
 
     
-    read_file_mock.return_value = 'old-content'
+    # size of 'old-content'
+    file_digest_mock.return_value = [11, None]
     
 
     with Environment('/') as env:
@@ -209,6 +210,6 @@ class TestPropertiesFIleResource(TestCase):
                      properties={'property_1': 'value1'},
       )
 
-    read_file_mock.assert_called()
+    file_digest_mock.assert_called()
     create_file_mock.assert_called_with('/dir1/new_file', u'# Generated by Apache Ambari. 777\n    \nproperty_1=value1\n    ', encoding=None)
     ensure_mock.assert_called()
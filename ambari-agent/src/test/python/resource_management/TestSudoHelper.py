@@ -0,0 +1,157 @@
+'''
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+import base64
+import hashlib
+import imp
+import os
+import shutil
+import stat
+import tempfile
+import threading
+from unittest import TestCase
+
+from mock.mock import MagicMock, patch
+from only_for_platform import not_for_platform, PLATFORM_WINDOWS
+
+from resource_management.core import sudo, sudo_helper
+
+
+@not_for_platform(PLATFORM_WINDOWS)
+class TestSudoHelper(TestCase):
+
+  def setUp(self):
+    self.tmp_dir = tempfile.mkdtemp()
+    self.socket_path = os.path.join(self.tmp_dir, "helper.sock")
+    self.audit_logger = MagicMock()
+    self.server = sudo_helper.SudoHelperServer(self.socket_path, os.getuid(), self.audit_logger)
+    self.server_thread = threading.Thread(target=self.server.serve_forever)
+    self.server_thread.daemon = True
+    self.server_thread.start()
+    self.client = sudo_helper.SudoHelperClient(self.socket_path)
+
+  def tearDown(self):
+    self.client.close()
+    self.server.shutdown()
+    self.server.server_close()
+    shutil.rmtree(self.tmp_dir)
+
+  def test_socket_permissions(self):
+    self.assertEqual(0600, stat.S_IMODE(os.stat(self.socket_path).st_mode))
+
+  def test_batch(self):
+    path = os.path.join(self.tmp_dir, "a", "b")
+    results = self.client.batch([["makedirs", path, 0750],
+                                 ["path_isdir", path],
+                                 ["stat", path],
+                                 ["path_exists", os.path.join(path, "missing")]])
+    self.assertEqual([{'result': None}, {'result': True},
+                      {'result': [os.getuid(), os.getgid(), 0750]}, {'result': False}], results)
+    self.audit_logger.info.assert_called_once_with("pid={0} uid={1}: makedirs [\"{2}\", 488]".format(os.getpid(), os.getuid(), path))
+
+  def test_read_file(self):
+    path = os.path.join(self.tmp_dir, "file")
+    with open(path, "wb") as fp:
+      fp.write("content\x00")
+    self.assertEqual("content\x00", base64.b64decode(self.client.call("read_file", path)))
+
+  def test_file_digest(self):
+    path = os.path.join(self.tmp_dir, "file")
+    with open(path, "wb") as fp:
+      fp.write("content")
+    self.assertEqual([7, hashlib.md5("content").hexdigest()], self.client.call("file_digest", path, None))
+    # the file is not read if the size differs
+    self.assertEqual([7, None], self.client.call("file_digest", path, 8))
+
+  def test_chmod_recursive(self):
+    root = os.path.join(self.tmp_dir, "root")
+    for name in ["a", "b", "c"]:
+      os.makedirs(os.path.join(root, name, "sub"))
+      with open(os.path.join(root, name, "sub", "file"), "wb") as fp:
+        fp.write("content")
+      os.chmod(os.path.join(root, name, "sub", "file"), 0600)
+    os.symlink(os.path.join(root, "a", "sub", "file"), os.path.join(root, "link"))
+    os.chmod(os.path.join(root, "b"), 0700)
+
+    progress = MagicMock()
+    # root, 3 directories, 3 subdirectories, 3 files and the link
+    self.assertEqual([11, 4], sudo_helper.chmod_recursive(root, {'f': 'go+r', 'd': 'a+rx'}, False, 2, progress))
+    self.assertEqual(0644, stat.S_IMODE(os.stat(os.path.join(root, "c", "sub", "file")).st_mode))
+    self.assertEqual(0755, stat.S_IMODE(os.stat(os.path.join(root, "b")).st_mode))
+    self.assertFalse(progress.called)
+
+    # entries which are already right are not changed
+    self.assertEqual([11, 0], self.client.call("chmod_recursive", root, {'f': 'go+r', 'd': 'a+rx'}, True, 1))
+    self.assertEqual([11, 3], self.client.call("chmod_recursive", root, {'f': 'u=rw,go='}, False, 1))
+    self.assertEqual(0600, stat.S_IMODE(os.stat(os.path.join(root, "a", "sub", "file")).st_mode))
+
+  def test_chown_recursive(self):
+    root = os.path.join(self.tmp_dir, "root")
+    os.makedirs(os.path.join(root, "a"))
+    self.assertEqual([2, 0], sudo_helper.chown_recursive(root, os.getuid(), -1))
+
+  def test_symbolic_modes(self):
+    changes = sudo_helper.parse_symbolic_mode("u+rwx,g=rx,o-rwx")
+    self.assertEqual(0750, sudo_helper.apply_symbolic_mode(0647, changes))
+    self.assertRaises(ValueError, sudo_helper.parse_symbolic_mode, "u+s")
+
+  def test_errors(self):
+    try:
+      self.client.call("stat", os.path.join(self.tmp_dir, "missing"))
+      self.fail("OSError expected")
+    except OSError, ex:
+      self.assertEqual(2, ex.errno)
+
+    results = self.client.batch([["unlink", self.tmp_dir], ["path_isdir", self.tmp_dir]])
+    self.assertEqual({'error': "Operation 'unlink' is not allowed", 'errno': 1}, results[0])
+    self.assertEqual({'result': True}, results[1])
+    self.assertTrue(os.path.isdir(self.tmp_dir))
+
+  def test_unavailable(self):
+    client = sudo_helper.SudoHelperClient(os.path.join(self.tmp_dir, "missing.sock"))
+    self.assertRaises(sudo_helper.SudoHelperUnavailable, client.call, "path_exists", self.tmp_dir)
+
+  def test_check_socket_parent(self):
+    os.chmod(self.tmp_dir, 0777)
+    self.assertRaises(ValueError, sudo_helper.check_socket_parent, self.tmp_dir)
+    path = os.path.join(self.tmp_dir, "file")
+    open(path, "wb").close()
+    self.assertRaises(ValueError, sudo_helper.check_socket_parent, path)
+
+  @patch("resource_management.core.shell.call")
+  @patch("resource_management.core.shell.checked_call")
+  def test_sudo_batch(self, checked_call_mock, call_mock):
+    with patch("os.geteuid", return_value=1):
+      non_root_sudo = imp.load_source("non_root_sudo", os.path.splitext(sudo.__file__)[0] + ".py")
+    path = os.path.join(self.tmp_dir, "file")
+    open(path, "wb").close()
+    os.chmod(path, 0644)
+
+    with patch.dict(os.environ, {sudo_helper.SOCKET_ENV_VAR: self.socket_path}):
+      results = non_root_sudo.batch(("path_isdir", path), ("stat", path), ("chown", path, None, None), ("chmod", path, 0600))
+      sudo_helper.get_client().close()
+
+    self.assertEqual([False, (os.getuid(), os.getgid(), 0644), None, None],
+                     results[:1] + [(results[1].st_uid, results[1].st_gid, results[1].st_mode)] + results[2:])
+    self.assertEqual(0600, stat.S_IMODE(os.stat(path).st_mode))
+    # chown had nothing to do
+    self.audit_logger.info.assert_called_once_with("pid={0} uid={1}: chmod [\"{2}\", 384]".format(os.getpid(), os.getuid(), path))
+    self.assertFalse(checked_call_mock.called)
+    self.assertFalse(call_mock.called)
+    # without the helper the functions are called one by one
+    self.assertEqual([True], sudo.batch(("path_isdir", self.tmp_dir)))
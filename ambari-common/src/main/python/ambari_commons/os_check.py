@@ -21,6 +21,7 @@ limitations under the License.
 import os
 import sys
 import platform
+import json
 
 def _get_windows_version():
   """
@@ -75,12 +76,27 @@ VER_NT_SERVER = 3
 _IS_ORACLE_LINUX = os.path.exists('/etc/oracle-release')
 _IS_REDHAT_LINUX = os.path.exists('/etc/redhat-release')
 
+# Detected distribution, cached for the same reason. Reset by OSCheck.refresh_os_distribution()
+_OS_DISTRIBUTION = None
+
 def _is_oracle_linux():
   return _IS_ORACLE_LINUX
 
 def _is_redhat_linux():
   return _IS_REDHAT_LINUX
 
+def _to_str(value):
+  """
+  Converts unicode strings loaded from json to str, recursively
+  """
+  if isinstance(value, dict):
+    return dict((_to_str(k), _to_str(v)) for k, v in value.iteritems())
+  if isinstance(value, list):
+    return [_to_str(item) for item in value]
+  if isinstance(value, unicode):
+    return value.encode('utf-8')
+  return value
+
 
 class OS_CONST_TYPE(type):
 
@@ -89,15 +105,17 @@ class OS_CONST_TYPE(type):
   # Would be generated from Family collection definition
   OS_COLLECTION = []
   FAMILY_COLLECTION = []
+  # os type -> family name and family name -> parent family name lookups
+  OS_TO_FAMILY = {}
+  FAMILY_PARENTS = {}
 
   def initialize_data(cls):
     """
       Initialize internal data structures from file
     """
     try:
-      f = open(os.path.join(RESOURCES_DIR, OSFAMILY_JSON_RESOURCE))
-      json_data = eval(f.read())
-      f.close()
+      with open(os.path.join(RESOURCES_DIR, OSFAMILY_JSON_RESOURCE)) as f:
+        json_data = _to_str(json.load(f))
       for family in json_data:
         cls.FAMILY_COLLECTION += [family]
         cls.OS_COLLECTION += json_data[family][JSON_OS_TYPE]
@@ -105,9 +123,12 @@ class OS_CONST_TYPE(type):
           'name': family,
           'os_list': json_data[family][JSON_OS_TYPE]
         }]
+        for os_type in json_data[family][JSON_OS_TYPE]:
+          cls.OS_TO_FAMILY.setdefault(os_type, family)
         
         if JSON_EXTENDS in json_data[family]:
           cls.OS_FAMILY_COLLECTION[-1][JSON_EXTENDS] = json_data[family][JSON_EXTENDS]
+          cls.FAMILY_PARENTS[family] = json_data[family][JSON_EXTENDS]
     except:
       raise Exception("Couldn't load '%s' file" % OSFAMILY_JSON_RESOURCE)
 
@@ -138,6 +159,26 @@ class OSCheck:
 
   @staticmethod
   def os_distribution():
+    """
+    Returns the distribution of the OS. It is detected only once per process,
+    use refresh_os_distribution() to detect it again.
+    """
+    global _OS_DISTRIBUTION
+    if _OS_DISTRIBUTION is None:
+      _OS_DISTRIBUTION = OSCheck._detect_os_distribution()
+    return _OS_DISTRIBUTION
+
+  @staticmethod
+  def refresh_os_distribution():
+    """
+    Drops the cached OS distribution. Needed after an OS upgrade, or in unit tests
+    which mock the platform module.
+    """
+    global _OS_DISTRIBUTION
+    _OS_DISTRIBUTION = None
+
+  @staticmethod
+  def _detect_os_distribution():
     if platform.system() == SYSTEM_WINDOWS:
       # windows distribution
       major, minor, build, code = _get_windows_version()
@@ -212,22 +253,12 @@ class OSCheck:
 
     In case cannot detect raises exception( from self.get_operating_system_type() ).
     """
-    os_family = OSCheck.get_os_type()
-    for os_family_item in OSConst.OS_FAMILY_COLLECTION:
-      if os_family in os_family_item['os_list']:
-        os_family = os_family_item['name']
-        break
-
-    return os_family.lower()
+    os_type = OSCheck.get_os_type()
+    return OSConst.OS_TO_FAMILY.get(os_type, os_type).lower()
 
   @staticmethod
   def get_os_family_parent(os_family):
-    for os_family_item in OSConst.OS_FAMILY_COLLECTION:
-      if os_family_item['name'] == os_family:
-        if JSON_EXTENDS in os_family_item:
-          return os_family_item[JSON_EXTENDS]
-        else:
-          return None
+    return OSConst.FAMILY_PARENTS.get(os_family)
 
   @staticmethod
   def get_os_version():
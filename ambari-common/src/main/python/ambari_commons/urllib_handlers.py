@@ -75,38 +75,10 @@ class RefreshHeaderProcessor(BaseHandler):
       if refresh_header is None:
         return response
 
-      # at this point the header should resemble
-      # Refresh: 3; url=http://c6403.ambari.apache.org:8088/
-      semicolon_index = string.find(refresh_header, ';')
-
-      # slice the redirect URL out of
-      # 3; url=http://c6403.ambari.apache.org:8088/jmx"
-      if semicolon_index >= 0:
-        redirect_url_key_value_pair = refresh_header[semicolon_index+1:]
-      else:
-        redirect_url_key_value_pair = refresh_header
-
-      equals_index = string.find(redirect_url_key_value_pair, '=')
-      key = redirect_url_key_value_pair[:equals_index]
-      redirect_url = redirect_url_key_value_pair[equals_index+1:]
-
-      if key.strip().lower() != REFRESH_HEADER_URL_KEY:
-        logger.warning("Unable to parse refresh header {0}".format(refresh_header))
+      redirect_url = get_refresh_redirect_url(request.get_full_url(), refresh_header)
+      if redirect_url is None:
         return response
 
-      # extract out just host:port
-      # c6403.ambari.apache.org:8088
-      redirect_netloc = urlparse(redirect_url).netloc
-
-      # deconstruct the original request URL into parts
-      original_url_parts = urlparse(request.get_full_url())
-
-      # build a brand new URL by swapping out the original request URL's
-      # netloc with the redirect's netloc
-      redirect_url = urlunparse(ParseResult(original_url_parts.scheme,
-        redirect_netloc, original_url_parts.path, original_url_parts.params,
-        original_url_parts.query, original_url_parts.fragment))
-
       # follow the new new and return the response
       return self.parent.open(redirect_url)
     except Exception,exception:
@@ -114,4 +86,45 @@ class RefreshHeaderProcessor(BaseHandler):
         refresh_header, str(exception)))
 
     # return the original response
-    return response
\ No newline at end of file
+    return response
+
+
+def get_refresh_redirect_url(original_url, refresh_header):
+  """
+  Builds the URL to follow for a "Refresh" header value by swapping out the
+  original URL's host:port for the redirected one.
+  :param original_url: the URL of the request which returned the header
+  :param refresh_header: the header value, such as "3; url=http://c6403.ambari.apache.org:8088/"
+  :return: the new URL or None if the header could not be parsed
+  """
+  # at this point the header should resemble
+  # Refresh: 3; url=http://c6403.ambari.apache.org:8088/
+  semicolon_index = string.find(refresh_header, ';')
+
+  # slice the redirect URL out of
+  # 3; url=http://c6403.ambari.apache.org:8088/jmx"
+  if semicolon_index >= 0:
+    redirect_url_key_value_pair = refresh_header[semicolon_index+1:]
+  else:
+    redirect_url_key_value_pair = refresh_header
+
+  equals_index = string.find(redirect_url_key_value_pair, '=')
+  key = redirect_url_key_value_pair[:equals_index]
+  redirect_url = redirect_url_key_value_pair[equals_index+1:]
+
+  if key.strip().lower() != REFRESH_HEADER_URL_KEY:
+    logger.warning("Unable to parse refresh header {0}".format(refresh_header))
+    return None
+
+  # extract out just host:port
+  # c6403.ambari.apache.org:8088
+  redirect_netloc = urlparse(redirect_url).netloc
+
+  # deconstruct the original request URL into parts
+  original_url_parts = urlparse(original_url)
+
+  # build a brand new URL by swapping out the original request URL's
+  # netloc with the redirect's netloc
+  return urlunparse(ParseResult(original_url_parts.scheme,
+    redirect_netloc, original_url_parts.path, original_url_parts.params,
+    original_url_parts.query, original_url_parts.fragment))
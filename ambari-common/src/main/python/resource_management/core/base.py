@@ -104,8 +104,13 @@ class Resource(object):
   not_if = ResourceArgument() # pass command e.g. not_if = ('ls','/root/jdk')
   only_if = ResourceArgument() # pass command
   initial_wait = ResourceArgument() # in seconds
+  # used by Environment.concurrent() to order the resources
+  requires = ForcedListArgument(default=[]) # resources which have to be run before this one
+  paths = ResourceArgument() # paths read or written, e.g. paths = ['/var/log/hadoop']
 
   actions = ["nothing"]
+  # arguments holding the paths of the resource, used when paths are not specified
+  path_arguments = []
   
   def __new__(cls, name, env=None, provider=None, **kwargs):
     if isinstance(name, list):
@@ -151,12 +156,22 @@ class Resource(object):
         except InvalidArgument, exc:
           raise InvalidArgument("%s %s" % (self, exc))
     
-    if not self.env.test_mode:
+    if not self.env.test_mode and not self.env.is_deferring():
       self.env.run()
 
   def validate(self):
     pass
 
+  def get_paths(self):
+    """
+    Gets the paths read or written by the resource, or None if they are not known
+    """
+    if self.paths is not None:
+      return self.paths
+    if self.path_arguments:
+      return [getattr(self, argument) for argument in self.path_arguments]
+    return None
+
   def __repr__(self):
     return unicode(self)
 
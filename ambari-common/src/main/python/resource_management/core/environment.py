@@ -23,14 +23,17 @@ Ambari Agent
 __all__ = ["Environment"]
 
 import os
+import sys
 import types
 import logging
 import shutil
+import threading
 import time
+from contextlib import contextmanager
 from datetime import datetime
 
-from resource_management.core import shell
 from resource_management.core.exceptions import Fail
+from resource_management.core.guards import GuardEvaluator
 from resource_management.core.providers import find_provider
 from resource_management.core.utils import AttributeDictionary
 from resource_management.core.system import System
@@ -39,6 +42,8 @@ from resource_management.core.logger import Logger
 
 class Environment(object):
   _instances = []
+  # default number of resources run at once by concurrent()
+  CONCURRENT_RESOURCES = 4
 
   def __init__(self, basedir=None, tmp_dir=None, test_mode=False, logger=None, logging_level=logging.INFO):
     """
@@ -57,8 +62,22 @@ class Environment(object):
     self.system = System.get_instance()
     self.config = AttributeDictionary()
     self.resources = {}
+    # resources are queued per thread while they are run concurrently
+    self._local = threading.local()
     self.resource_list = []
     self.delayed_actions = set()
+    # installed package names, cached by the package providers until any command is run
+    self.installed_packages = None
+    self.installed_packages_commands_run = None
+    # pwd/grp entries by name, directories known to exist and (directory, cd_access)
+    # pairs already applied, cached by the system providers
+    self.users = {}
+    self.groups = {}
+    self.directories = set()
+    self.accessible_directories = set()
+    # shell.commands_run when the directories were cached, they are dropped once any command runs
+    self.directories_commands_run = None
+    self.guards = GuardEvaluator()
     self.test_mode = test_mode
     self.tmp_dir = tmp_dir
     self.update_config({
@@ -120,7 +139,52 @@ class Environment(object):
       raise Fail("%r does not implement action %s" % (provider, action))
     provider_action()
 
-  def _check_condition(self, cond):
+  def _get_resource_list(self):
+    resource_list = getattr(self._local, 'resource_list', None)
+    if resource_list is None:
+      return self._resource_list
+    return resource_list
+
+  def _set_resource_list(self, resource_list):
+    if getattr(self._local, 'resource_list', None) is not None:
+      self._local.resource_list = resource_list
+    else:
+      self._resource_list = resource_list
+
+  resource_list = property(_get_resource_list, _set_resource_list)
+
+  def is_deferring(self):
+    """
+    Whether the resources defined by the current thread are only queued, see concurrent()
+    """
+    return getattr(self._local, 'deferring', False)
+
+  @contextmanager
+  def concurrent(self, max_workers=CONCURRENT_RESOURCES):
+    """
+    Resources defined in the block are run when it ends, at most max_workers
+    at once. A resource is run after all the preceding resources it requires,
+    or whose paths (see Resource.get_paths) overlap with its own; resources
+    with unknown paths are run after all the preceding ones. The output of
+    the resources is logged in their order.
+
+    with env.concurrent():
+      Directory(params.log_dir, ...)
+      XmlConfig("core-site.xml", conf_dir=params.conf_dir, ...)
+    """
+    self._local.deferring = True
+    try:
+      yield self
+    finally:
+      self._local.deferring = False
+
+    if not self.test_mode:
+      self.run(max_workers)
+
+  def _check_condition(self, cond, pending=()):
+    """
+    @param pending: the other guards checked before the next action, see GuardEvaluator
+    """
     if type(cond) == types.BooleanType:
       return cond
 
@@ -128,46 +192,176 @@ class Environment(object):
       return cond()
 
     if isinstance(cond, basestring):
-      ret, out = shell.call(cond)
-      return ret == 0
+      return self.guards.evaluate(cond, pending)
 
     raise Exception("Unknown condition type %r" % cond) 
     
-  def run(self):
+  def run(self, max_workers=1):
     with self:
       # Run resource actions
       while self.resource_list:
-        resource = self.resource_list.pop(0)
-        Logger.info_resource(resource)
-        
-        if resource.initial_wait:
-          time.sleep(resource.initial_wait)
-
-        if resource.not_if is not None and self._check_condition(
-          resource.not_if):
-          Logger.info("Skipping %s due to not_if" % resource)
-          continue
-
-        if resource.only_if is not None and not self._check_condition(
-          resource.only_if):
-          Logger.info("Skipping %s due to only_if" % resource)
-          continue
-
-        for action in resource.action:
-          if not resource.ignore_failures:
-            self.run_action(resource, action)
-          else:
-            try:
-              self.run_action(resource, action)
-            except Exception as ex:
-              Logger.info("Skipping failure of %s due to ignore_failures. Failure reason: %s" % (resource, str(ex)))
-              pass
+        resources = self.resource_list
+        # resources defined while these are run are queued in a new list
+        self.resource_list = []
+        if max_workers > 1 and len(resources) > 1:
+          self._run_concurrently(resources, max_workers)
+        else:
+          self._run_in_order(resources)
 
       # Run delayed actions
       while self.delayed_actions:
         action, resource = self.delayed_actions.pop()
         self.run_action(resource, action)
 
+  def run_resource(self, resource):
+    Logger.info_resource(resource)
+
+    if resource.initial_wait:
+      time.sleep(resource.initial_wait)
+
+    # not_if and only_if are both checked before the action, so they are evaluated at once
+    pending = [guard for guard in (resource.not_if, resource.only_if) if guard is not None]
+    if resource.not_if is not None and self._check_condition(
+      resource.not_if, pending):
+      Logger.info("Skipping %s due to not_if" % resource)
+      return
+
+    if resource.only_if is not None and not self._check_condition(
+      resource.only_if, pending):
+      Logger.info("Skipping %s due to only_if" % resource)
+      return
+
+    try:
+      for action in resource.action:
+        if not resource.ignore_failures:
+          self.run_action(resource, action)
+        else:
+          try:
+            self.run_action(resource, action)
+          except Exception as ex:
+            Logger.info("Skipping failure of %s due to ignore_failures. Failure reason: %s" % (resource, str(ex)))
+            pass
+    finally:
+      # the actions could change the results of the guards
+      self.guards.invalidate()
+
+  def _run_in_order(self, resources):
+    for i, resource in enumerate(resources):
+      try:
+        self.run_resource(resource)
+      except:
+        # the resources which were not run are left in the queue
+        self.resource_list[0:0] = resources[i + 1:]
+        raise
+
+  def _run_concurrently(self, resources, max_workers):
+    """
+    Runs the resources on up to max_workers threads, see concurrent(). Once a
+    resource fails no more resources are started, and the failure of the
+    first failed resource is raised when the running ones finish.
+    """
+    required = self._get_required_resources(resources)
+    results = [None] * len(resources)
+    finished = threading.Condition()
+    started = set()
+    logged = 0
+    failed = False
+
+    finished.acquire()
+    try:
+      while True:
+        if not failed:
+          running = len(started) - sum(1 for i in started if results[i] is not None)
+          for i in xrange(len(resources)):
+            if running >= max_workers:
+              break
+            if i not in started and all(results[j] is not None for j in required[i]):
+              started.add(i)
+              running += 1
+              worker = threading.Thread(target=self._run_resource_in_thread,
+                                        args=(resources[i], i, results, finished))
+              worker.daemon = True
+              worker.start()
+
+        if all(results[i] is not None for i in started) and (failed or len(started) == len(resources)):
+          break
+        finished.wait()
+
+        # log the output of the finished resources in their order
+        while logged < len(resources) and results[logged] is not None:
+          self._log_messages(results[logged][0])
+          logged += 1
+        failed = failed or any(results[i][2] for i in started if results[i] is not None)
+    finally:
+      finished.release()
+
+    for i in xrange(logged, len(resources)):
+      if results[i] is not None:
+        self._log_messages(results[i][0])
+
+    # resources defined in the threads, but not run by them (in test mode)
+    for i in sorted(started):
+      self.resource_list.extend(results[i][1])
+
+    for i in xrange(len(resources)):
+      if i in started and results[i][2]:
+        self.resource_list[0:0] = [resources[j] for j in xrange(len(resources)) if j not in started]
+        exc_info = results[i][2]
+        raise exc_info[0], exc_info[1], exc_info[2]
+
+  def _run_resource_in_thread(self, resource, i, results, finished):
+    messages = []
+    Logger.buffer_messages(messages)
+    self._local.resource_list = []
+    exc_info = None
+    try:
+      self.run_resource(resource)
+    except:
+      exc_info = sys.exc_info()
+    finally:
+      Logger.buffer_messages(None)
+      resource_list = self._local.resource_list
+      self._local.resource_list = None
+
+    finished.acquire()
+    try:
+      results[i] = (messages, resource_list, exc_info)
+      finished.notify()
+    finally:
+      finished.release()
+
+  def _log_messages(self, messages):
+    for method, text in messages:
+      method(text)
+
+  def _get_required_resources(self, resources):
+    """
+    Gets the indexes of the preceding resources every resource has to be run after
+    """
+    paths = []
+    for resource in resources:
+      resource_paths = resource.get_paths()
+      if resource_paths is not None:
+        resource_paths = [os.path.normpath(path) for path in resource_paths]
+      paths.append(resource_paths)
+
+    required = []
+    for i, resource in enumerate(resources):
+      required.append([j for j in xrange(i) if resources[j] in resource.requires
+                       or self._paths_overlap(paths[i], paths[j])])
+    return required
+
+  def _paths_overlap(self, paths, other_paths):
+    if paths is None or other_paths is None:
+      return True
+
+    for path in paths:
+      for other_path in other_paths:
+        if path == other_path or path.startswith(other_path.rstrip(os.sep) + os.sep) \
+            or other_path.startswith(path.rstrip(os.sep) + os.sep):
+          return True
+    return False
+
   @classmethod
   def get_instance(cls):
     return cls._instances[-1]
@@ -0,0 +1,248 @@
+#!/usr/bin/env python
+"""
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Ambari Agent
+
+"""
+
+__all__ = ["GuardEvaluator"]
+
+import errno
+import os
+import pwd
+import re
+import threading
+import time
+
+from resource_management.core import shell
+from resource_management.core.logger import Logger
+
+# redirections which do not change the exit code of a check
+REDIRECTIONS_REGEXP = re.compile(r"\s*(?:[12]?>>?\s*/dev/null|[12]?>&[12]|&>\s*/dev/null)(?=\s|$)")
+WORD = r"([\w./@%+=:,][\w./@%+=:,-]*)"
+PID = r"(?:(\d+)|`cat\s+%s`|\$\(cat\s+%s\))" % (WORD, WORD)
+
+TEST_REGEXP = re.compile(r"(?:test\s+-([efd])\s+%s|\[\s+-([efd])\s+%s\s+\])\Z" % (WORD, WORD))
+LS_REGEXP = re.compile(r"ls\s+%s\Z" % WORD)
+PS_REGEXP = re.compile(r"ps(\s+-p)?\s+%s\Z" % PID)
+USER_REGEXP = re.compile(r"(?:id(?:\s+-u)?|getent\s+passwd)\s+%s\Z" % WORD)
+
+PATH_TESTS = {
+  'e': os.path.exists,
+  'f': os.path.isfile,
+  'd': os.path.isdir,
+}
+
+
+def compile_guard(command):
+  """
+  Compiles "check && check ..." guards made of simple checks (test -e/-f/-d,
+  ls, ps -p, id, getent passwd) into functions. Returns None for other guards.
+  """
+  checks = []
+  for part in REDIRECTIONS_REGEXP.sub("", command).split("&&"):
+    check = _compile_check(part.strip())
+    if check is None:
+      return None
+    checks.append(check)
+
+  def evaluate():
+    """
+    Returns the result of the guard, or None if it has to be evaluated in the shell
+    """
+    for check in checks:
+      result = check()
+      if not result:
+        return result
+    return True
+
+  return evaluate
+
+
+def _compile_check(check):
+  match = TEST_REGEXP.match(check)
+  if match:
+    test, path, bracket_test, bracket_path = match.groups()
+    return lambda: PATH_TESTS[test or bracket_test](path or bracket_path)
+
+  match = LS_REGEXP.match(check)
+  if match:
+    path = match.group(1)
+    return lambda: os.path.lexists(path)
+
+  match = PS_REGEXP.match(check)
+  if match:
+    option, pid, pid_file, other_pid_file = match.groups()
+    return lambda: _is_process_running(pid, pid_file or other_pid_file, option is not None)
+
+  match = USER_REGEXP.match(check)
+  if match and not match.group(1).isdigit():
+    user = match.group(1)
+    return lambda: _user_exists(user)
+
+  return None
+
+
+def _is_process_running(pid, pid_file, pid_required):
+  if pid_file is not None:
+    try:
+      with open(pid_file) as f:
+        pid = f.read().strip()
+    except IOError:
+      pid = ""
+    if not pid:
+      # ps without pids lists the processes of the terminal and succeeds
+      return False if pid_required else None
+    if not pid.isdigit():
+      return None
+
+  pid = int(pid)
+  if pid <= 0:
+    return None
+  try:
+    os.kill(pid, 0)
+  except OSError, e:
+    return e.errno == errno.EPERM
+  return True
+
+
+def _user_exists(user):
+  try:
+    pwd.getpwnam(user)
+  except KeyError:
+    return False
+  return True
+
+
+class GuardEvaluator(object):
+  """
+  Evaluates the string not_if/only_if guards of resources.
+
+  Guards compiled by compile_guard are checked natively. The others are run in
+  the shell and their results are cached by the command string until any
+  resource action or shell command is run. The other shell guards of the same
+  resource which are not cached yet are run along with the requested one, in
+  a single shell invocation.
+  """
+  # guards running longer than this are logged at info level
+  SLOW_GUARD_SECONDS = 1.0
+  RESULT_MARKER = "RMF_GUARD_RESULT"
+
+  def __init__(self):
+    self.compiled = {}
+    self.results = {}
+    self.commands_run = None
+    self.lock = threading.Lock()
+
+  def invalidate(self):
+    with self.lock:
+      self.results.clear()
+      self.commands_run = None
+
+  def evaluate(self, command, pending=()):
+    """
+    @param pending: guards which are evaluated before any action runs
+    @return: True if the guard succeeds
+    """
+    start = time.time()
+    check = self._compile(command)
+    if check is not None:
+      result = check()
+      if result is not None:
+        self._log_timing(command, result, time.time() - start, "natively")
+        return result
+
+    with self.lock:
+      if self.commands_run != shell.commands_run:
+        self.results.clear()
+        self.commands_run = shell.commands_run
+      if command in self.results:
+        result = self.results[command]
+        self._log_timing(command, result, time.time() - start, "from cache")
+        return result
+      cached = set(self.results)
+      commands_run = shell.commands_run
+
+    commands = [command]
+    for guard in pending:
+      if isinstance(guard, basestring) and guard not in commands and guard not in cached \
+          and self._compile(guard) is None:
+        commands.append(guard)
+
+    calls = 0
+    results = {}
+    if len(commands) > 1:
+      results = self._evaluate_batch(commands)
+      calls += 1
+    if command not in results:
+      ret, out = shell.call(command)
+      results[command] = ret == 0
+      calls += 1
+      self._log_timing(command, results[command], time.time() - start, "in shell")
+
+    with self.lock:
+      # the results are dropped if anything else was run meanwhile, the guards do not change anything
+      if self.commands_run == commands_run and shell.commands_run == commands_run + calls:
+        self.results.update(results)
+        self.commands_run = shell.commands_run
+    return results[command]
+
+  def _compile(self, command):
+    """
+    Returns the native check of the guard, None if it has to be run in the shell
+    """
+    if command not in self.compiled:
+      self.compiled[command] = compile_guard(command)
+    return self.compiled[command]
+
+  def _evaluate_batch(self, commands):
+    """
+    Runs the guards in one shell, returns the results of the guards which were evaluated
+    """
+    script = ["TIMEFORMAT=%R"]
+    for command in commands:
+      script.append("{ time ( %s\n) > /dev/null 2>&1 < /dev/null ; } 2>&1 ; echo \"%s $?\"" % (command, self.RESULT_MARKER))
+    ret, out = shell.call("\n".join(script), logoutput=False, quiet=True)
+
+    results = {}
+    elapsed = None
+    lines = iter(out.splitlines())
+    for command in commands:
+      for line in lines:
+        if line.startswith(self.RESULT_MARKER + " "):
+          result = results[command] = line.split()[-1] == "0"
+          self._log_timing(command, result, elapsed, "in a batch of %d guards" % len(commands))
+          elapsed = None
+          break
+        try:
+          elapsed = float(line)
+        except ValueError:
+          pass
+      else:
+        break
+    return results
+
+  def _log_timing(self, command, result, elapsed, how):
+    if elapsed is None:
+      Logger.debug("Guard %s evaluated %s: %s" % (command, how, result))
+      return
+    message = "Guard %s evaluated %s in %.3f seconds: %s" % (command, how, elapsed, result)
+    if elapsed >= self.SLOW_GUARD_SECONDS:
+      Logger.info(message)
+    else:
+      Logger.debug(message)
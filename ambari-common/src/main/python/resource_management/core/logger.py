@@ -23,6 +23,7 @@ Ambari Agent
 __all__ = ["Logger"]
 import sys
 import logging
+import threading
 from resource_management.libraries.script.config_dictionary import UnknownConfiguration
 from resource_management.core.utils import PasswordString
 
@@ -33,6 +34,8 @@ class Logger:
   logger = None
   # unprotected_strings : protected_strings map
   sensitive_strings = {}
+  # per thread list of buffered messages, see buffer_messages
+  _local = threading.local()
   
   @staticmethod
   def initialize_logger(name='resource_management', logging_level=logging.INFO, format='%(asctime)s - %(message)s'):
@@ -56,19 +59,36 @@ class Logger:
 
   @staticmethod
   def error(text):
-    Logger.logger.error(Logger.filter_text(text))
+    Logger._log(Logger.logger.error, Logger.filter_text(text))
 
   @staticmethod
   def warning(text):
-    Logger.logger.warning(Logger.filter_text(text))
+    Logger._log(Logger.logger.warning, Logger.filter_text(text))
 
   @staticmethod
   def info(text):
-    Logger.logger.info(Logger.filter_text(text))
+    Logger._log(Logger.logger.info, Logger.filter_text(text))
 
   @staticmethod
   def debug(text):
-    Logger.logger.debug(Logger.filter_text(text))
+    Logger._log(Logger.logger.debug, Logger.filter_text(text))
+
+  @staticmethod
+  def buffer_messages(messages):
+    """
+    Makes the messages logged by the current thread be appended to the given
+    list as (log method, text) instead of being logged. Passing None stops it.
+    Used to log the output of concurrently run resources in order.
+    """
+    Logger._local.messages = messages
+
+  @staticmethod
+  def _log(method, text):
+    messages = getattr(Logger._local, 'messages', None)
+    if messages is None:
+      method(text)
+    else:
+      messages.append((method, text))
 
   @staticmethod
   def error_resource(resource):
@@ -80,11 +80,13 @@ class UserProvider(Provider):
     command.append(self.resource.username)
 
     shell.checked_call(command, sudo=True)
+    self.resource.env.users.pop(self.resource.username, None)
 
   def action_remove(self):
     if self.user:
       command = ['userdel', self.resource.username]
       shell.checked_call(command, sudo=True)
+      self.resource.env.users.pop(self.resource.username, None)
       Logger.info("Removed user %s" % self.resource)
 
   @property
@@ -131,11 +133,13 @@ class GroupProvider(Provider):
       return
     
     shell.checked_call(command, sudo=True)
+    self.resource.env.groups.pop(self.resource.group_name, None)
 
   def action_remove(self):
     if self.group:
       command = ['groupdel', self.resource.group_name]
       shell.checked_call(command, sudo=True)
+      self.resource.env.groups.pop(self.resource.group_name, None)
       Logger.info("Removed group %s" % self.resource)
 
   @property
@@ -43,18 +43,46 @@ class PackageProvider(Provider):
     raise NotImplementedError()
   def upgrade_package(self, name, version):
     raise NotImplementedError()
+  def install_package_list(self, names, use_repos=[], skip_repos=[]):
+    """
+    Installs all of the packages in a single package manager transaction, without checking their existence
+    """
+    raise NotImplementedError()
 
   def action_install(self):
-    package_name = self.get_package_name_with_version()
-    self.install_package(package_name, self.resource.use_repos, self.resource.skip_repos)
+    if self.resource.packages is not None:
+      self.install_packages(self.resource.packages, self.resource.use_repos, self.resource.skip_repos)
+    else:
+      package_name = self.get_package_name_with_version()
+      self.install_package(package_name, self.resource.use_repos, self.resource.skip_repos)
 
   def action_upgrade(self):
-    package_name = self.get_package_name_with_version()
-    self.upgrade_package(package_name, self.resource.use_repos, self.resource.skip_repos)
+    if self.resource.packages is not None:
+      self.install_packages(self.resource.packages, self.resource.use_repos, self.resource.skip_repos, is_upgrade=True)
+    else:
+      package_name = self.get_package_name_with_version()
+      self.upgrade_package(package_name, self.resource.use_repos, self.resource.skip_repos)
 
   def action_remove(self):
-    package_name = self.get_package_name_with_version()
-    self.remove_package(package_name)
+    if self.resource.packages is not None:
+      for package_name in self.resource.packages:
+        self.remove_package(package_name)
+    else:
+      package_name = self.get_package_name_with_version()
+      self.remove_package(package_name)
+
+  def install_packages(self, names, use_repos=[], skip_repos=[], is_upgrade=False):
+    """
+    Resolves which of the packages are missing and installs them in one transaction.
+    """
+    if not is_upgrade and not use_repos:
+      installed_packages = [name for name in names if self._check_existence(name)]
+      if installed_packages:
+        Logger.info("Skipping installation of existing packages %s" % (", ".join(installed_packages)))
+      names = [name for name in names if not name in installed_packages]
+
+    if names:
+      self.install_package_list(names, use_repos, skip_repos)
 
   def get_package_name_with_version(self):
     if self.resource.version:
@@ -96,34 +124,49 @@ class PackageProvider(Provider):
     return code, out
        
     
-  def yum_check_package_available(self, name):
+  def get_installed_packages(self, list_packages):
     """
-    Does the same as rpm_check_package_avaiable, but faster.
-    However need root permissions.
+    Names of installed packages, listed once per command (Environment) and shared by all of its Package resources.
+    The snapshot is dropped whenever a package is installed or removed, or any other command is run.
     """
-    import yum # Python Yum API is much faster then other check methods. (even then "import rpm")
-    yb = yum.YumBase()
+    env = self.resource.env
+    if env.installed_packages is None or env.installed_packages_commands_run != shell.commands_run:
+      env.installed_packages = list_packages()
+      env.installed_packages_commands_run = shell.commands_run
+    return env.installed_packages
+
+  def invalidate_installed_packages(self):
+    self.resource.env.installed_packages = None
+
+  def is_package_in_list(self, name, package_names):
     name_regex = re.escape(name).replace("\\?", ".").replace("\\*", ".*") + '$'
     regex = re.compile(name_regex)
-    
-    with suppress_stdout():
-      package_list = yb.rpmdb.simplePkgList()
-    
-    for package in package_list:
-      if regex.match(package[0]):
+
+    for package_name in package_names:
+      if regex.match(package_name):
         return True
-    
     return False
-  
-  def rpm_check_package_available(self, name):
+
+  def yum_list_installed_packages(self):
+    import yum # Python Yum API is much faster then other check methods. (even then "import rpm")
+    yb = yum.YumBase()
+    try:
+      with suppress_stdout():
+        return [package[0] for package in yb.rpmdb.simplePkgList()]
+    finally:
+      yb.close()
+
+  def rpm_list_installed_packages(self):
     import rpm # this is faster then calling 'rpm'-binary externally.
     ts = rpm.TransactionSet()
-    packages = ts.dbMatch()
-    
-    name_regex = re.escape(name).replace("\\?", ".").replace("\\*", ".*") + '$'
-    regex = re.compile(name_regex)
-    
-    for package in packages:
-      if regex.match(package['name']):
-        return True
-    return False
+    return [package['name'] for package in ts.dbMatch()]
+
+  def yum_check_package_available(self, name):
+    """
+    Does the same as rpm_check_package_avaiable, but faster.
+    However need root permissions.
+    """
+    return self.is_package_in_list(name, self.get_installed_packages(self.yum_list_installed_packages))
+  
+  def rpm_check_package_available(self, name):
+    return self.is_package_in_list(name, self.get_installed_packages(self.rpm_list_installed_packages))
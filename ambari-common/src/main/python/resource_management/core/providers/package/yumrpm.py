@@ -39,17 +39,23 @@ REMOVE_CMD = {
 class YumProvider(PackageProvider):
   def install_package(self, name, use_repos=[], skip_repos=[], is_upgrade=False):
     if is_upgrade or use_repos or not self._check_existence(name):
-      cmd = INSTALL_CMD[self.get_logoutput()]
-      if use_repos:
-        enable_repo_option = '--enablerepo=' + ",".join(use_repos)
-        disable_repo_option = '--disablerepo=' + "*,".join(skip_repos)
-        cmd = cmd + [disable_repo_option, enable_repo_option]
-      cmd = cmd + [name]
-      Logger.info("Installing package %s ('%s')" % (name, string_cmd_from_args_list(cmd)))
-      shell.checked_call(cmd, sudo=True, logoutput=self.get_logoutput())
+      self.install_package_list([name], use_repos, skip_repos)
     else:
       Logger.info("Skipping installation of existing package %s" % (name))
 
+  def install_package_list(self, names, use_repos=[], skip_repos=[]):
+    cmd = INSTALL_CMD[self.get_logoutput()]
+    if use_repos:
+      enable_repo_option = '--enablerepo=' + ",".join(use_repos)
+      disable_repo_option = '--disablerepo=' + "*,".join(skip_repos)
+      cmd = cmd + [disable_repo_option, enable_repo_option]
+    cmd = cmd + names
+    Logger.info("Installing package %s ('%s')" % (", ".join(names), string_cmd_from_args_list(cmd)))
+    try:
+      shell.checked_call(cmd, sudo=True, logoutput=self.get_logoutput())
+    finally:
+      self.invalidate_installed_packages()
+
   def upgrade_package(self, name, use_repos=[], skip_repos=[], is_upgrade=True):
     return self.install_package(name, use_repos, skip_repos, is_upgrade)
 
@@ -57,7 +63,10 @@ class YumProvider(PackageProvider):
     if self._check_existence(name):
       cmd = REMOVE_CMD[self.get_logoutput()] + [name]
       Logger.info("Removing package %s ('%s')" % (name, string_cmd_from_args_list(cmd)))
-      shell.checked_call(cmd, sudo=True, logoutput=self.get_logoutput())
+      try:
+        shell.checked_call(cmd, sudo=True, logoutput=self.get_logoutput())
+      finally:
+        self.invalidate_installed_packages()
     else:
       Logger.info("Skipping removal of non-existing package %s" % (name))
 
@@ -40,24 +40,30 @@ LIST_ACTIVE_REPOS_CMD = ['/usr/bin/zypper', 'repos']
 class ZypperProvider(PackageProvider):
   def install_package(self, name, use_repos=[], skip_repos=[], is_upgrade=False):
     if is_upgrade or use_repos or not self._check_existence(name):
-      cmd = INSTALL_CMD[self.get_logoutput()]
-      if use_repos:
-        active_base_repos = self.get_active_base_repos()
-        if 'base' in use_repos:
-          # Remove 'base' from use_repos list
-          use_repos = filter(lambda x: x != 'base', use_repos)
-          use_repos.extend(active_base_repos)
-        use_repos_options = []
-        for repo in use_repos:
-          use_repos_options = use_repos_options + ['--repo', repo]
-        cmd = cmd + use_repos_options
-
-      cmd = cmd + [name]
-      Logger.info("Installing package %s ('%s')" % (name, string_cmd_from_args_list(cmd)))
-      self.checked_call_until_not_locked(cmd, sudo=True, logoutput=self.get_logoutput())
+      self.install_package_list([name], use_repos, skip_repos)
     else:
       Logger.info("Skipping installation of existing package %s" % (name))
 
+  def install_package_list(self, names, use_repos=[], skip_repos=[]):
+    cmd = INSTALL_CMD[self.get_logoutput()]
+    if use_repos:
+      active_base_repos = self.get_active_base_repos()
+      if 'base' in use_repos:
+        # Remove 'base' from use_repos list
+        use_repos = filter(lambda x: x != 'base', use_repos)
+        use_repos.extend(active_base_repos)
+      use_repos_options = []
+      for repo in use_repos:
+        use_repos_options = use_repos_options + ['--repo', repo]
+      cmd = cmd + use_repos_options
+
+    cmd = cmd + names
+    Logger.info("Installing package %s ('%s')" % (", ".join(names), string_cmd_from_args_list(cmd)))
+    try:
+      self.checked_call_until_not_locked(cmd, sudo=True, logoutput=self.get_logoutput())
+    finally:
+      self.invalidate_installed_packages()
+
   def upgrade_package(self, name, use_repos=[], skip_repos=[], is_upgrade=True):
     return self.install_package(name, use_repos, skip_repos, is_upgrade)
   
@@ -65,7 +71,10 @@ class ZypperProvider(PackageProvider):
     if self._check_existence(name):
       cmd = REMOVE_CMD[self.get_logoutput()] + [name]
       Logger.info("Removing package %s ('%s')" % (name, string_cmd_from_args_list(cmd)))
-      self.checked_call_until_not_locked(cmd, sudo=True, logoutput=self.get_logoutput())
+      try:
+        self.checked_call_until_not_locked(cmd, sudo=True, logoutput=self.get_logoutput())
+      finally:
+        self.invalidate_installed_packages()
     else:
       Logger.info("Skipping removal of non-existing package %s" % (name))
       
@@ -25,11 +25,13 @@ from __future__ import with_statement
 import re
 import os
 import time
+import hashlib
 import pwd
 import grp
 from resource_management.core import shell
 from resource_management.core import sudo
 from resource_management.core.base import Fail
+from resource_management.core.environment import Environment
 from resource_management.core import ExecuteTimeoutException
 from resource_management.core.providers import Provider
 from resource_management.core.logger import Logger
@@ -39,18 +41,54 @@ def assert_not_safemode_folder(path, safemode_folders):
     raise Fail(("Not performing recursive operation ('recursive_ownership' or 'recursive_mode_flags') on folder '%s'" +
     " as this can damage the system. Please pass changed safemode_folders parameter to Directory resource if you really intend to do this.") % (path))
 
-def _ensure_metadata(path, user, group, mode=None, cd_access=None, recursive_ownership=False, recursive_mode_flags=None, recursion_follow_links=False, safemode_folders=[]):
+def _get_user(env, user):
+  if user not in env.users:
+    try:
+      env.users[user] = pwd.getpwnam(user)
+    except KeyError:
+      raise Fail("User '{0}' doesn't exist".format(user))
+  return env.users[user]
+
+def _get_group(env, group):
+  if group not in env.groups:
+    try:
+      env.groups[group] = grp.getgrnam(group)
+    except KeyError:
+      raise Fail("Group '{0}' doesn't exist".format(group))
+  return env.groups[group]
+
+def _forget_directory(env, path):
+  """
+  Drops the cached state of the directory and of everything under it
+  """
+  prefix = path.rstrip(os.sep) + os.sep
+  env.directories = set(dir_path for dir_path in env.directories
+                        if dir_path != path and not dir_path.startswith(prefix))
+  env.accessible_directories = set(entry for entry in env.accessible_directories
+                                   if entry[0] != path and not entry[0].startswith(prefix))
+
+def _forget_changed_directories(env):
+  """
+  Drops the cached state of all directories if any command was run since it was
+  cached, the command may have changed or removed them
+  """
+  if env.directories_commands_run != shell.commands_run:
+    env.directories.clear()
+    env.accessible_directories.clear()
+    env.directories_commands_run = shell.commands_run
+
+def _ensure_metadata(path, user, group, mode=None, cd_access=None, recursive_ownership=False, recursive_mode_flags=None, recursion_follow_links=False, safemode_folders=[], recursion_workers=1):
+  env = Environment.get_instance()
+  _forget_changed_directories(env)
   user_entity = group_entity = None
   _user_entity = _group_entity = None
 
-  if user or group:
+  stat = None
+  if user or group or mode:
     stat = sudo.stat(path)
 
   if user:
-    try:
-      _user_entity = pwd.getpwnam(user)
-    except KeyError:
-      raise Fail("User '{0}' doesn't exist".format(user))
+    _user_entity = _get_user(env, user)
     
     if stat.st_uid != _user_entity.pw_uid:
       user_entity = _user_entity
@@ -58,10 +96,7 @@ def _ensure_metadata(path, user, group, mode=None, cd_access=None, recursive_own
         "Changing owner for %s from %d to %s" % (path, stat.st_uid, user))
       
   if group:
-    try:
-      _group_entity = grp.getgrnam(group)
-    except KeyError:
-      raise Fail("Group '{0}' doesn't exist".format(group))
+    _group_entity = _get_group(env, group)
     
     if stat.st_gid != _group_entity.gr_gid:
       group_entity = _group_entity
@@ -70,9 +105,11 @@ def _ensure_metadata(path, user, group, mode=None, cd_access=None, recursive_own
   
   if recursive_ownership:
     assert_not_safemode_folder(path, safemode_folders)
-    sudo.chown_recursive(path, _user_entity, _group_entity, recursion_follow_links)
+    sudo.chown_recursive(path, _user_entity, _group_entity, recursion_follow_links, recursion_workers)
+    _forget_directory(env, path)
   
-  sudo.chown(path, user_entity, group_entity)
+  # chown and chmod are sent to the privileged helper in one request
+  operations = [("chown", path, user_entity, group_entity)]
   
   if recursive_mode_flags:
     if not isinstance(recursive_mode_flags, dict):
@@ -87,14 +124,22 @@ def _ensure_metadata(path, user, group, mode=None, cd_access=None, recursive_own
         raise Fail("'recursive_mode_flags' found '%s', but should value format have the following format: [ugoa...][[+-=][perms...]...]." % (str(flags)))
     
     assert_not_safemode_folder(path, safemode_folders)
-    sudo.chmod_recursive(path, recursive_mode_flags, recursion_follow_links)
+    sudo.batch(*operations)
+    operations = []
+    sudo.chmod_recursive(path, recursive_mode_flags, recursion_follow_links, recursion_workers)
+    _forget_directory(env, path)
 
   if mode:
-    stat = sudo.stat(path)
+    if recursive_ownership or recursive_mode_flags:
+      stat = sudo.stat(path)
     if stat.st_mode != mode:
       Logger.info("Changing permission for %s from %o to %o" % (
       path, stat.st_mode, mode))
-      sudo.chmod(path, mode)
+    # changing the owner may clear the setuid and setgid bits
+    if stat.st_mode != mode or user_entity or group_entity:
+      operations.append(("chmod", path, mode))
+      env.accessible_directories = set(entry for entry in env.accessible_directories if entry[0] != path)
+  sudo.batch(*operations)
       
   if cd_access:
     if not re.match("^[ugoa]+$", cd_access):
@@ -102,8 +147,10 @@ def _ensure_metadata(path, user, group, mode=None, cd_access=None, recursive_own
     
     dir_path = path
     while dir_path != os.sep:
-      if sudo.path_isdir(dir_path):
-        sudo.chmod_extended(dir_path, cd_access+"+rx")
+      if (dir_path, cd_access) not in env.accessible_directories:
+        if dir_path in env.directories or sudo.path_isdir(dir_path):
+          sudo.chmod_extended(dir_path, cd_access+"+rx")
+          env.accessible_directories.add((dir_path, cd_access))
         
       dir_path = os.path.split(dir_path)[0]
 
@@ -111,23 +158,30 @@ def _ensure_metadata(path, user, group, mode=None, cd_access=None, recursive_own
 class FileProvider(Provider):
   def action_create(self):
     path = self.resource.path
+    dirname = os.path.dirname(path)
+    _forget_changed_directories(self.resource.env)
     
-    if sudo.path_isdir(path):
+    operations = [("path_isdir", path), ("path_exists", path)]
+    if dirname not in self.resource.env.directories:
+      operations.append(("path_isdir", dirname))
+    results = sudo.batch(*operations)
+    
+    if results[0]:
       raise Fail("Applying %s failed, directory with name %s exists" % (self.resource, path))
     
-    dirname = os.path.dirname(path)
-    if not sudo.path_isdir(dirname):
-      raise Fail("Applying %s failed, parent directory %s doesn't exist" % (self.resource, dirname))
+    if len(results) > 2:
+      if not results[2]:
+        raise Fail("Applying %s failed, parent directory %s doesn't exist" % (self.resource, dirname))
+      self.resource.env.directories.add(dirname)
     
     write = False
     content = self._get_content()
-    if not sudo.path_exists(path):
+    if not results[1]:
       write = True
       reason = "it doesn't exist"
     elif self.resource.replace:
       if content is not None:
-        old_content = sudo.read_file(path, encoding=self.resource.encoding)
-        if content != old_content:
+        if not self._content_matches(path, content):
           write = True
           reason = "contents don't match"
           if self.resource.backup:
@@ -150,6 +204,14 @@ class FileProvider(Provider):
       Logger.info("Deleting %s" % self.resource)
       sudo.unlink(path)
 
+  def _content_matches(self, path, content):
+    """
+    Compares the size and the digest of the file with the content, without reading the whole file at once
+    """
+    content = content.encode(self.resource.encoding) if self.resource.encoding else content
+    size, digest = sudo.file_digest(path, len(content))
+    return size == len(content) and digest == hashlib.md5(content).hexdigest()
+
   def _get_content(self):
     content = self.resource.content
     if content is None:
@@ -192,11 +254,14 @@ class DirectoryProvider(Provider):
       
     if not sudo.path_isdir(path):
       raise Fail("Applying %s failed, file %s already exists" % (self.resource, path))
+    _forget_changed_directories(self.resource.env)
+    self.resource.env.directories.add(path)
     
     _ensure_metadata(path, self.resource.owner, self.resource.group,
                         mode=self.resource.mode, cd_access=self.resource.cd_access,
                         recursive_ownership=self.resource.recursive_ownership, recursive_mode_flags=self.resource.recursive_mode_flags, 
-                        recursion_follow_links=self.resource.recursion_follow_links, safemode_folders=self.resource.safemode_folders)
+                        recursion_follow_links=self.resource.recursion_follow_links, safemode_folders=self.resource.safemode_folders,
+                        recursion_workers=self.resource.recursion_workers)
 
   def action_delete(self):
     path = self.resource.path
@@ -206,6 +271,7 @@ class DirectoryProvider(Provider):
       
       Logger.info("Removing directory %s and all its content" % self.resource)
       sudo.rmtree(path)
+      _forget_directory(self.resource.env, path)
 
 
 class LinkProvider(Provider):
@@ -47,6 +47,12 @@ class Package(Resource):
   locked_tries = ResourceArgument(default=8)
   locked_try_sleep = ResourceArgument(default=30) # seconds
 
+  """
+  Install (or upgrade) all of these packages in one package manager transaction, instead of package_name.
+  Already installed packages are skipped on install, an empty list does nothing.
+  """
+  packages = ForcedListArgument(default=lambda obj: None)
+
   version = ResourceArgument()
   actions = ["install", "upgrade", "remove"]
   build_vars = ForcedListArgument(default=[])
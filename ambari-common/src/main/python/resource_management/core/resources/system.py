@@ -50,6 +50,7 @@ class File(Resource):
   cd_access = ResourceArgument()
 
   actions = Resource.actions + ["create", "delete"]
+  path_arguments = ["path"]
 
 
 class Directory(Resource):
@@ -149,7 +150,15 @@ class Directory(Resource):
   """
   recursion_follow_links = BooleanArgument(default=False)
 
+  """
+  Number of threads doing recursive chown/chmod (recursive_ownership or recursive_mode_flags),
+  each of them walks some of the top level subfolders. Worth raising for folders with many
+  files spread over several disks, like DataNode or NodeManager local dirs.
+  """
+  recursion_workers = ResourceArgument(default=1)
+
   actions = Resource.actions + ["create", "delete"]
+  path_arguments = ["path"]
 
 
 class Link(Resource):
@@ -159,6 +168,7 @@ class Link(Resource):
   hard = BooleanArgument(default=False)
 
   actions = Resource.actions + ["create", "delete"]
+  path_arguments = ["path", "to"]
 
 
 class Execute(Resource):
@@ -24,14 +24,19 @@ __all__ = ["non_blocking_call", "checked_call", "call", "quote_bash_args", "as_u
 
 import time
 import copy
+import errno
 import os
+import re
 import select
+import signal
 import sys
 import logging
 import string
 import subprocess
 import threading
 import traceback
+import uuid
+import atexit
 from exceptions import Fail
 from exceptions import ExecuteTimeoutException
 from resource_management.core.logger import Logger
@@ -46,6 +51,12 @@ PLACEHOLDERS_TO_STR = {
   EXPORT_PLACEHOLDER: "export {env_str} > /dev/null ; ",
   ENV_PLACEHOLDER: "{env_str}"
 }
+# when set to "true" (by the agent), commands are run in pooled shell sessions, see ShellSessionPool
+SHELL_SESSIONS_ENV_VAR = "AMBARI_SHELL_SESSIONS"
+READ_BUFFER_SIZE = 65536
+
+# number of commands started so far, lets cached results of checks be invalidated
+commands_run = 0
 
 def log_function_call(function):
   def inner(command, **kwargs):
@@ -120,6 +131,9 @@ def non_blocking_call(command, quiet=False, stdout=subprocess.PIPE,stderr=subpro
                               tries=1, try_sleep=0)
 
 def _call_wrapper(command, **kwargs):
+  global commands_run
+  commands_run += 1
+
   tries = kwargs['tries']
   try_sleep = kwargs['try_sleep']
   timeout = kwargs['timeout']
@@ -181,11 +195,22 @@ def _call(command, logoutput=None, throw_on_failure=True, stdout=subprocess.PIPE
     path = os.pathsep.join(path) if isinstance(path, (list, tuple)) else path
     env['PATH'] = os.pathsep.join([env['PATH'], path])
   
+  use_sessions = _shell_sessions_enabled()
+
   # prepare command cmd
   if sudo:
     command = as_sudo(command, env=env)
   elif user:
     command = as_user(command, user, env=env)
+  elif use_sessions and isinstance(command, (list, tuple)):
+    # no shell features are used, the command can be executed without bash
+    try:
+      return _run_command(list(command), command_alias, logoutput, throw_on_failure, stdout, stderr, cwd, env,
+                          preexec_fn, wait_for_finish, timeout, on_new_line)
+    except OSError, ex:
+      # e.g. bash builtins, bash reports the errors of the command
+      if ex.errno not in (errno.ENOENT, errno.EACCES):
+        raise
     
   # convert to string and escape
   if isinstance(command, (list, tuple)):
@@ -196,9 +221,23 @@ def _call(command, logoutput=None, throw_on_failure=True, stdout=subprocess.PIPE
   for placeholder, replacement in PLACEHOLDERS_TO_STR.iteritems():
     command = command.replace(placeholder, replacement.format(env_str=env_str))
 
+  if use_sessions and wait_for_finish and preexec_fn is None and on_new_line is None \
+      and stdout == subprocess.PIPE and stderr == subprocess.STDOUT:
+    code, out = _session_pool.run(command, command_alias, env, cwd, timeout)
+    if _is_output_logged(logoutput) and out:
+      _print(out + "\n")
+    if throw_on_failure and code:
+      err_msg = Logger.filter_text(("Execution of '%s' returned %d. %s") % (command_alias, code, out))
+      raise Fail(err_msg)
+    return code, out
+
   # --noprofile is used to preserve PATH set for ambari-agent
   subprocess_command = ["/bin/bash","--login","--noprofile","-c", command]
-  
+  return _run_command(subprocess_command, command_alias, logoutput, throw_on_failure, stdout, stderr, cwd, env,
+                      preexec_fn, wait_for_finish, timeout, on_new_line)
+
+def _run_command(subprocess_command, command_alias, logoutput, throw_on_failure, stdout, stderr, cwd, env,
+                 preexec_fn, wait_for_finish, timeout, on_new_line):
   files_to_close = []
   if isinstance(stdout, (basestring)):
     stdout = open(stdout, 'wb')
@@ -221,7 +260,7 @@ def _call(command, logoutput=None, throw_on_failure=True, stdout=subprocess.PIPE
       return proc
       
     # in case logoutput==False, never log.    
-    logoutput = logoutput==True and Logger.logger.isEnabledFor(logging.INFO) or logoutput==None and Logger.logger.isEnabledFor(logging.DEBUG)
+    logoutput = _is_output_logged(logoutput)
     read_set = []
     
     if stdout == subprocess.PIPE:
@@ -230,10 +269,10 @@ def _call(command, logoutput=None, throw_on_failure=True, stdout=subprocess.PIPE
       read_set.append(proc.stderr)
     
     fd_to_string = {
-      proc.stdout: "",
-      proc.stderr: ""
+      proc.stdout: bytearray(),
+      proc.stderr: bytearray()
     }
-    all_output = ""
+    all_output = bytearray()
                   
     while read_set:
 
@@ -245,7 +284,7 @@ def _call(command, logoutput=None, throw_on_failure=True, stdout=subprocess.PIPE
 
       for out_fd in read_set:
         if out_fd in ready:
-          line = os.read(out_fd.fileno(), 1024)
+          line = os.read(out_fd.fileno(), READ_BUFFER_SIZE)
           
           if not line:
             read_set = copy.copy(read_set)
@@ -274,9 +313,9 @@ def _call(command, logoutput=None, throw_on_failure=True, stdout=subprocess.PIPE
     for fp in files_to_close:
       fp.close()
       
-  out = fd_to_string[proc.stdout].strip('\n')
-  err = fd_to_string[proc.stderr].strip('\n')
-  all_output = all_output.strip('\n')
+  out = str(fd_to_string[proc.stdout]).strip('\n')
+  err = str(fd_to_string[proc.stderr]).strip('\n')
+  all_output = str(all_output).strip('\n')
   
   if timeout: 
     if not timeout_event.is_set():
@@ -298,6 +337,156 @@ def _call(command, logoutput=None, throw_on_failure=True, stdout=subprocess.PIPE
   
   return code, out
 
+def _is_output_logged(logoutput):
+  return logoutput==True and Logger.logger.isEnabledFor(logging.INFO) or logoutput==None and Logger.logger.isEnabledFor(logging.DEBUG)
+
+def _shell_sessions_enabled():
+  return os.environ.get(SHELL_SESSIONS_ENV_VAR, "").lower() == "true"
+
+
+class ShellSession(object):
+  """
+  Persistent bash process, which runs the commands written to its stdin one
+  at a time, so that they don't pay for starting bash. Every command is run in
+  a subshell with its own environment and directory. The subshell reports its
+  pid first, and is followed by a marker line with its exit code, which ends
+  the output of the command.
+  """
+  def __init__(self):
+    self.marker = "RMF_SHELL_SESSION_{0}".format(uuid.uuid4().hex)
+    self.marker_re = re.compile("\n{0} (\d+)\n$".format(self.marker))
+    self.pid_re = re.compile("^{0}_PID (\d+)\n".format(self.marker))
+    # --noprofile is used to preserve PATH set for ambari-agent
+    self.proc = subprocess.Popen(["/bin/bash", "--login", "--noprofile", "-s"], stdin=subprocess.PIPE,
+                                 stdout=subprocess.PIPE, stderr=subprocess.STDOUT, env={}, close_fds=True,
+                                 preexec_fn=os.setsid)
+
+  def is_alive(self):
+    return self.proc.poll() is None
+
+  def run(self, command, command_alias, env, cwd, timeout):
+    """
+    @return: return_code, output
+    """
+    script = "( printf '%s_PID %d\\n' {3} $BASHPID ; export {0} > /dev/null ; {1}eval {2}\n) < /dev/null 2>&1\nprintf '\\n%s %d\\n' {3} $?\n".format(
+      _get_environment_str(env), "cd {0} && ".format(quote_bash_args(cwd)) if cwd else "",
+      quote_bash_args(command), self.marker)
+    self.proc.stdin.write(script)
+    self.proc.stdin.flush()
+
+    deadline = time.time() + timeout if timeout else None
+    output = bytearray()
+    command_pid = None
+    fd = self.proc.stdout.fileno()
+    while True:
+      wait = 1
+      if deadline is not None:
+        wait = deadline - time.time()
+        if wait <= 0:
+          if command_pid is not None:
+            _kill_process_tree(command_pid)
+          self.close(kill=True)
+          err_msg = Logger.filter_text(("Execution of '%s' was killed due timeout after %d seconds") % (command_alias, timeout))
+          raise ExecuteTimeoutException(err_msg)
+
+      ready, _, _ = select.select([fd], [], [], min(wait, 1))
+      if not ready:
+        continue
+
+      chunk = os.read(fd, READ_BUFFER_SIZE)
+      if not chunk:
+        # the command terminated the session itself
+        return self.proc.wait(), str(output).strip('\n')
+
+      output += chunk
+      if command_pid is None:
+        match = self.pid_re.match(str(output[:len(self.marker) + 32]))
+        if match:
+          command_pid = int(match.group(1))
+          del output[:match.end()]
+      match = self.marker_re.search(str(output[-len(self.marker) - 16:]))
+      if match:
+        del output[len(output) - len(match.group(0)):]
+        return int(match.group(1)), str(output).strip('\n')
+
+  def close(self, kill=False):
+    if kill:
+      # processes backgrounded by the earlier commands are left alone
+      try:
+        os.kill(self.proc.pid, signal.SIGKILL)
+      except OSError:
+        pass
+    else:
+      self.proc.stdin.close()
+    self.proc.wait()
+    self.proc.stdout.close()
+
+
+def _kill_process_tree(pid):
+  """
+  Kills the process and all its descendants with SIGKILL
+  """
+  children = {}
+  for entry in os.listdir("/proc"):
+    if not entry.isdigit():
+      continue
+    try:
+      with open("/proc/{0}/stat".format(entry)) as f:
+        # the command name in parentheses may contain spaces
+        ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+    except (IOError, IndexError, ValueError):
+      continue
+    children.setdefault(ppid, []).append(int(entry))
+
+  pids = [pid]
+  for process in pids:
+    pids.extend(children.get(process, []))
+  for process in pids:
+    try:
+      os.kill(process, signal.SIGKILL)
+    except OSError:
+      pass
+
+
+class ShellSessionPool(object):
+  """
+  Idle shell sessions, a session is used by one command at a time
+  """
+  MAX_IDLE_SESSIONS = 4
+
+  def __init__(self):
+    self.sessions = []
+    self.lock = threading.Lock()
+
+  def run(self, command, command_alias, env, cwd, timeout):
+    with self.lock:
+      session = self.sessions.pop() if self.sessions else None
+    if session is None:
+      session = ShellSession()
+
+    try:
+      return session.run(command, command_alias, env, cwd, timeout)
+    finally:
+      self.release(session)
+
+  def release(self, session):
+    if session.is_alive():
+      with self.lock:
+        if len(self.sessions) < self.MAX_IDLE_SESSIONS:
+          self.sessions.append(session)
+          return
+      session.close()
+
+  def close(self):
+    with self.lock:
+      sessions = self.sessions
+      self.sessions = []
+    for session in sessions:
+      session.close()
+
+_session_pool = ShellSessionPool()
+atexit.register(_session_pool.close)
+
 def as_sudo(command, env=None, auto_escape=True):
   """
   command - list or tuple of arguments.
@@ -28,7 +28,10 @@ from resource_management.core.utils import checked_unite
 
 __all__ = ["Source", "Template", "InlineTemplate", "StaticFile", "DownloadSource"]
 
+import hashlib
 import os
+import sys
+import threading
 import time
 import urllib2
 import urlparse
@@ -89,7 +92,11 @@ class StaticFile(Source):
 
 try:
   from ambari_jinja2 import Environment as JinjaEnvironment, BaseLoader, TemplateNotFound, FunctionLoader, StrictUndefined
+  from ambari_jinja2.bccache import FileSystemBytecodeCache
+  from ambari_jinja2.utils import LRUCache
 except ImportError:
+  template_cache = None
+
   class Template(Source):
     def __init__(self, name, variables=None, env=None):
       raise Exception("Jinja2 required for Template/InlineTemplate")
@@ -118,7 +125,81 @@ else:
         source = fp.read().decode('utf-8')
       return source, path, lambda: mtime == os.path.getmtime(path)
 
+  class TemplateCache(object):
+    """
+    Process-wide cache of compiled templates, keyed by the hash of the template source
+    and the options of jinja environment. Templates are compiled by one shared jinja
+    environment per set of options.
+
+    If a bytecode cache directory is set, compiled code is also persisted there,
+    so that new processes do not have to compile the same templates again.
+    """
+    CAPACITY = 1000
+
+    def __init__(self, capacity=CAPACITY):
+      self.lock = threading.RLock()
+      self.templates = LRUCache(capacity)
+      self.environments = {}
+      self.bytecode_cache = None
+
+    def set_bytecode_cache_dir(self, directory):
+      with self.lock:
+        if directory:
+          # marshalled code can not be shared between python versions
+          pattern = "__ambari_jinja2_py%d%d_%%s.cache" % sys.version_info[:2]
+          self.bytecode_cache = FileSystemBytecodeCache(directory, pattern)
+        else:
+          self.bytecode_cache = None
+
+    def get_environment(self, options):
+      key = tuple(sorted(options.items()))
+      with self.lock:
+        if not key in self.environments:
+          self.environments[key] = JinjaEnvironment(**options)
+        return self.environments[key]
+
+    def get_template(self, source, filename, options):
+      key = (hashlib.sha1(source.encode('utf-8')).hexdigest(), tuple(sorted(options.items())))
+      with self.lock:
+        template = self.templates.get(key)
+        if template is None:
+          # templates compiled with different options must not share the bytecode
+          template = self.compile(self.get_environment(options), source, filename, repr(key))
+          self.templates[key] = template
+      return template
+
+    def compile(self, environment, source, filename, cache_name):
+      code = None
+      bucket = None
+      if self.bytecode_cache:
+        try:
+          bucket = self.bytecode_cache.get_bucket(environment, cache_name, None, source)
+          code = bucket.code
+        except (IOError, OSError, EOFError, ValueError), ex:
+          Logger.debug("Cannot load compiled template from the bytecode cache: {0}".format(str(ex)))
+          bucket = None
+
+      if code is None:
+        code = environment.compile(source, filename, filename)
+        if bucket:
+          bucket.code = code
+          try:
+            self.bytecode_cache.set_bucket(bucket)
+          except (IOError, OSError), ex:
+            Logger.debug("Cannot store compiled template in the bytecode cache: {0}".format(str(ex)))
+
+      return environment.template_class.from_code(environment, code, environment.make_globals(None))
+
+    def clear(self):
+      with self.lock:
+        self.templates.clear()
+
+  template_cache = TemplateCache()
+
   class Template(Source):
+    # options of the jinja environment used to compile the template
+    environment_options = dict(autoescape=False, undefined=StrictUndefined, trim_blocks=True)
+
     def __init__(self, name, extra_imports=[], **kwargs):
       """
       @param kwargs: Additional variables passed to template
@@ -128,11 +209,11 @@ else:
       variables = checked_unite(params, kwargs)
       self.imports_dict = dict((module.__name__, module) for module in extra_imports)
       self.context = variables.copy() if variables else {}
-      if not hasattr(self, 'template_env'):
-        self.template_env = JinjaEnvironment(loader=TemplateLoader(self.env),
-                                        autoescape=False, undefined=StrictUndefined, trim_blocks=True)
-        
-      self.template = self.template_env.get_template(self.name)     
+      self.template = self.load_template()
+
+    def load_template(self):
+      source, path, uptodate = TemplateLoader(self.env).get_source(None, self.name)
+      return template_cache.get_template(source, path, self.environment_options)
     
     def get_content(self):
       default_variables = { 'env':self.env, 'repr':repr, 'str':str, 'bool':bool }
@@ -143,13 +224,25 @@ else:
       return rendered
     
   class InlineTemplate(Template):
-    def __init__(self, name, extra_imports=[], **kwargs):
-      self.template_env = JinjaEnvironment(loader=FunctionLoader(lambda text: text))
-      super(InlineTemplate, self).__init__(name, extra_imports, **kwargs) 
+    environment_options = {}
+
+    def load_template(self):
+      if not has_template_syntax(self.name):
+        return None
+      return template_cache.get_template(self.name, None, self.environment_options)
+
+    def get_content(self):
+      if self.template is None:
+        # rendering of a plain text only normalizes its newlines
+        return u'\n'.join(unicode(self.name).splitlines())
+      return super(InlineTemplate, self).get_content()
   
     def __repr__(self):
       return "InlineTemplate(...)"
 
+  def has_template_syntax(text):
+    return '{{' in text or '{%' in text or '{#' in text
+
 
 class DownloadSource(Source):
   """
@@ -21,13 +21,16 @@ Ambari Agent
 
 import time
 import os
+import base64
 import tempfile
 import shutil
 import stat
 import errno
+import hashlib
 from resource_management.core import shell
 from resource_management.core.logger import Logger
 from resource_management.core.exceptions import Fail
+from resource_management.core import sudo_helper
 from ambari_commons.os_check import OSCheck
 import subprocess
 
@@ -38,19 +41,20 @@ if os.geteuid() == 0:
     if uid != -1 or gid != -1:
       return os.chown(path, uid, gid)
       
-  def chown_recursive(path, owner, group, follow_links=False):
+  def chown_recursive(path, owner, group, follow_links=False, workers=1):
     uid = owner.pw_uid if owner else -1
     gid = group.gr_gid if group else -1
     
     if uid == -1 and gid == -1:
       return
       
-    for root, dirs, files in os.walk(path, followlinks=follow_links):
-      for name in files + dirs:
-        if follow_links:
-          os.chown(os.path.join(root, name), uid, gid)
-        else:
-          os.lchown(os.path.join(root, name), uid, gid)
+    counts = sudo_helper.chown_recursive(path, uid, gid, follow_links, workers, _recursive_progress(path))
+    _log_recursive_result("ownership", path, counts)
+
+  def chmod_recursive(path, recursive_mode_flags, recursion_follow_links=False, workers=1):
+    counts = sudo_helper.chmod_recursive(path, recursive_mode_flags, recursion_follow_links, workers,
+                                         _recursive_progress(path))
+    _log_recursive_result("permissions", path, counts)
             
   
   def chmod(path, mode):
@@ -60,7 +64,8 @@ if os.geteuid() == 0:
   def chmod_extended(path, mode):
     if mode in mode_to_stat:
       st = os.stat(path)
-      os.chmod(path, st.st_mode | mode_to_stat[mode])
+      if st.st_mode | mode_to_stat[mode] != st.st_mode:
+        os.chmod(path, st.st_mode | mode_to_stat[mode])
     else:
       shell.checked_call(["chmod", mode, path])
       
@@ -116,6 +121,9 @@ if os.geteuid() == 0:
         
     content = content.decode(encoding) if encoding else content
     return content
+
+  def file_digest(path, size=None):
+    return sudo_helper.file_digest(path, size)
       
   def path_exists(path):
     return os.path.exists(path)
@@ -141,41 +149,137 @@ if os.geteuid() == 0:
   
   def kill(pid, signal):
     os.kill(pid, signal)
+
+  def batch(*operations):
+    """
+    Runs the (function name, arg1, arg2...) operations of this module, returns their results
+    """
+    return [globals()[operation[0]](*operation[1:]) for operation in operations]
     
     
 else:
+  HELPER_NOT_AVAILABLE = object()
+
+  def call_helper(name, *args):
+    """
+    Executes the operation in the privileged helper (see sudo_helper.py), if the agent has started one.
+    Returns HELPER_NOT_AVAILABLE if the caller should fall back to running 'ambari-sudo.sh'.
+    """
+    client = sudo_helper.get_client()
+    if not client:
+      return HELPER_NOT_AVAILABLE
+    try:
+      return client.call(name, *args)
+    except sudo_helper.SudoHelperUnavailable, ex:
+      Logger.warning("Privileged helper is not available, falling back to sudo. {0}".format(str(ex)))
+      return HELPER_NOT_AVAILABLE
+    except OSError, ex:
+      raise Fail("Execution of '{0}{1}' failed. {2}".format(name, args, ex.strerror))
+
+  def _chown_request(path, owner, group):
+    uid = owner.pw_uid if owner else -1
+    gid = group.gr_gid if group else -1
+    return ["chown", path, uid, gid] if uid != -1 or gid != -1 else None
+
+  # functions which batch() sends to the helper, they return the helper request or None if there is nothing to do
+  HELPER_REQUESTS = {
+    'chown': _chown_request,
+    'chmod': lambda path, mode: ["chmod", path, mode],
+    'stat': lambda path: ["stat", path],
+    'path_exists': lambda path: ["path_exists", path],
+    'path_isdir': lambda path: ["path_isdir", path],
+    'path_isfile': lambda path: ["path_isfile", path],
+    'path_lexists': lambda path: ["path_lexists", path],
+  }
+
+  def batch(*operations):
+    """
+    Runs the (function name, arg1, arg2...) operations of this module in one request to the
+    privileged helper and returns their results. The operations are run one by one if the
+    helper is not running or cannot run some of them.
+    """
+    client = sudo_helper.get_client()
+    if client and all(operation[0] in HELPER_REQUESTS for operation in operations):
+      requests = [HELPER_REQUESTS[operation[0]](*operation[1:]) for operation in operations]
+      sent_requests = [request for request in requests if request is not None]
+      try:
+        results = client.batch(sent_requests) if sent_requests else []
+      except sudo_helper.SudoHelperUnavailable, ex:
+        Logger.warning("Privileged helper is not available, falling back to sudo. {0}".format(str(ex)))
+      else:
+        results = iter(results)
+        values = []
+        for operation, request in zip(operations, requests):
+          result = next(results) if request is not None else {'result': None}
+          if 'error' in result:
+            raise Fail("Execution of '{0}{1}' failed. {2}".format(operation[0], tuple(operation[1:]), result['error']))
+          values.append(Stat(*result['result']) if operation[0] == "stat" else result['result'])
+        return values
+
+    return [globals()[operation[0]](*operation[1:]) for operation in operations]
+
   # os.chown replacement
   def chown(path, owner, group):
+    uid = owner.pw_uid if owner else -1
+    gid = group.gr_gid if group else -1
+    if (uid != -1 or gid != -1) and call_helper("chown", path, uid, gid) is not HELPER_NOT_AVAILABLE:
+      return
+
     owner = owner.pw_name if owner else ""
     group = group.gr_name if group else ""
     if owner or group:
       shell.checked_call(["chown", owner+":"+group, path], sudo=True)
       
-  def chown_recursive(path, owner, group, follow_links=False):
+  def chown_recursive(path, owner, group, follow_links=False, workers=1):
+    uid = owner.pw_uid if owner else -1
+    gid = group.gr_gid if group else -1
+    if uid == -1 and gid == -1:
+      return
+
+    counts = call_helper("chown_recursive", path, uid, gid, follow_links, workers)
+    if counts is not HELPER_NOT_AVAILABLE:
+      _log_recursive_result("ownership", path, counts)
+      return
+
     owner = owner.pw_name if owner else ""
     group = group.gr_name if group else ""
-    if owner or group:
-      flags = ["-R"]
-      if follow_links:
-        flags.append("-L")
-      shell.checked_call(["chown"] + flags + [owner+":"+group, path], sudo=True)
+    flags = ["-R"]
+    if follow_links:
+      flags.append("-L")
+    shell.checked_call(["chown"] + flags + [owner+":"+group, path], sudo=True)
+
+  def chmod_recursive(path, recursive_mode_flags, recursion_follow_links=False, workers=1):
+    counts = call_helper("chmod_recursive", path, recursive_mode_flags, recursion_follow_links, workers)
+    if counts is not HELPER_NOT_AVAILABLE:
+      _log_recursive_result("permissions", path, counts)
+      return
+
+    find_flags = []
+    if recursion_follow_links:
+      find_flags.append('-L')
+
+    for key, flags in recursive_mode_flags.iteritems():
+      shell.checked_call(["find"] + find_flags + [path, "-type", key, "-exec" , "chmod", flags ,"{}" ,"+"])
       
   # os.chmod replacement
   def chmod(path, mode):
-    shell.checked_call(["chmod", oct(mode), path], sudo=True)
+    if call_helper("chmod", path, mode) is HELPER_NOT_AVAILABLE:
+      shell.checked_call(["chmod", oct(mode), path], sudo=True)
     
   def chmod_extended(path, mode):
     shell.checked_call(["chmod", mode, path], sudo=True)
     
   # os.makedirs replacement
   def makedirs(path, mode):
-    shell.checked_call(["mkdir", "-p", path], sudo=True)
-    chmod(path, mode)
+    if call_helper("makedirs", path, mode) is HELPER_NOT_AVAILABLE:
+      shell.checked_call(["mkdir", "-p", path], sudo=True)
+      chmod(path, mode)
     
   # os.makedir replacement
   def makedir(path, mode):
-    shell.checked_call(["mkdir", path], sudo=True)
-    chmod(path, mode)
+    if call_helper("makedir", path, mode) is HELPER_NOT_AVAILABLE:
+      shell.checked_call(["mkdir", path], sudo=True)
+      chmod(path, mode)
     
   # os.symlink replacement
   def symlink(source, link_name):
@@ -213,49 +317,82 @@ else:
       
   # fp.read replacement
   def read_file(filename, encoding=None):
-    tmpf = tempfile.NamedTemporaryFile()
-    shell.checked_call(["cp", "-f", filename, tmpf.name], sudo=True)
-    
-    with tmpf:
-      with open(tmpf.name, "rb") as fp:
-        content = fp.read()
+    content = call_helper("read_file", filename)
+    if content is not HELPER_NOT_AVAILABLE:
+      content = base64.b64decode(content)
+    else:
+      tmpf = tempfile.NamedTemporaryFile()
+      shell.checked_call(["cp", "-f", filename, tmpf.name], sudo=True)
+
+      with tmpf:
+        with open(tmpf.name, "rb") as fp:
+          content = fp.read()
         
     content = content.decode(encoding) if encoding else content
     return content
+
+  # sudo_helper.file_digest replacement
+  def file_digest(path, size=None):
+    result = call_helper("file_digest", path, size)
+    if result is not HELPER_NOT_AVAILABLE:
+      return result
+    content = read_file(path)
+    if size is not None and len(content) != size:
+      return [len(content), None]
+    return [len(content), hashlib.md5(content).hexdigest()]
       
   # os.path.exists
   def path_exists(path):
+    result = call_helper("path_exists", path)
+    if result is not HELPER_NOT_AVAILABLE:
+      return result
     return (shell.call(["test", "-e", path], sudo=True)[0] == 0)
   
   # os.path.isdir
   def path_isdir(path):
+    result = call_helper("path_isdir", path)
+    if result is not HELPER_NOT_AVAILABLE:
+      return result
     return (shell.call(["test", "-d", path], sudo=True)[0] == 0)
   
   # os.path.lexists
   def path_lexists(path):
+    result = call_helper("path_lexists", path)
+    if result is not HELPER_NOT_AVAILABLE:
+      return result
     return (shell.call(["test", "-L", path], sudo=True)[0] == 0)
   
   # os.readlink
   def readlink(path):
+    result = call_helper("readlink", path)
+    if result is not HELPER_NOT_AVAILABLE:
+      return result
     return shell.checked_call(["readlink", path], sudo=True)[1].strip()
   
   # os.path.isfile
   def path_isfile(path):
+    result = call_helper("path_isfile", path)
+    if result is not HELPER_NOT_AVAILABLE:
+      return result
     return (shell.call(["test", "-f", path], sudo=True)[0] == 0)
 
+  class Stat:
+    def __init__(self, st_uid, st_gid, st_mode):
+      self.st_uid, self.st_gid, self.st_mode = st_uid, st_gid, st_mode
+
   # os.stat
   def stat(path):
-    class Stat:
-      def __init__(self, path):
-        cmd = ["stat", "-c", "%u %g %a", path]
-        code, out, err = shell.checked_call(cmd, sudo=True, stderr=subprocess.PIPE)
-        values = out.split(' ')
-        if len(values) != 3:
-          raise Fail("Execution of '{0}' returned unexpected output. {2}\n{3}".format(cmd, code, err, out))
-        uid_str, gid_str, mode_str = values
-        self.st_uid, self.st_gid, self.st_mode = int(uid_str), int(gid_str), int(mode_str, 8)
-  
-    return Stat(path)
+    values = call_helper("stat", path)
+    if values is not HELPER_NOT_AVAILABLE:
+      return Stat(*values)
+
+    cmd = ["stat", "-c", "%u %g %a", path]
+    code, out, err = shell.checked_call(cmd, sudo=True, stderr=subprocess.PIPE)
+    values = out.split(' ')
+    if len(values) != 3:
+      raise Fail("Execution of '{0}' returned unexpected output. {2}\n{3}".format(cmd, code, err, out))
+    uid_str, gid_str, mode_str = values
+    return Stat(int(uid_str), int(gid_str), int(mode_str, 8))
   
   # os.kill replacement
   def kill(pid, signal):
@@ -268,10 +405,11 @@ else:
   def copy(src, dst):
     shell.checked_call(["sudo", "cp", "-r", src, dst], sudo=True)
     
-def chmod_recursive(path, recursive_mode_flags, recursion_follow_links):
-  find_flags = []
-  if recursion_follow_links:
-    find_flags.append('-L')
-    
-  for key, flags in recursive_mode_flags.iteritems():
-    shell.checked_call(["find"] + find_flags + [path, "-type", key, "-exec" , "chmod", flags ,"{}" ,";"])
\ No newline at end of file
+def _recursive_progress(path):
+  def progress(entries, changed):
+    Logger.info("Processed {0} entries under {1}, changed {2} of them".format(entries, path, changed))
+  return progress
+
+def _log_recursive_result(what, path, counts):
+  entries, changed = counts
+  Logger.info("Changed {0} of {1} of {2} entries under {3}".format(what, changed, entries, path))
\ No newline at end of file
@@ -0,0 +1,522 @@
+"""
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+Ambari Agent
+
+Privileged helper for resource_management.core.sudo.
+
+When the agent runs as non-root, every privileged file operation used to be a separate
+'ambari-sudo.sh' process. The helper is started once via sudo, listens on a unix socket,
+which only the agent user can connect to, and performs a fixed set of file operations
+on its behalf. Requests are batches of operations, one json document per line.
+
+The module is also executed as a script under sudo (which resets PYTHONPATH),
+that's why it only uses the standard library at the module level.
+"""
+
+import base64
+import errno
+import hashlib
+import json
+import logging
+import os
+import Queue
+import select
+import shutil
+import socket
+import SocketServer
+import stat
+import struct
+import sys
+import tempfile
+import threading
+import time
+
+__all__ = ["get_client", "start_helper", "SOCKET_ENV_VAR", "SOCKET_PARENT_DIR", "SudoHelperUnavailable"]
+
+# processes started by the agent find the helper by this variable
+SOCKET_ENV_VAR = "AMBARI_SUDO_HELPER_SOCKET"
+SO_PEERCRED = getattr(socket, 'SO_PEERCRED', 17)
+# the helper creates the directory of its socket in here, it has to be writable only by root
+SOCKET_PARENT_DIR = "/var/run"
+START_TIMEOUT = 10
+OWNER_CHECK_INTERVAL = 5
+READ_BUFFER_SIZE = 65536
+# recursive operations report their progress after this many entries
+PROGRESS_INTERVAL = 100000
+
+# operations which change the file system, they are written to the audit log
+MODIFYING_OPERATIONS = ["chmod", "chown", "makedirs", "makedir", "chmod_recursive", "chown_recursive"]
+
+SYMBOLIC_MODE_WHO = {'u': 0700, 'g': 0070, 'o': 0007, 'a': 0777}
+SYMBOLIC_MODE_PERMS = {'r': 0444, 'w': 0222, 'x': 0111}
+
+
+class SudoHelperUnavailable(Exception):
+  pass
+
+
+def _stat(path):
+  stat_val = os.stat(path)
+  return [stat_val.st_uid, stat_val.st_gid, stat_val.st_mode & 07777]
+
+def _makedirs(path, mode):
+  try:
+    os.makedirs(path)
+  except OSError, ex:
+    if ex.errno != errno.EEXIST or not os.path.isdir(path):
+      raise
+  os.chmod(path, mode)
+
+def _makedir(path, mode):
+  os.mkdir(path)
+  os.chmod(path, mode)
+
+def _read_file(path):
+  with open(path, "rb") as fp:
+    return base64.b64encode(fp.read())
+
+def file_digest(path, size=None):
+  """
+  Returns [size, md5 hex digest] of the file, reading it in chunks. The digest is None
+  if the size of the file is not the given one.
+  """
+  with open(path, "rb") as fp:
+    file_size = os.fstat(fp.fileno()).st_size
+    if size is not None and file_size != size:
+      return [file_size, None]
+    digest = hashlib.md5()
+    while True:
+      chunk = fp.read(READ_BUFFER_SIZE)
+      if not chunk:
+        break
+      digest.update(chunk)
+  return [file_size, digest.hexdigest()]
+
+def parse_symbolic_mode(flags):
+  """
+  Parses chmod symbolic modes like 'u+rwx,go-w' into a list of (who bits, operation, permission bits)
+  """
+  changes = []
+  for clause in flags.split(","):
+    who = clause.rstrip("rwx")
+    perms = clause[len(who):]
+    if len(who) < 2 or who[-1] not in "+-=" or who[:-1].strip("ugoa"):
+      raise ValueError("Unsupported symbolic mode '{0}'".format(flags))
+    who_bits = perm_bits = 0
+    for letter in who[:-1]:
+      who_bits |= SYMBOLIC_MODE_WHO[letter]
+    for letter in perms:
+      perm_bits |= SYMBOLIC_MODE_PERMS[letter]
+    changes.append((who_bits, who[-1], who_bits & perm_bits))
+  return changes
+
+def apply_symbolic_mode(mode, changes):
+  for who_bits, operation, perm_bits in changes:
+    if operation == '+':
+      mode |= perm_bits
+    elif operation == '-':
+      mode &= ~perm_bits
+    else:
+      mode = (mode & ~who_bits) | perm_bits
+  return mode
+
+
+class RecursiveUpdate(object):
+  """
+  Walks path and everything under it, calling update(path, stat) for every entry,
+  which returns True if it has changed the entry. Symbolic links are followed only
+  if follow_links is set, every directory is visited once then. Top level subtrees
+  are walked by up to workers threads.
+  """
+  def __init__(self, path, update, follow_links=False, workers=1, progress=None):
+    self.path = path
+    self.update = update
+    self.follow_links = follow_links
+    self.workers = max(1, workers)
+    self.progress = progress
+    self.lock = threading.Lock()
+    self.entries = 0
+    self.changed = 0
+    self.visited = set()
+
+  def run(self):
+    """
+    Returns [number of entries, number of changed entries]
+    """
+    subtrees = self._visit(self.path, os.stat(self.path))
+    if self.workers == 1 or len(subtrees) < 2:
+      for subtree in subtrees:
+        self._walk(subtree)
+    else:
+      self._walk_in_threads(subtrees)
+    return [self.entries, self.changed]
+
+  def _walk_in_threads(self, subtrees):
+    queue = Queue.Queue()
+    for subtree in subtrees:
+      queue.put(subtree)
+    errors = []
+
+    def worker():
+      while not errors:
+        try:
+          subtree = queue.get_nowait()
+        except Queue.Empty:
+          return
+        try:
+          self._walk(subtree)
+        except Exception:
+          errors.append(sys.exc_info())
+
+    threads = [threading.Thread(target=worker) for i in xrange(min(self.workers, len(subtrees)))]
+    for thread in threads:
+      thread.daemon = True
+      thread.start()
+    for thread in threads:
+      thread.join()
+    if errors:
+      raise errors[0][0], errors[0][1], errors[0][2]
+
+  def _walk(self, path):
+    stack = [path]
+    while stack:
+      path = stack.pop()
+      try:
+        stat_val = os.stat(path) if self.follow_links else os.lstat(path)
+      except OSError:
+        # removed meanwhile or a broken link
+        continue
+      stack.extend(self._visit(path, stat_val))
+
+  def _visit(self, path, stat_val):
+    """
+    Updates the entry, returns the paths of its children to walk
+    """
+    changed = self.update(path, stat_val)
+    with self.lock:
+      self.entries += 1
+      self.changed += 1 if changed else 0
+      if self.progress and self.entries % PROGRESS_INTERVAL == 0:
+        self.progress(self.entries, self.changed)
+
+    if not stat.S_ISDIR(stat_val.st_mode):
+      return []
+    if self.follow_links:
+      with self.lock:
+        key = (stat_val.st_dev, stat_val.st_ino)
+        if key in self.visited:
+          return []
+        self.visited.add(key)
+    try:
+      names = os.listdir(path)
+    except OSError:
+      return []
+    return [os.path.join(path, name) for name in names]
+
+def chmod_recursive(path, recursive_mode_flags, follow_links=False, workers=1, progress=None):
+  """
+  Applies the symbolic modes of recursive_mode_flags ({'f': modes of files, 'd': modes
+  of directories}) to path and everything under it. Entries which already have the
+  right mode are not changed. Returns [number of entries, number of changed entries].
+  """
+  changes = dict((key, parse_symbolic_mode(flags)) for key, flags in recursive_mode_flags.iteritems())
+
+  def update(path, stat_val):
+    if stat.S_ISREG(stat_val.st_mode):
+      entry_changes = changes.get('f')
+    elif stat.S_ISDIR(stat_val.st_mode):
+      entry_changes = changes.get('d')
+    else:
+      return False
+    if not entry_changes:
+      return False
+    mode = stat.S_IMODE(stat_val.st_mode)
+    new_mode = apply_symbolic_mode(mode, entry_changes)
+    if new_mode == mode:
+      return False
+    os.chmod(path, new_mode)
+    return True
+
+  return RecursiveUpdate(path, update, follow_links, workers, progress).run()
+
+def chown_recursive(path, uid, gid, follow_links=False, workers=1, progress=None):
+  """
+  Changes the owner and the group (-1 keeps them) of path and everything under it.
+  Entries which already have them are not changed. Returns [number of entries,
+  number of changed entries].
+  """
+  chown = os.chown if follow_links else os.lchown
+
+  def update(path, stat_val):
+    if (uid == -1 or stat_val.st_uid == uid) and (gid == -1 or stat_val.st_gid == gid):
+      return False
+    chown(path, uid, gid)
+    return True
+
+  return RecursiveUpdate(path, update, follow_links, workers, progress).run()
+
+OPERATIONS = {
+  'stat': _stat,
+  'path_exists': os.path.exists,
+  'path_isdir': os.path.isdir,
+  'path_isfile': os.path.isfile,
+  'path_lexists': os.path.lexists,
+  'readlink': os.readlink,
+  'chmod': os.chmod,
+  'chown': os.chown,
+  'makedirs': _makedirs,
+  'makedir': _makedir,
+  'read_file': _read_file,
+  'file_digest': file_digest,
+  'chmod_recursive': chmod_recursive,
+  'chown_recursive': chown_recursive,
+}
+
+
+def execute_batch(operations, audit_logger=None, peer=None):
+  """
+  Executes [[name, arg1, arg2...], ...] and returns a list of {'result': value}
+  or {'error': message, 'errno': errno} dictionaries, in the same order
+  """
+  results = []
+  for operation in operations:
+    name, args = operation[0], operation[1:]
+    if not name in OPERATIONS:
+      results.append({'error': "Operation '{0}' is not allowed".format(name), 'errno': errno.EPERM})
+      continue
+    if audit_logger and name in MODIFYING_OPERATIONS:
+      audit_logger.info("{0}: {1} {2}".format(peer, name, json.dumps(args)))
+    try:
+      results.append({'result': OPERATIONS[name](*args)})
+    except (OSError, IOError), ex:
+      results.append({'error': str(ex), 'errno': ex.errno})
+    except Exception, ex:
+      results.append({'error': str(ex), 'errno': None})
+  return results
+
+
+class SudoHelperRequestHandler(SocketServer.StreamRequestHandler):
+  def handle(self):
+    pid, uid, gid = struct.unpack('3i', self.request.getsockopt(socket.SOL_SOCKET, SO_PEERCRED, struct.calcsize('3i')))
+    if uid not in (0, self.server.allowed_uid):
+      self.server.audit_logger.warning("Rejected connection from pid={0} uid={1}".format(pid, uid))
+      return
+    peer = "pid={0} uid={1}".format(pid, uid)
+
+    while True:
+      line = self.rfile.readline()
+      if not line:
+        break
+      try:
+        results = execute_batch(json.loads(line), self.server.audit_logger, peer)
+      except (ValueError, TypeError, IndexError), ex:
+        results = [{'error': "Malformed request: {0}".format(str(ex)), 'errno': errno.EINVAL}]
+      self.wfile.write(json.dumps(results) + "\n")
+      self.wfile.flush()
+
+
+class SudoHelperServer(SocketServer.ThreadingUnixStreamServer):
+  """
+  The directory of socket_path must be writable only by root, or else the socket
+  could be replaced before it is given to the agent user.
+  """
+  daemon_threads = True
+
+  def __init__(self, socket_path, allowed_uid, audit_logger):
+    if os.path.exists(socket_path):
+      os.unlink(socket_path)
+    SocketServer.ThreadingUnixStreamServer.__init__(self, socket_path, SudoHelperRequestHandler)
+    # only the agent user is able to connect
+    os.chown(socket_path, allowed_uid, -1)
+    self.allowed_uid = allowed_uid
+    self.audit_logger = audit_logger
+
+  def server_bind(self):
+    # the socket is created with its final mode, it is never accessible to others
+    old_umask = os.umask(0177)
+    try:
+      SocketServer.ThreadingUnixStreamServer.server_bind(self)
+    finally:
+      os.umask(old_umask)
+
+
+class SudoHelperClient(object):
+  """
+  Connection to the helper, shared by all threads of a process
+  """
+  def __init__(self, socket_path):
+    self.socket_path = socket_path
+    self.lock = threading.Lock()
+    self.sock = None
+    self.rfile = None
+
+  def connect(self):
+    try:
+      self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+      self.sock.connect(self.socket_path)
+      self.rfile = self.sock.makefile('rb')
+    except socket.error, ex:
+      self.close()
+      raise SudoHelperUnavailable("Cannot connect to {0}: {1}".format(self.socket_path, str(ex)))
+
+  def close(self):
+    if self.sock:
+      try:
+        self.sock.close()
+      except socket.error:
+        pass
+    self.sock = None
+    self.rfile = None
+
+  def batch(self, operations):
+    """
+    Executes a list of [name, arg1, arg2...] operations in one round trip.
+    Raises SudoHelperUnavailable if the helper cannot be reached.
+    """
+    with self.lock:
+      if self.sock is None:
+        self.connect()
+      try:
+        self.sock.sendall(json.dumps(operations) + "\n")
+        line = self.rfile.readline()
+      except socket.error, ex:
+        self.close()
+        raise SudoHelperUnavailable(str(ex))
+      if not line:
+        self.close()
+        raise SudoHelperUnavailable("Connection to {0} was closed".format(self.socket_path))
+    return json.loads(line)
+
+  def call(self, name, *args):
+    """
+    Executes a single operation. Errors are raised as OSError.
+    """
+    result = self.batch([[name] + list(args)])[0]
+    if 'error' in result:
+      raise OSError(result['errno'], result['error'])
+    return result['result']
+
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+  """
+  Returns the client of the helper started by the agent, or None if it's not running
+  """
+  global _client
+  socket_path = os.environ.get(SOCKET_ENV_VAR)
+  if not socket_path:
+    return None
+  with _client_lock:
+    if _client is None or _client.socket_path != socket_path:
+      _client = SudoHelperClient(socket_path)
+    return _client
+
+
+def start_helper(audit_log, sudo_binary="ambari-sudo.sh", socket_parent=SOCKET_PARENT_DIR):
+  """
+  Starts the helper as root and exports its socket to the child processes.
+  Returns the path of the socket if the helper is up, None otherwise.
+  """
+  import subprocess
+  script = os.path.splitext(os.path.abspath(__file__))[0] + ".py"
+  command = [sudo_binary, sys.executable, script, socket_parent, str(os.getuid()), str(os.getpid()), audit_log]
+  process = subprocess.Popen(command, stdout=subprocess.PIPE, close_fds=True)
+
+  # the helper prints the path of its socket once it is listening
+  deadline = time.time() + START_TIMEOUT
+  socket_path = ""
+  while not socket_path.endswith("\n") and time.time() < deadline:
+    if not select.select([process.stdout], [], [], max(0, deadline - time.time()))[0]:
+      break
+    data = os.read(process.stdout.fileno(), READ_BUFFER_SIZE)
+    if not data:
+      break
+    socket_path += data
+  process.stdout.close()
+  if not socket_path.endswith("\n"):
+    return None
+
+  socket_path = socket_path.strip()
+  client = SudoHelperClient(socket_path)
+  try:
+    client.connect()
+  except SudoHelperUnavailable:
+    return None
+  client.close()
+  os.environ[SOCKET_ENV_VAR] = socket_path
+  return socket_path
+
+
+def check_socket_parent(path):
+  """
+  Raises ValueError unless path and all of its parents are directories which only root
+  can change, so that nobody else can replace the socket directory created in it
+  """
+  path = os.path.realpath(path)
+  while True:
+    stat_val = os.lstat(path)
+    if not stat.S_ISDIR(stat_val.st_mode) or stat_val.st_uid != 0 or \
+        (stat_val.st_mode & 0022 and not stat_val.st_mode & stat.S_ISVTX):
+      raise ValueError("{0} is not a directory writable only by root".format(path))
+    if path == os.sep:
+      return
+    path = os.path.dirname(path)
+
+
+def _exit_with_owner(owner_pid, server):
+  while True:
+    time.sleep(OWNER_CHECK_INTERVAL)
+    try:
+      os.kill(owner_pid, 0)
+    except OSError, ex:
+      if ex.errno == errno.ESRCH:
+        server.shutdown()
+        return
+
+
+def main():
+  socket_parent, allowed_uid, owner_pid, audit_log = sys.argv[1], int(sys.argv[2]), int(sys.argv[3]), sys.argv[4]
+  audit_logger = logging.getLogger("ambari_sudo_helper")
+  handler = logging.FileHandler(audit_log)
+  handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+  audit_logger.addHandler(handler)
+  audit_logger.setLevel(logging.INFO)
+
+  check_socket_parent(socket_parent)
+  # a new directory owned by root, which the agent user can only traverse
+  socket_dir = tempfile.mkdtemp(prefix="ambari-sudo-helper-", dir=socket_parent)
+  os.chmod(socket_dir, 0711)
+  socket_path = os.path.join(socket_dir, "helper.sock")
+  try:
+    server = SudoHelperServer(socket_path, allowed_uid, audit_logger)
+    audit_logger.info("Started for uid={0} on {1}".format(allowed_uid, socket_path))
+    owner_watcher = threading.Thread(target=_exit_with_owner, args=(owner_pid, server))
+    owner_watcher.daemon = True
+    owner_watcher.start()
+    sys.stdout.write(socket_path + "\n")
+    sys.stdout.flush()
+    server.serve_forever()
+  finally:
+    shutil.rmtree(socket_dir, ignore_errors=True)
+    audit_logger.info("Stopped")
+
+
+if __name__ == "__main__":
+  main()
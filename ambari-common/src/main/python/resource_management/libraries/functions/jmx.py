@@ -17,13 +17,160 @@ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 See the License for the specific language governing permissions and
 limitations under the License.
 '''
-import urllib2
+import httplib
+import socket
+import threading
+import time
+import urlparse
 import ambari_simplejson as json # simplejson is much faster comparing to Python 2.6 json module and has the same functions set.
+from ambari_commons.urllib_handlers import get_refresh_redirect_url, REFRESH_HEADER
 from resource_management.core import shell
 from resource_management.core.logger import Logger
 from resource_management.libraries.functions.get_user_call_output import get_user_call_output
 
-def get_value_from_jmx(qry, property, security_enabled, run_user, is_https_enabled):
+# default number of seconds for which a JMX response is reused
+DEFAULT_JMX_CACHE_TTL = 10
+
+
+class JmxFetchError(Exception):
+  def __init__(self, message, http_code=None):
+    super(JmxFetchError, self).__init__(message)
+    self.http_code = http_code
+
+
+class _JmxRequest(object):
+  def __init__(self):
+    self.done = threading.Event()
+    self.content = None
+    self.error = None
+
+
+class JmxCache(object):
+  """
+  Per-url cache of JMX responses shared by all alerts and scripts of a process.
+  A response is reused for ttl seconds, and callers asking for a url which is
+  being fetched at the moment wait for that request instead of issuing their own.
+  Plain http(s) requests are sent over keep-alive connections, one pool per host:port.
+  """
+
+  def __init__(self):
+    self.lock = threading.Lock()
+    # key -> (fetch time, content)
+    self.snapshots = {}
+    # key -> _JmxRequest
+    self.in_flight = {}
+    # (scheme, host:port) -> idle connections
+    self.connections = {}
+
+  def get(self, key, loader, ttl=DEFAULT_JMX_CACHE_TTL):
+    """
+    Returns the content for key, calling loader() if there is no fresh snapshot
+    and no other thread is loading it already. Exceptions of loader are re-raised
+    in all of the waiting threads.
+    """
+    with self.lock:
+      snapshot = self.snapshots.get(key)
+      if snapshot is not None and ttl > 0 and time.time() - snapshot[0] < ttl:
+        return snapshot[1]
+      request = self.in_flight.get(key)
+      is_owner = request is None
+      if is_owner:
+        request = _JmxRequest()
+        self.in_flight[key] = request
+
+    if not is_owner:
+      request.done.wait()
+    else:
+      try:
+        request.content = loader()
+      except Exception, exception:
+        request.error = exception
+      with self.lock:
+        del self.in_flight[key]
+        if request.error is None and ttl > 0:
+          self.snapshots[key] = (time.time(), request.content)
+      request.done.set()
+
+    if request.error is not None:
+      raise request.error
+    return request.content
+
+  def get_url(self, url, timeout, ttl=DEFAULT_JMX_CACHE_TTL):
+    """
+    Returns the body of the url, fetched over a pooled keep-alive connection
+    """
+    return self.get(url, lambda: self.fetch_url(url, timeout), ttl)
+
+  def clear(self):
+    with self.lock:
+      self.snapshots.clear()
+
+  def fetch_url(self, url, timeout, follow_refresh=True):
+    scheme, netloc, path, query, fragment = urlparse.urlsplit(url)
+    if query:
+      path += "?" + query
+
+    connection = self._acquire_connection(scheme, netloc, timeout)
+    try:
+      try:
+        response = self._send_request(connection, path)
+      except (httplib.HTTPException, socket.error):
+        # the server may have closed the idle connection, retry once with a new one
+        connection.close()
+        connection = self._create_connection(scheme, netloc, timeout)
+        response = self._send_request(connection, path)
+      content = response.read()
+    except Exception, exception:
+      connection.close()
+      raise JmxFetchError("Unable to fetch {0}: {1}".format(url, str(exception)))
+
+    if response.will_close:
+      connection.close()
+    else:
+      with self.lock:
+        self.connections.setdefault((scheme, netloc), []).append(connection)
+
+    if response.status != httplib.OK:
+      raise JmxFetchError("HTTP {0} response from {1}".format(response.status, url), response.status)
+
+    # follow the "Refresh" header the same way as RefreshHeaderProcessor does for urllib2
+    refresh_header = response.getheader(REFRESH_HEADER)
+    if follow_refresh and refresh_header is not None:
+      redirect_url = get_refresh_redirect_url(url, refresh_header)
+      if redirect_url is not None:
+        return self.fetch_url(redirect_url, timeout, follow_refresh=False)
+    return content
+
+  def _create_connection(self, scheme, netloc, timeout):
+    if scheme == "https":
+      return httplib.HTTPSConnection(netloc, timeout=timeout)
+    return httplib.HTTPConnection(netloc, timeout=timeout)
+
+  def _acquire_connection(self, scheme, netloc, timeout):
+    with self.lock:
+      idle_connections = self.connections.get((scheme, netloc))
+      connection = idle_connections.pop() if idle_connections else None
+    if connection is None:
+      return self._create_connection(scheme, netloc, timeout)
+    connection.timeout = timeout
+    if connection.sock is not None:
+      connection.sock.settimeout(timeout)
+    return connection
+
+  def _send_request(self, connection, path):
+    connection.request("GET", path)
+    return connection.getresponse()
+
+
+jmx_cache = JmxCache()
+
+
+def get_value_from_jmx(qry, property, security_enabled, run_user, is_https_enabled, cache_ttl=0):
+  """
+  Returns the property of the first bean in the JMX response of qry url.
+  Identical concurrent queries are executed once; with cache_ttl > 0 the response
+  is also reused for that many seconds.
+  """
   try:
     if security_enabled:
       cmd = ['curl', '--negotiate', '-u', ':', '-s']
@@ -35,11 +182,15 @@ def get_value_from_jmx(qry, property, security_enabled, run_user, is_https_enabl
 
     cmd.append(qry)
 
-    _, data, _ = get_user_call_output(cmd, user=run_user, quiet=False)
+    def load():
+      _, data, _ = get_user_call_output(cmd, user=run_user, quiet=False)
+      return data
+
+    data = jmx_cache.get((qry, security_enabled, run_user), load, cache_ttl)
 
     if data:
       data_dict = json.loads(data)
       return data_dict["beans"][0][property]
   except:
     Logger.logger.exception("Getting jmx metrics from NN failed. URL: " + str(qry))
-    return None
\ No newline at end of file
+    return None
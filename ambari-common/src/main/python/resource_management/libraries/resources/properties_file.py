@@ -21,6 +21,7 @@ Ambari Agent
 """
 
 _all__ = ["PropertiesFile"]
+import os
 from resource_management.core.base import Resource, ForcedListArgument, ResourceArgument, BooleanArgument
 
 class PropertiesFile(Resource):
@@ -36,3 +37,10 @@ class PropertiesFile(Resource):
   key_value_delimiter = ResourceArgument(default="=")
 
   actions = Resource.actions + ["create"]
+
+  def get_paths(self):
+    if self.paths is not None:
+      return self.paths
+    if self.dir is None:
+      return [self.filename]
+    return [os.path.join(self.dir, self.filename)]
@@ -33,3 +33,4 @@ class TemplateConfig(Resource):
   extra_imports = ResourceArgument(default=[])
 
   actions = Resource.actions + ["create"]
+  path_arguments = ["path"]
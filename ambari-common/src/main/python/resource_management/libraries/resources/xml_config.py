@@ -21,6 +21,7 @@ Ambari Agent
 """
 
 _all__ = ["XmlConfig"]
+import os
 from resource_management.core.base import Resource, ForcedListArgument, ResourceArgument, BooleanArgument
 
 class XmlConfig(Resource):
@@ -38,3 +39,8 @@ class XmlConfig(Resource):
   encoding = ResourceArgument(default="UTF-8")
 
   actions = Resource.actions + ["create"]
+
+  def get_paths(self):
+    if self.paths is not None or self.conf_dir is None:
+      return self.paths
+    return [os.path.join(self.conf_dir, self.filename)]
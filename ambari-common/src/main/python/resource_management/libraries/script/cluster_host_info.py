@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+
+'''
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+__all__ = ["RangeList", "decompress_cluster_host_info", "COMPRESSED_CLUSTER_HOST_INFO_KEY"]
+
+import bisect
+import collections
+from resource_management.core.exceptions import Fail
+
+# set in the command json when clusterHostInfo is kept in the range encoding of the server
+COMPRESSED_CLUSTER_HOST_INFO_KEY = "compressedClusterHostInfo"
+
+HOSTS_LIST_KEY = "all_hosts"
+PING_PORTS_KEY = "all_ping_ports"
+RACKS_KEY = "all_racks"
+IPV4_ADDRESSES_KEY = "all_ipv4_ips"
+AMBARI_SERVER_HOST = "ambari_server_host"
+MAPPED_RANGE_KEYS = [PING_PORTS_KEY, RACKS_KEY, IPV4_ADDRESSES_KEY]
+
+
+class RangeList(collections.MutableSequence):
+  """
+  List encoded the way the server compresses clusterHostInfo:
+  - indexes of all_hosts, ["1-3,5"] means [hosts[1], hosts[2], hosts[3], hosts[5]]
+  - values mapped to host indexes, ["1:0-2,4", "42:3"] means [1, 1, 1, 42, 1]
+
+  The encoding is parsed on first access, and elements are computed from it,
+  so indexing, iterating and len() do not expand the list. It is expanded only
+  when it gets modified (e.g. some scripts sort host lists in place).
+  """
+
+  def __init__(self, ranges, hosts=None, value_type=None):
+    self.ranges = ranges
+    # None for the lists of mapped values
+    self.hosts = hosts
+    self.value_type = value_type
+    # (first index, last index, value) of every range, value is None for host ranges
+    self._segments = None
+    # position of the first element of every segment in the list
+    self._offsets = None
+    self._length = None
+    self._items = None
+
+  def _parse(self):
+    if self._segments is not None:
+      return
+    if self.hosts is not None:
+      segments = self._parse_host_ranges()
+    else:
+      segments = self._parse_mapped_ranges()
+
+    offsets = []
+    length = 0
+    for start, end, value in segments:
+      offsets.append(length)
+      length += end - start + 1
+    self._segments = segments
+    self._offsets = offsets
+    self._length = length
+
+  def _parse_host_ranges(self):
+    # Converts from 1-3,5,6-8 to [(1, 3), (5, 5), (6, 8)]
+    segments = []
+    for ranges in self.ranges:
+      for r in ranges.split(','):
+        bounds = r.split('-')
+        if len(bounds) == 2 and bounds[0] and bounds[1]:
+          segments.append((int(bounds[0]), int(bounds[1]), None))
+        elif len(bounds) == 1:
+          index = int(bounds[0])
+          segments.append((index, index, None))
+        else:
+          raise Fail("Broken data in given range, expected - ""m-n"" or ""m"", got : " + str(r))
+    return segments
+
+  def _parse_mapped_ranges(self):
+    # Converts from ['1:0-2,4', '42:3'] to [(0, 2, 1), (3, 3, 42), (4, 4, 1)]
+    segments = []
+    for mapped_ranges in self.ranges:
+      value_to_ranges = mapped_ranges.split(":")
+      if len(value_to_ranges) != 2:
+        raise Fail("Broken data in given value to range, expected format - ""value:m-n"", got - " + str(mapped_ranges))
+      value, ranges = value_to_ranges
+      if value.isdigit():
+        value = int(value)
+      if self.value_type is not None:
+        value = self.value_type(value)
+
+      for r in ranges.split(','):
+        bounds = r.split('-')
+        if len(bounds) == 2 and bounds[0] and bounds[1]:
+          segments.append((int(bounds[0]), int(bounds[1]), value))
+        elif len(bounds) == 1:
+          index = int(bounds[0])
+          segments.append((index, index, value))
+        else:
+          raise Fail("Broken data in given value to range, expected format - ""value:m-n"", got - " + str(r))
+
+    # values are ordered by host index
+    ordered = sorted(segments, key=lambda segment: segment[0])
+    for i in range(1, len(ordered)):
+      if ordered[i][0] <= ordered[i - 1][1]:
+        # the same index is mapped more than once, the latest mapping wins
+        values = {}
+        for start, end, value in segments:
+          for index in range(start, end + 1):
+            values[index] = value
+        return [(index, index, values[index]) for index in sorted(values)]
+    return ordered
+
+  def _expand(self):
+    if self._items is None:
+      self._items = list(self._iterate())
+
+  def _iterate(self):
+    self._parse()
+    hosts = self.hosts
+    for start, end, value in self._segments:
+      if value is None:
+        for index in xrange(start, end + 1):
+          yield hosts[index]
+      else:
+        for index in xrange(start, end + 1):
+          yield value
+
+  def __len__(self):
+    if self._items is not None:
+      return len(self._items)
+    self._parse()
+    return self._length
+
+  def __getitem__(self, index):
+    if self._items is not None:
+      return self._items[index]
+    if isinstance(index, slice):
+      return [self[i] for i in xrange(*index.indices(len(self)))]
+
+    length = len(self)
+    if index < 0:
+      index += length
+    if index < 0 or index >= length:
+      raise IndexError("list index out of range")
+    segment = bisect.bisect_right(self._offsets, index) - 1
+    start, end, value = self._segments[segment]
+    if value is None:
+      return self.hosts[start + index - self._offsets[segment]]
+    return value
+
+  def __iter__(self):
+    if self._items is not None:
+      return iter(self._items)
+    return self._iterate()
+
+  def __setitem__(self, index, value):
+    self._expand()
+    self._items[index] = value
+
+  def __delitem__(self, index):
+    self._expand()
+    del self._items[index]
+
+  def insert(self, index, value):
+    self._expand()
+    self._items.insert(index, value)
+
+  def sort(self, *args, **kwargs):
+    self._expand()
+    self._items.sort(*args, **kwargs)
+
+  def __eq__(self, other):
+    if not isinstance(other, (list, RangeList)):
+      return False
+    return list(self) == list(other)
+
+  def __ne__(self, other):
+    return not self == other
+
+  __hash__ = None
+
+  def __add__(self, other):
+    if not isinstance(other, (list, RangeList)):
+      return NotImplemented
+    return list(self) + list(other)
+
+  def __radd__(self, other):
+    if not isinstance(other, (list, RangeList)):
+      return NotImplemented
+    return list(other) + list(self)
+
+  def __repr__(self):
+    return repr(list(self))
+
+
+def decompress_cluster_host_info(cluster_host_info):
+  """
+  Wraps the role host lists and the lists mapped to hosts (ports, racks, ips)
+  of clusterHostInfo received from the server into RangeLists.
+  """
+  info = dict(cluster_host_info)
+  hosts = info.pop(HOSTS_LIST_KEY, [])
+  result = {HOSTS_LIST_KEY: hosts}
+  if AMBARI_SERVER_HOST in info:
+    result[AMBARI_SERVER_HOST] = info.pop(AMBARI_SERVER_HOST)
+
+  for key, value in info.iteritems():
+    if key == PING_PORTS_KEY:
+      result[key] = RangeList(value, value_type=str)
+    elif key in MAPPED_RANGE_KEYS:
+      result[key] = RangeList(value)
+    else:
+      result[key] = RangeList(value, hosts)
+  return result
@@ -17,6 +17,9 @@ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 See the License for the specific language governing permissions and
 limitations under the License.
 '''
+import collections
+import os
+import ambari_simplejson as json
 from resource_management.core.exceptions import Fail
 
 IMMUTABLE_MESSAGE = """Configuration dictionary is immutable!
@@ -70,6 +73,58 @@ class ConfigDictionary(dict):
     return value
 
 
+class StoredConfigDictionary(collections.Mapping):
+  """
+  Immutable mapping of configuration types, whose properties are read from
+  the configuration store of the agent when the type is accessed first time.
+  It is not a dict, so that dict() and copy go through __getitem__ and load
+  the types too.
+  """
+  FILE_NAME_FORMAT = "config-{0}.json"
+
+  def __init__(self, store_dir, digests):
+    self.store_dir = store_dir
+    self.digests = digests
+    self.loaded = {}
+
+  def load(self, name):
+    path = os.path.join(self.store_dir, self.FILE_NAME_FORMAT.format(self.digests[name]))
+    try:
+      with open(path) as f:
+        value = ConfigDictionary(json.load(f))
+    except (IOError, ValueError), ex:
+      raise Fail("Cannot read configuration '{0}' from {1}: {2}".format(name, path, str(ex)))
+    self.loaded[name] = value
+    return value
+
+  def __getitem__(self, name):
+    if name not in self.digests:
+      return UnknownConfiguration(name)
+    if name not in self.loaded:
+      return self.load(name)
+    return self.loaded[name]
+
+  def __setitem__(self, name, value):
+    raise Fail(IMMUTABLE_MESSAGE)
+
+  def __contains__(self, name):
+    return name in self.digests
+
+  def __iter__(self):
+    return iter(self.digests)
+
+  def __len__(self):
+    return len(self.digests)
+
+  def get(self, name, default=None):
+    if name in self:
+      return self[name]
+    return default
+
+  def copy(self):
+    return ConfigDictionary(dict(self))
+
+
 class UnknownConfiguration():
   """
   Lazy failing for unknown configs.
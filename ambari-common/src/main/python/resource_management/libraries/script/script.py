@@ -34,7 +34,7 @@ from ambari_commons.os_family_impl import OsFamilyFuncImpl, OsFamilyImpl
 from resource_management.libraries.resources import XmlConfig
 from resource_management.libraries.resources import PropertiesFile
 from resource_management.core.resources import File, Directory
-from resource_management.core.source import InlineTemplate
+from resource_management.core.source import InlineTemplate, template_cache
 from resource_management.core.environment import Environment
 from resource_management.core.logger import Logger
 from resource_management.core.exceptions import Fail, ClientComponentHasNoStatus, ComponentIsNotRunning
@@ -44,7 +44,8 @@ from resource_management.libraries.functions.version import compare_versions
 from resource_management.libraries.functions.version import format_hdp_stack_version
 from resource_management.libraries.functions.constants import Direction
 from resource_management.libraries.functions import packages_analyzer
-from resource_management.libraries.script.config_dictionary import ConfigDictionary, UnknownConfiguration
+from resource_management.libraries.script.config_dictionary import ConfigDictionary, StoredConfigDictionary, UnknownConfiguration
+from resource_management.libraries.script.cluster_host_info import decompress_cluster_host_info, COMPRESSED_CLUSTER_HOST_INFO_KEY
 from resource_management.core.resources.system import Execute
 from contextlib import closing
 
@@ -70,6 +71,9 @@ USAGE = """Usage: {0} <COMMAND> <JSON_CONFIG> <BASEDIR> <STROUTPUT> <LOGGING_LEV
 
 _PASSWORD_MAP = {"/configurations/cluster-env/hadoop.user.name":"/configurations/cluster-env/hadoop.user.password"}
 DISTRO_SELECT_PACKAGE_NAME = "hdp-select"
+TEMPLATES_BYTECODE_CACHE_DIR = "templates_bytecode_cache"
+# set in the command json when the configurations are referenced from the configuration store
+STORED_CONFIGURATIONS_KEY = "storedConfigurations"
 STACK_VERSION_PLACEHOLDER = "${stack_version}"
 
 def get_path_from_configuration(name, configuration):
@@ -99,6 +103,8 @@ class Script(object):
   """
   stack_version_from_distro_select = None
   structuredOut = {}
+  # (command json path, ConfigDictionary) parsed once for all scripts of a command run in one process
+  preloaded_config = None
   command_data_file = ""
   basedir = ""
   stroutfile = ""
@@ -208,6 +214,7 @@ class Script(object):
 
     logging_level_str = logging._levelNames[self.logging_level]
     Logger.initialize_logger(__name__, logging_level=logging_level_str)
+    self.enable_templates_bytecode_cache()
 
     # on windows we need to reload some of env variables manually because there is no default paths for configs(like
     # /etc/something/conf on linux. When this env vars created by one of the Script execution, they can not be updated
@@ -216,14 +223,15 @@ class Script(object):
       reload_windows_env()
 
     try:
-      with open(self.command_data_file) as f:
-        pass
-        Script.config = ConfigDictionary(json.load(f))
-        # load passwords here(used on windows to impersonate different users)
-        Script.passwords = {}
-        for k, v in _PASSWORD_MAP.iteritems():
-          if get_path_from_configuration(k, Script.config) and get_path_from_configuration(v, Script.config):
-            Script.passwords[get_path_from_configuration(k, Script.config)] = get_path_from_configuration(v, Script.config)
+      if Script.preloaded_config and Script.preloaded_config[0] == self.command_data_file:
+        Script.config = Script.preloaded_config[1]
+      else:
+        Script.config = Script.load_config(self.command_data_file)
+      # load passwords here(used on windows to impersonate different users)
+      Script.passwords = {}
+      for k, v in _PASSWORD_MAP.iteritems():
+        if get_path_from_configuration(k, Script.config) and get_path_from_configuration(v, Script.config):
+          Script.passwords[get_path_from_configuration(k, Script.config)] = get_path_from_configuration(v, Script.config)
 
     except IOError:
       Logger.logger.exception("Can not read json file with command parameters: ")
@@ -239,6 +247,36 @@ class Script(object):
       if self.should_expose_component_version(self.command_name):
         self.save_component_version_to_structured_out()
 
+  @staticmethod
+  def load_config(command_data_file):
+    with open(command_data_file) as f:
+      command = json.load(f)
+    # host lists are expanded on demand
+    if command.get(COMPRESSED_CLUSTER_HOST_INFO_KEY) and command.get('clusterHostInfo'):
+      command['clusterHostInfo'] = decompress_cluster_host_info(command['clusterHostInfo'])
+    stored_configurations = command.pop(STORED_CONFIGURATIONS_KEY, None)
+    config = ConfigDictionary(command)
+    # configurations are read from the configuration store of the agent on first access
+    if stored_configurations:
+      store_dir = stored_configurations.pop('dir')
+      for key, digests in stored_configurations.iteritems():
+        dict.__setitem__(config, key, StoredConfigDictionary(store_dir, digests))
+    return config
+
+  def enable_templates_bytecode_cache(self):
+    """
+    Persists compiled templates in tmp_dir, so that next commands do not compile them again
+    """
+    if not template_cache or not Script.tmp_dir or not os.path.isdir(Script.tmp_dir):
+      return
+    cache_dir = os.path.join(Script.tmp_dir, TEMPLATES_BYTECODE_CACHE_DIR)
+    try:
+      if not os.path.isdir(cache_dir):
+        os.mkdir(cache_dir, 0700)
+      template_cache.set_bytecode_cache_dir(cache_dir)
+    except OSError, ex:
+      Logger.warning("Cannot use {0} as templates bytecode cache: {1}".format(cache_dir, str(ex)))
+
   def choose_method_to_execute(self, command_name):
     """
     Returns a callable object that should be executed for a given command.
@@ -94,6 +94,10 @@ enable_value_threshold = false
 
 [emitter]
 send_interval = 60
+spool_max_size_mb = 64
+spool_max_age = 86400
+max_replay_batches = 10
+compress_payload = false
 
 [collector]
 collector_sleep_interval = 5
@@ -189,6 +193,21 @@ class Configuration:
   def get_send_interval(self):
     return int(self.get("emitter", "send_interval", 60))
 
+  def get_spool_dir(self):
+    return self.get("emitter", "spool_dir")
+
+  def get_spool_max_size(self):
+    return int(self.get("emitter", "spool_max_size_mb", 64)) * 1024 * 1024
+
+  def get_spool_max_age(self):
+    return int(self.get("emitter", "spool_max_age", 86400))
+
+  def get_max_replay_batches(self):
+    return int(self.get("emitter", "max_replay_batches", 10))
+
+  def get_compress_payload(self):
+    return str(self.get("emitter", "compress_payload", "false")).lower() == "true"
+
   def get_collector_sleep_interval(self):
     return int(self.get("collector", "collector_sleep_interval", 5))
 
@@ -18,19 +18,24 @@ See the License for the specific language governing permissions and
 limitations under the License.
 '''
 
+import httplib
 import logging
+import socket
+import struct
 import threading
-import time
-import urllib2
+import zlib
+
+from metric_spool import MetricSpool, decompress
 
 logger = logging.getLogger()
 
 class Emitter(threading.Thread):
-  COLLECTOR_URL = "http://{0}/ws/v1/timeline/metrics"
+  COLLECTOR_PATH = "/ws/v1/timeline/metrics"
   RETRY_SLEEP_INTERVAL = 5
   MAX_RETRY_COUNT = 3
   """
   Wake up every send interval seconds and empty the application metric map.
+  The metrics are spooled until the collector accepts them, see MetricSpool.
   """
   def __init__(self, config, application_metric_map, stop_handler):
     threading.Thread.__init__(self)
@@ -38,8 +43,12 @@ class Emitter(threading.Thread):
     self.lock = threading.Lock()
     self.collector_address = config.get_server_address()
     self.send_interval = config.get_send_interval()
+    self.compress_payload = config.get_compress_payload()
+    self.max_replay_batches = config.get_max_replay_batches()
     self._stop_handler = stop_handler
     self.application_metric_map = application_metric_map
+    self.spool = MetricSpool(config.get_spool_dir(), config.get_spool_max_size(), config.get_spool_max_age())
+    self.connection = None
 
   def run(self):
     logger.info('Running Emitter thread: %s' % threading.currentThread().getName())
@@ -52,49 +61,110 @@ class Emitter(threading.Thread):
       #Wait for the service stop event instead of sleeping blindly
       if 0 == self._stop_handler.wait(self.send_interval):
         logger.info('Shutting down Emitter thread')
+        self.close_connection()
         return
     pass
-  
+
   def submit_metrics(self):
-    retry_count = 0
     # This call will acquire lock on the map and clear contents before returning
-    # After configured number of retries the data will not be sent to the
-    # collector
+    # The data is spooled until the collector accepts it
     json_data = self.application_metric_map.flatten(None, True)
     if json_data is None:
       logger.info("Nothing to emit, resume waiting.")
-      return
+    else:
+      self.spool.append(json_data)
     pass
 
-    response = None
-    while retry_count < self.MAX_RETRY_COUNT:
+    self.replay_spool()
+
+  def replay_spool(self):
+    """
+    Sends the spooled batches, oldest first. At most max_replay_batches are sent
+    per interval, so that the collector is not flooded after an outage.
+    """
+    retry_count = 0
+    sent_count = 0
+    while sent_count < self.max_replay_batches:
+      batch = self.spool.peek()
+      if batch is None:
+        return
+
       try:
-        response = self.push_metrics(json_data)
-      except Exception, e:
-        logger.warn('Error sending metrics to server. %s' % str(e))
-      pass
-  
-      if response and response.getcode() == 200:
-        retry_count = self.MAX_RETRY_COUNT
+        payload = self.spool.read(batch)
+        # a batch written partially before a crash can not be sent, in any encoding
+        data = decompress(payload)
+      except (IOError, EOFError, struct.error, zlib.error), e:
+        logger.warn("Dropping an unreadable batch of metrics from the spool. %s" % str(e))
+        self.spool.remove(batch)
+        continue
+
+      status = self.push_metrics(payload if self.compress_payload else data)
+      if status == 200:
+        self.spool.remove(batch)
+        sent_count += 1
+        retry_count = 0
+      elif status is not None and 400 <= status < 500:
+        # the collector will never accept the batch, it must not block the spool
+        logger.warn("Dropping a batch of metrics rejected by the collector, retcode = {0}".format(status))
+        self.spool.remove(batch)
+        retry_count = 0
       else:
-        logger.warn("Retrying after {0} ...".format(self.RETRY_SLEEP_INTERVAL))
         retry_count += 1
+        if retry_count >= self.MAX_RETRY_COUNT:
+          logger.warn("Keeping {0} batches of metrics in the spool until the collector is available".format(len(self.spool)))
+          return
+        logger.warn("Retrying after {0} ...".format(self.RETRY_SLEEP_INTERVAL))
         #Wait for the service stop event instead of sleeping blindly
         if 0 == self._stop_handler.wait(self.RETRY_SLEEP_INTERVAL):
           return
       pass
     pass
-  
+
+    if len(self.spool):
+      logger.info("{0} batches of metrics are left in the spool for the next intervals".format(len(self.spool)))
+
   def push_metrics(self, data):
+    """
+    Posts a batch over the keep-alive connection to the collector, gzip-compressed
+    if compress_payload is set. Returns the HTTP status of the response, None if
+    the collector could not be reached.
+    """
     headers = {"Content-Type" : "application/json", "Accept" : "*/*"}
-    server = self.COLLECTOR_URL.format(self.collector_address.strip())
-    logger.info("server: %s" % server)
+    if self.compress_payload:
+      headers["Content-Encoding"] = "gzip"
+    logger.info("server: %s%s" % (self.collector_address.strip(), self.COLLECTOR_PATH))
     logger.debug("message to sent: %s" % data)
-    req = urllib2.Request(server, data, headers)
-    response = urllib2.urlopen(req, timeout=int(self.send_interval - 10))
-    if response:
-      logger.debug("POST response from server: retcode = {0}".format(response.getcode()))
-      logger.debug(str(response.read()))
+
+    try:
+      try:
+        response = self.send_request(data, headers)
+      except (httplib.HTTPException, socket.error):
+        # the collector may have closed the idle connection, retry once with a new one
+        self.close_connection()
+        response = self.send_request(data, headers)
+    except Exception, e:
+      logger.warn('Error sending metrics to server. %s' % str(e))
+      self.close_connection()
+      return None
     pass
+
+    logger.debug("POST response from server: retcode = {0}".format(response.status))
+    if response.will_close:
+      self.close_connection()
+    return response.status
+
+  def send_request(self, data, headers):
+    if self.connection is None:
+      self.connection = httplib.HTTPConnection(self.collector_address.strip(), timeout=int(self.send_interval - 10))
+    self.connection.request("POST", self.COLLECTOR_PATH, data, headers)
+    response = self.connection.getresponse()
+    logger.debug(str(response.read()))
     return response
 
+  def close_connection(self):
+    if self.connection is not None:
+      try:
+        self.connection.close()
+      except Exception:
+        pass
+      self.connection = None
@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+
+'''
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+import collections
+import gzip
+import logging
+import os
+import threading
+import time
+from cStringIO import StringIO
+
+logger = logging.getLogger()
+
+
+def compress(data):
+  buf = StringIO()
+  gzip_file = gzip.GzipFile(fileobj=buf, mode='wb')
+  try:
+    gzip_file.write(data)
+  finally:
+    gzip_file.close()
+  return buf.getvalue()
+
+
+def decompress(payload):
+  gzip_file = gzip.GzipFile(fileobj=StringIO(payload), mode='rb')
+  try:
+    return gzip_file.read()
+  finally:
+    gzip_file.close()
+
+
+class SpooledBatch(object):
+  def __init__(self, sequence, created, size, path=None, payload=None):
+    self.sequence = sequence
+    self.created = created
+    self.size = size
+    # batches which could not be written to disk are kept in memory
+    self.path = path
+    self.payload = payload
+
+
+class MetricSpool(object):
+  """
+  Ring buffer of gzip-compressed metric batches waiting to be sent to the collector.
+
+  Every batch is a file named <sequence>-<creation time>.json.gz in spool_dir, so the
+  batches survive restarts of the monitor and are replayed oldest first. When the
+  spool grows over max_size bytes, or holds batches older than max_age seconds,
+  the oldest batches are dropped. Without spool_dir the batches are kept in memory.
+  """
+  FILE_SUFFIX = ".json.gz"
+
+  def __init__(self, spool_dir, max_size, max_age):
+    self.spool_dir = spool_dir
+    self.max_size = max_size
+    self.max_age = max_age
+    self.lock = threading.RLock()
+    self.batches = collections.deque()
+    self.size = 0
+    self.next_sequence = 0
+
+    if self.spool_dir:
+      try:
+        if not os.path.isdir(self.spool_dir):
+          os.makedirs(self.spool_dir)
+        self.load()
+      except (IOError, OSError), e:
+        logger.warn("Cannot use spool directory {0}, metrics will be spooled in memory. {1}".format(self.spool_dir, str(e)))
+        self.spool_dir = None
+
+  def load(self):
+    """
+    Picks up the batches left by the previous run of the monitor
+    """
+    for file_name in sorted(os.listdir(self.spool_dir)):
+      if not file_name.endswith(self.FILE_SUFFIX):
+        continue
+      path = os.path.join(self.spool_dir, file_name)
+      try:
+        sequence, created = file_name[:-len(self.FILE_SUFFIX)].split("-")
+        batch = SpooledBatch(int(sequence), int(created), os.path.getsize(path), path=path)
+      except (ValueError, OSError):
+        logger.warn("Ignoring unexpected file in the spool directory: {0}".format(path))
+        continue
+      self.batches.append(batch)
+      self.size += batch.size
+      self.next_sequence = max(self.next_sequence, batch.sequence + 1)
+
+    if self.batches:
+      logger.info("Found {0} spooled batches of metrics in {1}".format(len(self.batches), self.spool_dir))
+    self.trim()
+
+  def __len__(self):
+    return len(self.batches)
+
+  def append(self, data):
+    payload = compress(data)
+    with self.lock:
+      batch = SpooledBatch(self.next_sequence, int(time.time()), len(payload))
+      self.next_sequence += 1
+      if self.spool_dir:
+        try:
+          batch.path = self.write_batch(batch, payload)
+        except (IOError, OSError), e:
+          logger.warn("Cannot write the metrics to the spool directory, keeping them in memory. {0}".format(str(e)))
+      if batch.path is None:
+        batch.payload = payload
+      self.batches.append(batch)
+      self.size += batch.size
+      self.trim()
+
+  def write_batch(self, batch, payload):
+    path = os.path.join(self.spool_dir, "{0:012d}-{1}{2}".format(batch.sequence, batch.created, self.FILE_SUFFIX))
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+      f.write(payload)
+      f.flush()
+      os.fsync(f.fileno())
+    # readers never see partially written batches
+    os.rename(tmp_path, path)
+    return path
+
+  def peek(self):
+    """
+    Returns the oldest batch, or None if the spool is empty
+    """
+    with self.lock:
+      self.trim()
+      if not self.batches:
+        return None
+      return self.batches[0]
+
+  def read(self, batch):
+    """
+    Returns the compressed payload of the batch
+    """
+    if batch.path is None:
+      return batch.payload
+    with open(batch.path, "rb") as f:
+      return f.read()
+
+  def remove(self, batch):
+    with self.lock:
+      if batch in self.batches:
+        self.batches.remove(batch)
+        self.size -= batch.size
+      if batch.path is not None:
+        try:
+          os.remove(batch.path)
+        except OSError, e:
+          logger.warn("Cannot remove spooled batch {0}. {1}".format(batch.path, str(e)))
+
+  def trim(self):
+    with self.lock:
+      dropped = 0
+      oldest_allowed = time.time() - self.max_age
+      # the newest batch is always kept
+      while len(self.batches) > 1 and (self.size > self.max_size or self.batches[0].created < oldest_allowed):
+        self.remove(self.batches[0])
+        dropped += 1
+      if dropped:
+        logger.warn("Dropped {0} oldest batches of metrics, the spool exceeded its size or age limit".format(dropped))
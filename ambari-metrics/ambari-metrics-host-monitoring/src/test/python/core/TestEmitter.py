@@ -19,7 +19,9 @@ limitations under the License.
 '''
 
 import json
-import urllib2
+import os
+import shutil
+import tempfile
 
 import logging
 from unittest import TestCase
@@ -34,6 +36,7 @@ with patch("platform.linux_distribution", return_value = os_distro_value):
   from core.application_metric_map import ApplicationMetricMap
   from core.config_reader import Configuration
   from core.emitter import Emitter
+  from core.metric_spool import MetricSpool
   from core.stop_handler import bind_signal_handlers
 
 logger = logging.getLogger()
@@ -41,12 +44,9 @@ logger = logging.getLogger()
 class TestEmitter(TestCase):
 
   @patch.object(OSCheck, "os_distribution", new = MagicMock(return_value = os_distro_value))
-  @patch("urllib2.urlopen")
-  def testJavaHomeAvailableCheck(self, url_open_mock):
-    url_open_mock.return_value = MagicMock()
-    url_open_mock.return_value.getcode.return_value = 200
-    self.assertEqual(urllib2.urlopen(None, None).getcode(), 200)
-    url_open_mock.reset_mock()
+  @patch("httplib.HTTPConnection")
+  def testJavaHomeAvailableCheck(self, http_connection_mock):
+    http_connection_mock.return_value.getresponse.return_value = MagicMock(status=200, will_close=False)
 
     stop_handler = bind_signal_handlers()
 
@@ -57,13 +57,15 @@ class TestEmitter(TestCase):
     emitter = Emitter(config, application_metric_map, stop_handler)
     emitter.submit_metrics()
     
-    self.assertEqual(url_open_mock.call_count, 1)
-    self.assertUrlData(url_open_mock)
+    self.assertEqual(http_connection_mock.return_value.request.call_count, 1)
+    self.assertUrlData(http_connection_mock)
+    self.assertEqual(len(emitter.spool), 0)
 
 
   @patch.object(OSCheck, "os_distribution", new = MagicMock(return_value = os_distro_value))
-  @patch("urllib2.urlopen")
-  def testRetryFetch(self, url_open_mock):
+  @patch("httplib.HTTPConnection")
+  def testRetryFetch(self, http_connection_mock):
+    http_connection_mock.return_value.getresponse.return_value = MagicMock(status=500, will_close=False)
     stop_handler = bind_signal_handlers()
 
     config = Configuration()
@@ -74,12 +76,96 @@ class TestEmitter(TestCase):
     emitter.RETRY_SLEEP_INTERVAL = .001
     emitter.submit_metrics()
     
-    self.assertEqual(url_open_mock.call_count, 3)
-    self.assertUrlData(url_open_mock)
-    
-  def assertUrlData(self, url_open_mock):
-    self.assertEqual(len(url_open_mock.call_args), 2)
-    data = url_open_mock.call_args[0][0].data
+    self.assertEqual(http_connection_mock.return_value.request.call_count, 3)
+    self.assertUrlData(http_connection_mock)
+    # the metrics are kept until the collector accepts them
+    self.assertEqual(len(emitter.spool), 1)
+
+    http_connection_mock.return_value.getresponse.return_value.status = 200
+    application_metric_map.put_metric("APP1", {"metric1":2}, 2)
+    emitter.submit_metrics()
+    self.assertEqual(http_connection_mock.return_value.request.call_count, 5)
+    self.assertEqual(len(emitter.spool), 0)
+    # one keep-alive connection is used for all of the requests
+    self.assertEqual(http_connection_mock.call_count, 1)
+
+
+  @patch.object(OSCheck, "os_distribution", new = MagicMock(return_value = os_distro_value))
+  @patch("httplib.HTTPConnection")
+  def testReplayIsLimited(self, http_connection_mock):
+    http_connection_mock.return_value.getresponse.return_value = MagicMock(status=200, will_close=False)
+    stop_handler = bind_signal_handlers()
+
+    config = Configuration()
+    application_metric_map = ApplicationMetricMap("host","10.10.10.10")
+    application_metric_map.clear()
+    emitter = Emitter(config, application_metric_map, stop_handler)
+    emitter.max_replay_batches = 2
+    for i in range(3):
+      emitter.spool.append('{"metrics": []}')
+
+    application_metric_map.put_metric("APP1", {"metric1":1}, 1)
+    emitter.submit_metrics()
+
+    self.assertEqual(http_connection_mock.return_value.request.call_count, 2)
+    self.assertEqual(len(emitter.spool), 2)
+    # oldest batches are sent first
+    self.assertEqual(http_connection_mock.return_value.request.call_args[0][2], '{"metrics": []}')
+
+  @patch.object(OSCheck, "os_distribution", new = MagicMock(return_value = os_distro_value))
+  @patch("httplib.HTTPConnection")
+  def testRejectedBatchIsDropped(self, http_connection_mock):
+    responses = [MagicMock(status=400, will_close=False), MagicMock(status=200, will_close=False)]
+    http_connection_mock.return_value.getresponse.side_effect = responses
+    stop_handler = bind_signal_handlers()
+
+    config = Configuration()
+    application_metric_map = ApplicationMetricMap("host","10.10.10.10")
+    application_metric_map.clear()
+    emitter = Emitter(config, application_metric_map, stop_handler)
+    emitter.spool.append('{"metrics": "malformed"}')
+
+    application_metric_map.put_metric("APP1", {"metric1":1}, 1)
+    emitter.submit_metrics()
+
+    # the rejected batch is not retried and the next one is sent
+    self.assertEqual(http_connection_mock.return_value.request.call_count, 2)
+    self.assertUrlData(http_connection_mock)
+    self.assertEqual(len(emitter.spool), 0)
+
+  @patch.object(OSCheck, "os_distribution", new = MagicMock(return_value = os_distro_value))
+  @patch("httplib.HTTPConnection")
+  def testUnreadableBatchIsDropped(self, http_connection_mock):
+    http_connection_mock.return_value.getresponse.return_value = MagicMock(status=200, will_close=False)
+    stop_handler = bind_signal_handlers()
+    spool_dir = tempfile.mkdtemp()
+    try:
+      config = Configuration()
+      application_metric_map = ApplicationMetricMap("host","10.10.10.10")
+      application_metric_map.clear()
+      emitter = Emitter(config, application_metric_map, stop_handler)
+      emitter.spool = MetricSpool(spool_dir, 1024 * 1024, 3600)
+      emitter.spool.append('{"metrics": "truncated"}')
+      emitter.spool.append('{"metrics": "missing"}')
+      truncated, missing = emitter.spool.batches
+      with open(truncated.path, "r+b") as f:
+        f.truncate(10)
+      os.remove(missing.path)
+
+      application_metric_map.put_metric("APP1", {"metric1":1}, 1)
+      emitter.submit_metrics()
+
+      # the broken batches do not block the next one
+      self.assertEqual(http_connection_mock.return_value.request.call_count, 1)
+      self.assertUrlData(http_connection_mock)
+      self.assertEqual(len(emitter.spool), 0)
+    finally:
+      shutil.rmtree(spool_dir)
+
+  def assertUrlData(self, http_connection_mock):
+    method, path, data, headers = http_connection_mock.return_value.request.call_args[0]
+    self.assertEqual(method, "POST")
+    self.assertEqual(path, "/ws/v1/timeline/metrics")
     self.assertTrue(data is not None)
     
     metrics = json.loads(data)
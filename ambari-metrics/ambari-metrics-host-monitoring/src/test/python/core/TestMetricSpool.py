@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+
+'''
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+'''
+
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+from only_for_platform import os_distro_value
+
+from mock.mock import patch
+
+with patch("platform.linux_distribution", return_value = os_distro_value):
+  from core.metric_spool import MetricSpool, compress, decompress
+
+
+class TestMetricSpool(TestCase):
+
+  def setUp(self):
+    self.spool_dir = tempfile.mkdtemp()
+
+  def tearDown(self):
+    shutil.rmtree(self.spool_dir)
+
+  def testBatchesSurviveRestart(self):
+    spool = MetricSpool(self.spool_dir, 1024 * 1024, 3600)
+    spool.append('{"metrics": [1]}')
+    spool.append('{"metrics": [2]}')
+    self.assertEqual(2, len(os.listdir(self.spool_dir)))
+
+    spool = MetricSpool(self.spool_dir, 1024 * 1024, 3600)
+    self.assertEqual(2, len(spool))
+    batch = spool.peek()
+    self.assertEqual('{"metrics": [1]}', decompress(spool.read(batch)))
+    spool.remove(batch)
+    self.assertEqual('{"metrics": [2]}', decompress(spool.read(spool.peek())))
+    self.assertEqual(1, len(os.listdir(self.spool_dir)))
+
+    spool.append('{"metrics": [3]}')
+    self.assertEqual(2, spool.batches[-1].sequence)
+
+  def testSizeLimit(self):
+    size = len(compress('{"metrics": [1]}'))
+    spool = MetricSpool(self.spool_dir, 2 * size, 3600)
+    for i in range(1, 5):
+      spool.append('{"metrics": [%d]}' % i)
+
+    self.assertEqual(2, len(spool))
+    self.assertEqual('{"metrics": [3]}', decompress(spool.read(spool.peek())))
+    self.assertEqual(2, len(os.listdir(self.spool_dir)))
+
+  @patch("time.time")
+  def testAgeLimit(self, time_mock):
+    time_mock.return_value = 1000
+    spool = MetricSpool(None, 1024 * 1024, 60)
+    spool.append('{"metrics": [1]}')
+    time_mock.return_value = 1050
+    spool.append('{"metrics": [2]}')
+    time_mock.return_value = 1070
+
+    self.assertEqual('{"metrics": [2]}', decompress(spool.read(spool.peek())))
+    self.assertEqual(1, len(spool))
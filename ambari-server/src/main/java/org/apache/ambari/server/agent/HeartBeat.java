@@ -20,6 +20,7 @@ package org.apache.ambari.server.agent;
 
 import java.util.ArrayList;
 import java.util.List;
+import java.util.Map;
 
 import org.apache.ambari.server.state.Alert;
 import org.codehaus.jackson.annotate.JsonProperty;
@@ -42,6 +43,7 @@ public class HeartBeat {
   private AgentEnv agentEnv = null;
   private List<Alert> alerts = null;
   private RecoveryReport recoveryReport;
+  private Map<String, Long> actionQueueMetrics = null;
 
   public long getResponseId() {
     return responseId;
@@ -93,6 +95,18 @@ public class HeartBeat {
     this.recoveryReport = recoveryReport;
   }
 
+  /**
+   * @return the depth of the command queue of the agent and the wait and run
+   *         times (in milliseconds) of the commands completed since the previous heartbeat
+   */
+  public Map<String, Long> getActionQueueMetrics() {
+    return actionQueueMetrics;
+  }
+
+  public void setActionQueueMetrics(Map<String, Long> actionQueueMetrics) {
+    this.actionQueueMetrics = actionQueueMetrics;
+  }
+
   public AgentEnv getAgentEnv() {
     return agentEnv;
   }
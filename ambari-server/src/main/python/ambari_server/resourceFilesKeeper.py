@@ -44,6 +44,8 @@ class ResourceFilesKeeper():
   ARCHIVABLE_DIRS = [HOOKS_DIR, PACKAGE_DIR]
 
   HASH_SUM_FILE=".hash"
+  # Hash sums of individual files, so that agents are able to download only changed files
+  MANIFEST_FILE=".manifest"
   ARCHIVE_NAME="archive.zip"
 
   PYC_EXT=".pyc"
@@ -149,14 +151,18 @@ class ResourceFilesKeeper():
     skip_empty_directory = True
     cur_hash = self.count_hash_sum(directory)
     saved_hash = self.read_hash_sum(directory)
-    if cur_hash != saved_hash:
-      if not self.nozip:
+    manifest_exists = os.path.isfile(os.path.join(directory, self.MANIFEST_FILE))
+    if cur_hash != saved_hash or not manifest_exists:
+      if cur_hash != saved_hash and not self.nozip:
         self.zip_directory(directory, skip_empty_directory)
       # Skip generation of .hash file is directory is empty
       if (skip_empty_directory and not os.listdir(directory)):
         self.dbg_out("Empty directory. Skipping generation of hash file for {0}".format(directory))
       else:
-        self.write_hash_sum(directory, cur_hash)
+        # manifest goes first, the .hash file marks the directory as complete
+        self.write_manifest(directory)
+        if cur_hash != saved_hash:
+          self.write_hash_sum(directory, cur_hash)
       pass
 
   def count_hash_sum(self, directory):
@@ -189,6 +195,50 @@ class ResourceFilesKeeper():
                             "hash: {0}".format(str(err)))
 
 
+  def count_file_hash_sums(self, directory):
+    """
+    Returns a dictionary of file path (relative to directory, with '/' separators) to sha1 hash sum
+    of the file. Ignores the same files as count_hash_sum
+    """
+    try:
+      hash_sums = {}
+      abs_src = os.path.abspath(directory)
+      for root, dirs, files in os.walk(directory):
+        for f in files:
+          if not self.is_ignored(f):
+            full_path = os.path.abspath(os.path.join(root, f))
+            sha1 = hashlib.sha1()
+            with open(full_path, 'rb') as fh:
+              while True:
+                data = fh.read(self.BUFFER)
+                if not data:
+                  break
+                sha1.update(data)
+            relative_path = full_path[len(abs_src) + 1:].replace(os.sep, '/')
+            hash_sums[relative_path] = sha1.hexdigest()
+      return hash_sums
+    except Exception, err:
+      raise KeeperException("Can not calculate file "
+                            "hashes: {0}".format(str(err)))
+
+
+  def write_manifest(self, directory):
+    """
+    Writes the hash sums of all files in directory to manifest file.
+    Every line has the format "<sha1> <relative path>", lines are sorted by path
+    """
+    hash_sums = self.count_file_hash_sums(directory)
+    manifest_file = os.path.join(directory, self.MANIFEST_FILE)
+    try:
+      with open(manifest_file, "w") as fh:
+        for path in sorted(hash_sums.keys()):
+          fh.write("{0} {1}\n".format(hash_sums[path], path))
+      os.chmod(manifest_file, 0o666)
+    except Exception, err:
+      raise KeeperException("Can not write to file {0} : {1}".format(manifest_file,
+                                                                   str(err)))
+
+
   def read_hash_sum(self, directory):
     """
     Tries to read a hash sum from previously generated file. Returns string
@@ -255,7 +305,7 @@ class ResourceFilesKeeper():
     """
     returns True if filename is ignored when calculating hashing or archiving
     """
-    return filename in [self.HASH_SUM_FILE, self.ARCHIVE_NAME] or \
+    return filename in [self.HASH_SUM_FILE, self.MANIFEST_FILE, self.ARCHIVE_NAME] or \
            filename.endswith(self.PYC_EXT)
 
 
@@ -24,6 +24,7 @@ limitations under the License.
 
 import time
 import sys
+import hashlib
 import logging
 import pprint
 import os
@@ -31,6 +32,10 @@ import subprocess
 import threading
 import traceback
 import re
+import shutil
+import tarfile
+import tempfile
+from cStringIO import StringIO
 from datetime import datetime
 from ambari_commons import OSCheck, OSConst
 from ambari_commons.os_family_impl import OsFamilyFuncImpl, OsFamilyImpl
@@ -42,8 +47,14 @@ else:
 
 AMBARI_PASSPHRASE_VAR_NAME = "AMBARI_PASSPHRASE"
 HOST_BOOTSTRAP_TIMEOUT = 300
+# how many parallel bootstraps are run at first, the number grows while hosts
+# bootstrap successfully and shrinks on timeouts and connection errors
+INITIAL_PARALLEL_BOOTSTRAPS = 20
+MIN_PARALLEL_BOOTSTRAPS = 5
 # how many parallel bootstraps may be run at a time
-MAX_PARALLEL_BOOTSTRAPS = 20
+MAX_PARALLEL_BOOTSTRAPS = 100
+# exit code of ssh when the connection fails
+SSH_CONNECTION_ERROR = 255
 # How many seconds to wait between polling parallel bootstraps
 POLL_INTERVAL_SEC = 1
 DEBUG = False
@@ -71,48 +82,12 @@ class HostLog:
     logFile.close()
 
 
-class SCP:
-  """ SCP implementation that is thread based. The status can be returned using
-   status val """
-  def __init__(self, user, sshPort, sshkey_file, host, inputFile, remote, bootdir, host_log):
-    self.user = user
-    self.sshPort = sshPort
-    self.sshkey_file = sshkey_file
-    self.host = host
-    self.inputFile = inputFile
-    self.remote = remote
-    self.bootdir = bootdir
-    self.host_log = host_log
-    pass
-
-
-  def run(self):
-    scpcommand = ["scp",
-                  "-r",
-                  "-o", "ConnectTimeout=60",
-                  "-o", "BatchMode=yes",
-                  "-o", "StrictHostKeyChecking=no", "-P", self.sshPort,
-                  "-i", self.sshkey_file, self.inputFile, self.user + "@" +
-                                                         self.host + ":" + self.remote]
-    if DEBUG:
-      self.host_log.write("Running scp command " + ' '.join(scpcommand))
-    self.host_log.write("==========================")
-    self.host_log.write("\nCommand start time " + datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
-    scpstat = subprocess.Popen(scpcommand, stdout=subprocess.PIPE,
-                               stderr=subprocess.PIPE)
-    log = scpstat.communicate()
-    errorMsg = log[1]
-    log = log[0] + "\n" + log[1]
-    self.host_log.write(log)
-    self.host_log.write("scp " + self.inputFile)
-    self.host_log.write("host=" + self.host + ", exitcode=" + str(scpstat.returncode) )
-    self.host_log.write("Command end time " + datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
-    return {"exitstatus": scpstat.returncode, "log": log, "errormsg": errorMsg}
-
-
 class SSH:
-  """ Ssh implementation of this """
-  def __init__(self, user, sshPort, sshkey_file, host, command, bootdir, host_log, errorMessage = None):
+  """ Ssh implementation of this.
+   With control_path the command reuses the master connection to the host, which
+   is opened by the first command. input_data is sent to the stdin of the command. """
+  def __init__(self, user, sshPort, sshkey_file, host, command, bootdir, host_log, errorMessage = None,
+               control_path = None, input_data = None):
     self.user = user
     self.sshPort = sshPort
     self.sshkey_file = sshkey_file
@@ -121,6 +96,8 @@ class SSH:
     self.bootdir = bootdir
     self.errorMessage = errorMessage
     self.host_log = host_log
+    self.control_path = control_path
+    self.input_data = input_data
     pass
 
 
@@ -128,17 +105,29 @@ class SSH:
     sshcommand = ["ssh",
                   "-o", "ConnectTimeOut=60",
                   "-o", "StrictHostKeyChecking=no",
-                  "-o", "BatchMode=yes",
-                  "-tt", # Should prevent "tput: No value for $TERM and no -T specified" warning
-                  "-i", self.sshkey_file, "-p", self.sshPort,
-                  self.user + "@" + self.host, self.command]
+                  "-o", "BatchMode=yes"]
+    if self.control_path:
+      sshcommand.extend(["-o", "ControlMaster=auto",
+                         "-o", "ControlPath=" + self.control_path,
+                         "-o", "ControlPersist=" + str(HOST_BOOTSTRAP_TIMEOUT)])
+    if self.input_data is None:
+      sshcommand.append("-tt") # Should prevent "tput: No value for $TERM and no -T specified" warning
+    else:
+      sshcommand.append("-T") # a terminal would alter the binary input
+    sshcommand.extend(["-i", self.sshkey_file, "-p", self.sshPort,
+                       self.user + "@" + self.host, self.command])
     if DEBUG:
       self.host_log.write("Running ssh command " + ' '.join(sshcommand))
     self.host_log.write("==========================")
     self.host_log.write("\nCommand start time " + datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
-    sshstat = subprocess.Popen(sshcommand, stdout=subprocess.PIPE,
-                               stderr=subprocess.PIPE)
-    log = sshstat.communicate()
+    if self.input_data is None:
+      sshstat = subprocess.Popen(sshcommand, stdout=subprocess.PIPE,
+                                 stderr=subprocess.PIPE)
+      log = sshstat.communicate()
+    else:
+      sshstat = subprocess.Popen(sshcommand, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                 stderr=subprocess.PIPE)
+      log = sshstat.communicate(self.input_data)
     errorMsg = log[1]
     if self.errorMessage and sshstat.returncode != 0:
       errorMsg = self.errorMessage + "\n" + errorMsg
@@ -201,6 +190,7 @@ class Bootstrap(threading.Thread):
     log_file = os.path.join(self.shared_state.bootdir, self.host + ".log")
     self.host_log = HostLog(log_file)
     self.daemon = True
+    self.copied_password_file = False
 
     if OSCheck.is_ubuntu_family():
       self.AMBARI_REPO_FILENAME = self.AMBARI_REPO_FILENAME + ".list"
@@ -449,33 +439,6 @@ class BootstrapDefault(Bootstrap):
     password_file = self.shared_state.password_file
     return password_file is not None and password_file != 'null'
 
-  def copyOsCheckScript(self):
-    # Copying the os check script file
-    fileToCopy = self.getOsCheckScript()
-    target = self.getOsCheckScriptRemoteLocation()
-    params = self.shared_state
-    self.host_log.write("==========================\n")
-    self.host_log.write("Copying OS type check script...")
-    scp = SCP(params.user, params.sshPort, params.sshkey_file, self.host, fileToCopy,
-              target, params.bootdir, self.host_log)
-    result = scp.run()
-    self.host_log.write("\n")
-    return result
-
-  def copyCommonFunctions(self):
-    # Copying the os check script file
-    fileToCopy = self.ambari_commons
-    target = self.getCommonFunctionsRemoteLocation()
-    params = self.shared_state
-    self.host_log.write("==========================\n")
-    self.host_log.write("Copying common functions script...")
-    scp = SCP(params.user, params.sshPort, params.sshkey_file, self.host, fileToCopy,
-              target, params.bootdir, self.host_log)
-    result = scp.run()
-    self.host_log.write("\n")
-    result["exitstatus"] = 0 # ignore not copied *.pyc files with permission denied. 
-    return result
-
   def getMoveRepoFileWithPasswordCommand(self, targetDir):
     return "sudo -S mv " + str(self.getRemoteName(self.AMBARI_REPO_FILENAME)) \
            + " " + os.path.join(str(targetDir), self.AMBARI_REPO_FILENAME) + \
@@ -498,70 +461,118 @@ class BootstrapDefault(Bootstrap):
   def getRepoFileChmodCommand(self):
     return "sudo chmod 644 {0}".format(self.getRepoFile())
 
-  def copyNeededFiles(self):
-    # get the params
+  def getControlPath(self):
+    """ Path of the socket of the master ssh connection, None if connections are not shared """
+    control_dir = self.shared_state.control_dir
+    if control_dir is None:
+      return None
+    # "%r@%h:%p" may not fit into the 108 bytes of a socket path with long host names,
+    # and "%C" needs OpenSSH 6.7
     params = self.shared_state
+    connection = "{0}@{1}:{2}".format(params.user, self.host, params.sshPort)
+    return os.path.join(control_dir, hashlib.md5(connection).hexdigest()[:16])
 
-    # Copying the files
-    fileToCopy = self.getRepoFile()
-    target = self.getRemoteName(self.AMBARI_REPO_FILENAME)
-
-    if (os.path.exists(fileToCopy)):
-      self.host_log.write("==========================\n")
-      self.host_log.write("Copying repo file to 'tmp' folder...")
-      scp = SCP(params.user, params.sshPort, params.sshkey_file, self.host, fileToCopy,
-                target, params.bootdir, self.host_log)
-      retcode1 = scp.run()
-      self.host_log.write("\n")
-
-      # Move file to repo dir
-      self.host_log.write("==========================\n")
-      self.host_log.write("Moving file to repo dir...")
-      targetDir = self.getRepoDir()
-      command = self.getMoveRepoFileCommand(targetDir)
-      ssh = SSH(params.user, params.sshPort, params.sshkey_file, self.host, command,
-                params.bootdir, self.host_log)
-      retcode2 = ssh.run()
-      self.host_log.write("\n")
-
-      # Change permissions on ambari.repo
-      self.host_log.write("==========================\n")
-      self.host_log.write("Changing permissions for ambari.repo...")
-      command = self.getRepoFileChmodCommand()
-      ssh = SSH(params.user, params.sshPort, params.sshkey_file, self.host, command,
-                params.bootdir, self.host_log)
-      retcode4 = ssh.run()
-      self.host_log.write("\n")
-
-      # Update repo cache for ubuntu OS
-      if OSCheck.is_ubuntu_family():
-        self.host_log.write("==========================\n")
-        self.host_log.write("Update apt cache of repository...")
-        command = self.getAptUpdateCommand()
-        ssh = SSH(params.user, params.sshPort, params.sshkey_file, self.host, command,
-                  params.bootdir, self.host_log)
-        retcode2 = ssh.run()
-        self.host_log.write("\n")
-
-      retcode = max(retcode1["exitstatus"], retcode2["exitstatus"], retcode4["exitstatus"])
-    else:
-      self.host_log.write("==========================\n")
+  def runCommand(self, command, errorMessage=None, input_data=None):
+    params = self.shared_state
+    ssh = SSH(params.user, params.sshPort, params.sshkey_file, self.host, command,
+              params.bootdir, self.host_log, errorMessage=errorMessage,
+              control_path=self.getControlPath(), input_data=input_data)
+    return ssh.run()
+
+  def getBootstrapArchiveFiles(self):
+    """ Returns a list of (local path, name in the archive, mode) of the files shipped to the host """
+    params = self.shared_state
+    files = []
+    for root, dirs, file_names in os.walk(self.ambari_commons):
+      for file_name in file_names:
+        # compiled files are created by the agent
+        if file_name.endswith(".pyc") or file_name.endswith(".pyo"):
+          continue
+        local_path = os.path.join(root, file_name)
+        archive_name = os.path.join("ambari_commons", os.path.relpath(local_path, self.ambari_commons))
+        files.append((local_path, archive_name, None))
+    files.append((self.getOsCheckScript(), os.path.basename(self.getOsCheckScriptRemoteLocation()), None))
+    files.append((params.setup_agent_file, os.path.basename(self.getRemoteName(self.SETUP_SCRIPT_FILENAME)), None))
+    if os.path.exists(self.getRepoFile()):
+      files.append((self.getRepoFile(), os.path.basename(self.getRemoteName(self.AMBARI_REPO_FILENAME)), None))
+    if self.hasPassword():
+      files.append((params.password_file, os.path.basename(self.getPasswordFile()), 0600))
+    return files
+
+  def createBootstrapArchive(self):
+    """ Packs the files needed on the hosts into one gzipped tar archive, which is the same for all hosts """
+    params = self.shared_state
+    params.archive_lock.acquire()
+    try:
+      if params.archive is None:
+        buf = StringIO()
+        archive = tarfile.open(fileobj=buf, mode="w:gz")
+        try:
+          for local_path, archive_name, mode in self.getBootstrapArchiveFiles():
+            try:
+              tarinfo = archive.gettarinfo(local_path, archive_name)
+            except (IOError, OSError):
+              # same as scp, files which cannot be read are skipped
+              logging.warn("Cannot add {0} to the bootstrap archive".format(local_path))
+              continue
+            tarinfo.uid = tarinfo.gid = 0
+            tarinfo.uname = tarinfo.gname = ""
+            if mode is not None:
+              tarinfo.mode = mode
+            fileobj = open(local_path, "rb")
+            try:
+              archive.addfile(tarinfo, fileobj)
+            finally:
+              fileobj.close()
+        finally:
+          archive.close()
+        params.archive = buf.getvalue()
+      return params.archive
+    finally:
+      params.archive_lock.release()
+
+  def copyBootstrapArchive(self):
+    """ Copies common functions, the os check script, the setup script, the repo file
+    and the password file to the target directory in one stream """
+    self.host_log.write("==========================\n")
+    self.host_log.write("Copying bootstrap files...")
+    archive = self.createBootstrapArchive()
+    command = "tar -xzf - -C {0}".format(self.TEMP_FOLDER)
+    retcode = self.runCommand(command, input_data=archive)
+    if self.hasPassword():
+      self.copied_password_file = True
+    self.host_log.write("\n")
+    return retcode
+
+  def installRepoFile(self):
+    """ Moves the copied repo file to the repo dir """
+    self.host_log.write("==========================\n")
+    if not os.path.exists(self.getRepoFile()):
       self.host_log.write("Copying required files...")
       self.host_log.write("Ambari repo file not found: {0}".format(self.getRepoFile()))
-      retcode = -1
-      pass
+      return -1
 
-    # copy the setup script file
-    self.host_log.write("==========================\n")
-    self.host_log.write("Copying setup script file...")
-    fileToCopy = params.setup_agent_file
-    target = self.getRemoteName(self.SETUP_SCRIPT_FILENAME)
-    scp = SCP(params.user, params.sshPort, params.sshkey_file, self.host, fileToCopy,
-              target, params.bootdir, self.host_log)
-    retcode3 = scp.run()
+    self.host_log.write("Moving file to repo dir and changing permissions for ambari.repo...")
+    commands = [self.getMoveRepoFileCommand(self.getRepoDir()), self.getRepoFileChmodCommand()]
+    # Update repo cache for ubuntu OS
+    if OSCheck.is_ubuntu_family():
+      commands.append(self.getAptUpdateCommand())
+    retcode = self.runCommand(" && ".join(commands))
     self.host_log.write("\n")
+    return retcode
 
-    return max(retcode, retcode3["exitstatus"])
+  def closeConnection(self):
+    """ Stops the master ssh connection to the host """
+    control_path = self.getControlPath()
+    if control_path is None:
+      return
+    params = self.shared_state
+    command = ["ssh", "-o", "ControlPath=" + control_path, "-p", params.sshPort,
+               "-O", "exit", params.user + "@" + self.host]
+    try:
+      subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE).communicate()
+    except OSError:
+      pass
 
   def getAmbariPort(self):
     server_port = self.shared_state.server_port
@@ -602,9 +613,7 @@ class BootstrapDefault(Bootstrap):
               (self.getOsCheckScriptRemoteLocation(),
                PYTHON_ENV, self.getOsCheckScriptRemoteLocation(), params.cluster_os_type)
 
-    ssh = SSH(params.user, params.sshPort, params.sshkey_file, self.host, command,
-              params.bootdir, self.host_log)
-    retcode = ssh.run()
+    retcode = self.runCommand(command)
     self.host_log.write("\n")
     return retcode
 
@@ -612,58 +621,20 @@ class BootstrapDefault(Bootstrap):
     """ Checking 'sudo' package on remote host """
     self.host_log.write("==========================\n")
     self.host_log.write("Checking 'sudo' package on remote host...")
-    params = self.shared_state
     if OSCheck.is_ubuntu_family():
       command = "dpkg --get-selections|grep -e '^sudo\s*install'"
     else:
       command = "rpm -qa | grep -e '^sudo\-'"
-    ssh = SSH(params.user, params.sshPort, params.sshkey_file, self.host, command,
-              params.bootdir, self.host_log,
-              errorMessage="Error: Sudo command is not available. "
-                           "Please install the sudo command.")
-    retcode = ssh.run()
+    retcode = self.runCommand(command, errorMessage="Error: Sudo command is not available. "
+                                                    "Please install the sudo command.")
     self.host_log.write("\n")
     return retcode
 
-  def copyPasswordFile(self):
-    # Copy the password file
-    self.host_log.write("Copying password file to 'tmp' folder...")
-    params = self.shared_state
-    scp = SCP(params.user, params.sshPort, params.sshkey_file, self.host, params.password_file,
-              self.getPasswordFile(), params.bootdir, self.host_log)
-    retcode1 = scp.run()
-
-    self.copied_password_file = True
-
-    # Change password file mode to 600
-    self.host_log.write("Changing password file mode...")
-    command = "chmod 600 " + self.getPasswordFile()
-    ssh = SSH(params.user, params.sshPort, params.sshkey_file, self.host, command,
-              params.bootdir, self.host_log)
-    retcode2 = ssh.run()
-
-    self.host_log.write("Copying password file finished")
-    return max(retcode1["exitstatus"], retcode2["exitstatus"])
-
-  def changePasswordFileModeOnHost(self):
-    # Change password file mode to 600
-    self.host_log.write("Changing password file mode...")
-    params = self.shared_state
-    command = "chmod 600 " + self.getPasswordFile()
-    ssh = SSH(params.user, params.sshPort, params.sshkey_file, self.host, command,
-              params.bootdir, self.host_log)
-    retcode = ssh.run()
-    self.host_log.write("Change password file mode on host finished")
-    return retcode
-
   def deletePasswordFile(self):
     # Deleting the password file
     self.host_log.write("Deleting password file...")
-    params = self.shared_state
     command = "rm " + self.getPasswordFile()
-    ssh = SSH(params.user, params.sshPort, params.sshkey_file, self.host, command,
-              params.bootdir, self.host_log)
-    retcode = ssh.run()
+    retcode = self.runCommand(command)
     self.host_log.write("Deleting password file finished")
     return retcode
 
@@ -677,9 +648,7 @@ class BootstrapDefault(Bootstrap):
     command = "sudo mkdir -p {0} ; sudo chown -R {1} {0} ; sudo chmod 755 {3} ; sudo chmod 755 {2} ; sudo chmod 777 {0}".format(
       self.TEMP_FOLDER, quote_bash_args(params.user), DEFAULT_AGENT_DATA_FOLDER, DEFAULT_AGENT_LIB_FOLDER)
 
-    ssh = SSH(params.user, params.sshPort, params.sshkey_file, self.host, command,
-              params.bootdir, self.host_log)
-    retcode = ssh.run()
+    retcode = self.runCommand(command)
     self.host_log.write("\n")
     return retcode
 
@@ -690,13 +659,10 @@ class BootstrapDefault(Bootstrap):
       return self.getRunSetupWithoutPasswordCommand(expected_hostname)
 
   def runSetupAgent(self):
-    params = self.shared_state
     self.host_log.write("==========================\n")
     self.host_log.write("Running setup agent script...")
     command = self.getRunSetupCommand(self.host)
-    ssh = SSH(params.user, params.sshPort, params.sshkey_file, self.host, command,
-              params.bootdir, self.host_log)
-    retcode = ssh.run()
+    retcode = self.runCommand(command)
     self.host_log.write("\n")
     return retcode
 
@@ -705,18 +671,12 @@ class BootstrapDefault(Bootstrap):
     self.status["start_time"] = time.time()
     # Population of action queue
     action_queue = [self.createTargetDir,
-                    self.copyCommonFunctions,
-                    self.copyOsCheckScript,
+                    self.copyBootstrapArchive,
                     self.runOsCheckScript,
-                    self.checkSudoPackage
+                    self.checkSudoPackage,
+                    self.installRepoFile,
+                    self.runSetupAgent
     ]
-    if self.hasPassword():
-      action_queue.extend([self.copyPasswordFile,
-                           self.changePasswordFileModeOnHost])
-    action_queue.extend([
-      self.copyNeededFiles,
-      self.runSetupAgent,
-    ])
 
     # Execution of action queue
     last_retcode = 0
@@ -741,6 +701,7 @@ class BootstrapDefault(Bootstrap):
         self.host_log.write(message)
         logging.warn(message)
 
+    self.closeConnection()
     self.createDoneFile(last_retcode)
     self.status["return_code"] = last_retcode
 
@@ -759,17 +720,37 @@ class PBootstrap:
     return bootstrap
 
   def run(self):
-    """ Run up to MAX_PARALLEL_BOOTSTRAPS at a time in parallel """
+    """ Run up to MAX_PARALLEL_BOOTSTRAPS at a time in parallel.
+    The number of parallel bootstraps starts at INITIAL_PARALLEL_BOOTSTRAPS, grows
+    by one with every successful host and is halved when a host times out or
+    cannot be connected to. """
     logging.info("Executing parallel bootstrap")
+    if not OSCheck.is_windows_family():
+      self.sharedState.control_dir = tempfile.mkdtemp(prefix="ambari-ssh-")
+    try:
+      self.run_bootstraps()
+    finally:
+      if self.sharedState.control_dir is not None:
+        shutil.rmtree(self.sharedState.control_dir, ignore_errors=True)
+        self.sharedState.control_dir = None
+    logging.info("Finished parallel bootstrap")
+
+  def run_bootstraps(self):
     queue = list(self.hostlist)
     queue.reverse()
     running_list = []
     finished_list = []
+    parallel_bootstraps = INITIAL_PARALLEL_BOOTSTRAPS
     while queue or running_list: # until queue is not empty or not all parallel bootstraps are
       # poll running bootstraps
       for bootstrap in running_list:
-        if bootstrap.getStatus()["return_code"] is not None:
+        return_code = bootstrap.getStatus()["return_code"]
+        if return_code is not None:
           finished_list.append(bootstrap)
+          if return_code == SSH_CONNECTION_ERROR:
+            parallel_bootstraps = max(MIN_PARALLEL_BOOTSTRAPS, parallel_bootstraps / 2)
+          elif return_code == 0:
+            parallel_bootstraps = min(MAX_PARALLEL_BOOTSTRAPS, parallel_bootstraps + 1)
         else:
           starttime = bootstrap.getStatus()["start_time"]
           elapsedtime = time.time() - starttime
@@ -779,17 +760,17 @@ class PBootstrap:
                             "interrupted".format(bootstrap.host))
             bootstrap.interruptBootstrap()
             finished_list.append(bootstrap)
+            parallel_bootstraps = max(MIN_PARALLEL_BOOTSTRAPS, parallel_bootstraps / 2)
       # Remove finished from the running list
       running_list[:] = [b for b in running_list if not b in finished_list]
       # Start new bootstraps from the queue
-      free_slots = MAX_PARALLEL_BOOTSTRAPS - len(running_list)
+      free_slots = parallel_bootstraps - len(running_list)
       for i in range(free_slots):
         if queue:
           next_host = queue.pop()
           bootstrap = self.run_bootstrap(next_host)
           running_list.append(bootstrap)
       time.sleep(POLL_INTERVAL_SEC)
-    logging.info("Finished parallel bootstrap")
 
 
 class SharedState:
@@ -812,6 +793,11 @@ class SharedState:
     self.server_port = server_port
     self.remote_files = {}
     self.ret = {}
+    # directory of the sockets of the master ssh connections
+    self.control_dir = None
+    # files copied to every host, packed once
+    self.archive = None
+    self.archive_lock = threading.Lock()
     pass
 
 
@@ -348,6 +348,13 @@ def ams(name=None):
               create_parents = True
     )
 
+    Directory(params.ams_monitor_spool_dir,
+              owner=params.ams_user,
+              group=params.user_group,
+              mode=0755,
+              create_parents = True
+    )
+
     Directory(format("{ams_monitor_dir}/psutil/build"),
               owner=params.ams_user,
               group=params.user_group,
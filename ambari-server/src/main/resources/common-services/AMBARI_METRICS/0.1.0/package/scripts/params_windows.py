@@ -42,9 +42,11 @@ except:
 try:
   ams_monitor_conf_dir = os.environ["MONITOR_CONF_DIR"]
   ams_monitor_home_dir = os.environ["MONITOR_HOME"]
+  ams_monitor_spool_dir = os.path.join(os.environ["MONITOR_HOME"], "spool")
 except:
   ams_monitor_conf_dir = None
   ams_monitor_home_dir = None
+  ams_monitor_spool_dir = None
 
 hadoop_native_lib = None
 hadoop_bin_dir = None
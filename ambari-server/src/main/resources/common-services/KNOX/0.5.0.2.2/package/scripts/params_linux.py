@@ -28,6 +28,7 @@ from resource_management.libraries.functions.get_port_from_url import get_port_f
 from resource_management.libraries.functions.get_hdp_version import get_hdp_version
 from resource_management.libraries.functions import get_kinit_path
 from resource_management.libraries.script.script import Script
+from resource_management.libraries.script.cluster_host_info import RangeList
 from status_params import *
 from resource_management.libraries.resources.hdfs_resource import HdfsResource
 from resource_management.libraries.functions import hdp_select
@@ -120,7 +121,7 @@ if dfs_ha_enabled:
 
 
 namenode_hosts = default("/clusterHostInfo/namenode_host", None)
-if type(namenode_hosts) is list:
+if isinstance(namenode_hosts, (list, RangeList)):
   namenode_host = namenode_hosts[0]
 else:
   namenode_host = namenode_hosts
@@ -151,7 +152,7 @@ def buildUrlElement(protocol, hdfs_host, port, servicePath) :
   else:
     return openTag + proto + hdfs_host + ":" + port + servicePath + closeTag + newLine
 
-if type(namenode_hosts) is list:
+if isinstance(namenode_hosts, (list, RangeList)):
     for host in namenode_hosts:
       webhdfs_service_urls += buildUrlElement("http", host, namenode_http_port, "/webhdfs")
 else:
@@ -159,7 +160,7 @@ else:
 
 
 rm_hosts = default("/clusterHostInfo/rm_host", None)
-if type(rm_hosts) is list:
+if isinstance(rm_hosts, (list, RangeList)):
   rm_host = rm_hosts[0]
 else:
   rm_host = rm_hosts
@@ -178,27 +179,27 @@ if has_rm:
 hive_http_port = default('/configurations/hive-site/hive.server2.thrift.http.port', "10001")
 hive_http_path = default('/configurations/hive-site/hive.server2.thrift.http.path', "cliservice")
 hive_server_hosts = default("/clusterHostInfo/hive_server_host", None)
-if type(hive_server_hosts) is list:
+if isinstance(hive_server_hosts, (list, RangeList)):
   hive_server_host = hive_server_hosts[0]
 else:
   hive_server_host = hive_server_hosts
 
 templeton_port = default('/configurations/webhcat-site/templeton.port', "50111")
 webhcat_server_hosts = default("/clusterHostInfo/webhcat_server_host", None)
-if type(webhcat_server_hosts) is list:
+if isinstance(webhcat_server_hosts, (list, RangeList)):
   webhcat_server_host = webhcat_server_hosts[0]
 else:
   webhcat_server_host = webhcat_server_hosts
 
 hbase_master_port = default('/configurations/hbase-site/hbase.rest.port', "8080")
 hbase_master_hosts = default("/clusterHostInfo/hbase_master_hosts", None)
-if type(hbase_master_hosts) is list:
+if isinstance(hbase_master_hosts, (list, RangeList)):
   hbase_master_host = hbase_master_hosts[0]
 else:
   hbase_master_host = hbase_master_hosts
 
 oozie_server_hosts = default("/clusterHostInfo/oozie_server", None)
-if type(oozie_server_hosts) is list:
+if isinstance(oozie_server_hosts, (list, RangeList)):
   oozie_server_host = oozie_server_hosts[0]
 else:
   oozie_server_host = oozie_server_hosts
@@ -341,10 +341,10 @@ class InstallPackages(Script):
       packages_installed_before = [package[0] for package in packages_installed_before]
       packages_were_checked = True
       filtered_package_list = self.filter_package_list(package_list)
-      for package in filtered_package_list:
-        name = self.format_package_name(package['name'])
-        Package(name
-        # action="upgrade" # should we use "upgrade" action here, to upgrade not versioned packages?       
+      # all of the packages are resolved and installed in a single package manager transaction
+      if filtered_package_list:
+        Package("{0} packages".format(self.repository_version),
+                packages=[self.format_package_name(package['name']) for package in filtered_package_list]
         )
     except Exception, err:
       ret_code = 1
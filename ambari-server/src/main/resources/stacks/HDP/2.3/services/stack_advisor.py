@@ -39,20 +39,20 @@ class HDP23StackAdvisor(HDP22StackAdvisor):
   def getComponentLayoutValidations(self, services, hosts):
     parentItems = super(HDP23StackAdvisor, self).getComponentLayoutValidations(services, hosts)
 
-    hiveExists = "HIVE" in [service["StackServices"]["service_name"] for service in services["services"]]
-    sparkExists = "SPARK" in [service["StackServices"]["service_name"] for service in services["services"]]
+    servicesList = [service["StackServices"]["service_name"] for service in services["services"]]
+    hiveExists = "HIVE" in servicesList
+    sparkExists = "SPARK" in servicesList
 
-    if not "HAWQ" in [service["StackServices"]["service_name"] for service in services["services"]] and not sparkExists:
+    if not "HAWQ" in servicesList and not sparkExists:
       return parentItems
 
     childItems = []
     hostsList = [host["Hosts"]["host_name"] for host in hosts["items"]]
     hostsCount = len(hostsList)
 
-    componentsListList = [service["components"] for service in services["services"]]
-    componentsList = [item for sublist in componentsListList for item in sublist]
-    hawqMasterHosts = [component["StackServiceComponents"]["hostnames"][0] for component in componentsList if component["StackServiceComponents"]["component_name"] == "HAWQMASTER"]
-    hawqStandbyHosts = [component["StackServiceComponents"]["hostnames"][0] for component in componentsList if component["StackServiceComponents"]["component_name"] == "HAWQSTANDBY"]
+    clusterIndex = self.getClusterIndex(services, hosts)
+    hawqMasterHosts = clusterIndex.getComponentHostNames("HAWQ", "HAWQMASTER")[:1]
+    hawqStandbyHosts = clusterIndex.getComponentHostNames("HAWQ", "HAWQSTANDBY")[:1]
 
     # single node case is not analyzed because HAWQ Standby Master will not be present in single node topology due to logic in createComponentLayoutRecommendations()
     if len(hawqMasterHosts) == 1 and len(hawqStandbyHosts) == 1 and hawqMasterHosts == hawqStandbyHosts:
@@ -71,13 +71,13 @@ class HDP23StackAdvisor(HDP22StackAdvisor):
                 "to a value different from the port number used by Ambari Server database."
       childItems.append( { "type": 'host-component', "level": 'WARN', "message": message, "component-name": 'HAWQSTANDBY', "host": hawqStandbyHosts[0] } )
 
-    if "SPARK_THRIFTSERVER" in [service["StackServices"]["service_name"] for service in services["services"]]:
-      if not "HIVE_SERVER" in [service["StackServices"]["service_name"] for service in services["services"]]:
+    if "SPARK_THRIFTSERVER" in servicesList:
+      if not "HIVE_SERVER" in servicesList:
         message = "SPARK_THRIFTSERVER requires HIVE services to be selected."
         childItems.append( {"type": 'host-component', "level": 'ERROR', "message": messge, "component-name": 'SPARK_THRIFTSERVER'} )
 
-    hmsHosts = [component["StackServiceComponents"]["hostnames"] for component in componentsList if component["StackServiceComponents"]["component_name"] == "HIVE_METASTORE"][0] if hiveExists else []
-    sparkTsHosts = [component["StackServiceComponents"]["hostnames"] for component in componentsList if component["StackServiceComponents"]["component_name"] == "SPARK_THRIFTSERVER"][0] if sparkExists else []
+    hmsHosts = clusterIndex.getComponentHostNames("HIVE", "HIVE_METASTORE") if hiveExists else []
+    sparkTsHosts = clusterIndex.getComponentHostNames("SPARK", "SPARK_THRIFTSERVER") if sparkExists else []
 
     # if Spark Thrift Server is deployed but no Hive Server is deployed
     if len(sparkTsHosts) > 0 and len(hmsHosts) == 0:
@@ -574,10 +574,9 @@ class HDP23StackAdvisor(HDP22StackAdvisor):
 
 
   def isHawqMasterComponentOnAmbariServer(self, services):
-    componentsListList = [service["components"] for service in services["services"]]
-    componentsList = [item for sublist in componentsListList for item in sublist]
-    hawqMasterComponentHosts = [component["StackServiceComponents"]["hostnames"][0] for component in componentsList 
-                               if component["StackServiceComponents"]["component_name"] in ("HAWQMASTER", "HAWQSTANDBY")]
+    clusterIndex = self.getClusterIndex(services)
+    hawqMasterComponentHosts = clusterIndex.getComponentHostNames("HAWQ", "HAWQMASTER")[:1] + \
+                               clusterIndex.getComponentHostNames("HAWQ", "HAWQSTANDBY")[:1]
     return any([self.isLocalHost(host) for host in hawqMasterComponentHosts])
 
 
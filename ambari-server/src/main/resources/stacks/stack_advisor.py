@@ -17,6 +17,7 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import copy
 import socket
 import re
 
@@ -300,6 +301,106 @@ class StackAdvisor(object):
 
 
 
+class ClusterIndex(object):
+  """
+  Lookup tables over the 'services' and 'hosts' of a stack advisor request.
+
+  The advisors look up the hosts of a component, or the components of a host, many
+  times per request. The tables are built once, so that the lookups do not scan
+  all of the services and hosts every time.
+  """
+
+  def __init__(self, services, hosts):
+    self.services = services
+    # service name -> list of components
+    self.serviceComponents = {}
+    # (service name, component name) -> component
+    self.components = {}
+    # host name -> list of components assigned to the host
+    self.hostComponents = {}
+
+    if services is not None:
+      for service in services["services"]:
+        serviceName = service["StackServices"]["service_name"]
+        self.serviceComponents.setdefault(serviceName, service["components"])
+        for component in service["components"]:
+          componentName = component["StackServiceComponents"]["component_name"]
+          self.components.setdefault((serviceName, componentName), component)
+          for hostName in component["StackServiceComponents"].get("hostnames") or []:
+            self.hostComponents.setdefault(hostName, []).append(component)
+
+    self.indexHosts(hosts)
+
+  def indexHosts(self, hosts):
+    self.hosts = hosts
+    # host name -> (position in hosts["items"], host)
+    self.hostsByName = {}
+    if hosts is not None:
+      for position, host in enumerate(hosts["items"]):
+        self.hostsByName.setdefault(host["Hosts"]["host_name"], (position, host))
+
+  def forHosts(self, services, hosts):
+    """
+    Returns an index sharing the component tables of this one, for another
+    'services' dictionary with the same components and a subset of the hosts.
+    """
+    index = copy.copy(self)
+    index.services = services
+    index.indexHosts(hosts)
+    return index
+
+  def getHost(self, hostName):
+    positionAndHost = self.hostsByName.get(hostName)
+    if positionAndHost is None:
+      return None
+    return positionAndHost[1]
+
+  def getComponent(self, serviceName, componentName):
+    return self.components.get((serviceName, componentName), None)
+
+  def getServiceComponents(self, serviceName):
+    return self.serviceComponents.get(serviceName, [])
+
+  def getComponentHostNames(self, serviceName, componentName):
+    component = self.getComponent(serviceName, componentName)
+    if component is None:
+      return []
+    return component["StackServiceComponents"].get("hostnames") or []
+
+  def getComponentHosts(self, serviceName, componentName):
+    """
+    Returns the hosts of the component, in the order of hosts["items"]
+    """
+    componentHosts = [self.hostsByName[hostName] for hostName in set(self.getComponentHostNames(serviceName, componentName))
+                      if hostName in self.hostsByName]
+    componentHosts.sort(key=lambda positionAndHost: positionAndHost[0])
+    return [host for position, host in componentHosts]
+
+  def getHostComponents(self, hostName, categories=None):
+    return [component for component in self.hostComponents.get(hostName, [])
+            if categories is None or component["StackServiceComponents"]["component_category"] in categories]
+
+
+def usesClusterIndex(method):
+  """
+  Makes the lookups done while the request is processed share one ClusterIndex
+  and one cluster summary per set of hosts.
+  """
+  def processRequest(self, services, hosts, *args):
+    if self.clusterIndex is not None and self.clusterIndex.services is services:
+      return method(self, services, hosts, *args)
+    self.clusterIndex = ClusterIndex(services, hosts)
+    self.clusterSummaries = {}
+    try:
+      return method(self, services, hosts, *args)
+    finally:
+      self.clusterIndex = None
+      self.clusterSummaries = {}
+  processRequest.__name__ = method.__name__
+  processRequest.__doc__ = method.__doc__
+  return processRequest
+
+
 class DefaultStackAdvisor(StackAdvisor):
   """
   Default stack advisor implementation.
@@ -309,6 +410,12 @@ class DefaultStackAdvisor(StackAdvisor):
   implement
   """
 
+  def __init__(self):
+    # index of the request being processed, see usesClusterIndex
+    self.clusterIndex = None
+    self.clusterSummaries = {}
+
+  @usesClusterIndex
   def recommendComponentLayout(self, services, hosts):
     """Returns Services object with hostnames array populated for components"""
 
@@ -378,7 +485,7 @@ class DefaultStackAdvisor(StackAdvisor):
     componentsListList = [service["components"] for service in services["services"]]
     componentsList = [item for sublist in componentsListList for item in sublist]
     usedHostsListList = [component["StackServiceComponents"]["hostnames"] for component in componentsList if not self.isComponentNotValuable(component)]
-    utilizedHosts = [item for sublist in usedHostsListList for item in sublist]
+    utilizedHosts = set([item for sublist in usedHostsListList for item in sublist])
     freeHosts = [hostName for hostName in hostsList if hostName not in utilizedHosts]
 
     for service in services["services"]:
@@ -453,11 +560,13 @@ class DefaultStackAdvisor(StackAdvisor):
 
     return validations
 
+  @usesClusterIndex
   def validateComponentLayout(self, services, hosts):
     """Returns array of Validation objects about issues with hostnames components assigned to"""
     validationItems = self.getComponentLayoutValidations(services, hosts)
     return self.createValidationResponse(services, validationItems)
 
+  @usesClusterIndex
   def validateConfigurations(self, services, hosts):
     """Returns array of Validation objects about issues with hostnames components assigned to"""
     validationItems = self.getConfigurationsValidationItems(services, hosts)
@@ -469,12 +578,25 @@ class DefaultStackAdvisor(StackAdvisor):
   def getConfigurationClusterSummary(self, servicesList, hosts, components, services):
     pass
 
+  def getClusterSummary(self, servicesList, hosts, components, services):
+    """
+    Returns getConfigurationClusterSummary, computed once per set of hosts while a request is processed
+    """
+    if self.clusterIndex is None:
+      return self.getConfigurationClusterSummary(servicesList, hosts, components, services)
+    key = (tuple(servicesList), tuple(components), tuple([host["Hosts"]["host_name"] for host in hosts["items"]]))
+    if key not in self.clusterSummaries:
+      self.clusterSummaries[key] = self.getConfigurationClusterSummary(servicesList, hosts, components, services)
+    return self.clusterSummaries[key]
+
   def getConfigurationsValidationItems(self, services, hosts):
     return []
 
   def recommendConfigGroupsConfigurations(self, recommendations, services, components, hosts,
                             servicesList):
     recommendations["recommendations"]["config-groups"] = []
+    requestIndex = self.clusterIndex
+    clusterIndex = self.getClusterIndex(services, hosts)
     for configGroup in services["config-groups"]:
 
       # Override configuration with the config group values
@@ -488,14 +610,16 @@ class DefaultStackAdvisor(StackAdvisor):
           configGroup["configurations"][configName]
 
       # Override hosts with the config group hosts
+      configGroupHosts = set(configGroup["hosts"])
       cgHosts = {"items": [host for host in hosts["items"] if
-                           host["Hosts"]["host_name"] in configGroup["hosts"]]}
+                           host["Hosts"]["host_name"] in configGroupHosts]}
+      self.clusterIndex = clusterIndex.forHosts(cgServices, cgHosts)
 
       # Override clusterSummary
-      cgClusterSummary = self.getConfigurationClusterSummary(servicesList,
-                                                             cgHosts,
-                                                             components,
-                                                             cgServices)
+      cgClusterSummary = self.getClusterSummary(servicesList,
+                                                cgHosts,
+                                                components,
+                                                cgServices)
 
       configurations = {}
 
@@ -530,6 +654,9 @@ class DefaultStackAdvisor(StackAdvisor):
               cgRecommendation["dependent_configurations"][config][
                 configElement][property] = value
 
+    self.clusterIndex = requestIndex
+
+  @usesClusterIndex
   def recommendConfigurations(self, services, hosts):
     stackName = services["Versions"]["stack_name"]
     stackVersion = services["Versions"]["stack_version"]
@@ -539,7 +666,7 @@ class DefaultStackAdvisor(StackAdvisor):
                   for service in services["services"]
                   for component in service["components"]]
 
-    clusterSummary = self.getConfigurationClusterSummary(servicesList, hosts, components, services)
+    clusterSummary = self.getClusterSummary(servicesList, hosts, components, services)
 
     recommendations = {
       "Versions": {"stack_name": stackName, "stack_version": stackVersion},
@@ -672,13 +799,45 @@ class DefaultStackAdvisor(StackAdvisor):
     return {}
 
   def getComponentHostNames(self, servicesDict, serviceName, componentName):
-    for service in servicesDict["services"]:
-      if service["StackServices"]["service_name"] == serviceName:
-        for component in service['components']:
-          if component["StackServiceComponents"]["component_name"] == componentName:
-            return component["StackServiceComponents"]["hostnames"]
+    component = self.getClusterIndex(servicesDict).getComponent(serviceName, componentName)
+    if component is not None:
+      return component["StackServiceComponents"]["hostnames"]
   pass
 
+  def getClusterIndex(self, services, hosts=None):
+    """
+    Returns the index of the request being processed, or a new one for other services and hosts
+    """
+    index = self.clusterIndex
+    if index is not None and index.services is services and (hosts is None or index.hosts is hosts):
+      return index
+    return ClusterIndex(services, hosts)
+
+  def getHostNamesWithComponent(self, serviceName, componentName, services):
+    """
+    Returns the list of hostnames on which service component is installed
+    """
+    if services is None:
+      return []
+    return self.getClusterIndex(services).getComponentHostNames(serviceName, componentName)
+
+  def getHostsWithComponent(self, serviceName, componentName, services, hosts):
+    if services is None or hosts is None:
+      return []
+    return self.getClusterIndex(services, hosts).getComponentHosts(serviceName, componentName)
+
+  def getHostWithComponent(self, serviceName, componentName, services, hosts):
+    componentHosts = self.getHostsWithComponent(serviceName, componentName, services, hosts)
+    if (len(componentHosts) > 0):
+      return componentHosts[0]
+    return None
+
+  def getHostComponentsByCategories(self, hostname, categories, services, hosts):
+    if services is None or hosts is None:
+      return []
+    return self.getClusterIndex(services, hosts).getHostComponents(hostname, categories)
+
+  @usesClusterIndex
   def recommendConfigurationDependencies(self, services, hosts):
     result = self.recommendConfigurations(services, hosts)
     return self.filterResult(result, services)
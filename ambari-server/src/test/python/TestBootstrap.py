@@ -18,15 +18,19 @@ limitations under the License.
 
 from stacks.utils.RMFTestCase import *
 import bootstrap
+import hashlib
 import time
 import subprocess
 import os
 import logging
+import shutil
+import tarfile
 import tempfile
 import pprint
+from StringIO import StringIO
 
 from ambari_commons.os_check import OSCheck
-from bootstrap import PBootstrap, Bootstrap, BootstrapDefault, SharedState, HostLog, SCP, SSH
+from bootstrap import PBootstrap, Bootstrap, BootstrapDefault, SharedState, HostLog, SSH
 from unittest import TestCase
 from subprocess import Popen
 from bootstrap import AMBARI_PASSPHRASE_VAR_NAME
@@ -205,49 +209,6 @@ class TestBootstrap(TestCase):
     os.unlink(tmp_filename)
 
 
-  @patch("subprocess.Popen")
-  def test_SCP(self, popenMock):
-    params = SharedState("root", "123", "sshkey_file", "scriptDir", "bootdir",
-                                  "setupAgentFile", "ambariServer", "centos6",
-                                  "1.2.1", "8440", "root")
-    host_log_mock = MagicMock()
-    log = {'text': ""}
-    def write_side_effect(text):
-      log['text'] = log['text'] + text
-
-    host_log_mock.write.side_effect = write_side_effect
-    scp = SCP(params.user, params.sshPort, params.sshkey_file, "dummy-host", "src/file",
-              "dst/file", params.bootdir, host_log_mock)
-    log_sample = "log_sample"
-    error_sample = "error_sample"
-    # Successful run
-    process = MagicMock()
-    popenMock.return_value = process
-    process.communicate.return_value = (log_sample, error_sample)
-    process.returncode = 0
-
-    retcode = scp.run()
-
-    self.assertTrue(popenMock.called)
-    self.assertTrue(log_sample in log['text'])
-    self.assertTrue(error_sample in log['text'])
-    command_str = str(popenMock.call_args[0][0])
-    self.assertEquals(command_str, "['scp', '-r', '-o', 'ConnectTimeout=60', '-o', "
-        "'BatchMode=yes', '-o', 'StrictHostKeyChecking=no', '-P', '123', '-i', 'sshkey_file',"
-        " 'src/file', 'root@dummy-host:dst/file']")
-    self.assertEqual(retcode["exitstatus"], 0)
-
-    log['text'] = ""
-    #unsuccessfull run
-    process.returncode = 1
-
-    retcode = scp.run()
-
-    self.assertTrue(log_sample in log['text'])
-    self.assertTrue(error_sample in log['text'])
-    self.assertEqual(retcode["exitstatus"], 1)
-
-
   @patch("subprocess.Popen")
   def test_SSH(self, popenMock):
     params = SharedState("root", "123", "sshkey_file", "scriptDir", "bootdir",
@@ -304,6 +265,32 @@ class TestBootstrap(TestCase):
     self.assertTrue(dummy_error_message in log['text'])
     self.assertEqual(retcode["exitstatus"], 1)
 
+    # shared connection, input data
+    process.returncode = 0
+    ssh = SSH(params.user, params.sshPort, params.sshkey_file, "dummy-host", "dummy-command",
+              params.bootdir, host_log_mock, control_path="/tmp/ssh/%r@%h:%p", input_data="data")
+    retcode = ssh.run()
+    command_str = str(popenMock.call_args[0][0])
+    self.assertEquals(command_str, "['ssh', '-o', 'ConnectTimeOut=60', '-o', "
+            "'StrictHostKeyChecking=no', '-o', 'BatchMode=yes', '-o', 'ControlMaster=auto', "
+            "'-o', 'ControlPath=/tmp/ssh/%r@%h:%p', '-o', 'ControlPersist=300', '-T', '-i', "
+            "'sshkey_file', '-p', '123', 'root@dummy-host', 'dummy-command']")
+    process.communicate.assert_called_with("data")
+    self.assertEqual(retcode["exitstatus"], 0)
+
+
+  def test_getControlPath(self):
+    shared_state = SharedState("root", "123", "sshkey_file", "scriptDir", "bootdir",
+                               "setupAgentFile", "ambariServer", "centos6",
+                               None, "8440", "root")
+    self.assertEqual(None, Bootstrap("hostname", shared_state).getControlPath())
+
+    shared_state.control_dir = "/tmp/ambari-ssh-abcdef"
+    long_host = "host-" + "a" * 200 + ".example.com"
+    control_path = Bootstrap(long_host, shared_state).getControlPath()
+    self.assertTrue(len(control_path) < 108)
+    self.assertNotEqual(control_path, Bootstrap("hostname", shared_state).getControlPath())
+
 
   def test_getOsCheckScript(self):
     shared_state = SharedState("root", "123", "sshkey_file", "scriptDir", "bootdir",
@@ -359,28 +346,55 @@ class TestBootstrap(TestCase):
                      "sudo chmod 755 /var/lib/ambari-agent/data ; "
                      "sudo chmod 777 /var/lib/ambari-agent/tmp")
 
-  @patch.object(BootstrapDefault, "getOsCheckScript")
-  @patch.object(BootstrapDefault, "getOsCheckScriptRemoteLocation")
-  @patch.object(SCP, "__init__")
-  @patch.object(SCP, "run")
+  @patch.object(BootstrapDefault, "getRepoFile")
+  @patch.object(BootstrapDefault, "getRemoteName")
+  @patch.object(SSH, "__init__")
+  @patch.object(SSH, "run")
   @patch.object(HostLog, "write")
-  def test_copyOsCheckScript(self, write_mock, run_mock, init_mock,
-                    getOsCheckScriptRemoteLocation_mock, getOsCheckScript_mock):
-    shared_state = SharedState("root", "123", "sshkey_file", "scriptDir", "bootdir",
-                               "setupAgentFile", "ambariServer", "centos6",
-                               None, "8440", "root")
-    bootstrap_obj = Bootstrap("hostname", shared_state)
-    getOsCheckScript_mock.return_value = "OsCheckScript"
-    getOsCheckScriptRemoteLocation_mock.return_value = "OsCheckScriptRemoteLocation"
-    expected = 42
-    init_mock.return_value = None
-    run_mock.return_value = expected
-    res = bootstrap_obj.copyOsCheckScript()
-    self.assertEquals(res, expected)
-    input_file = str(init_mock.call_args[0][4])
-    remote_file = str(init_mock.call_args[0][5])
-    self.assertEqual(input_file, "OsCheckScript")
-    self.assertEqual(remote_file, "OsCheckScriptRemoteLocation")
+  def test_copyBootstrapArchive(self, write_mock, run_mock, init_mock,
+                                getRemoteName_mock, getRepoFile_mock):
+    tmp_dir = tempfile.mkdtemp()
+    try:
+      commons_dir = os.path.join(tmp_dir, "ambari_commons")
+      os.makedirs(os.path.join(commons_dir, "resources"))
+      for name in ["ambari_commons/__init__.py", "ambari_commons/__init__.pyc",
+                   "ambari_commons/resources/os_family.json", "os_check_type.py",
+                   "setupAgent.py", "ambari.repo", "host_pass"]:
+        with open(os.path.join(tmp_dir, name), "w") as f:
+          f.write(name)
+      shared_state = SharedState("root", "123", "sshkey_file", tmp_dir, "bootdir",
+                                 os.path.join(tmp_dir, "setupAgent.py"), "ambariServer", "centos6",
+                                 None, "8440", "root", password_file=os.path.join(tmp_dir, "host_pass"))
+      shared_state.control_dir = "/tmp/ssh"
+      bootstrap_obj = Bootstrap("hostname", shared_state)
+      bootstrap_obj.ambari_commons = commons_dir
+      getRemoteName_mock.side_effect = lambda name: "/var/lib/ambari-agent/tmp/" + name + "1"
+      getRepoFile_mock.return_value = os.path.join(tmp_dir, "ambari.repo")
+      init_mock.return_value = None
+      run_mock.return_value = {"exitstatus": 0, "log": "log0", "errormsg": "errorMsg"}
+
+      res = bootstrap_obj.copyBootstrapArchive()
+      self.assertEquals(res["exitstatus"], 0)
+      self.assertTrue(bootstrap_obj.copied_password_file)
+      self.assertEqual(init_mock.call_count, 1)
+      self.assertEqual(init_mock.call_args[0][4], "tar -xzf - -C /var/lib/ambari-agent/tmp")
+      self.assertEqual(init_mock.call_args[1]["control_path"], "/tmp/ssh/" + hashlib.md5("root@hostname:123").hexdigest()[:16])
+
+      archive = tarfile.open(fileobj=StringIO(init_mock.call_args[1]["input_data"]))
+      members = dict([(member.name, member) for member in archive.getmembers()])
+      self.assertEqual(sorted(members.keys()),
+                       sorted([bootstrap_obj.AMBARI_REPO_FILENAME + "1", "ambari_commons/__init__.py",
+                               "ambari_commons/resources/os_family.json", "host_pass1",
+                               "os_check_type.py1", "setupAgent.py1"]))
+      self.assertEqual(members["host_pass1"].mode, 0600)
+      self.assertEqual(archive.extractfile("setupAgent.py1").read(), "setupAgent.py")
+
+      # the archive is built once for all hosts
+      os.remove(os.path.join(tmp_dir, "setupAgent.py"))
+      Bootstrap("hostname2", shared_state).copyBootstrapArchive()
+      self.assertEqual(init_mock.call_args_list[0][1]["input_data"], init_mock.call_args[1]["input_data"])
+    finally:
+      shutil.rmtree(tmp_dir)
 
 
   @patch.object(BootstrapDefault, "getRemoteName")
@@ -414,29 +428,17 @@ class TestBootstrap(TestCase):
   @patch.object(BootstrapDefault, "getMoveRepoFileCommand")
   @patch.object(BootstrapDefault, "getRepoDir")
   @patch.object(BootstrapDefault, "getRepoFile")
-  @patch.object(BootstrapDefault, "getRemoteName")
-  @patch.object(SCP, "__init__")
-  @patch.object(SCP, "run")
   @patch.object(SSH, "__init__")
   @patch.object(SSH, "run")
   @patch.object(HostLog, "write")
-  def test_copyNeededFiles(self, write_mock, ssh_run_mock, ssh_init_mock,
-                           scp_run_mock, scp_init_mock,
-                           getRemoteName_mock, getRepoFile_mock, getRepoDir,
-                           getMoveRepoFileCommand, is_redhat_family, is_ubuntu_family, is_suse_family,
+  def test_installRepoFile(self, write_mock, ssh_run_mock, ssh_init_mock,
+                           getRepoFile_mock, getRepoDir, getMoveRepoFileCommand,
+                           is_redhat_family, is_ubuntu_family, is_suse_family,
                            os_path_exists_mock):
     #
     # Ambari repo file exists
     #
-    def os_path_exists_side_effect(*args, **kwargs):
-      if args[0] == getRepoFile_mock():
-        return True
-      else:
-        return False
-
-    os_path_exists_mock.side_effect = os_path_exists_side_effect
-    os_path_exists_mock.return_value = None
-
+    os_path_exists_mock.return_value = True
     shared_state = SharedState("root", "123", "sshkey_file", "scriptDir", "bootdir",
                                "setupAgentFile", "ambariServer", "centos6",
                                None, "8440", "root")
@@ -446,60 +448,29 @@ class TestBootstrap(TestCase):
     bootstrap_obj = Bootstrap("hostname", shared_state)
     getMoveRepoFileCommand.return_value = "MoveRepoFileCommand"
     getRepoDir.return_value  = "RepoDir"
-    getRemoteName_mock.return_value = "RemoteName"
     getRepoFile_mock.return_value = "RepoFile"
-    expected1 = {"exitstatus": 42, "log": "log42", "errormsg": "errorMsg"}
-    expected2 = {"exitstatus": 17, "log": "log17", "errormsg": "errorMsg"}
-    expected3 = {"exitstatus": 1, "log": "log1", "errormsg": "errorMsg"}
-    expected4 = {"exitstatus": 17, "log": "log17", "errormsg": "errorMsg"}
-    scp_init_mock.return_value = None
+    expected = {"exitstatus": 42, "log": "log42", "errormsg": "errorMsg"}
     ssh_init_mock.return_value = None
-    # Testing max retcode return
-    scp_run_mock.side_effect = [expected1, expected3]
-    ssh_run_mock.side_effect = [expected2, expected4]
-    res = bootstrap_obj.copyNeededFiles()
-    self.assertEquals(res, expected1["exitstatus"])
-    input_file = str(scp_init_mock.call_args[0][4])
-    remote_file = str(scp_init_mock.call_args[0][5])
-    self.assertEqual(input_file, "setupAgentFile")
-    self.assertEqual(remote_file, "RemoteName")
+    ssh_run_mock.return_value = expected
+    res = bootstrap_obj.installRepoFile()
+    self.assertEquals(res, expected)
+    self.assertEqual(ssh_init_mock.call_count, 1)
+    command = str(ssh_init_mock.call_args[0][4])
+    self.assertEqual(command, "MoveRepoFileCommand && sudo chmod 644 RepoFile")
+    # apt cache is updated on ubuntu
+    is_ubuntu_family.return_value = True
+    bootstrap_obj.installRepoFile()
     command = str(ssh_init_mock.call_args[0][4])
-    self.assertEqual(command, "sudo chmod 644 RepoFile")
-    # Another order
-    expected1 = {"exitstatus": 0, "log": "log0", "errormsg": "errorMsg"}
-    expected2 = {"exitstatus": 17, "log": "log17", "errormsg": "errorMsg"}
-    expected3 = {"exitstatus": 1, "log": "log1", "errormsg": "errorMsg"}
-    expected4 = {"exitstatus": 17, "log": "log17", "errormsg": "errorMsg"}
-    scp_run_mock.side_effect = [expected1, expected3]
-    ssh_run_mock.side_effect = [expected2, expected4]
-    res = bootstrap_obj.copyNeededFiles()
-    self.assertEquals(res, expected2["exitstatus"])
-    # yet another order
-    expected1 = {"exitstatus": 33, "log": "log33", "errormsg": "errorMsg"}
-    expected2 = {"exitstatus": 17, "log": "log17", "errormsg": "errorMsg"}
-    expected3 = {"exitstatus": 42, "log": "log42", "errormsg": "errorMsg"}
-    expected4 = {"exitstatus": 17, "log": "log17", "errormsg": "errorMsg"}
-    scp_run_mock.side_effect = [expected1, expected3]
-    ssh_run_mock.side_effect = [expected2, expected4]
-    res = bootstrap_obj.copyNeededFiles()
-    self.assertEquals(res, expected3["exitstatus"])
+    self.assertTrue(command.startswith("MoveRepoFileCommand && sudo chmod 644 RepoFile && sudo apt-get update"))
 
     #
     #Ambari repo file does not exist
     #
-    os_path_exists_mock.side_effect = None
     os_path_exists_mock.return_value = False
-
-    #Expectations:
-    # SSH will not be called at all
-    # SCP will be called once for copying the setup script file
-    scp_run_mock.reset_mock()
     ssh_run_mock.reset_mock()
-    expectedResult = {"exitstatus": 33, "log": "log33", "errormsg": "errorMsg"}
-    scp_run_mock.side_effect = [expectedResult]
-    res = bootstrap_obj.copyNeededFiles()
+    res = bootstrap_obj.installRepoFile()
     self.assertFalse(ssh_run_mock.called)
-    self.assertEquals(res, expectedResult["exitstatus"])
+    self.assertEquals(res, -1)
 
   @patch.object(BootstrapDefault, "getOsCheckScriptRemoteLocation")
   @patch.object(SSH, "__init__")
@@ -646,62 +617,6 @@ class TestBootstrap(TestCase):
     self.assertEqual(command, "rm PasswordFile")
 
 
-  @patch.object(BootstrapDefault, "getPasswordFile")
-  @patch.object(SCP, "__init__")
-  @patch.object(SCP, "run")
-  @patch.object(SSH, "__init__")
-  @patch.object(SSH, "run")
-  @patch.object(HostLog, "write")
-  def test_copyPasswordFile(self, write_mock, ssh_run_mock,
-                            ssh_init_mock, scp_run_mock,
-                            scp_init_mock, getPasswordFile_mock):
-    shared_state = SharedState("root", "123", "sshkey_file", "scriptDir", "bootdir",
-                               "setupAgentFile", "ambariServer", "centos6",
-                               None, "8440", "root", password_file="PasswordFile")
-    bootstrap_obj = Bootstrap("hostname", shared_state)
-    getPasswordFile_mock.return_value = "PasswordFile"
-     # Testing max retcode return
-    expected1 = {"exitstatus": 42, "log": "log42", "errormsg": "errorMsg"}
-    expected2 = {"exitstatus": 17, "log": "log17", "errormsg": "errorMsg"}
-    scp_init_mock.return_value = None
-    scp_run_mock.return_value = expected1
-    ssh_init_mock.return_value = None
-    ssh_run_mock.return_value = expected2
-    res = bootstrap_obj.copyPasswordFile()
-    self.assertEquals(res, expected1["exitstatus"])
-    input_file = str(scp_init_mock.call_args[0][4])
-    remote_file = str(scp_init_mock.call_args[0][4])
-    self.assertEqual(input_file, "PasswordFile")
-    self.assertEqual(remote_file, "PasswordFile")
-    command = str(ssh_init_mock.call_args[0][4])
-    self.assertEqual(command, "chmod 600 PasswordFile")
-    # Another order
-    expected1 = {"exitstatus": 0, "log": "log0", "errormsg": "errorMsg"}
-    expected2 = {"exitstatus": 17, "log": "log17", "errormsg": "errorMsg"}
-    scp_run_mock.return_value = expected1
-    ssh_run_mock.return_value = expected2
-
-
-  @patch.object(SSH, "__init__")
-  @patch.object(SSH, "run")
-  @patch.object(HostLog, "write")
-  @patch.object(BootstrapDefault, "getPasswordFile")
-  def test_changePasswordFileModeOnHost(self, getPasswordFile_mock, write_mock,
-                                        run_mock, init_mock):
-    shared_state = SharedState("root", "123", "sshkey_file", "scriptDir", "bootdir",
-                               "setupAgentFile", "ambariServer", "centos6",
-                               None, "8440", "root")
-    bootstrap_obj = Bootstrap("hostname", shared_state)
-    expected = 42
-    getPasswordFile_mock.return_value = "PasswordFile"
-    init_mock.return_value = None
-    run_mock.return_value = expected
-    res = bootstrap_obj.changePasswordFileModeOnHost()
-    self.assertEquals(res, expected)
-    command = str(init_mock.call_args[0][4])
-    self.assertEqual(command, "chmod 600 PasswordFile")
-
-
   @patch.object(HostLog, "write")
   def test_try_to_execute(self, write_mock):
     expected = 43
@@ -747,7 +662,7 @@ class TestBootstrap(TestCase):
     hasPassword_mock.return_value = False
     try_to_execute_mock.return_value = {"exitstatus": 0, "log":"log0", "errormsg":"errormsg0"}
     bootstrap_obj.run()
-    self.assertEqual(try_to_execute_mock.call_count, 7) # <- Adjust if changed
+    self.assertEqual(try_to_execute_mock.call_count, 6) # <- Adjust if changed
     self.assertTrue(createDoneFile_mock.called)
     self.assertEqual(bootstrap_obj.getStatus()["return_code"], 0)
 
@@ -758,7 +673,7 @@ class TestBootstrap(TestCase):
     hasPassword_mock.return_value = True
     try_to_execute_mock.return_value = {"exitstatus": 0, "log":"log0", "errormsg":"errormsg0"}
     bootstrap_obj.run()
-    self.assertEqual(try_to_execute_mock.call_count, 10) # <- Adjust if changed
+    self.assertEqual(try_to_execute_mock.call_count, 7) # <- Adjust if changed
     self.assertTrue(createDoneFile_mock.called)
     self.assertEqual(bootstrap_obj.getStatus()["return_code"], 0)
 
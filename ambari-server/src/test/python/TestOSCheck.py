@@ -294,3 +294,26 @@ class TestOSCheck(TestCase):
 
     get_os_family_mock.return_value = "troll_os"
     self.assertEqual(OSCheck.is_redhat_family(), False)
+
+  @patch("ambari_commons.os_check._is_redhat_linux", new = MagicMock(return_value = False))
+  @patch("platform.system", new = MagicMock(return_value = "Linux"))
+  @patch("platform.linux_distribution")
+  def test_os_distribution_cached(self, mock_linux_distribution):
+    OSCheck.refresh_os_distribution()
+    try:
+      mock_linux_distribution.return_value = ('CentOS', '6.6', 'Final')
+      self.assertEqual(OSCheck.get_os_type(), 'centos')
+      self.assertEqual(OSCheck.get_os_family(), 'redhat')
+      self.assertEqual(OSCheck.get_os_major_version(), '6')
+      self.assertEqual(mock_linux_distribution.call_count, 1)
+
+      # os upgrade is visible only after refresh
+      mock_linux_distribution.return_value = ('Ubuntu', '14.04', 'trusty')
+      self.assertEqual(OSCheck.get_os_type(), 'centos')
+      OSCheck.refresh_os_distribution()
+      self.assertEqual(OSCheck.get_os_type(), 'ubuntu')
+      self.assertEqual(OSCheck.get_os_family(), 'ubuntu')
+      self.assertTrue(OSCheck.is_ubuntu_family())
+      self.assertEqual(mock_linux_distribution.call_count, 2)
+    finally:
+      OSCheck.refresh_os_distribution()
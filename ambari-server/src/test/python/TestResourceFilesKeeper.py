@@ -21,6 +21,7 @@ import subprocess
 import os
 import logging
 import tempfile
+import shutil
 import pprint
 from xml.dom import minidom
 
@@ -170,7 +171,8 @@ class TestResourceFilesKeeper(TestCase):
   @patch.object(ResourceFilesKeeper, "read_hash_sum")
   @patch.object(ResourceFilesKeeper, "zip_directory")
   @patch.object(ResourceFilesKeeper, "write_hash_sum")
-  def test_update_directory_archive(self, write_hash_sum_mock,
+  @patch.object(ResourceFilesKeeper, "write_manifest")
+  def test_update_directory_archive(self, write_manifest_mock, write_hash_sum_mock,
                                     zip_directory_mock, read_hash_sum_mock,
                                     count_hash_sum_mock,
                                     os_listdir_mock):
@@ -207,12 +209,24 @@ class TestResourceFilesKeeper(TestCase):
     # Test situation when saved directory hash == current hash
     read_hash_sum_mock.return_value = self.DUMMY_HASH
     count_hash_sum_mock.return_value = self.DUMMY_HASH
-    resource_files_keeper.update_directory_archive(self.SOME_PATH)
+    with patch("os.path.isfile") as isfile_mock:
+      isfile_mock.return_value = True
+      resource_files_keeper.update_directory_archive(self.SOME_PATH)
     self.assertTrue(read_hash_sum_mock.called)
     self.assertTrue(count_hash_sum_mock.called)
     self.assertFalse(zip_directory_mock.called)
     self.assertFalse(write_hash_sum_mock.called)
 
+    read_hash_sum_mock.reset_mock()
+    count_hash_sum_mock.reset_mock()
+    write_manifest_mock.reset_mock()
+
+    # Test situation when saved directory hash == current hash, but there is no manifest yet
+    resource_files_keeper.update_directory_archive(self.SOME_PATH)
+    self.assertFalse(zip_directory_mock.called)
+    self.assertFalse(write_hash_sum_mock.called)
+    self.assertTrue(write_manifest_mock.called)
+
     read_hash_sum_mock.reset_mock()
     count_hash_sum_mock.reset_mock()
     zip_directory_mock.reset_mock()
@@ -344,6 +358,28 @@ class TestResourceFilesKeeper(TestCase):
         self.fail('Unexpected exception thrown:' + str(e))
 
 
+  def test_write_manifest(self):
+    tmpdir = tempfile.mkdtemp()
+    try:
+      os.makedirs(os.path.join(tmpdir, "scripts"))
+      with open(os.path.join(tmpdir, "scripts", "params.py"), "w") as f:
+        f.write("a = 1\n")
+      with open(os.path.join(tmpdir, "metainfo.xml"), "w") as f:
+        f.write("<metainfo/>")
+      with open(os.path.join(tmpdir, "scripts", "params.pyc"), "w") as f:
+        f.write("compiled")
+      resource_files_keeper = ResourceFilesKeeper(self.TEST_RESOURCES_DIR, tmpdir)
+      resource_files_keeper.write_hash_sum(tmpdir, self.DUMMY_HASH)
+      resource_files_keeper.write_manifest(tmpdir)
+
+      with open(os.path.join(tmpdir, ResourceFilesKeeper.MANIFEST_FILE)) as f:
+        self.assertEquals(f.read(),
+                          "bb022d16b46e57e5b5010fc82f45a86612efcc2f metainfo.xml\n"
+                          "31bd2185b0feac6e0c3da31b83b83819ef32a9a6 scripts/params.py\n")
+    finally:
+      shutil.rmtree(tmpdir)
+
+
   def test_zip_directory(self):
     # Test normal flow
     resource_files_keeper = ResourceFilesKeeper(self.TEST_RESOURCES_DIR, self.DUMMY_UNCHANGEABLE_PACKAGE)
@@ -385,6 +421,7 @@ class TestResourceFilesKeeper(TestCase):
     resource_files_keeper = ResourceFilesKeeper(self.TEST_RESOURCES_DIR, self.DUMMY_UNCHANGEABLE_PACKAGE)
     self.assertTrue(resource_files_keeper.is_ignored(".hash"))
     self.assertTrue(resource_files_keeper.is_ignored("archive.zip"))
+    self.assertTrue(resource_files_keeper.is_ignored(".manifest"))
     self.assertTrue(resource_files_keeper.is_ignored("dummy.pyc"))
     self.assertFalse(resource_files_keeper.is_ignored("dummy.py"))
     self.assertFalse(resource_files_keeper.is_ignored("1.sh"))
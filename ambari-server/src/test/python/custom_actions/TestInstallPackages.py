@@ -111,13 +111,62 @@ class TestInstallPackages(RMFTestCase):
                               append_to_file=True,
     )
     self.assertResourceCalled('Package', 'hdp-select', action=["upgrade"])
-    self.assertResourceCalled('Package', 'hadoop_2_2_0_1_885')
-    self.assertResourceCalled('Package', 'snappy')
-    self.assertResourceCalled('Package', 'snappy-devel')
-    self.assertResourceCalled('Package', 'lzo')
-    self.assertResourceCalled('Package', 'hadooplzo_2_2_0_1_885')
-    self.assertResourceCalled('Package', 'hadoop_2_2_0_1_885-libhdfs')
-    self.assertResourceCalled('Package', 'ambari-log4j')
+    self.assertResourceCalled('Package', '2.2.0.1-885 packages',
+                              packages=['hadoop_2_2_0_1_885', 'snappy', 'snappy-devel', 'lzo', 'hadooplzo_2_2_0_1_885',
+                                        'hadoop_2_2_0_1_885-libhdfs', 'ambari-log4j'])
+    self.assertNoMoreResources()
+
+  @patch("resource_management.libraries.functions.list_ambari_managed_repos.list_ambari_managed_repos")
+  @patch("resource_management.libraries.functions.packages_analyzer.allInstalledPackages")
+  @patch("resource_management.libraries.script.Script.put_structured_out")
+  @patch("resource_management.libraries.functions.hdp_select.get_hdp_versions")
+  @patch("resource_management.libraries.functions.repo_version_history.read_actual_version_from_history_file")
+  @patch("resource_management.libraries.functions.repo_version_history.write_actual_version_to_history_file")
+  def test_empty_package_list(self,
+                              write_actual_version_to_history_file_mock,
+                              read_actual_version_from_history_file_mock,
+                              hdp_versions_mock,
+                              put_structured_out_mock, allInstalledPackages_mock, list_ambari_managed_repos_mock):
+    hdp_versions_mock.side_effect = [
+      [],  # before installation attempt
+      [VERSION_STUB]
+    ]
+    config_file = self.get_src_folder() + "/test/python/custom_actions/configs/install_packages_config.json"
+    with open(config_file, "r") as f:
+      command_json = json.load(f)
+
+    command_json['roleParams']['package_list'] = "[]"
+
+    allInstalledPackages_mock.side_effect = TestInstallPackages._add_packages
+    list_ambari_managed_repos_mock.return_value = []
+    self.executeScript("scripts/install_packages.py",
+                       classname="InstallPackages",
+                       command="actionexecute",
+                       config_dict=command_json,
+                       target=RMFTestCase.TARGET_CUSTOM_ACTIONS,
+                       os_type=('Redhat', '6.4', 'Final'),
+    )
+    self.assertEquals('SUCCESS', put_structured_out_mock.call_args[0][0]['package_installation_result'])
+    self.assertResourceCalled('Repository', 'HDP-UTILS-2.2.0.1-885',
+                              base_url=u'http://repo1/HDP/centos5/2.x/updates/2.2.0.0',
+                              action=['create'],
+                              components=[u'HDP-UTILS', 'main'],
+                              repo_template='[{{repo_id}}]\nname={{repo_id}}\n{% if mirror_list %}mirrorlist={{mirror_list}}{% else %}baseurl={{base_url}}{% endif %}\n\npath=/\nenabled=1\ngpgcheck=0',
+                              repo_file_name=u'HDP-2.2.0.1-885',
+                              mirror_list=None,
+                              append_to_file=False,
+    )
+    self.assertResourceCalled('Repository', 'HDP-2.2.0.1-885',
+                              base_url=u'http://repo1/HDP/centos5/2.x/updates/2.2.0.0',
+                              action=['create'],
+                              components=[u'HDP', 'main'],
+                              repo_template='[{{repo_id}}]\nname={{repo_id}}\n{% if mirror_list %}mirrorlist={{mirror_list}}{% else %}baseurl={{base_url}}{% endif %}\n\npath=/\nenabled=1\ngpgcheck=0',
+                              repo_file_name=u'HDP-2.2.0.1-885',
+                              mirror_list=None,
+                              append_to_file=True,
+    )
+    self.assertResourceCalled('Package', 'hdp-select', action=["upgrade"])
+    # nothing is left to install
     self.assertNoMoreResources()
 
   @patch("ambari_commons.os_check.OSCheck.is_suse_family")
@@ -171,13 +220,9 @@ class TestInstallPackages(RMFTestCase):
                               append_to_file=True,
                               )
     self.assertResourceCalled('Package', 'hdp-select', action=["upgrade"])
-    self.assertResourceCalled('Package', 'hadoop_2_2_0_1_885')
-    self.assertResourceCalled('Package', 'snappy')
-    self.assertResourceCalled('Package', 'snappy-devel')
-    self.assertResourceCalled('Package', 'lzo')
-    self.assertResourceCalled('Package', 'hadooplzo_2_2_0_1_885')
-    self.assertResourceCalled('Package', 'hadoop_2_2_0_1_885-libhdfs')
-    self.assertResourceCalled('Package', 'ambari-log4j')
+    self.assertResourceCalled('Package', '2.2.0.1-885 packages',
+                              packages=['hadoop_2_2_0_1_885', 'snappy', 'snappy-devel', 'lzo', 'hadooplzo_2_2_0_1_885',
+                                        'hadoop_2_2_0_1_885-libhdfs', 'ambari-log4j'])
     self.assertNoMoreResources()
 
 
@@ -234,13 +279,9 @@ class TestInstallPackages(RMFTestCase):
                               append_to_file=True,
     )
     self.assertResourceCalled('Package', 'hdp-select', action=["upgrade"])
-    self.assertResourceCalled('Package', 'hadoop_2_2_0_1_885')
-    self.assertResourceCalled('Package', 'snappy')
-    self.assertResourceCalled('Package', 'snappy-devel')
-    self.assertResourceCalled('Package', 'lzo')
-    self.assertResourceCalled('Package', 'hadooplzo_2_2_0_1_885')
-    self.assertResourceCalled('Package', 'hadoop_2_2_0_1_885-libhdfs')
-    self.assertResourceCalled('Package', 'ambari-log4j')
+    self.assertResourceCalled('Package', '2.2.0.1-885 packages',
+                              packages=['hadoop_2_2_0_1_885', 'snappy', 'snappy-devel', 'lzo', 'hadooplzo_2_2_0_1_885',
+                                        'hadoop_2_2_0_1_885-libhdfs', 'ambari-log4j'])
     self.assertNoMoreResources()
 
 
@@ -368,13 +409,9 @@ class TestInstallPackages(RMFTestCase):
                               append_to_file=True,
                               )
     self.assertResourceCalled('Package', 'hdp-select', action=["upgrade"])
-    self.assertResourceCalled('Package', 'hadoop_2_2_0_1_885')
-    self.assertResourceCalled('Package', 'snappy')
-    self.assertResourceCalled('Package', 'snappy-devel')
-    self.assertResourceCalled('Package', 'lzo')
-    self.assertResourceCalled('Package', 'hadooplzo_2_2_0_1_885')
-    self.assertResourceCalled('Package', 'hadoop_2_2_0_1_885-libhdfs')
-    self.assertResourceCalled('Package', 'ambari-log4j')
+    self.assertResourceCalled('Package', '2.2.0.1-885 packages',
+                              packages=['hadoop_2_2_0_1_885', 'snappy', 'snappy-devel', 'lzo', 'hadooplzo_2_2_0_1_885',
+                                        'hadoop_2_2_0_1_885-libhdfs', 'ambari-log4j'])
     self.assertNoMoreResources()
 
 
@@ -1614,6 +1614,50 @@ class TestHDP206StackAdvisor(TestCase):
     unknown_component = self.stackAdvisor.getHostWithComponent("UNKNOWN", "NODEMANAGER", services, hosts)
     self.assertEquals(nodemanager, None)
 
+    # components by host
+    masters = self.stackAdvisor.getHostComponentsByCategories("host2", ["MASTER"], services, hosts)
+    self.assertEquals([services["services"][0]["components"][2]], masters)
+    slaves = self.stackAdvisor.getHostComponentsByCategories("host1", ["SLAVE"], services, hosts)
+    self.assertEquals(services["services"][0]["components"][0:2], slaves)
+    self.assertEquals([], self.stackAdvisor.getHostComponentsByCategories("host3", ["SLAVE"], services, hosts))
+
+  def test_recommendConfigurations_clusterSummaryPerHostSet(self):
+    services = {
+      "Versions": {"stack_name": "HDP", "stack_version": "2.0.6"},
+      "services": [
+        {
+          "StackServices": {"service_name": "FOO"},
+          "components": [
+            {"StackServiceComponents": {"component_name": "FOO_SERVER", "hostnames": ["host1", "host2"]}}
+          ]
+        }
+      ],
+      "configurations": {},
+      "config-groups": [
+        {"configurations": {}, "hosts": ["host1"]},
+        {"configurations": {}, "hosts": ["host1"]},
+        {"configurations": {}, "hosts": ["host2"]}
+      ]
+    }
+    hosts = {
+      "items": [
+        {"Hosts": {"host_name": "host1"}},
+        {"Hosts": {"host_name": "host2"}}
+      ]
+    }
+    summaryHosts = []
+    def getConfigurationClusterSummary(servicesList, hosts, components, services):
+      summaryHosts.append([host["Hosts"]["host_name"] for host in hosts["items"]])
+      self.assertEquals(["host1", "host2"], self.stackAdvisor.getHostNamesWithComponent("FOO", "FOO_SERVER", services))
+      return {}
+    self.stackAdvisor.getConfigurationClusterSummary = getConfigurationClusterSummary
+
+    result = self.stackAdvisor.recommendConfigurations(services, hosts)
+
+    self.assertEquals([["host1", "host2"], ["host1"], ["host2"]], summaryHosts)
+    self.assertEquals(3, len(result["recommendations"]["config-groups"]))
+    self.assertEquals(None, self.stackAdvisor.clusterIndex)
+
   def test_mergeValidators(self):
     childValidators = {
       "HDFS": {"hdfs-site": "validateHDFSConfigurations2.3"},
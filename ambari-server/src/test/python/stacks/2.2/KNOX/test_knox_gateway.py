@@ -18,6 +18,8 @@ See the License for the specific language governing permissions and
 limitations under the License.
 '''
 import json
+import os
+import sys
 import tempfile
 from resource_management import *
 from stacks.utils.RMFTestCase import *
@@ -30,6 +32,44 @@ class TestKnoxGateway(RMFTestCase):
   COMMON_SERVICES_PACKAGE_DIR = "KNOX/0.5.0.2.2/package"
   STACK_VERSION = "2.2"
 
+  def test_configure_compressed_cluster_host_info(self):
+    config_file = self.get_src_folder() + "/test/python/stacks/2.2/configs/default.json"
+    with open(config_file, "r") as f:
+      json_content = json.load(f)
+    hosts = ["c6401.ambari.apache.org", "c6402.ambari.apache.org", "jaimin-knox-1.c.pramod-thangali.internal"]
+    json_content['compressedClusterHostInfo'] = True
+    json_content['clusterHostInfo'] = {
+      'all_hosts': hosts,
+      'ambari_server_host': [hosts[0]],
+      'all_ping_ports': ['8670:0-2'],
+      'namenode_host': ['0'],
+      'rm_host': ['1'],
+      'knox_gateway_hosts': ['2'],
+      'zookeeper_hosts': ['0'],
+    }
+    fd, command_file = tempfile.mkstemp()
+    try:
+      with os.fdopen(fd, "w") as f:
+        json.dump(json_content, f)
+      config = Script.load_config(command_file)
+    finally:
+      os.unlink(command_file)
+    # params see the lazy host lists
+    json_content['clusterHostInfo'] = dict(config['clusterHostInfo'])
+
+    self.executeScript(self.COMMON_SERVICES_PACKAGE_DIR + "/scripts/knox_gateway.py",
+                       classname = "KnoxGateway",
+                       command = "configure",
+                       config_dict = json_content,
+                       hdp_stack_version = self.STACK_VERSION,
+                       target = RMFTestCase.TARGET_COMMON_SERVICES
+    )
+
+    params = sys.modules['params_linux']
+    self.assertEqual("c6401.ambari.apache.org", params.namenode_host)
+    self.assertEqual("c6402.ambari.apache.org", params.rm_host)
+    self.assertTrue(params.webhdfs_service_urls.startswith("<url>http://c6401.ambari.apache.org:"))
+
   def test_configure_default(self):
     self.executeScript(self.COMMON_SERVICES_PACKAGE_DIR + "/scripts/knox_gateway.py",
                        classname = "KnoxGateway",
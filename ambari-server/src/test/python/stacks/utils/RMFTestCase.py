@@ -30,6 +30,8 @@ import itertools
 from mock.mock import MagicMock, patch
 import platform
 
+from ambari_commons.os_check import OSCheck
+
 with patch("platform.linux_distribution", return_value = ('Suse','11','Final')):
   from resource_management.core.environment import Environment
   from resource_management.libraries.script.config_dictionary import ConfigDictionary
@@ -112,6 +114,7 @@ class RMFTestCase(TestCase):
     # get method to execute
     try:
       with patch.object(platform, 'linux_distribution', return_value=os_type):
+        OSCheck.refresh_os_distribution()
         script_module = imp.load_source(classname, script_path)
         script_class_inst = RMFTestCase._get_attr(script_module, classname)()
         method = RMFTestCase._get_attr(script_class_inst, command)
@@ -139,12 +142,15 @@ class RMFTestCase(TestCase):
             with patch.object(Script, 'get_tmp_dir', return_value="/tmp") as mocks_dict['get_tmp_dir']:
               with patch('resource_management.libraries.functions.get_kinit_path', return_value=kinit_path_local) as mocks_dict['get_kinit_path']:
                 with patch.object(platform, 'linux_distribution', return_value=os_type) as mocks_dict['linux_distribution']:
+                  OSCheck.refresh_os_distribution()
                   with patch.object(os, "environ", new=os_env) as mocks_dict['environ']:
                     if not try_install:
                       with patch.object(Script, 'install_packages') as install_mock_value:
                         method(RMFTestCase.env, *command_args)
                     else:
                       method(RMFTestCase.env, *command_args)
+    # do not leak the mocked distribution to other tests
+    OSCheck.refresh_os_distribution()
 
     sys.path.remove(scriptsdir)
   